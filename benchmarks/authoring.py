@@ -0,0 +1,141 @@
+"""Write throughput and tail latency of the authoring endpoints, with and
+without the single-writer queue of ``drinks.writer``.
+
+Builds a synthetic catalog in a temporary SQLite file and serves it with
+``manage.py serve`` (WSGI, ``--workers`` processes), once with
+``DRINKS_WRITE_QUEUE`` off and once on. 100 concurrent authors then PATCH
+drink instructions and POST new tags for a fixed time, one request per
+connection. Reports writes per second, the median and p99 latency and the
+writes that failed (e.g. with "database is locked").
+
+    python benchmarks/authoring.py [--drinks 2000] [--authors 100] [--workers 2] [--duration 10]
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT
+from concurrency import build, configure, free_port
+
+
+TIMEOUT = 30
+
+
+def serve(db_path, port, workers, write_queue):
+    os.environ['DRINKS_WRITE_QUEUE'] = '1' if write_queue else ''
+    configure(db_path)
+    from django.conf import settings
+    from django.core.management import call_command
+    settings.ALLOWED_HOSTS = ['*']
+    call_command('serve', bind=f'127.0.0.1:{port}', workers=workers, max_requests=0)
+
+
+def start(db_path, workers, write_queue):
+    port = free_port()
+    command = [sys.executable, os.path.abspath(__file__), '--serve', '--db', db_path, '--port', str(port), '--workers', str(workers)]
+    if write_queue:
+        command.append('--queue')
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('server did not start')
+
+
+async def send(port, method, path, payload):
+    body = json.dumps(payload).encode()
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: application/json\r\n'
+        f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1]), time.perf_counter() - started
+
+
+async def load(port, authors, drinks, duration, run):
+    latencies, failed = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def author(a):
+        nonlocal failed
+        n = 0
+        while time.perf_counter() < deadline:
+            n += 1
+            if n % 5:
+                request = ('PATCH', f'/api/All_Cocktails/drink_{(a * 17 + n) % drinks:05}/', {'instructions': f'Stir, take {n}.'})
+            else:
+                request = ('POST', '/api/tags/', {'name': f'Tag {run} {a} {n}'})
+            try:
+                status, elapsed = await asyncio.wait_for(send(port, *request), TIMEOUT)
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError):
+                failed += 1
+                continue
+            if status in (200, 201):
+                latencies.append(elapsed)
+            else:
+                failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(author(a) for a in range(authors)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float('nan')
+
+    return len(latencies) / elapsed, percentile(0.5), percentile(0.99), failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drinks', type=int, default=2000)
+    parser.add_argument('--authors', type=int, default=100)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--build', action='store_true')
+    parser.add_argument('--serve', action='store_true')
+    parser.add_argument('--queue', action='store_true')
+    parser.add_argument('--db')
+    parser.add_argument('--port', type=int)
+    args = parser.parse_args()
+    if args.build:
+        return build(args.db, args.drinks)
+    if args.serve:
+        return serve(args.db, args.port, args.workers, args.queue)
+
+    print(f'{args.drinks} drinks, {args.authors} authors, {args.workers} workers, {args.duration:g} s per run')
+    print(f"{'queue':<6} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+    for write_queue in (False, True):
+        with tempfile.TemporaryDirectory() as tmp:
+            db_path = os.path.join(tmp, 'authoring.sqlite3')
+            # Django is configured for one database per process.
+            subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--build', '--db', db_path, '--drinks', str(args.drinks)],
+                check=True,
+            )
+            process, port = start(db_path, args.workers, write_queue)
+            try:
+                rate, p50, p99, failed = asyncio.run(load(port, args.authors, args.drinks, args.duration, int(write_queue)))
+            finally:
+                process.terminate()
+                process.wait()
+        print(f"{'on' if write_queue else 'off':<6} {rate:>9.1f} {p50:>8.1f} {p99:>8.1f} {failed:>7}")
+
+
+if __name__ == '__main__':
+    main()
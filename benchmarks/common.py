@@ -0,0 +1,74 @@
+"""Shared setup for the benchmark scripts in this directory.
+
+Each script calls ``setup()`` before importing anything from ``drinks``; it
+configures Django and creates a throwaway test database, and
+``populate(n)`` fills it with a synthetic catalog of ``n`` drinks.
+"""
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup():
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    import django
+    django.setup()
+    from django.conf import settings
+    from django.db import connection
+    from django.test.utils import setup_test_environment
+    settings.ALLOWED_HOSTS = ['*']
+    setup_test_environment()
+    connection.creation.create_test_db(verbosity=0)
+
+
+def populate(n, seed=0):
+    from drinks.models import (
+        Category, Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag, Unit,
+    )
+    from drinks.recipe_lines import normalize_lines
+    rng = random.Random(seed)
+    categories = [Category.objects.create(name=f'Category {i}') for i in range(8)]
+    glasses = [GlassType.objects.create(name=f'Glass {i}') for i in range(12)]
+    tags = [Tag.objects.create(name=f'Tag {i}') for i in range(40)]
+    methods = [PreparationMethod.objects.create(name=f'Method {i}') for i in range(6)]
+    units = [Unit.objects.create(name=name) for name in ('oz', 'dash', 'barspoon')]
+    ingredients = [RecipeIngredient.objects.create(name=f'Ingredient {i}') for i in range(300)]
+    Drink.objects.bulk_create(
+        Drink(
+            name=f'Drink {i:05}',
+            safe_name=f'drink_{i:05}',
+            category=rng.choice(categories),
+            glass_type=rng.choice(glasses),
+            instructions='Shake with ice - strain into a chilled glass.\n\nGarnish ,and serve .',
+            is_shot=rng.random() < 0.1,
+        )
+        for i in range(n)
+    )
+    drinks = list(Drink.objects.all())
+    lines, tag_rows, method_rows, garnish_rows = [], [], [], []
+    for drink in drinks:
+        for ingredient in rng.sample(ingredients, rng.randint(2, 6)):
+            lines.append(DrinkIngredientsList(drink=drink, ingredient=ingredient, quantity=rng.choice([0.5, 1, 2]), unit=rng.choice(units)))
+        tag_rows += [Drink.tags.through(drink=drink, tag=t) for t in rng.sample(tags, rng.randint(0, 4))]
+        method_rows += [Drink.preparation_method.through(drink=drink, preparationmethod=m) for m in rng.sample(methods, 1)]
+        garnish_rows += [Drink.garnish.through(drink=drink, recipeingredient=g) for g in rng.sample(ingredients, rng.randint(0, 2))]
+    DrinkIngredientsList.objects.bulk_create(lines)
+    Drink.tags.through.objects.bulk_create(tag_rows)
+    Drink.preparation_method.through.objects.bulk_create(method_rows)
+    Drink.garnish.through.objects.bulk_create(garnish_rows)
+    normalize_lines()
+    return drinks
+
+
+def timed(func, repeat=20):
+    """Best wall time of ``repeat`` calls to ``func``, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
@@ -0,0 +1,173 @@
+"""Throughput and p99 latency of the JSON read endpoints, WSGI vs ASGI.
+
+Builds a synthetic catalog in a temporary SQLite file and serves it twice
+from a local server: ``config.wsgi`` on Django's threaded server (what
+``runserver`` runs) and ``config.asgi`` on uvicorn, which turns on the async
+read views of ``drinks.async_views``. An asyncio load generator keeps 50,
+200 and 1000 connections busy against each, one request per connection,
+cycling through list, filtered list, detail and facet detail URLs with a
+warm fragment cache, and reports requests per second, the median and p99
+latency and the requests that failed or timed out.
+
+    python benchmarks/concurrency.py [--drinks 2000] [--duration 10]
+
+uvicorn is not a dependency of the app; the ASGI runs are skipped when it is
+not installed. The load generator shares the machine with the server, so
+compare the two columns rather than the absolute numbers.
+"""
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT, populate
+
+
+CONCURRENCY = (50, 200, 1000)
+TIMEOUT = 30
+PATHS = (
+    '/api/All_Cocktails/',
+    '/api/All_Cocktails/?page=3',
+    '/api/All_Cocktails/?tag=3',
+    '/api/All_Cocktails/drink_00042/',
+    '/api/tags/Tag_3/',
+    '/api/glass_types/Glass_2/',
+)
+
+
+def configure(db_path, async_reads=False):
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    os.environ['DRINKS_ASYNC_READS'] = '1' if async_reads else ''
+    from django.conf import settings
+    settings.DATABASES['default']['NAME'] = db_path
+    settings.DEBUG = False
+    import django
+    django.setup()
+
+
+def build(db_path, drinks):
+    configure(db_path)
+    from django.core.management import call_command
+    from django.db import connection
+    call_command('migrate', verbosity=0)
+    populate(drinks)
+    connection.close()
+
+
+def serve(mode, db_path, port):
+    configure(db_path, async_reads=mode == 'asgi')
+    if mode == 'asgi':
+        import uvicorn
+        from config.asgi import application
+        uvicorn.run(application, host='127.0.0.1', port=port, log_level='error', access_log=False)
+    else:
+        from django.core.servers.basehttp import run
+        from django.core.wsgi import get_wsgi_application
+        run('127.0.0.1', port, get_wsgi_application(), threading=True)
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start(mode, db_path):
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), '--serve', mode, '--db', db_path, '--port', str(port)],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f'{mode} server did not start')
+
+
+async def fetch(port, path):
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'GET {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: application/json\r\nConnection: close\r\n\r\n'.encode()
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1]), time.perf_counter() - started
+
+
+async def load(port, concurrency, duration):
+    latencies, failed = [], 0
+    deadline = time.perf_counter() + duration
+
+    async def connection(n):
+        nonlocal failed
+        while time.perf_counter() < deadline:
+            n += 1
+            try:
+                status, elapsed = await asyncio.wait_for(fetch(port, PATHS[n % len(PATHS)]), TIMEOUT)
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError):
+                failed += 1
+                continue
+            if status == 200:
+                latencies.append(elapsed)
+            else:
+                failed += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(connection(n) for n in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float('nan')
+
+    return len(latencies) / elapsed, percentile(0.5), percentile(0.99), failed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drinks', type=int, default=2000)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--serve', choices=('wsgi', 'asgi'))
+    parser.add_argument('--db')
+    parser.add_argument('--port', type=int)
+    args = parser.parse_args()
+    if args.serve:
+        return serve(args.serve, args.db, args.port)
+
+    try:
+        import uvicorn  # noqa: F401
+        modes = ('wsgi', 'asgi')
+    except ImportError:
+        print('uvicorn is not installed; skipping the ASGI runs.')
+        modes = ('wsgi',)
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'bench.sqlite3')
+        build(db_path, args.drinks)
+        print(f'{args.drinks} drinks, {args.duration:g} s per run')
+        print(f"{'server':<6} {'conns':>6} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'failed':>7}")
+        for mode in modes:
+            process, port = start(mode, db_path)
+            try:
+                asyncio.run(load(port, 10, 2))  # Warms the indexes and fragment cache.
+                for concurrency in CONCURRENCY:
+                    rate, p50, p99, failed = asyncio.run(load(port, concurrency, args.duration))
+                    print(f'{mode:<6} {concurrency:>6} {rate:>8.0f} {p50:>8.1f} {p99:>8.1f} {failed:>7}')
+            finally:
+                process.terminate()
+                process.wait()
+
+
+if __name__ == '__main__':
+    main()
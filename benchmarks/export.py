@@ -0,0 +1,63 @@
+"""Full-catalog pull: paging through the list vs the streaming export.
+
+Fetches every drink once by walking ``/api/All_Cocktails/?page=N`` and once
+from ``/api/All_Cocktails/export.ndjson``, with a cold fragment cache, and
+reports wall time, queries and the peak of Python allocations while the
+responses are produced (tracemalloc, measured in a separate pull).
+
+    python benchmarks/export.py
+"""
+import time
+import tracemalloc
+
+from common import populate, setup
+
+
+DRINKS = 3000
+
+
+def main():
+    setup()
+    from django.conf import settings
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+
+    populate(DRINKS)
+    client = APIClient()
+
+    def paged():
+        for page in range(1, -(-DRINKS // settings.REST_FRAMEWORK['PAGE_SIZE']) + 1):
+            client.get(f'/api/All_Cocktails/?page={page}', HTTP_ACCEPT='application/json')
+
+    def streamed():
+        response = client.get('/api/All_Cocktails/export.ndjson')
+        for _ in response.streaming_content:
+            pass
+
+    def measure(pull):
+        pull()  # Loads the in-memory indexes.
+        cache.clear()
+        start = time.perf_counter()
+        pull()
+        elapsed = (time.perf_counter() - start) * 1000
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            pull()
+        queries = len(ctx.captured_queries)
+        cache.clear()
+        tracemalloc.start()
+        pull()
+        peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+        tracemalloc.stop()
+        return elapsed, queries, peak
+
+    print(f'{"pull":<8}  {"ms":>8}  {"queries":>7}  {"peak MiB":>8}')
+    for label, pull in (('paged', paged), ('streamed', streamed)):
+        elapsed, queries, peak = measure(pull)
+        print(f'{label:<8}  {elapsed:>8.1f}  {queries:>7}  {peak:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
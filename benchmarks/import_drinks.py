@@ -0,0 +1,47 @@
+"""Bulk import throughput.
+
+Imports a synthetic file of 10,000 recipes into an empty catalog, then
+imports it again (every row unchanged) and once more with one row in ten
+edited, reporting rows per second for each pass.
+
+    python benchmarks/import_drinks.py
+"""
+from common import setup
+
+
+RECIPES = 10000
+
+
+def rows(edited_every=0):
+    result = []
+    for i in range(RECIPES):
+        edited = edited_every and i % edited_every == 0
+        result.append({
+            'name': f'Drink {i:05}',
+            'category': f'Category {i % 8}',
+            'glass_type': f'Glass {i % 12}',
+            'tags': [f'Tag {i % 40}', f'Tag {(i * 7) % 40}'] + (['Edited'] if edited else []),
+            'preparation_method': [f'Method {i % 6}'],
+            'garnish_ingredients': [f'Ingredient {(i * 11) % 300}'],
+            'instructions': 'Shake with ice and strain into a chilled glass.',
+            'is_shot': i % 10 == 0,
+            'recipe_ingredients': [
+                {'ingredient': f'Ingredient {(i + k) % 300}', 'quantity': 1.5, 'unit': 'oz'} for k in range(3)
+            ] + [f'Ingredient {(i * 3) % 300}: 2 dash'],
+        })
+    return result
+
+
+def main():
+    setup()
+    from drinks.importer import import_rows
+
+    print(f'{"pass":<10}  {"created":>7}  {"updated":>7}  {"unchanged":>9}  {"seconds":>7}  {"rows/s":>8}')
+    for label, data in (('empty', rows()), ('rerun', rows()), ('10% edits', rows(edited_every=10))):
+        report = import_rows(data).as_dict()
+        print(f'{label:<10}  {report["created"]:>7}  {report["updated"]:>7}  {report["unchanged"]:>9}  '
+              f'{report["seconds"]:>7.2f}  {report["rows_per_second"]:>8.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,39 @@
+"""HTML render overhead of the navigation-only pages.
+
+Renders ``/api/`` and ``/api/about/`` as browsable HTML with the navigation
+fragments and home payloads cached (as in production after the first hit)
+and with them rebuilt on every request, i.e. the ``reverse()`` calls and
+f-strings the cache saves.
+
+    python benchmarks/nav_pages.py
+"""
+from common import setup, timed
+
+
+URLS = ('/api/', '/api/about/')
+
+
+def main():
+    setup()
+    from rest_framework.test import APIClient
+    from drinks.navigation import fragments
+
+    client = APIClient()
+
+    def get(url, cold=False):
+        def run():
+            if cold:
+                fragments.clear()
+            client.get(url, HTTP_ACCEPT='text/html')
+        return run
+
+    print(f'{"url":<12}  {"rebuilt ms":>10}  {"cached ms":>9}  {"saved ms":>8}')
+    for url in URLS:
+        get(url)()
+        cold = timed(get(url, cold=True), repeat=200)
+        warm = timed(get(url), repeat=200)
+        print(f'{url:<12}  {cold:>10.3f}  {warm:>9.3f}  {cold - warm:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
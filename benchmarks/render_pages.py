@@ -0,0 +1,43 @@
+"""Cost of the browsable API post-processing by page size.
+
+Renders the cocktail list as HTML at several page sizes, once with DRF's
+plain ``BrowsableAPIRenderer`` and once with ``CustomBrowsableAPIRenderer``;
+the difference is what the post-processing adds to a page.
+
+    python benchmarks/render_pages.py
+"""
+from unittest import mock
+
+from common import populate, setup, timed
+
+
+PAGE_SIZES = (10, 25, 50, 100)
+
+
+def main():
+    setup()
+    from django.core.cache import cache
+    from rest_framework.renderers import BrowsableAPIRenderer
+    from rest_framework.test import APIClient
+    from drinks.views import AdminAwarePagination, CustomBrowsableAPIRenderer
+
+    populate(max(PAGE_SIZES))
+    client = APIClient()
+
+    def get():
+        client.get('/api/All_Cocktails/', HTTP_ACCEPT='text/html')
+
+    print(f'{"page size":>9}  {"page bytes":>10}  {"plain ms":>8}  {"custom ms":>9}  {"post ms":>7}')
+    for size in PAGE_SIZES:
+        with mock.patch.object(AdminAwarePagination, 'page_size', size):
+            cache.clear()
+            get()
+            page_bytes = len(client.get('/api/All_Cocktails/', HTTP_ACCEPT='text/html').content)
+            custom = timed(get)
+            with mock.patch.object(CustomBrowsableAPIRenderer, 'render', BrowsableAPIRenderer.render):
+                plain = timed(get)
+        print(f'{size:>9}  {page_bytes:>10}  {plain:>8.2f}  {custom:>9.2f}  {custom - plain:>7.2f}')
+
+
+if __name__ == '__main__':
+    main()
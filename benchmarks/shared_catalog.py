@@ -0,0 +1,184 @@
+"""Resident memory of the ``manage.py serve`` workers with the catalog kept
+per process or in the shared catalog file of ``drinks.catalog_file``.
+
+Builds a synthetic catalog in a temporary SQLite file and serves it with
+``--workers`` processes three times: with ``DRINKS_SNAPSHOT`` off (ORM
+views), on (an in-memory snapshot in every worker) and on with
+``DRINKS_CATALOG_FILE`` (the snapshot mapped from one file). Every drink's
+detail page, every list page, a few facet pages and the makeable endpoint
+are read, one drink is updated and everything is read again, so each
+worker has swapped in the new catalog. Reports, per worker on average, the resident set (RSS), its
+proportional share (PSS: shared pages divided among the processes mapping
+them) and the pages only that worker holds (USS), plus the PSS of the whole
+server and the size of the catalog file.
+
+    python benchmarks/shared_catalog.py [--drinks 5000] [--workers 4]
+
+Linux only: the figures come from ``/proc/<pid>/smaps_rollup``.
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import ROOT
+from concurrency import build, configure, free_port
+
+
+MODES = ('orm', 'snapshot', 'file')
+CONNECTIONS = 20
+FACET_PATHS = (
+    '/api/tags/Tag_3/',
+    '/api/glass_types/Glass_2/',
+    '/api/All_Cocktails/?tag=3',
+    '/api/categories/',
+    '/api/recipe_ingredients/',
+    # Answered by the viewsets, from the facet and makeable indexes or,
+    # with the snapshot on, its postings.
+    '/api/All_Cocktails/?tag=3&cursor=',
+    '/api/All_Cocktails/makeable/?have=1,2,3,4,5&missing=2',
+)
+
+
+def serve(db_path, port, workers, mode):
+    os.environ['DRINKS_SNAPSHOT'] = '' if mode == 'orm' else '1'
+    if mode == 'file':
+        os.environ['DRINKS_CATALOG_FILE'] = f'{db_path}.catalog'
+    configure(db_path)
+    from django.conf import settings
+    from django.core.management import call_command
+    settings.ALLOWED_HOSTS = ['*']
+    call_command('serve', bind=f'127.0.0.1:{port}', workers=workers, max_requests=0)
+
+
+def start(db_path, workers, mode):
+    port = free_port()
+    command = [
+        sys.executable, os.path.abspath(__file__), '--serve', '--db', db_path, '--port', str(port),
+        '--workers', str(workers), '--mode', mode,
+    ]
+    process = subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, cwd=ROOT)
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return process, port
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('server did not start')
+
+
+async def request(port, method, path, payload=None):
+    body = json.dumps(payload).encode() if payload is not None else b''
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(
+        f'{method} {path} HTTP/1.1\r\nHost: 127.0.0.1\r\nAccept: application/json\r\n'
+        f'Content-Type: application/json\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n'.encode() + body
+    )
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b' ', 2)[1])
+
+
+async def read_all(port, paths):
+    queue = list(reversed(paths))
+    failed = 0
+
+    async def client():
+        nonlocal failed
+        while queue:
+            if await request(port, 'GET', queue.pop()) != 200:
+                failed += 1
+
+    await asyncio.gather(*(client() for _ in range(CONNECTIONS)))
+    return failed
+
+
+async def exercise(port, drinks):
+    paths = [f'/api/All_Cocktails/drink_{i:05}/' for i in range(drinks)]
+    paths += [f'/api/All_Cocktails/?page={page}' for page in range(1, drinks // 100 + 1)]
+    paths += list(FACET_PATHS) * CONNECTIONS
+    failed = await read_all(port, paths)
+    if await request(port, 'PATCH', '/api/All_Cocktails/drink_00000/', {'instructions': 'Stir.'}) != 200:
+        failed += 1
+    # Let the workers build (or map) the new catalog before reading it.
+    await asyncio.sleep(1)
+    await read_all(port, list(FACET_PATHS) * CONNECTIONS)
+    await asyncio.sleep(1)
+    return failed + await read_all(port, paths)
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if entry.isdigit():
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    stat = f.read()
+            except OSError:
+                continue
+            # The command name, in parentheses, may contain spaces.
+            if int(stat.rpartition(')')[2].split()[1]) == pid:
+                found.append(int(entry))
+    return found
+
+
+def memory(pid):
+    """RSS, PSS and USS of ``pid`` in MiB."""
+    fields = {}
+    with open(f'/proc/{pid}/smaps_rollup') as f:
+        for line in f:
+            name, _, value = line.partition(':')
+            if value.strip().endswith('kB'):
+                fields[name] = int(value.split()[0])
+    uss = fields['Private_Clean'] + fields['Private_Dirty']
+    return fields['Rss'] / 1024, fields['Pss'] / 1024, uss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drinks', type=int, default=5000)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--build', action='store_true')
+    parser.add_argument('--serve', action='store_true')
+    parser.add_argument('--mode', choices=MODES, default='orm')
+    parser.add_argument('--db')
+    parser.add_argument('--port', type=int)
+    args = parser.parse_args()
+    if args.build:
+        return build(args.db, args.drinks)
+    if args.serve:
+        return serve(args.db, args.port, args.workers, args.mode)
+
+    print(f'{args.drinks} drinks, {args.workers} workers; MiB, per worker unless noted')
+    print(f"{'catalog':<9} {'RSS':>7} {'PSS':>7} {'USS':>7} {'PSS all':>8} {'file':>7} {'failed':>7}")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'shared_catalog.sqlite3')
+        subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--build', '--db', db_path, '--drinks', str(args.drinks)],
+            check=True,
+        )
+        for mode in MODES:
+            process, port = start(db_path, args.workers, mode)
+            try:
+                failed = asyncio.run(exercise(port, args.drinks))
+                workers = [memory(pid) for pid in children(process.pid)]
+                server = sum(pss for _, pss, _ in workers) + memory(process.pid)[1]
+            finally:
+                process.terminate()
+                process.wait()
+            rss, pss, uss = (sum(column) / len(workers) for column in zip(*workers))
+            path = f'{db_path}.catalog'
+            size = f'{os.path.getsize(path) / 2**20:.1f}' if mode == 'file' else '-'
+            print(f'{mode:<9} {rss:>7.1f} {pss:>7.1f} {uss:>7.1f} {server:>8.1f} {size:>7} {failed:>7}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,165 @@
+"""Mixed read/write load on SQLite, Django's defaults vs the tuned profile.
+
+Builds a synthetic catalog in a fresh SQLite file per profile and runs
+reader threads (GETs of the drink list, filtered lists and drink details)
+next to writer threads (PATCHes of drink instructions) through the Django
+test client for a fixed time. Reports reads and writes per second, read
+p50/p99 latency and the requests that failed with "database is locked".
+
+- ``default``: a rollback journal, no PRAGMAs, a connection per request and
+  deferred transactions.
+- ``tuned``: ``config.settings`` as shipped, i.e. the PRAGMAs of
+  ``drinks.sqlite`` (WAL, ``synchronous=NORMAL``, a busy timeout, page
+  cache and mmap), persistent connections and ``BEGIN IMMEDIATE``.
+
+    python benchmarks/sqlite_load.py [--drinks 2000] [--readers 8] [--writers 2] [--duration 10]
+
+Each profile runs in its own process, since the settings are read once.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT, populate
+
+
+PROFILES = ('default', 'tuned')
+
+
+def read_path(n, drinks):
+    if n % 4 == 0:
+        return f'/api/All_Cocktails/?page={n % 20 + 1}'
+    if n % 4 == 1:
+        return f'/api/All_Cocktails/?tag={n % 40 + 1}'
+    return f'/api/All_Cocktails/drink_{n % drinks:05}/'
+
+
+def configure(profile, db_path):
+    sys.path.insert(0, ROOT)
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+    from django.conf import settings
+    database = settings.DATABASES['default']
+    database['NAME'] = db_path
+    if profile == 'default':
+        database['CONN_MAX_AGE'] = 0
+        database['OPTIONS'] = {}
+        settings.DRINKS_SQLITE_PRAGMAS = {'journal_mode': 'delete'}
+    settings.DEBUG = False
+    settings.ALLOWED_HOSTS = ['*']
+    import django
+    django.setup()
+
+
+def run(profile, db_path, drinks, readers, writers, duration):
+    configure(profile, db_path)
+    from django.core.management import call_command
+    from django.db import connection, connections
+    from rest_framework.test import APIClient
+
+    call_command('migrate', verbosity=0)
+    populate(drinks)
+    connection.close()
+
+    latencies, writes, errors = [], [0], {'locked': 0, 'other': 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def record_error(exc):
+        with lock:
+            errors['locked' if 'database is locked' in str(exc) else 'other'] += 1
+
+    def reader(seed):
+        client = APIClient()
+        n = seed
+        while time.perf_counter() < deadline:
+            n += 7
+            started = time.perf_counter()
+            try:
+                response = client.get(read_path(n, drinks), HTTP_ACCEPT='application/json')
+            except Exception as e:
+                record_error(e)
+                continue
+            elapsed = time.perf_counter() - started
+            if response.status_code == 200:
+                with lock:
+                    latencies.append(elapsed)
+            else:
+                record_error(response.content)
+        connections.close_all()
+
+    def writer(seed):
+        client = APIClient()
+        n = seed
+        while time.perf_counter() < deadline:
+            n += 13
+            try:
+                response = client.patch(
+                    f'/api/All_Cocktails/drink_{n % drinks:05}/', {'instructions': f'Stir, revision {n}.'}, format='json',
+                )
+            except Exception as e:
+                record_error(e)
+                continue
+            if response.status_code == 200:
+                with lock:
+                    writes[0] += 1
+            else:
+                record_error(response.content)
+        connections.close_all()
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000 if latencies else float('nan')
+
+    print(json.dumps({
+        'reads': len(latencies) / elapsed, 'writes': writes[0] / elapsed,
+        'p50': percentile(0.5), 'p99': percentile(0.99), **errors,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--drinks', type=int, default=2000)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--profile', choices=PROFILES)
+    parser.add_argument('--db')
+    args = parser.parse_args()
+    if args.profile:
+        return run(args.profile, args.db, args.drinks, args.readers, args.writers, args.duration)
+
+    print(f'{args.drinks} drinks, {args.readers} readers, {args.writers} writers, {args.duration:g} s per run')
+    print(f"{'profile':<8} {'reads/s':>8} {'writes/s':>9} {'p50 ms':>8} {'p99 ms':>8} {'locked':>7} {'other':>6}")
+    for profile in PROFILES:
+        with tempfile.TemporaryDirectory() as tmp:
+            output = subprocess.run(
+                [
+                    sys.executable, os.path.abspath(__file__), '--profile', profile, '--db', os.path.join(tmp, 'load.sqlite3'),
+                    '--drinks', str(args.drinks), '--readers', str(args.readers), '--writers', str(args.writers),
+                    '--duration', str(args.duration),
+                ],
+                check=True, capture_output=True, text=True,
+            ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{profile:<8} {result['reads']:>8.0f} {result['writes']:>9.1f} {result['p50']:>8.1f} "
+            f"{result['p99']:>8.1f} {result['locked']:>7} {result['other']:>6}"
+        )
+
+
+if __name__ == '__main__':
+    main()
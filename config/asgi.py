@@ -2,4 +2,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
+# Async read handlers only pay off without a thread per request.
+os.environ.setdefault('DRINKS_ASYNC_READS', '1')
 application = get_asgi_application()
@@ -25,6 +25,7 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'drinks.replicas.ReadReplicaMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -53,9 +54,53 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Keep connections (and their page cache) across requests.
+        'CONN_MAX_AGE': int(os.environ.get('DRINKS_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Take the write lock at BEGIN, where the busy timeout applies,
+            # instead of failing with "database is locked" on upgrade.
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
 
+# Read-only copies of the database that GETs read from (drinks.replicas),
+# refreshed by `manage.py refresh_replicas`.
+DRINKS_READ_REPLICAS = {
+    f'replica{number}': path
+    for number, path in enumerate(filter(None, os.environ.get('DRINKS_READ_REPLICAS', '').split(',')))
+}
+for _alias, _path in DRINKS_READ_REPLICAS.items():
+    DATABASES[_alias] = {
+        **DATABASES['default'],
+        'NAME': f'file:{_path}?mode=ro',
+        'OPTIONS': {},
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['drinks.replicas.ReadReplicaRouter']
+# Clients read from the primary this long after a write; keep it above the
+# refresh interval so they see their own writes.
+DRINKS_REPLICA_STICKY_SECONDS = 15
+
+# PRAGMAs run on every new SQLite connection by drinks.sqlite.
+DRINKS_SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    # Negative: KiB of page cache per connection.
+    'cache_size': int(os.environ.get('DRINKS_SQLITE_CACHE_SIZE', -20000)),
+    'mmap_size': int(os.environ.get('DRINKS_SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+    'temp_store': 'memory',
+}
+
+# Send the writes of the authoring endpoints through one writer thread per
+# process, group-committing up to DRINKS_WRITE_BATCH of them (drinks.writer).
+DRINKS_WRITE_QUEUE = os.environ.get('DRINKS_WRITE_QUEUE', '') == '1'
+DRINKS_WRITE_BATCH = 32
+# Lock file the writers of every process take turns on (None: next to the database).
+DRINKS_WRITE_LOCK_FILE = None
+
 AUTH_PASSWORD_VALIDATORS = []
 
 LANGUAGE_CODE = 'en-us'
@@ -67,6 +112,28 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = []
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'OPTIONS': {'MAX_ENTRIES': 20000},
+    }
+}
+
+# Cache alias holding pre-encoded drink JSON fragments (None disables it).
+DRINKS_FRAGMENT_CACHE = 'default'
+DRINKS_FRAGMENT_TIMEOUT = 24 * 60 * 60
+
+# Serve JSON reads of the drinks endpoints from the async views in
+# drinks.async_views; config.asgi turns this on.
+DRINKS_ASYNC_READS = os.environ.get('DRINKS_ASYNC_READS', '') == '1'
+
+# Serve the JSON reads of the drinks endpoints from the in-memory catalog
+# snapshot of drinks.snapshot (takes precedence over DRINKS_ASYNC_READS).
+DRINKS_SNAPSHOT = os.environ.get('DRINKS_SNAPSHOT', '') == '1'
+# Keep that snapshot in this file, mapped by every process, instead of in
+# each process's memory (drinks.catalog_file).
+DRINKS_CATALOG_FILE = os.environ.get('DRINKS_CATALOG_FILE') or None
+
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 100,
@@ -2,11 +2,11 @@ from django.contrib import admin
 from django.utils.html import format_html, escape
 from django.http import HttpResponse
 from django.shortcuts import redirect
-from django.db.models import Count
 from django.db.models.functions import Lower
 from django.urls import reverse as django_reverse, path
 
 from drinks.models import (
+    CatalogVersion,
     Drink,
     Tag,
     Category,
@@ -17,6 +17,7 @@ from drinks.models import (
     RecipeIngredient,
     Cocktail,
 )
+from drinks.signals import touch_drinks
 
 
 class IngredientListFilter(admin.SimpleListFilter):
@@ -54,12 +55,18 @@ class DrinkIngredientsList(admin.ModelAdmin):
 
 
     def mark_as_shot(self, request, queryset):
+        ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_shot=True)
+        touch_drinks(ids)
+        CatalogVersion.bump()
         self.message_user(request, f"Marked {updated} drink(s) as shots.")
     mark_as_shot.short_description = 'Mark selected drinks as Shots'
 
     def unmark_as_shot(self, request, queryset):
+        ids = list(queryset.values_list('pk', flat=True))
         updated = queryset.update(is_shot=False)
+        touch_drinks(ids)
+        CatalogVersion.bump()
         self.message_user(request, f"Cleared is_shot on {updated} drink(s).")
     unmark_as_shot.short_description = 'Unmark selected drinks as Shots'
 
@@ -161,8 +168,9 @@ class RecipeIngredientAdmin(admin.ModelAdmin):
     ordering = ('name',)
 
     def drinks_count(self, obj):
-        return Drink.objects.filter(recipe_ingredients__ingredient=obj).distinct().count()
+        return obj.drink_count
     drinks_count.short_description = 'Drinks Using'
+    drinks_count.admin_order_field = 'drink_count'
 
     def api_link(self, obj):
         safe = obj.name.replace(' ', '_')
@@ -198,7 +206,7 @@ class GarnishIngredientAdmin(admin.ModelAdmin):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.filter(garnish_for__isnull=False).distinct().order_by('name')
+        return qs.filter(garnish_count__gt=0).order_by('name')
 
     def api_link(self, obj):
         safe = obj.name.replace(' ', '_')
@@ -207,8 +215,9 @@ class GarnishIngredientAdmin(admin.ModelAdmin):
     api_link.short_description = 'API endpoint'
 
     def drinks_count(self, obj):
-        return Drink.objects.filter(garnish=obj).distinct().count()
+        return obj.garnish_count
     drinks_count.short_description = 'Drinks Using'
+    drinks_count.admin_order_field = 'garnish_count'
 
     def add_view(self, request, form_url='', extra_context=None):
         try:
@@ -300,10 +309,7 @@ class TagAdmin(admin.ModelAdmin):
         return format_html('<a href="{}" target="_blank">{}</a>', url, url)
     api_link.short_description = 'API endpoint'
     def drinks_count(self, obj):
-        count = getattr(obj, 'drink_count', None)
-        if count is None:
-            from .models import Drink
-            count = Drink.objects.filter(tags=obj).distinct().count()
+        count = obj.drink_count
         try:
             changelist = django_reverse('admin:drinks_drink_changelist')
             url = f"{changelist}?tags__id__exact={obj.pk}"
@@ -311,10 +317,11 @@ class TagAdmin(admin.ModelAdmin):
         except Exception:
             return count
     drinks_count.short_description = 'Drinks Using'
+    drinks_count.admin_order_field = 'drink_count'
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.annotate(drink_count=Count('drink', distinct=True)).order_by(Lower('name'))
+        return qs.order_by(Lower('name'))
 
 admin.site.register(Category, CategoryAdmin)
 
@@ -332,10 +339,7 @@ class PreparationMethodAdmin(admin.ModelAdmin):
         return format_html('<a href="{}" target="_blank">{}</a>', url, url)
     api_link.short_description = 'API endpoint'
     def drinks_count(self, obj):
-        count = getattr(obj, 'drink_count', None)
-        if count is None:
-            from .models import Drink
-            count = Drink.objects.filter(preparation_method=obj).distinct().count()
+        count = obj.drink_count
         try:
             changelist = django_reverse('admin:drinks_drink_changelist')
             url = f"{changelist}?preparation_method__id__exact={obj.pk}"
@@ -343,10 +347,11 @@ class PreparationMethodAdmin(admin.ModelAdmin):
         except Exception:
             return count
     drinks_count.short_description = 'Drinks Using'
+    drinks_count.admin_order_field = 'drink_count'
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.annotate(drink_count=Count('drink', distinct=True)).order_by(Lower('name'))
+        return qs.order_by(Lower('name'))
 
 @admin.register(Unit)
 
@@ -377,10 +382,7 @@ class GlassTypeAdmin(admin.ModelAdmin):
         return format_html('<a href="{}" target="_blank">{}</a>', url, url)
     api_link.short_description = 'API endpoint'
     def drinks_count(self, obj):
-        count = getattr(obj, 'drink_count', None)
-        if count is None:
-            from .models import Drink
-            count = Drink.objects.filter(glass_type=obj).distinct().count()
+        count = obj.drink_count
         try:
             changelist = django_reverse('admin:drinks_drink_changelist')
             url = f"{changelist}?glass_type__id__exact={obj.pk}"
@@ -388,7 +390,8 @@ class GlassTypeAdmin(admin.ModelAdmin):
         except Exception:
             return count
     drinks_count.short_description = 'Drinks Using'
+    drinks_count.admin_order_field = 'drink_count'
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.annotate(drink_count=Count('drink', distinct=True)).order_by(Lower('name'))
+        return qs.order_by(Lower('name'))
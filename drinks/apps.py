@@ -0,0 +1,9 @@
+from django.apps import AppConfig
+
+
+class DrinksConfig(AppConfig):
+    name = 'drinks'
+
+    def ready(self):
+        # Connect the catalog write hooks and the caches that listen to them.
+        from drinks import signals, counters, recipe_lines, fragments, sampling, search, makeable, facets, breadcrumbs, sqlite, snapshot  # noqa: F401
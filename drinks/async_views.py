@@ -0,0 +1,259 @@
+"""Async read path for the drinks endpoints under ASGI.
+
+With ``DRINKS_ASYNC_READS`` on (``config.asgi`` turns it on), the JSON GETs
+of the cocktail list, detail and random endpoints and of the facet detail
+pages (a tag, category, ingredient, garnish, preparation method, unit or
+glass type) are answered by the coroutines below rather than by the DRF
+viewsets, so a request waiting on the database does not hold a worker
+thread. They load drinks through the async ORM (``aget``, ``afirst``,
+``acount``, ``ain_bulk``, ``async for``), use the fragment cache through
+``adrink_fragments()`` and encode with the same serializers and
+``DrinkJSONRenderer`` as the viewsets, so the bytes, status and headers sent
+are the same.
+
+Anything else (the browsable API, format suffixes, ``?q=``, ``?cursor=``,
+HTTP authentication, writes, and every error response) is handed to the
+sync viewset unchanged. Writes stay sync.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.core.paginator import InvalidPage
+from django.db.models import QuerySet
+from django.urls import URLPattern
+
+from drinks.facets import select as select_facets
+from drinks.fast_reads import Fallback, check_not_modified, finish, negotiate, render
+from drinks.filtering import apply_drink_filters, parse_drink_filters
+from drinks.fragments import adrink_fragments
+from drinks.models import (
+    CatalogVersion,
+    Category,
+    Drink,
+    GlassType,
+    PreparationMethod,
+    RecipeIngredient,
+    Tag,
+    Unit,
+    normalize_safe_name,
+)
+from drinks.sampling import sample_drink_ids
+from drinks.serializers import DrinkSerializer, aload_drink_relations
+from drinks.views import (
+    AdminAwarePagination,
+    CategoryViewSet,
+    DrinkViewSet,
+    GarnishIngredientViewSet,
+    GlassTypeViewSet,
+    NotModified,
+    PreparationMethodViewSet,
+    RecipeIngredientViewSet,
+    TagViewSet,
+    UnitViewSet,
+    drink_detail_queryset,
+    make_etag,
+)
+
+
+async def check_catalog(request):
+    version, last_modified = await CatalogVersion.afor_request(request)
+    check_not_modified(request, (make_etag(request, f'catalog:{version}'), last_modified))
+
+
+async def paginate(request, rows):
+    """The requested page of ``rows`` (a queryset or a ``FacetResult``) as
+    ``AdminAwarePagination`` would cut it."""
+    pagination = AdminAwarePagination()
+    paginator = pagination.django_paginator_class(rows, pagination.get_page_size(request))
+    if isinstance(rows, QuerySet):
+        paginator.count = await rows.acount()
+    number = request.query_params.get(pagination.page_query_param) or 1
+    if number in pagination.last_page_strings:
+        number = paginator.num_pages
+    try:
+        page = paginator.page(number)
+    except InvalidPage:
+        raise Fallback
+    if isinstance(rows, QuerySet):
+        return [row async for row in page.object_list]
+    return list(page.object_list)
+
+
+async def load_ids(ids):
+    by_pk = await Drink.objects.select_related('glass_type').ain_bulk(ids)
+    return [by_pk[pk] for pk in ids if pk in by_pk]
+
+
+async def drink_results(request, drinks, context):
+    async def serialize(missing):
+        await aload_drink_relations(missing)
+        return DrinkSerializer(missing, many=True, context=context).data
+
+    return await adrink_fragments(drinks, request, serialize)
+
+
+async def list_page(request, rows, context=None):
+    """``DrinkListingMixin.list_drinks()`` for a queryset or ``FacetResult``."""
+    if context is None:
+        context = {'request': request, 'suppress_category': True}
+    if isinstance(rows, QuerySet):
+        rows = rows.select_related('glass_type')
+        drinks = await paginate(request, rows)
+    else:
+        drinks = await load_ids(await paginate(request, rows))
+    return {'results': await drink_results(request, drinks, context)}
+
+
+def parse_filters(request):
+    try:
+        return parse_drink_filters(request.query_params)
+    except ValueError:
+        raise Fallback
+
+
+# Cocktails.
+
+async def cocktail_list(request):
+    await check_catalog(request)
+    drink_filters = parse_filters(request)
+    context = {'request': request}
+    if drink_filters:
+        selected = await sync_to_async(select_facets)(drink_filters)
+        if selected is not None:
+            return await list_page(request, selected, context)
+    qs = apply_drink_filters(DrinkViewSet.queryset.all(), drink_filters)
+    return await list_page(request, qs, context)
+
+
+async def cocktail_detail(request, name=None):
+    if not name or str(name).isdigit():
+        raise Fallback
+    slug = normalize_safe_name(name)
+    row = await Drink.objects.filter(safe_name=slug).values_list('pk', 'updated').afirst()
+    if row is None:
+        raise Fallback
+    pk, updated = row
+    check_not_modified(request, (make_etag(request, f'drink:{pk}:{updated.isoformat()}'), updated))
+    try:
+        drink = await drink_detail_queryset().aget(safe_name=slug)
+    except (Drink.DoesNotExist, Drink.MultipleObjectsReturned):
+        raise Fallback
+    await aload_drink_relations([drink])
+    return DrinkSerializer(drink, context={'request': request}).data
+
+
+async def cocktail_random(request):
+    if 'seed' in request.query_params:
+        await check_catalog(request)
+    drink_filters = parse_filters(request)
+    n = request.query_params.get('n')
+    if n is not None:
+        try:
+            n = int(n)
+        except (TypeError, ValueError):
+            raise Fallback
+        if not 1 <= n <= DrinkViewSet.MAX_RANDOM_DRAWS:
+            raise Fallback
+    ids = await sync_to_async(sample_drink_ids)(drink_filters, n or 1, seed=request.query_params.get('seed'))
+    drinks = await load_ids(ids)
+    if not drinks:
+        raise Fallback
+    context = {'request': request}
+    if n is None:
+        await aload_drink_relations(drinks)
+        return DrinkSerializer(drinks[0], context=context).data
+    return {'results': await drink_results(request, drinks, context)}
+
+
+# Facet detail pages: the drinks with one tag, ingredient, glass type, ...
+
+async def lookup(model, value):
+    """The viewsets' lookup: by primary key for digits, else by safe name."""
+    try:
+        if str(value).isdigit():
+            return await model.objects.aget(pk=value)
+        slug = normalize_safe_name(value)
+        if not slug:
+            raise Fallback
+        return await model.objects.aget(safe_name=slug)
+    except (model.DoesNotExist, model.MultipleObjectsReturned):
+        raise Fallback
+
+
+def facet_detail(model, drinks_for, kwarg='pk'):
+    async def detail(request, **kwargs):
+        if kwargs.get(kwarg) is None:
+            raise Fallback
+        await check_catalog(request)
+        obj = await lookup(model, kwargs[kwarg])
+        return await list_page(request, drinks_for(request, obj))
+    return detail
+
+
+async def category_detail(request, name=None):
+    if name is None:
+        raise Fallback
+    await check_catalog(request)
+    # ``CategoryViewSet`` looks digits up by safe name too.
+    try:
+        slug = normalize_safe_name(name)
+        if not slug:
+            raise Fallback
+        category = await Category.objects.aget(safe_name=slug)
+    except (Category.DoesNotExist, Category.MultipleObjectsReturned):
+        raise Fallback
+    return await list_page(request, CategoryViewSet.drinks_for(request, category))
+
+
+# URL name -> handler. The facet pages list the querysets of the viewsets'
+# ``drinks_for()``.
+HANDLERS = {
+    'cocktail-list': cocktail_list,
+    'cocktail-detail': cocktail_detail,
+    'cocktail-random': cocktail_random,
+    'category-detail': category_detail,
+    'tag-detail': facet_detail(Tag, TagViewSet.drinks_for),
+    'recipe_ingredient-detail': facet_detail(RecipeIngredient, RecipeIngredientViewSet.drinks_for, kwarg='name'),
+    'garnish_ingredient-detail': facet_detail(RecipeIngredient, GarnishIngredientViewSet.drinks_for, kwarg='name'),
+    'preparationmethod-detail': facet_detail(PreparationMethod, PreparationMethodViewSet.drinks_for),
+    'unit-detail': facet_detail(Unit, UnitViewSet.drinks_for),
+    'glasstype-detail': facet_detail(GlassType, GlassTypeViewSet.drinks_for),
+}
+
+
+async def respond(request, handler, view, kwargs):
+    request = negotiate(request, view, kwargs)
+    # Every DRF view authenticates, which reads the session.
+    await request._request.auser()
+    try:
+        response = render(request, await handler(request, **kwargs))
+    except NotModified as exc:
+        response = exc.response
+    return finish(request, view, response)
+
+
+def async_read_view(view, handler):
+    """Async view answering what ``handler`` can and passing the rest to ``view``."""
+    sync_view = sync_to_async(view)
+
+    @functools.wraps(view)
+    async def read_view(request, *args, **kwargs):
+        try:
+            return await respond(request, handler, view, kwargs)
+        except Fallback:
+            return await sync_view(request, *args, **kwargs)
+
+    return read_view
+
+
+def async_reads(patterns):
+    """``patterns`` (e.g. ``router.urls``) with the read handlers wired in."""
+    wired = []
+    for pattern in patterns:
+        handler = HANDLERS.get(getattr(pattern, 'name', None))
+        if isinstance(pattern, URLPattern) and handler is not None:
+            pattern = URLPattern(
+                pattern.pattern, async_read_view(pattern.callback, handler), pattern.default_args, pattern.name,
+            )
+        wired.append(pattern)
+    return wired
@@ -0,0 +1,120 @@
+"""Memoized breadcrumb trails for the browsable API.
+
+Working out a trail resolves every prefix of the path, instantiates the
+views found there and asks each one for its name, which for detail routes
+means a database lookup. Both halves are cached per process: ``views``
+remembers what each path resolves to, and ``trails`` keeps finished trails
+until the catalog changes, so a warm trail costs no queries at all.
+
+The resolved paths are dropped whenever Django's URL resolver is rebuilt
+(``clear_url_caches()``), and the trails whenever ``CatalogVersion`` moves
+or a write in this process sends ``catalog_changed`` or ``drinks_changed``.
+"""
+import threading
+from collections import OrderedDict
+
+from django.dispatch import receiver
+from django.urls import Resolver404, get_resolver, get_script_prefix, get_urlconf
+
+from drinks.models import CatalogVersion
+from drinks.signals import catalog_changed, drinks_changed
+
+
+# Entries kept per process by each cache.
+MAX_PATHS = 1024
+MAX_TRAILS = 1024
+
+
+class LRU:
+    """Bounded ``OrderedDict`` tied to a state; a new state empties it."""
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._state = None
+        self._items = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._state = None
+            self._items.clear()
+
+    def get(self, state, key):
+        with self._lock:
+            if state != self._state:
+                return None
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, state, key, value):
+        with self._lock:
+            if state != self._state:
+                self._items.clear()
+                self._state = state
+            self._items[key] = value
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+class ViewResolver:
+    """``resolve()`` with the result (or the miss) remembered per path."""
+
+    MISSING = (None, (), {})
+
+    def __init__(self, max_paths=MAX_PATHS):
+        self.paths = LRU(max_paths)
+
+    def resolve(self, path):
+        """Return ``(view, args, kwargs)``; raises ``Resolver404`` like ``resolve()``."""
+        resolver = get_resolver(get_urlconf())
+        match = self.paths.get(resolver, path)
+        if match is None:
+            try:
+                found = resolver.resolve(path)
+                match = (found.func, found.args, found.kwargs)
+            except Resolver404:
+                match = self.MISSING
+            self.paths.set(resolver, path, match)
+        if match is self.MISSING:
+            raise Resolver404({'path': path})
+        view, args, kwargs = match
+        return view, args, dict(kwargs)
+
+
+class TrailCache:
+    """Finished trails per path for one catalog version and URLconf."""
+
+    # Query parameters that change a crumb: the category list labels itself
+    # with ``name`` and detail views look objects up through ``search``.
+    PARAMS = ('name', 'search')
+
+    def __init__(self, max_trails=MAX_TRAILS):
+        self.trails = LRU(max_trails)
+
+    def clear(self):
+        self.trails.clear()
+
+    def key(self, request):
+        return (get_script_prefix(), request.path) + tuple(request.GET.get(p) for p in self.PARAMS)
+
+    def get(self, request, build):
+        """Return the trail for ``request``, calling ``build(request)`` on a miss."""
+        state = (CatalogVersion.for_request(request), get_resolver(get_urlconf()))
+        key = self.key(request)
+        crumbs = self.trails.get(state, key)
+        if crumbs is None:
+            crumbs = list(build(request))
+            self.trails.set(state, key, crumbs)
+        return list(crumbs)
+
+
+views = ViewResolver()
+trails = TrailCache()
+
+
+@receiver(catalog_changed, dispatch_uid='drinks_breadcrumbs_catalog')
+@receiver(drinks_changed, dispatch_uid='drinks_breadcrumbs_drinks')
+def drop_trails(sender, **kwargs):
+    trails.clear()
@@ -0,0 +1,168 @@
+"""Formatting applied to the HTML pages of the browsable API.
+
+``CustomBrowsableAPIRenderer`` lets DRF render the page and then tidies the
+JSON shown in it: the request and response panes are marked ``nocode``, drink
+URLs become links, short arrays are put on one line (recipe lines stacked
+under each other), the ``results`` envelope is dropped, closing brackets are
+dedented, blank lines removed and instructions collapsed to one clean line.
+
+The JSON only ever appears inside ``<pre>`` and ``<textarea>`` elements, so
+the page is scanned once for those and each one is tokenized in a single
+pass; the rest of the page is copied through untouched.
+"""
+import html
+import json
+import re
+
+
+# Arrays put on one line, and whether their items are stacked instead.
+ARRAY_KEYS = {
+    'tags': False,
+    'preparation_method': False,
+    'garnish_ingredients': False,
+    'recipe_ingredients': True,
+}
+
+_ELEMENT_RE = re.compile(
+    r'<div[^>]*class=["\'][^"\']*(?:request|response)-info[^"\']*["\']'
+    r'|<(?P<tag>pre|textarea)\b[^>]*>',
+    re.I,
+)
+_CLOSING = {'pre': re.compile(r'</pre>', re.I), 'textarea': re.compile(r'</textarea>', re.I)}
+_INFO_PRE_RE = re.compile(r'(<pre[^>]*class=["\'])(prettyprint)(["\'][^>]*>)', re.I)
+_PRETTYPRINT_RE = re.compile(r'<pre[^>]*class=["\'][^"\']*prettyprint[^"\']*["\'][^>]*>', re.I)
+
+_URL = r'&quot;(?P<url>https?://[^&<\s]*/api/(?:drinks|Cocktails|All_Cocktails)/[A-Za-z0-9_\-]+/?)&quot;'
+_URL_RE = re.compile(_URL, re.I)
+_TOKEN_RE = re.compile(
+    r'(?<!\s)(?P<prefix>\s+)(?P<head>(?:&quot;|")(?P<key>' + '|'.join(ARRAY_KEYS) + r')(?:&quot;|")\s*:\s*\[)(?P<inside>.*?)\]'
+    r'|(?i:' + _URL + r')'
+    r'|(?P<instructions>(?:&quot;|")instructions(?:&quot;|")\s*:\s*&quot;)(?P<text>.*?)(?=&quot;)',
+    re.S,
+)
+_ITEM_RE = re.compile(r'["\'](.*?)["\']', re.S)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+_RESULTS_RE = re.compile(r'\{\s*(?:&quot;|")results(?:&quot;|")\s*:\s*(?=[\[{])')
+_RESULTS_END = {'[': re.compile(r'\]\s*\}'), '{': re.compile(r'\}\s*\}')}
+_BRACKET_INDENT_RE = re.compile(r'\n[ \t]+(?=\])')
+_BLANK_LINE_RE = re.compile(r'(\r?\n)\s*\r?\n')
+
+_DASH_RE = re.compile(r'([.!?)])\s*[—–-]\s*')
+_COMMA_RE = re.compile(r',(?=\S)')
+_SPACE_BEFORE_PUNCTUATION_RE = re.compile(r'\s+(?=[\.,;:\?!])')
+
+
+def postprocess(text):
+    """Return the page ``text`` with the browsable API formatting applied."""
+    out = []
+    pos = start = 0
+    info_pending = False
+    while True:
+        element = _ELEMENT_RE.search(text, start)
+        if element is None:
+            break
+        start = element.end()
+        tag = element.group('tag')
+        if tag is None:
+            info_pending = True
+            continue
+        tag = tag.lower()
+        closing = _CLOSING[tag].search(text, element.end())
+        if closing is None:
+            continue
+        open_tag = element.group(0)
+        if tag == 'pre' and info_pending:
+            marked = _INFO_PRE_RE.fullmatch(open_tag)
+            if marked:
+                open_tag = f'{marked.group(1)}prettyprint nocode{marked.group(3)}'
+                info_pending = False
+        content = unwrap_results(_TOKEN_RE.sub(_format_token, text[element.end():closing.start()]))
+        if tag == 'pre' and _PRETTYPRINT_RE.fullmatch(open_tag):
+            content = _BLANK_LINE_RE.sub(r'\1', _BRACKET_INDENT_RE.sub('\n', content))
+        out.append(text[pos:element.start()])
+        out.append(open_tag)
+        out.append(content)
+        pos = start = closing.start()
+    out.append(text[pos:])
+    return ''.join(out)
+
+
+def unwrap_results(text):
+    """Replace ``{"results": [...]}`` with its list."""
+    out = []
+    pos = start = 0
+    while True:
+        match = _RESULTS_RE.search(text, start)
+        if match is None:
+            break
+        end = _RESULTS_END[text[match.end()]].search(text, match.end() + 1)
+        if end is None:
+            start = match.start() + 1
+            continue
+        out.append(text[pos:match.start()])
+        out.append(text[match.end():end.start() + 1])
+        pos = start = end.end()
+    out.append(text[pos:])
+    return ''.join(out)
+
+
+def _format_token(m):
+    if m.group('url'):
+        return _link(m)
+    if m.group('instructions'):
+        # The closing quote is left for the next token, which may be a URL.
+        return m.group('instructions') + sanitize_instructions(m.group('text'))
+    inside = _URL_RE.sub(_link, m.group('inside'))
+    return _format_array(m.group('prefix'), m.group('head'), inside, ARRAY_KEYS[m.group('key')])
+
+
+def _link(m):
+    url = m.group('url')
+    return f'&quot;<a href="{url}" rel="nofollow">{url}</a>&quot;'
+
+
+def _format_array(prefix, head, inside, stacked):
+    if '\n' in prefix:
+        newline = '\n'
+        indent = prefix.replace('\n', '')
+    else:
+        newline = ''
+        indent = prefix
+    unescaped = html.unescape(inside)
+    items = _ITEM_RE.findall(unescaped)
+    if not items:
+        raw = _WHITESPACE_RE.sub(' ', unescaped).strip()
+        if not raw:
+            return f'{prefix}{head}{inside}]'
+        items = [p.strip().strip('"\'') for p in raw.split(',') if p.strip()]
+    cleaned = []
+    for item in items:
+        try:
+            decoded = bytes(item, 'utf-8').decode('unicode_escape')
+        except Exception:
+            decoded = item
+        cleaned.append(decoded.replace('\n', ' ').replace('\r', ' ').strip())
+    header = head.split('\n')[-1]
+    if stacked:
+        offset = len(indent) + len(html.unescape(header))
+        joined = (',\n' + ' ' * offset).join(json.dumps(s, ensure_ascii=False) for s in cleaned)
+        margin = text_indent = 0
+    else:
+        joined = ', '.join(json.dumps(s, ensure_ascii=False) for s in cleaned)
+        margin = len(indent) + len(header)
+        text_indent = -margin
+    return (
+        f'{newline}<span style="display:inline-block; margin-left:{margin}ch; text-indent:{text_indent}ch;">'
+        f'{indent}{head}{joined}]</span>'
+    )
+
+
+def sanitize_instructions(text):
+    """Collapse instructions onto one line with tidy spacing around punctuation."""
+    text = text.replace('\\n', ' ').replace('\n', ' ')
+    text = _DASH_RE.sub(r'\1 ', text)
+    text = _WHITESPACE_RE.sub(' ', text).strip()
+    text = _COMMA_RE.sub(', ', text)
+    text = _SPACE_BEFORE_PUNCTUATION_RE.sub('', text)
+    return text.replace('"', '\\"')
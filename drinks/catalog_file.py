@@ -0,0 +1,374 @@
+"""Binary catalog file shared by the worker processes.
+
+With ``DRINKS_SNAPSHOT`` on and ``DRINKS_CATALOG_FILE`` set, the catalog
+snapshot of ``drinks.snapshot`` is not kept by every process: it is written
+once to that file and every process maps the file read-only, so the page
+cache holds the only copy of it however many workers serve it.
+
+The file is little-endian and made of 8-byte aligned sections listed after
+the header:
+
+``strings``
+    UTF-8 text of every distinct string. Strings are referenced by
+    ``(offset, length)`` pairs of u32; an offset of ``NONE`` is None.
+``lists``
+    String references of the tuples of the drink records (tags, preparation
+    methods, garnishes, recipe lines, ingredient names), referenced by
+    ``(start, count)`` pairs of u32.
+``drinks.rows``, ``<table>.rows``
+    Fixed-width records (``DRINK``, ``ROW``) of the drinks and of each
+    lookup table, in name order: a drink's index is its position.
+``<rows>.pks``, ``<rows>.by_pk``, ``<rows>.by_safe_name``
+    Primary keys in ascending order (i64) and the rows in that order (u32),
+    and the rows with a safe name in the order of its UTF-8 bytes (u32), for
+    binary searches.
+``<facet>.keys``, ``<facet>.offsets``, ``<facet>.positions``
+    For each of ``drinks.snapshot.FACETS``: its values (i64, ascending), and
+    for the i-th value the positions of the drinks having it, ascending,
+    from ``positions[offsets[i]]`` to ``positions[offsets[i + 1]]`` (u32).
+
+A new file is written for every catalog version, under an exclusive lock,
+to a temporary path renamed over the previous one. Its header carries a
+generation number, one more than the file it replaces, and the catalog
+version it was read at. Processes keep the file they mapped until a request
+shows ``CatalogVersion`` has moved on, then map the new file if its header
+has both a new generation and that version; the old mapping is released
+once the requests using it are done.
+"""
+import array
+import bisect
+import mmap
+import os
+import struct
+import sys
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from drinks.models import CatalogVersion, normalize_safe_name
+from drinks.snapshot import FACETS, TABLES, BaseSnapshot, DrinkRecord, LookupRecord, Records, load_snapshot
+from drinks.writer import WriteLock
+
+
+MAGIC = b'DRINKCAT'
+FORMAT = 2
+
+# Magic, format, number of sections, generation, catalog version and its
+# ``updated`` in microseconds since the epoch.
+HEADER = struct.Struct('<8sIIQQq')
+# Name, offset and length of a section.
+SECTION = struct.Struct('<32sQQ')
+# Primary key, then name, safe name, slug and plural, then drink and garnish counts.
+ROW = struct.Struct('<q8Iqq')
+# Primary key, ``updated``, then name, safe name, slug, image, instructions
+# and glass, then tags, methods, garnish, lines and ingredient names.
+DRINK = struct.Struct('<qq22I')
+DRINK_LISTS = ('tags', 'methods', 'garnish', 'lines', 'ingredient_names')
+
+NONE = 0xFFFFFFFF
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+Header = namedtuple('Header', 'generation version updated')
+
+
+class CatalogFileError(ValueError):
+    pass
+
+
+def _check_byte_order():
+    # Arrays are written and read in the host's byte order.
+    if sys.byteorder != 'little':
+        raise CatalogFileError('catalog files are only supported on little-endian hosts')
+
+
+def _micros(value):
+    return (value - EPOCH) // timedelta(microseconds=1)
+
+
+def _datetime(micros):
+    return EPOCH + timedelta(microseconds=micros)
+
+
+class _Builder:
+    """Sections of a catalog file being written."""
+
+    def __init__(self):
+        self.strings = bytearray()
+        self.refs = {}
+        self.lists = array.array('I')
+        self.sections = {}
+
+    def string(self, text):
+        if text is None:
+            return (NONE, 0)
+        try:
+            return self.refs[text]
+        except KeyError:
+            data = text.encode()
+            ref = self.refs[text] = (len(self.strings), len(data))
+            self.strings += data
+            return ref
+
+    def strings_list(self, texts):
+        start = len(self.lists) // 2
+        for text in texts:
+            self.lists.extend(self.string(text))
+        return (start, len(texts))
+
+    def indexes(self, prefix, rows):
+        """The ``pks``, ``by_pk`` and ``by_safe_name`` sections of ``rows``."""
+        by_pk = sorted(range(len(rows)), key=lambda i: rows[i].pk)
+        self.sections[f'{prefix}.pks'] = array.array('q', (rows[i].pk for i in by_pk))
+        self.sections[f'{prefix}.by_pk'] = array.array('I', by_pk)
+        named = [i for i in range(len(rows)) if rows[i].safe_name]
+        named.sort(key=lambda i: rows[i].safe_name.encode())
+        self.sections[f'{prefix}.by_safe_name'] = array.array('I', named)
+
+
+def catalog_bytes(snapshot, generation):
+    """``snapshot`` in the catalog file format."""
+    _check_byte_order()
+    builder = _Builder()
+    sections = builder.sections
+    for name in TABLES:
+        rows = getattr(snapshot, name).rows
+        data = bytearray(ROW.size * len(rows))
+        for i, row in enumerate(rows):
+            ROW.pack_into(
+                data, i * ROW.size, row.pk,
+                *builder.string(row.name), *builder.string(row.safe_name),
+                *builder.string(row.slug), *builder.string(row.plural),
+                row.drink_count, row.garnish_count,
+            )
+        sections[f'{name}.rows'] = data
+        builder.indexes(name, rows)
+
+    records = snapshot.drinks[:]
+    data = bytearray(DRINK.size * len(records))
+    for record in records:
+        DRINK.pack_into(
+            data, record.position * DRINK.size, record.pk, _micros(record.updated),
+            *builder.string(record.name), *builder.string(record.safe_name), *builder.string(record.slug),
+            *builder.string(record.image), *builder.string(record.instructions), *builder.string(record.glass),
+            *(n for field in DRINK_LISTS for n in builder.strings_list(getattr(record, field))),
+        )
+    sections['drinks.rows'] = data
+    builder.indexes('drinks', records)
+
+    for facet in FACETS:
+        keys, offsets, positions = array.array('q'), array.array('I', [0]), array.array('I')
+        for value, postings in sorted(
+            (int(value), postings) for (name, value), postings in snapshot.index.items() if name == facet
+        ):
+            keys.append(value)
+            positions.extend(postings)
+            offsets.append(len(positions))
+        sections[f'{facet}.keys'] = keys
+        sections[f'{facet}.offsets'] = offsets
+        sections[f'{facet}.positions'] = positions
+    sections['strings'] = builder.strings
+    sections['lists'] = builder.lists
+
+    chunks = [bytes(section) for section in sections.values()]
+    offset = _align(HEADER.size + SECTION.size * len(chunks))
+    head = [HEADER.pack(MAGIC, FORMAT, len(chunks), generation, snapshot.version, _micros(snapshot.updated))]
+    body = []
+    for name, chunk in zip(sections, chunks):
+        head.append(SECTION.pack(name.encode(), offset, len(chunk)))
+        body.append(chunk.ljust(_align(len(chunk)), b'\0'))
+        offset += len(body[-1])
+    head = b''.join(head)
+    return head.ljust(_align(len(head)), b'\0') + b''.join(body)
+
+
+def _align(size):
+    return (size + 7) & ~7
+
+
+def write_catalog(snapshot, path, generation):
+    """Write ``snapshot`` to ``path``, replacing the file atomically."""
+    data = catalog_bytes(snapshot, generation)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def read_header(path):
+    """The ``Header`` of the catalog file at ``path``, or None if there is none."""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read(HEADER.size)
+    except FileNotFoundError:
+        return None
+    if len(data) < HEADER.size:
+        return None
+    magic, file_format, _count, generation, version, updated = HEADER.unpack(data)
+    if magic != MAGIC or file_format != FORMAT:
+        return None
+    return Header(generation, version, _datetime(updated))
+
+
+class MappedTable:
+    """``LookupTable`` over a mapped catalog file."""
+
+    __slots__ = ('strings', 'data', 'pks', 'pk_index', 'name_index')
+
+    def __init__(self, file, name):
+        self.strings = file.strings
+        self.data = file.section(f'{name}.rows')
+        self.pks = file.section(f'{name}.pks').cast('q')
+        self.pk_index = file.section(f'{name}.by_pk').cast('I')
+        self.name_index = file.section(f'{name}.by_safe_name').cast('I')
+
+    @property
+    def rows(self):
+        return Records(self, range(len(self.data) // ROW.size))
+
+    def record(self, index):
+        pk, *refs, drink_count, garnish_count = ROW.unpack_from(self.data, index * ROW.size)
+        name, safe_name, slug, plural = (_text(self.strings, *refs[i:i + 2]) for i in range(0, 8, 2))
+        return LookupRecord(pk, name, safe_name, slug, plural, drink_count, garnish_count)
+
+    def _safe_name_at(self, index):
+        return _raw(self.strings, *ROW.unpack_from(self.data, index * ROW.size)[3:5])
+
+    def get(self, value):
+        """The row addressed by ``value`` the way the viewsets look it up."""
+        if str(value).isdigit():
+            index = _find(self.pks, int(value))
+            return None if index is None else self.record(self.pk_index[index])
+        return self.named(value)
+
+    def named(self, value):
+        index = _find_named(self.name_index, self._safe_name_at, normalize_safe_name(value))
+        return None if index is None else self.record(index)
+
+
+class MappedSnapshot(BaseSnapshot):
+    """The snapshot in the catalog file at ``path``, mapped read-only."""
+
+    __slots__ = (
+        'generation', 'version', 'updated', 'map', 'view', 'sections', 'strings', 'lists', 'data',
+        'sorted_pks', 'pk_index', 'name_index', 'keys', 'offsets', 'positions',
+        'categories', 'tags', 'methods', 'glass_types', 'units', 'ingredients',
+    )
+
+    def __init__(self, path):
+        _check_byte_order()
+        with open(path, 'rb') as f:
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.view = view = memoryview(self.map)
+        magic, file_format, count, self.generation, self.version, updated = HEADER.unpack_from(view)
+        if magic != MAGIC or file_format != FORMAT:
+            raise CatalogFileError(f'{path} is not a catalog file')
+        self.updated = _datetime(updated)
+        self.sections = {}
+        for i in range(count):
+            name, offset, length = SECTION.unpack_from(view, HEADER.size + i * SECTION.size)
+            self.sections[name.rstrip(b'\0').decode()] = (offset, length)
+
+        self.strings = self.section('strings')
+        self.lists = self.section('lists').cast('I')
+        self.data = self.section('drinks.rows')
+        self.sorted_pks = self.section('drinks.pks').cast('q')
+        self.pk_index = self.section('drinks.by_pk').cast('I')
+        self.name_index = self.section('drinks.by_safe_name').cast('I')
+        self.keys = {facet: self.section(f'{facet}.keys').cast('q') for facet in FACETS}
+        self.offsets = {facet: self.section(f'{facet}.offsets').cast('I') for facet in FACETS}
+        self.positions = {facet: self.section(f'{facet}.positions').cast('I') for facet in FACETS}
+        for name in TABLES:
+            setattr(self, name, MappedTable(self, name))
+
+    def section(self, name):
+        offset, length = self.sections[name]
+        return self.view[offset:offset + length]
+
+    def __len__(self):
+        return len(self.data) // DRINK.size
+
+    def record(self, position):
+        pk, updated, *refs = DRINK.unpack_from(self.data, position * DRINK.size)
+        record = DrinkRecord()
+        record.pk, record.position, record.updated = pk, position, _datetime(updated)
+        (record.name, record.safe_name, record.slug, record.image, record.instructions,
+         record.glass) = (_text(self.strings, *refs[i:i + 2]) for i in range(0, 12, 2))
+        for i, field in enumerate(DRINK_LISTS):
+            start, count = refs[12 + 2 * i:14 + 2 * i]
+            pairs = self.lists[2 * start:2 * (start + count)]
+            setattr(record, field, tuple(_text(self.strings, pairs[j], pairs[j + 1]) for j in range(0, len(pairs), 2)))
+        return record
+
+    def pk_at(self, position):
+        return DRINK.unpack_from(self.data, position * DRINK.size)[0]
+
+    def name_at(self, position):
+        return _text(self.strings, *DRINK.unpack_from(self.data, position * DRINK.size)[2:4])
+
+    def position_of(self, pk):
+        index = _find(self.sorted_pks, pk)
+        return None if index is None else self.pk_index[index]
+
+    def position_named(self, safe_name):
+        return _find_named(self.name_index, self._safe_name_at, safe_name)
+
+    def _safe_name_at(self, position):
+        return _raw(self.strings, *DRINK.unpack_from(self.data, position * DRINK.size)[4:6])
+
+    def pks(self):
+        return self.sorted_pks
+
+    def values(self, facet):
+        return self.keys[facet]
+
+    def postings(self, facet, value):
+        index = _find(self.keys[facet], int(value))
+        if index is None:
+            return ()
+        offsets = self.offsets[facet]
+        return self.positions[facet][offsets[index]:offsets[index + 1]]
+
+
+def _raw(strings, offset, length):
+    return None if offset == NONE else bytes(strings[offset:offset + length])
+
+
+def _text(strings, offset, length):
+    return None if offset == NONE else str(strings[offset:offset + length], 'utf-8')
+
+
+def _find(values, value):
+    """Index of ``value`` in the ascending ``values``, or None."""
+    i = bisect.bisect_left(values, value)
+    return i if i < len(values) and values[i] == value else None
+
+
+def _find_named(index, safe_name_at, safe_name):
+    """The row of ``index`` (rows ordered by ``safe_name_at(row)``) named ``safe_name``, or None."""
+    if not safe_name:
+        return None
+    target = safe_name.encode()
+    i = bisect.bisect_left(index, target, key=safe_name_at)
+    return index[i] if i < len(index) and safe_name_at(index[i]) == target else None
+
+
+def open_catalog(path, version, current=None):
+    """The catalog file at ``path`` mapped, if it is of catalog ``version``
+    and not the generation ``current`` already maps; otherwise None."""
+    header = read_header(path)
+    if header is None or (header.version, header.updated) != version:
+        return None
+    if getattr(current, 'generation', None) == header.generation:
+        return None
+    snapshot = MappedSnapshot(path)
+    # The file may have been replaced since its header was read.
+    return snapshot if snapshot.catalog_version == version else None
+
+
+def update_catalog(path):
+    """Map the catalog file at ``path``, first writing a new generation of
+    it if it is behind ``CatalogVersion``."""
+    with WriteLock(f'{path}.lock'):
+        header = read_header(path)
+        if header is None or (header.version, header.updated) != CatalogVersion.current():
+            write_catalog(load_snapshot(), path, header.generation + 1 if header else 1)
+    return MappedSnapshot(path)
@@ -0,0 +1,162 @@
+"""Usage counts stored on the lookup models.
+
+``Tag``, ``PreparationMethod``, ``GlassType``, ``Unit`` and
+``RecipeIngredient`` carry the number of distinct drinks that use them
+(``RecipeIngredient`` twice: in recipe lines and as a garnish), so list
+endpoints and the admin can filter on "in use" and sort by popularity
+without joining the drinks tables.
+
+The handlers below recount the rows a write touched with one ``UPDATE``
+per counter, which keeps the columns exact without having to reason about
+duplicate recipe lines. Writes that bypass signals (``QuerySet.update()``,
+``bulk_create()``, raw SQL) leave them stale until ``manage.py recount``.
+"""
+from django.apps import apps as global_apps
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from drinks.models import Cocktail, Drink, DrinkIngredientsList
+
+
+# (counted model, count field, referencing model, its column pointing at the
+# counted row, its column holding the drink id).
+COUNTERS = (
+    ('Tag', 'drink_count', 'Drink_tags', 'tag_id', 'drink_id'),
+    ('PreparationMethod', 'drink_count', 'Drink_preparation_method', 'preparationmethod_id', 'drink_id'),
+    ('GlassType', 'drink_count', 'Drink', 'glass_type_id', 'id'),
+    ('Unit', 'drink_count', 'DrinkIngredientsList', 'unit_id', 'drink_id'),
+    ('RecipeIngredient', 'drink_count', 'DrinkIngredientsList', 'ingredient_id', 'drink_id'),
+    ('RecipeIngredient', 'garnish_count', 'Drink_garnish', 'recipeingredient_id', 'drink_id'),
+)
+
+
+def recount(model_name, field, pks=None, apps=global_apps):
+    """Recompute ``field`` on the ``model_name`` rows ``pks`` (all rows if None).
+
+    Returns the number of rows updated. ``apps`` may be a migration state.
+    """
+    for name, count_field, source_name, column, drink_column in COUNTERS:
+        if (name, count_field) == (model_name, field):
+            break
+    else:
+        raise ValueError(f'No counter {model_name}.{field}')
+    model = apps.get_model('drinks', model_name)
+    source = apps.get_model('drinks', source_name)
+    counts = (
+        source.objects.filter(**{column: OuterRef('pk')})
+        .order_by()
+        .values(column)
+        .annotate(n=Count(drink_column, distinct=True))
+        .values('n')
+    )
+    rows = model.objects.all()
+    if pks is not None:
+        pks = {pk for pk in pks if pk is not None}
+        if not pks:
+            return 0
+        rows = rows.filter(pk__in=pks)
+    return rows.update(**{field: Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))})
+
+
+def recount_all(apps=global_apps):
+    """Recompute every counter on every row; returns ``{'Model.field': rows}``."""
+    return {f'{name}.{field}': recount(name, field, apps=apps) for name, field, *_ in COUNTERS}
+
+
+def _drink_references(drink_ids):
+    """Counted rows referenced by ``drink_ids``, as ``{(model, field): pks}``."""
+    refs = {}
+    for name, field, source_name, column, drink_column in COUNTERS:
+        source = global_apps.get_model('drinks', source_name)
+        drink_lookup = 'pk__in' if drink_column == 'id' else f'{drink_column}__in'
+        refs[(name, field)] = set(source.objects.filter(**{drink_lookup: drink_ids}).values_list(column, flat=True))
+    return refs
+
+
+def _recount_references(refs):
+    for (name, field), pks in refs.items():
+        recount(name, field, pks)
+
+
+# Drinks: the glass type lives on the row; deleting a drink also drops its
+# m2m and recipe rows, which does not send ``m2m_changed``.
+
+def drink_saving(sender, instance, raw=False, **kwargs):
+    previous = None
+    if not raw and instance.pk is not None:
+        previous = Drink.objects.filter(pk=instance.pk).values_list('glass_type_id', flat=True).first()
+    instance._counted_glass_type_id = previous
+
+
+def drink_saved(sender, instance, raw=False, **kwargs):
+    previous = getattr(instance, '_counted_glass_type_id', None)
+    if not raw and previous != instance.glass_type_id:
+        recount('GlassType', 'drink_count', {previous, instance.glass_type_id})
+
+
+def drink_deleting(sender, instance, **kwargs):
+    instance._counted_refs = _drink_references([instance.pk])
+
+
+def drink_deleted(sender, instance, **kwargs):
+    _recount_references(getattr(instance, '_counted_refs', {}))
+
+
+for _model in (Drink, Cocktail):
+    pre_save.connect(drink_saving, sender=_model, dispatch_uid=f'drinks_counters_saving_{_model.__name__}')
+    post_save.connect(drink_saved, sender=_model, dispatch_uid=f'drinks_counters_saved_{_model.__name__}')
+    pre_delete.connect(drink_deleting, sender=_model, dispatch_uid=f'drinks_counters_deleting_{_model.__name__}')
+    post_delete.connect(drink_deleted, sender=_model, dispatch_uid=f'drinks_counters_deleted_{_model.__name__}')
+
+
+# Recipe lines: the ingredient and the unit.
+
+@receiver(pre_save, sender=DrinkIngredientsList, dispatch_uid='drinks_counters_line_saving')
+def line_saving(sender, instance, raw=False, **kwargs):
+    previous = None
+    if not raw and instance.pk is not None:
+        previous = DrinkIngredientsList.objects.filter(pk=instance.pk).values_list('ingredient_id', 'unit_id').first()
+    instance._counted_line = previous or (None, None)
+
+
+@receiver(post_save, sender=DrinkIngredientsList, dispatch_uid='drinks_counters_line_saved')
+@receiver(post_delete, sender=DrinkIngredientsList, dispatch_uid='drinks_counters_line_deleted')
+def line_changed(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    ingredient_id, unit_id = getattr(instance, '_counted_line', (None, None))
+    recount('RecipeIngredient', 'drink_count', {ingredient_id, instance.ingredient_id})
+    recount('Unit', 'drink_count', {unit_id, instance.unit_id})
+
+
+# Tags, preparation methods and garnishes.
+
+# Through model -> (counted model, count field, ``Drink`` attribute).
+M2M_COUNTERS = {
+    Drink.tags.through: ('Tag', 'drink_count', 'tags'),
+    Drink.preparation_method.through: ('PreparationMethod', 'drink_count', 'preparation_method'),
+    Drink.garnish.through: ('RecipeIngredient', 'garnish_count', 'garnish'),
+}
+
+
+def drink_relation_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    name, field, attr = M2M_COUNTERS[sender]
+    if action == 'pre_clear':
+        if not reverse:
+            # Remember which rows are about to lose this drink.
+            instance._counted_cleared = set(getattr(instance, attr).values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if reverse:
+        recount(name, field, {instance.pk})
+    elif action == 'post_clear':
+        recount(name, field, instance.__dict__.pop('_counted_cleared', ()))
+    else:
+        recount(name, field, pk_set or ())
+
+
+for _through in M2M_COUNTERS:
+    m2m_changed.connect(drink_relation_changed, sender=_through, dispatch_uid=f'drinks_counters_m2m_{_through.__name__}')
@@ -0,0 +1,128 @@
+"""Streaming full-catalog export (``/api/All_Cocktails/export.ndjson``, ``.csv``).
+
+The export walks the matching drinks in chunks of ``CHUNK_SIZE``: a server
+side ``iterator()`` for the whole catalog, keyset pages of the facet index
+for filtered exports, slices of the ranked ids for ``?q=``. Each chunk goes
+through the same fragment cache and batched prefetch as a list page and is
+written out before the next one is loaded, so memory does not grow with the
+catalog and no COUNT or OFFSET query is run.
+"""
+import csv
+import json
+from itertools import islice
+
+from django.http import StreamingHttpResponse
+from rest_framework.renderers import BaseRenderer
+
+from drinks.models import Drink
+from drinks.serializers import DrinkSerializer
+
+
+CHUNK_SIZE = 500
+
+# Columns of the CSV export; list values are joined with LIST_SEPARATOR.
+CSV_FIELDS = DrinkSerializer.Meta.fields
+LIST_SEPARATOR = '; '
+
+
+class NDJSONRenderer(BaseRenderer):
+    """One JSON document per line; only used as-is for error responses."""
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode() + b'\n'
+
+
+class CSVRenderer(BaseRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        rows = data if isinstance(data, list) else [data]
+        fields = list(rows[0]) if rows and isinstance(rows[0], dict) else []
+        writer = csv.writer(Echo())
+        return ''.join([writer.writerow(fields)] + [writer.writerow(csv_row(row, fields)) for row in rows]).encode()
+
+
+class Echo:
+    """File-like object for ``csv.writer`` that hands each line back."""
+
+    def write(self, value):
+        return value
+
+
+def csv_row(data, fields=CSV_FIELDS):
+    row = []
+    for field in fields:
+        value = data.get(field)
+        if isinstance(value, (list, tuple)):
+            value = LIST_SEPARATOR.join(str(v) for v in value)
+        row.append('' if value is None else value)
+    return row
+
+
+def queryset_chunks(queryset, size=None):
+    size = size or CHUNK_SIZE
+    rows = queryset.select_related('glass_type').iterator(chunk_size=size)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _load(ids):
+    by_pk = Drink.objects.select_related('glass_type').in_bulk(ids)
+    return [by_pk[pk] for pk in ids if pk in by_pk]
+
+
+def id_chunks(ids, size=None):
+    """Chunks of the drinks in ``ids``, a list already in export order."""
+    size = size or CHUNK_SIZE
+    for start in range(0, len(ids), size):
+        chunk = _load(ids[start:start + size])
+        if chunk:
+            yield chunk
+
+
+def facet_chunks(result, size=None):
+    """Chunks of the drinks in a ``FacetResult``, by name."""
+    size = size or CHUNK_SIZE
+    after = None
+    while True:
+        keys = result.keyset_page(after=after, limit=size)
+        if not keys:
+            return
+        after = keys[-1]
+        chunk = _load([pk for _, pk in keys])
+        if chunk:
+            yield chunk
+
+
+def ndjson_lines(chunks, encode):
+    for chunk in chunks:
+        yield b'\n'.join(encode(chunk)) + b'\n'
+
+
+def csv_lines(chunks, encode):
+    writer = csv.writer(Echo())
+    yield writer.writerow(CSV_FIELDS)
+    for chunk in chunks:
+        yield ''.join(writer.writerow(csv_row(json.loads(fragment))) for fragment in encode(chunk))
+
+
+def export_response(chunks, encode, renderer):
+    """Stream ``chunks`` of drinks in ``renderer``'s format.
+
+    ``encode`` turns a chunk into its encoded JSON fragments, one per drink.
+    """
+    lines = csv_lines if renderer.format == 'csv' else ndjson_lines
+    content_type = renderer.media_type
+    if renderer.charset:
+        content_type += f'; charset={renderer.charset}'
+    response = StreamingHttpResponse(lines(chunks, encode), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="cocktails.{renderer.format}"'
+    return response
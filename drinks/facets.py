@@ -0,0 +1,254 @@
+"""In-memory postings for filtering the cocktail list by facet.
+
+For every facet value (an ingredient, tag, preparation method, glass type,
+category or the shot flag) the index keeps the set of drinks that have it,
+stored like the ``drinks.makeable`` columns as an integer bitset in which
+bit ``n`` is the drink with primary key ``n``. A filter from
+``drinks.filtering.parse_drink_filters`` is then evaluated with ``|`` (any),
+``&`` (all, and between facets) and ``& ~`` (exclude) over whole postings,
+and only the requested page of ids, in list order, is handed to the
+database.
+
+With ``DRINKS_SNAPSHOT`` on, ``select()`` reads the postings the catalog
+snapshot already holds (mapped from ``DRINKS_CATALOG_FILE`` when that is
+set) instead, so the index is not built in every process. While the
+snapshot is behind a write, the caller filters with the ORM.
+"""
+import bisect
+
+from drinks.filtering import ID_FACETS
+from drinks.indexes import DrinkIndex
+from drinks.makeable import bit_positions
+from drinks.models import Category, Drink, DrinkIngredientsList
+from drinks.snapshot import current_snapshot, snapshot_enabled
+
+
+# Result sets up to this size are sorted by name; larger ones are read off
+# the name-ordered list of all drinks instead.
+SORT_LIMIT = 2048
+
+
+class FacetIndex(DrinkIndex):
+
+    def clear(self):
+        self.postings = {}
+        self.drink_facets = {}
+        self.sort_keys = {}
+        # (name, pk) of every drink, in the list endpoint's order.
+        self.by_name = []
+        self.all = 0
+
+    def remove(self, pk):
+        bit = 1 << pk
+        for key in self.drink_facets.pop(pk, ()):
+            self.postings[key] &= ~bit
+            if not self.postings[key]:
+                del self.postings[key]
+        sort_key = self.sort_keys.pop(pk, None)
+        if sort_key is not None:
+            position = bisect.bisect_left(self.by_name, sort_key)
+            if position < len(self.by_name) and self.by_name[position] == sort_key:
+                del self.by_name[position]
+        self.all &= ~bit
+
+    def _add(self, pk, name, keys):
+        bit = 1 << pk
+        for key in keys:
+            self.postings[key] = self.postings.get(key, 0) | bit
+        self.drink_facets[pk] = keys
+        self.sort_keys[pk] = (name, pk)
+        bisect.insort(self.by_name, (name, pk))
+        self.all |= bit
+
+    def load(self, ids=None):
+        through = {
+            'tag': (Drink.tags.through, 'tag_id'),
+            'preparation': (Drink.preparation_method.through, 'preparationmethod_id'),
+        }
+        if ids is None:
+            batches = [None]
+        else:
+            batches = list(self.batches(ids))
+        found = set()
+        for batch in batches:
+            def rows(qs, *fields):
+                if batch is not None:
+                    qs = qs.filter(**{'pk__in' if qs.model is Drink else 'drink_id__in': batch})
+                return qs.values_list(*fields)
+
+            keys = {}
+            drinks = rows(Drink.objects.all(), 'pk', 'name', 'glass_type_id', 'category_id', 'is_shot')
+            names = {}
+            for pk, name, glass_id, category_id, is_shot in drinks:
+                names[pk] = name
+                keys[pk] = {('is_shot', is_shot)}
+                if glass_id is not None:
+                    keys[pk].add(('glass', glass_id))
+                if category_id is not None:
+                    keys[pk].add(('category', category_id))
+            for drink_id, ingredient_id in rows(DrinkIngredientsList.objects.all(), 'drink_id', 'ingredient_id'):
+                if drink_id in keys:
+                    keys[drink_id].add(('ingredient', ingredient_id))
+            for facet, (model, field) in through.items():
+                for drink_id, value in rows(model.objects.all(), 'drink_id', field):
+                    if drink_id in keys:
+                        keys[drink_id].add((facet, value))
+            for pk, drink_keys in keys.items():
+                self._add(pk, names[pk], frozenset(drink_keys))
+                found.add(pk)
+        return found
+
+    def select(self, filters):
+        """Return the ``FacetResult`` of drinks matching ``filters``."""
+        category_ids = None
+        if filters.get('category'):
+            category_ids = list(Category.objects.filter(name__iexact=filters['category']).values_list('pk', flat=True))
+        self.ensure_current()
+        with self.lock:
+            mask = self.all
+            for facet in ID_FACETS:
+                ids = filters.get(facet)
+                if ids:
+                    mask &= self._combine(facet, ids, filters.get(f'{facet}_mode') == 'all')
+                if filters.get(f'exclude_{facet}'):
+                    mask &= ~self._combine(facet, filters[f'exclude_{facet}'], False)
+            if category_ids is not None:
+                mask &= self._combine('category', category_ids, False)
+            if 'is_shot' in filters:
+                mask &= self.postings.get(('is_shot', filters['is_shot']), 0)
+            return FacetResult(self, mask)
+
+    def _combine(self, facet, values, match_all):
+        postings = [self.postings.get((facet, value), 0) for value in values]
+        if match_all:
+            mask = self.all
+            for posting in postings:
+                mask &= posting
+            return mask
+        mask = 0
+        for posting in postings:
+            mask |= posting
+        return mask
+
+    def ordered(self, mask, start, stop):
+        if start >= stop:
+            return []
+        with self.lock:
+            if mask.bit_count() <= SORT_LIMIT:
+                return sorted(bit_positions(mask), key=self.sort_keys.__getitem__)[start:stop]
+            bits = format(mask, 'b')[::-1]
+            size = len(bits)
+            page = []
+            seen = 0
+            for _, pk in self.by_name:
+                if pk < size and bits[pk] == '1':
+                    if seen >= start:
+                        page.append(pk)
+                        if len(page) >= stop - start:
+                            break
+                    seen += 1
+            return page
+
+    def keyset_page(self, mask, after=None, before=None, limit=None):
+        """``(name, pk)`` of up to ``limit`` matches right after ``after`` or
+        right before ``before`` (both ``(name, pk)`` keys), in list order."""
+        with self.lock:
+            bits = format(mask, 'b')[::-1]
+            size = len(bits)
+            if before is not None:
+                end = bisect.bisect_left(self.by_name, tuple(before))
+                keys = (self.by_name[i] for i in range(end - 1, -1, -1))
+            else:
+                start = bisect.bisect_right(self.by_name, tuple(after)) if after is not None else 0
+                keys = (self.by_name[i] for i in range(start, len(self.by_name)))
+            page = []
+            for key in keys:
+                if key[1] < size and bits[key[1]] == '1':
+                    page.append(key)
+                    if len(page) == limit:
+                        break
+            if before is not None:
+                page.reverse()
+            return page
+
+
+class FacetResult:
+    """Matching drink ids in list order, sliced lazily so that a paginator
+    only ever materializes the page it asks for."""
+
+    def __init__(self, index, mask):
+        self.index = index
+        self.mask = mask
+
+    def __len__(self):
+        return self.mask.bit_count()
+
+    def count(self):
+        return len(self)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            start, stop, step = item.indices(len(self))
+            if step != 1:
+                raise ValueError('FacetResult slices do not support a step.')
+            return self.index.ordered(self.mask, start, stop)
+        if item < 0:
+            item += len(self)
+        page = self.index.ordered(self.mask, item, item + 1)
+        if not page:
+            raise IndexError(item)
+        return page[0]
+
+    def __iter__(self):
+        return iter(self[:])
+
+    def keyset_page(self, after=None, before=None, limit=None):
+        return self.index.keyset_page(self.mask, after=after, before=before, limit=limit)
+
+
+index = FacetIndex()
+
+
+class SnapshotResult:
+    """``FacetResult`` of the drinks at ``positions`` of a snapshot, which
+    are in list order."""
+
+    def __init__(self, snapshot, positions):
+        self.snapshot = snapshot
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def count(self):
+        return len(self)
+
+    def __getitem__(self, item):
+        if isinstance(item, slice):
+            return [self.snapshot.pk_at(position) for position in self.positions[item]]
+        return self.snapshot.pk_at(self.positions[item])
+
+    def __iter__(self):
+        return map(self.snapshot.pk_at, self.positions)
+
+    def sort_key(self, position):
+        return (self.snapshot.name_at(position), self.snapshot.pk_at(position))
+
+    def keyset_page(self, after=None, before=None, limit=None):
+        positions = self.positions
+        if before is not None:
+            end = bisect.bisect_left(positions, tuple(before), key=self.sort_key)
+            page = positions[0 if limit is None else max(0, end - limit):end]
+        else:
+            start = bisect.bisect_right(positions, tuple(after), key=self.sort_key) if after is not None else 0
+            page = positions[start:None if limit is None else start + limit]
+        return [self.sort_key(position) for position in page]
+
+
+def select(filters):
+    """The ``FacetResult`` of drinks matching ``filters``; None when
+    ``DRINKS_SNAPSHOT`` is on and the snapshot is behind the catalog."""
+    if snapshot_enabled():
+        snapshot = current_snapshot()
+        return None if snapshot is None else SnapshotResult(snapshot, snapshot.select(filters).positions)
+    return index.select(filters)
@@ -0,0 +1,83 @@
+"""What the two fast read paths, ``drinks.async_views`` and
+``drinks.snapshot_views``, share with each other.
+
+Both answer JSON GETs without the DRF viewsets and hand everything else to
+them. Deciding which requests they may answer, and the ``Allow``, ``Vary``,
+``ETag`` and ``Last-Modified`` headers the viewsets would send, live here so
+that the two cannot disagree on either.
+"""
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.negotiation import DefaultContentNegotiation
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from drinks.fragments import DrinkJSONRenderer
+from drinks.views import AdminAwarePagination, NotModified
+
+
+# Query parameters only the sync views handle.
+SYNC_PARAMS = frozenset({'q', AdminAwarePagination.cursor_query_param})
+
+
+class Fallback(Exception):
+    """Hand the request to the sync view."""
+
+
+def allowed_methods(view):
+    """The ``Allow`` header the viewset sends for ``view``'s route."""
+    methods = set(view.actions) | {'options'}
+    if 'get' in methods:
+        methods.add('head')
+    return ', '.join(m.upper() for m in view.cls.http_method_names if m in methods)
+
+
+def check_not_modified(request, validators):
+    """Remember ``(etag, last_modified)`` for the response and raise
+    ``NotModified`` when the client's copy is current."""
+    request._validators = validators
+    etag, last_modified = validators
+    response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+    if response is not None:
+        raise NotModified(response)
+
+
+def negotiate(request, view, kwargs):
+    """``request`` as the DRF ``Request`` ``view`` would get, with the
+    ``DrinkJSONRenderer`` accepted; raises ``Fallback`` for anything else."""
+    if request.method != 'GET' or 'format' in kwargs or 'HTTP_AUTHORIZATION' in request.META:
+        raise Fallback
+    request = Request(request, authenticators=[auth() for auth in view.cls.authentication_classes])
+    params = request.query_params
+    if not SYNC_PARAMS.isdisjoint(params) or api_settings.URL_FORMAT_OVERRIDE in params:
+        raise Fallback
+    renderers = [renderer() for renderer in view.cls.renderer_classes]
+    try:
+        renderer, media_type = DefaultContentNegotiation().select_renderer(request, renderers)
+    except Exception:
+        raise Fallback
+    if not isinstance(renderer, DrinkJSONRenderer):
+        raise Fallback
+    request.accepted_renderer, request.accepted_media_type = renderer, media_type
+    return request
+
+
+def render(request, data):
+    renderer = request.accepted_renderer
+    return HttpResponse(
+        renderer.render(data, request.accepted_media_type, {'request': request}),
+        content_type=renderer.media_type,
+    )
+
+
+def finish(request, view, response):
+    """Add the headers the viewset would send to ``response``."""
+    response['Allow'] = allowed_methods(view)
+    patch_vary_headers(response, ['Accept'])
+    validators = getattr(request, '_validators', None)
+    if validators and response.status_code in (200, 304):
+        etag, last_modified = validators
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
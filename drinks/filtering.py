@@ -0,0 +1,100 @@
+"""Query-parameter parsing and filters shared by the drink endpoints."""
+
+TRUTHY = {'1', 'true', 't', 'yes', 'y'}
+FALSEY = {'0', 'false', 'f', 'no', 'n'}
+
+
+def parse_id_list(params, key):
+    """Integers from repeated and/or comma separated ``key`` parameters."""
+    out = []
+    for v in params.getlist(key):
+        if not v:
+            continue
+        for part in v.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            try:
+                ival = int(part)
+            except Exception:
+                raise ValueError(f"Invalid integer value for '{key}': {part}")
+            out.append(ival)
+    return out
+
+
+# Facets filtered by id, with the ORM path each one follows.
+ID_FACETS = {
+    'ingredient': 'recipe_ingredients__ingredient__id',
+    'tag': 'tags__id',
+    'preparation': 'preparation_method__id',
+    'glass': 'glass_type__id',
+}
+MODES = ('any', 'all')
+
+
+def parse_drink_filters(params):
+    """Parse the drink facet filters.
+
+    ``ingredient``, ``tag``, ``preparation`` and ``glass`` take ids and match
+    drinks with any of them, or all of them with ``<facet>_mode=all``;
+    ``exclude_<facet>`` drops drinks with any of the given ids. Facets are
+    combined with AND, together with ``category`` (name) and ``is_shot``.
+
+    Returns a dict with only the filters that were given. Raises ``ValueError``
+    with a client-facing message on malformed values.
+    """
+    filters = {}
+    for key in ID_FACETS:
+        ids = parse_id_list(params, key)
+        if ids:
+            filters[key] = sorted(set(ids))
+        mode = params.get(f'{key}_mode')
+        if mode is not None and mode not in MODES:
+            raise ValueError(f"Invalid value for '{key}_mode'. Use any or all.")
+        if ids and mode == 'all':
+            filters[f'{key}_mode'] = mode
+        excluded = parse_id_list(params, f'exclude_{key}')
+        if excluded:
+            filters[f'exclude_{key}'] = sorted(set(excluded))
+    category_name = params.get('category')
+    if category_name:
+        filters['category'] = category_name.lower()
+    is_shot = parse_bool(params, 'is_shot')
+    if is_shot is not None:
+        filters['is_shot'] = is_shot
+    return filters
+
+
+def parse_bool(params, key, default=None):
+    value = params.get(key)
+    if value is None:
+        return default
+    val = (value or '').strip().lower()
+    if val in TRUTHY:
+        return True
+    if val in FALSEY:
+        return False
+    raise ValueError(f"Invalid boolean for '{key}'. Use true/false or 1/0.")
+
+
+def filter_key(filters):
+    """Hashable, order-independent key for a parsed filter dict."""
+    return tuple(sorted((k, tuple(v) if isinstance(v, list) else v) for k, v in filters.items()))
+
+
+def apply_drink_filters(qs, filters):
+    for key, lookup in ID_FACETS.items():
+        ids = filters.get(key)
+        if ids and filters.get(f'{key}_mode') == 'all':
+            for pk in ids:
+                qs = qs.filter(**{lookup: pk})
+            qs = qs.distinct()
+        elif ids:
+            qs = qs.filter(**{f'{lookup}__in': ids}).distinct()
+        if filters.get(f'exclude_{key}'):
+            qs = qs.exclude(**{f'{lookup}__in': filters[f'exclude_{key}']})
+    if filters.get('category'):
+        qs = qs.filter(category__name__iexact=filters['category'])
+    if 'is_shot' in filters:
+        qs = qs.filter(is_shot=filters['is_shot'])
+    return qs
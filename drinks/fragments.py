@@ -0,0 +1,204 @@
+"""Per-drink cache of pre-encoded ``DrinkSerializer`` output.
+
+List and facet-detail responses are assembled by joining the cached JSON
+bytes of every drink on the page instead of serializing and encoding each
+drink again. One cache entry is kept per drink holding its ``updated``
+timestamp and one encoded fragment per representation variant (renderer,
+indentation and the base URL the absolute links were built against).
+
+Entries are dropped on ``drinks_changed`` and are also checked against
+``Drink.updated``, which the write hooks in ``drinks.signals`` bump for every
+change that shows up in a drink, so stale fragments are never served by
+processes that did not see the write.
+"""
+import hashlib
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.dispatch import receiver
+from django.urls import get_script_prefix
+from rest_framework.compat import INDENT_SEPARATORS, LONG_SEPARATORS, SHORT_SEPARATORS
+from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
+
+from drinks.signals import drinks_changed
+
+
+KEY_PREFIX = 'drinks:fragment:'
+# Fragments for more base URLs than this are not kept for the same drink.
+MAX_VARIANTS = 8
+
+
+class EncodedFragments(list):
+    """A page of drinks already encoded as JSON, one ``bytes`` item per drink."""
+
+    def __init__(self, fragments, indent=None):
+        super().__init__(fragments)
+        self.indent = indent
+
+
+class DrinkJSONRenderer(JSONRenderer):
+    """JSON renderer that splices pre-encoded drink fragments into the page."""
+
+    # Stands in for the fragments while the rest of the page is encoded.
+    PLACEHOLDER = '\x00drinks:results\x00'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        fragments = data.get('results') if isinstance(data, dict) else None
+        if not isinstance(fragments, EncodedFragments):
+            return super().render(data, accepted_media_type, renderer_context)
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent != fragments.indent:
+            decoded = dict(data, results=[json.loads(f) for f in fragments])
+            return super().render(decoded, accepted_media_type, renderer_context)
+        page = super().render(dict(data, results=self.PLACEHOLDER), accepted_media_type, renderer_context)
+        return page.replace(json.dumps(self.PLACEHOLDER).encode(), self.encode_array(fragments, indent), 1)
+
+    def encode_array(self, fragments, indent):
+        """Encode ``fragments`` as the JSON array under a top-level key."""
+        if indent is None:
+            item_sep = (SHORT_SEPARATORS if self.compact else LONG_SEPARATORS)[0]
+            return b'[' + item_sep.encode().join(fragments) + b']'
+        if not fragments:
+            return b'[]'
+        outer = b' ' * indent
+        inner = b',\n' + outer * 2
+        return b'[\n' + outer * 2 + inner.join(fragments) + b'\n' + outer + b']'
+
+
+def get_fragment_cache():
+    alias = getattr(settings, 'DRINKS_FRAGMENT_CACHE', 'default')
+    if not alias:
+        return None
+    return caches[alias]
+
+
+def fragment_encoding(request, renderer_class=DrinkJSONRenderer):
+    """Return ``(variant, indent)`` describing how ``request`` will be encoded."""
+    accepted = getattr(request, 'accepted_renderer', None)
+    renderer = renderer_class()
+    if isinstance(accepted, BrowsableAPIRenderer):
+        # BrowsableAPIRenderer.get_content renders with indent=4 and no media type params.
+        indent = 4
+    else:
+        indent = renderer.get_indent(getattr(request, 'accepted_media_type', None), {})
+    fmt = getattr(accepted, 'format', None) or 'json'
+    base = f"{request.build_absolute_uri('/')}|{get_script_prefix()}"
+    digest = hashlib.sha1(base.encode()).hexdigest()[:12]
+    return f'{fmt}:{indent}:{digest}', indent
+
+
+def encode_fragment(data, indent, renderer_class=DrinkJSONRenderer):
+    renderer = renderer_class()
+    if indent is None:
+        separators = SHORT_SEPARATORS if renderer.compact else LONG_SEPARATORS
+    else:
+        separators = INDENT_SEPARATORS
+    text = json.dumps(
+        data, cls=renderer.encoder_class, indent=indent,
+        ensure_ascii=renderer.ensure_ascii, allow_nan=not renderer.strict, separators=separators,
+    )
+    text = text.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    if indent:
+        # Drinks sit two levels deep inside {"results": [...]}. Encoded JSON
+        # strings never contain raw newlines, so re-indenting is safe.
+        text = text.replace('\n', '\n' + ' ' * (indent * 2))
+    return text.encode()
+
+
+def _stamp(drink):
+    updated = getattr(drink, 'updated', None)
+    return updated.isoformat() if updated is not None else None
+
+
+def _fragment_keys(drinks):
+    return [f'{KEY_PREFIX}{d.pk}' for d in drinks]
+
+
+def _cached_fragments(drinks, keys, entries, variant):
+    """Split ``drinks`` into the fragments found in ``entries`` (None for a
+    miss) and the indexes of the misses."""
+    fragments = [None] * len(drinks)
+    misses = []
+    for index, (drink, key) in enumerate(zip(drinks, keys)):
+        entry = entries.get(key)
+        if entry and entry[0] == _stamp(drink) and variant in entry[1]:
+            fragments[index] = entry[1][variant]
+        else:
+            misses.append(index)
+    return fragments, misses
+
+
+def _encode_misses(drinks, keys, entries, fragments, misses, serialized, variant, indent):
+    """Fill in the ``misses`` from their ``serialized`` dicts; returns the cache entries to store."""
+    to_store = {}
+    for index, data in zip(misses, serialized):
+        drink, key = drinks[index], keys[index]
+        encoded = encode_fragment(data, indent)
+        fragments[index] = encoded
+        entry = entries.get(key)
+        variants = dict(entry[1]) if entry and entry[0] == _stamp(drink) else {}
+        if len(variants) >= MAX_VARIANTS:
+            variants = {}
+        variants[variant] = encoded
+        to_store[key] = (_stamp(drink), variants)
+    return to_store
+
+
+def _timeout(timeout):
+    if timeout is None:
+        timeout = getattr(settings, 'DRINKS_FRAGMENT_TIMEOUT', 24 * 60 * 60)
+    return timeout
+
+
+def drink_fragments(drinks, request, serialize, timeout=None):
+    """Return ``EncodedFragments`` for ``drinks``, serializing cache misses only.
+
+    ``serialize`` receives the list of drinks missing from the cache and
+    returns their serialized dicts in the same order.
+    """
+    drinks = list(drinks)
+    variant, indent = fragment_encoding(request)
+    cache = get_fragment_cache()
+    keys = _fragment_keys(drinks)
+    entries = cache.get_many(keys) if cache is not None and keys else {}
+    fragments, misses = _cached_fragments(drinks, keys, entries, variant)
+    if misses:
+        serialized = serialize([drinks[i] for i in misses])
+        to_store = _encode_misses(drinks, keys, entries, fragments, misses, serialized, variant, indent)
+        if cache is not None:
+            cache.set_many(to_store, timeout=_timeout(timeout))
+    return EncodedFragments(fragments, indent=indent)
+
+
+async def adrink_fragments(drinks, request, serialize, timeout=None):
+    """``drink_fragments()`` for async views; ``serialize`` is a coroutine function.
+
+    The cache is read and written with one ``get_many``/``set_many`` call
+    each, run off the event loop: the backends' own ``aget_many`` awaits one
+    ``get`` per key.
+    """
+    drinks = list(drinks)
+    variant, indent = fragment_encoding(request)
+    cache = get_fragment_cache()
+    keys = _fragment_keys(drinks)
+    entries = await sync_to_async(cache.get_many)(keys) if cache is not None and keys else {}
+    fragments, misses = _cached_fragments(drinks, keys, entries, variant)
+    if misses:
+        serialized = await serialize([drinks[i] for i in misses])
+        to_store = _encode_misses(drinks, keys, entries, fragments, misses, serialized, variant, indent)
+        if cache is not None:
+            await sync_to_async(cache.set_many)(to_store, timeout=_timeout(timeout))
+    return EncodedFragments(fragments, indent=indent)
+
+
+def invalidate_fragments(drink_ids):
+    cache = get_fragment_cache()
+    if cache is not None:
+        cache.delete_many([f'{KEY_PREFIX}{pk}' for pk in drink_ids])
+
+
+@receiver(drinks_changed, dispatch_uid='drinks_fragments_invalidate')
+def drop_changed_fragments(sender, drink_ids, **kwargs):
+    invalidate_fragments(drink_ids)
@@ -0,0 +1,52 @@
+"""Request-scoped identity map for objects looked up by URL segment.
+
+Rendering one browsable detail page asks for the same object several times:
+the view itself, its title and description, and every view the breadcrumb
+trail instantiates for the same request. ``lookup`` answers all of them from
+one query by remembering each ``(model, safe name, queryset)`` it resolved,
+misses included, on the request. ``remember`` does the same for any other
+value a request would otherwise load more than once.
+"""
+from django.http import Http404
+
+from drinks.models import normalize_safe_name
+
+
+def remember(request, key, load):
+    """Return ``load()``, called at most once per request for ``key``."""
+    if request is None:
+        return load()
+    # DRF wraps the Django request; keep the map on the one they share.
+    request = getattr(request, '_request', request)
+    try:
+        objects = request._identity_map
+    except AttributeError:
+        objects = request._identity_map = {}
+    if key not in objects:
+        objects[key] = load()
+    return objects[key]
+
+
+def lookup(request, model, safe_value, queryset=None):
+    """``get_by_safe_name()``, hitting the database at most once per request.
+
+    Lookups through a ``queryset`` are remembered apart from plain ones, since
+    it may narrow down (or load more of) what the model's manager returns.
+    """
+    slug = normalize_safe_name(safe_value) if safe_value is not None else None
+    if not slug:
+        raise Http404
+    key = (model, slug, None if queryset is None else str(queryset.query))
+    if queryset is None:
+        queryset = model.objects.all()
+
+    def load():
+        try:
+            return queryset.get(safe_name=slug)
+        except (model.DoesNotExist, model.MultipleObjectsReturned):
+            return None
+
+    obj = remember(request, key, load)
+    if obj is None:
+        raise Http404
+    return obj
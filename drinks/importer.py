@@ -0,0 +1,400 @@
+"""Bulk catalog import, used by ``ReimportView`` and ``manage.py import_drinks``.
+
+Input is a JSON array (or ``{"results": [...]}``), NDJSON or CSV, one drink
+per row::
+
+    {"name": "Gimlet", "category": "Classics", "glass_type": "Coupe",
+     "tags": ["Sour"], "preparation_method": ["Shaken"],
+     "garnish_ingredients": ["Lime wheel"], "instructions": "...",
+     "is_shot": false,
+     "recipe_ingredients": [{"ingredient": "Gin", "quantity": 2, "unit": "oz"},
+                            "Lime juice: 3/4 oz"]}
+
+In CSV the list columns hold ``;``-separated values and each recipe line is
+``"<ingredient>: <quantity text>"``.
+
+Lookup rows (categories, glass types, tags, preparation methods, units and
+ingredients) are matched by ``safe_name`` and the missing ones created, one
+``in_bulk`` and one ``bulk_create`` per model. Drinks are matched the same
+way: new ones are inserted, existing ones updated only if the row differs
+(their tags, preparation methods, garnishes and recipe lines are then
+replaced), so importing the same file twice writes nothing the second time.
+Everything runs in one transaction with ``bulk_create``/``bulk_update`` in
+batches, and the per-row signal work (counters, recipe-line measures, index
+and cache invalidation) is done once for the whole import afterwards.
+"""
+import csv
+import io
+import json
+import time
+
+from django.db import transaction
+from django.utils import timezone
+
+from drinks.counters import recount_all
+from drinks.filtering import FALSEY, TRUTHY
+from drinks.measures import parse_measure, units_by_name
+from drinks.models import (
+    CatalogVersion, Category, Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag, Unit,
+    normalize_safe_name,
+)
+from drinks.recipe_lines import normalize_lines, unit_lines
+from drinks.signals import catalog_changed, notify_drinks_changed
+
+
+BATCH_SIZE = 1000
+FORMATS = ('json', 'ndjson', 'csv')
+LIST_SEPARATOR = ';'
+
+# Row key -> (lookup model, many).
+LOOKUP_FIELDS = {
+    'category': (Category, False),
+    'glass_type': (GlassType, False),
+    'tags': (Tag, True),
+    'preparation_method': (PreparationMethod, True),
+    'garnish_ingredients': (RecipeIngredient, True),
+}
+
+
+# Many-to-many row key -> (through model, its column for the related row).
+THROUGH = {
+    'tags': (Drink.tags.through, 'tag_id'),
+    'preparation_method': (Drink.preparation_method.through, 'preparationmethod_id'),
+    'garnish_ingredients': (Drink.garnish.through, 'recipeingredient_id'),
+}
+RELATED = tuple(THROUGH)
+
+
+class ImportFormatError(ValueError):
+    """The upload could not be read as rows at all."""
+
+
+def format_for(filename, default='json'):
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    return extension if extension in FORMATS else default
+
+
+def read_rows(data, fmt):
+    """Return the rows (dicts) in ``data``, ``bytes`` or ``str`` in ``fmt``."""
+    if fmt not in FORMATS:
+        raise ImportFormatError(f"Unknown format '{fmt}'; use one of {', '.join(FORMATS)}.")
+    if isinstance(data, bytes):
+        try:
+            data = data.decode('utf-8-sig')
+        except UnicodeDecodeError:
+            raise ImportFormatError('The file is not UTF-8 encoded.')
+    try:
+        if fmt == 'csv':
+            return list(csv.DictReader(io.StringIO(data)))
+        if fmt == 'ndjson':
+            return [json.loads(line) for line in data.splitlines() if line.strip()]
+        rows = json.loads(data)
+    except (ValueError, csv.Error) as e:
+        raise ImportFormatError(f'Could not read {fmt}: {e}')
+    if isinstance(rows, dict):
+        rows = rows.get('results', rows.get('drinks'))
+    if not isinstance(rows, list):
+        raise ImportFormatError('Expected a list of drinks.')
+    return rows
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = self.created = self.updated = self.unchanged = 0
+        self.errors = []
+        self.seconds = 0.0
+
+    def error(self, row, name, messages):
+        self.errors.append({'row': row, 'name': name, 'errors': messages})
+
+    def as_dict(self):
+        return {
+            'rows': self.rows,
+            'created': self.created,
+            'updated': self.updated,
+            'unchanged': self.unchanged,
+            'failed': len(self.errors),
+            'seconds': round(self.seconds, 3),
+            'rows_per_second': round(self.rows / self.seconds, 1) if self.seconds else None,
+            'errors': self.errors,
+        }
+
+
+def _text(value):
+    return '' if value is None else str(value).strip()
+
+
+def _names(value):
+    if value is None or value == '':
+        return []
+    if isinstance(value, str):
+        value = value.split(LIST_SEPARATOR)
+    if not isinstance(value, (list, tuple)):
+        raise ValueError('expected a list of names')
+    return [name for name in (_text(v) for v in value) if name]
+
+
+def _bool(value):
+    if isinstance(value, bool):
+        return value
+    text = _text(value).lower()
+    if not text or text in FALSEY:
+        return False
+    if text in TRUTHY:
+        return True
+    raise ValueError('expected true or false')
+
+
+def _line(value):
+    """``(ingredient, quantity, unit, quantity_text)`` of a recipe line."""
+    if isinstance(value, str):
+        ingredient, _, text = value.partition(':')
+        return _text(ingredient), None, '', _text(text)
+    if not isinstance(value, dict):
+        raise ValueError('expected an object or "<ingredient>: <quantity>"')
+    quantity = value.get('quantity')
+    if quantity in (None, ''):
+        quantity = None
+    else:
+        try:
+            quantity = float(quantity)
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid quantity {quantity!r}")
+    return _text(value.get('ingredient')), quantity, _text(value.get('unit')), _text(value.get('quantity_text'))
+
+
+def _unit_names(lines):
+    """Units named by ``lines``: given explicitly or in a quantity text."""
+    for _, quantity, unit, text in lines:
+        if unit:
+            yield unit
+        elif quantity is None and text:
+            parsed_quantity, parsed_unit = parse_measure(text)
+            if parsed_quantity is not None:
+                yield parsed_unit
+
+
+def _check_length(model, field, name, errors, label):
+    max_length = model._meta.get_field(field).max_length
+    if max_length and len(name) > max_length:
+        errors.append(f'{label}: longer than {max_length} characters')
+    elif not normalize_safe_name(name):
+        errors.append(f'{label}: {name!r} has no letters or digits')
+
+
+def parse_row(raw):
+    """Validate one input row; returns ``(spec, errors)``."""
+    if not isinstance(raw, dict):
+        return None, ['expected an object']
+    errors = []
+    name = _text(raw.get('name'))
+    if not name:
+        errors.append('name: required')
+    else:
+        _check_length(Drink, 'name', name, errors, 'name')
+    spec = {'name': name, 'instructions': _text(raw.get('instructions')), 'lines': []}
+    try:
+        spec['is_shot'] = _bool(raw.get('is_shot'))
+    except ValueError as e:
+        errors.append(f'is_shot: {e}')
+    for key, (model, many) in LOOKUP_FIELDS.items():
+        value = raw.get(key)
+        if key == 'garnish_ingredients' and value is None:
+            value = raw.get('garnish')
+        try:
+            names = _names(value) if many else _names([value] if value not in (None, '') else [])
+        except ValueError as e:
+            errors.append(f'{key}: {e}')
+            continue
+        for item in names:
+            _check_length(model, 'name', item, errors, key)
+        spec[key] = names if many else (names[0] if names else None)
+    lines = raw.get('recipe_ingredients') or []
+    if isinstance(lines, str):
+        lines = [line for line in lines.split(LIST_SEPARATOR) if line.strip()]
+    if not isinstance(lines, list):
+        errors.append('recipe_ingredients: expected a list')
+        lines = []
+    for position, value in enumerate(lines, 1):
+        try:
+            ingredient, quantity, unit, text = _line(value)
+        except ValueError as e:
+            errors.append(f'recipe_ingredients[{position}]: {e}')
+            continue
+        if not ingredient:
+            errors.append(f'recipe_ingredients[{position}]: ingredient required')
+            continue
+        _check_length(RecipeIngredient, 'name', ingredient, errors, f'recipe_ingredients[{position}]')
+        if unit:
+            _check_length(Unit, 'name', unit, errors, f'recipe_ingredients[{position}] unit')
+        if len(text) > DrinkIngredientsList._meta.get_field('quantity_text').max_length:
+            errors.append(f'recipe_ingredients[{position}]: quantity text too long')
+        spec['lines'].append((ingredient, quantity, unit, text))
+    return spec, errors
+
+
+def resolve(model, names, batch_size=BATCH_SIZE, created=None):
+    """Map the ``safe_name`` of each of ``names`` to its row, creating missing ones.
+
+    The rows created are appended to ``created`` if given.
+    """
+    first = {}
+    for name in names:
+        first.setdefault(normalize_safe_name(name), name)
+    rows = model.objects.in_bulk(list(first), field_name='safe_name')
+    missing = [model(name=name, safe_name=slug) for slug, name in first.items() if slug not in rows]
+    if missing:
+        new = model.objects.bulk_create(missing, batch_size=batch_size)
+        if any(obj.pk is None for obj in new):
+            new = model.objects.in_bulk([obj.safe_name for obj in missing], field_name='safe_name').values()
+        rows.update((obj.safe_name, obj) for obj in new)
+        if created is not None:
+            created.extend(new)
+    return rows
+
+
+def _state(drink, tags, methods, garnish, lines):
+    """Comparable content of a drink as stored."""
+    return (
+        drink.name, drink.category_id, drink.glass_type_id, drink.instructions, drink.is_shot,
+        tuple(sorted(tags)), tuple(sorted(methods)), tuple(sorted(garnish)),
+        tuple((line.ingredient_id, line.quantity, line.unit_id, line.quantity_text) for line in lines),
+    )
+
+
+def _stored_relations(drink_ids):
+    stored = {key: {pk: [] for pk in drink_ids} for key in RELATED + ('lines',)}
+    for key, (model, column) in THROUGH.items():
+        for drink_id, value in model.objects.filter(drink_id__in=drink_ids).values_list('drink_id', column):
+            stored[key][drink_id].append(value)
+    for line in DrinkIngredientsList.objects.filter(drink_id__in=drink_ids).order_by('pk'):
+        stored['lines'][line.drink_id].append(line)
+    return stored
+
+
+def import_rows(rows, batch_size=BATCH_SIZE):
+    """Import ``rows`` (dicts, see the module docstring); returns an ``ImportResult``."""
+    started = time.perf_counter()
+    result = ImportResult()
+    result.rows = len(rows)
+    specs, seen = [], {}
+    for number, raw in enumerate(rows, 1):
+        spec, errors = parse_row(raw)
+        if spec is not None and not errors:
+            slug = normalize_safe_name(spec['name'])
+            if slug in seen:
+                errors = [f"name: duplicates row {seen[slug]}"]
+            else:
+                seen[slug] = number
+        if errors:
+            result.error(number, spec['name'] if spec else None, errors)
+        else:
+            specs.append(spec)
+
+    changed_ids = set()
+    with transaction.atomic():
+        lookups = {
+            key: resolve(model, [n for s in specs for n in (s[key] if many else [s[key]] if s[key] else [])], batch_size)
+            for key, (model, many) in LOOKUP_FIELDS.items()
+        }
+        lookups['garnish_ingredients'].update(resolve(
+            RecipeIngredient, [line[0] for s in specs for line in s['lines']], batch_size))
+        ingredients = lookups['garnish_ingredients']
+        new_units = []
+        units = resolve(Unit, [name for s in specs for name in _unit_names(s['lines'])], batch_size, new_units)
+        if new_units:
+            # ``bulk_create`` skips ``Unit``'s post_save, which parses the
+            # stored lines naming a new unit again.
+            normalize_lines(unit_lines(*new_units))
+        units_by_lower_name = units_by_name(Unit.objects.order_by('name'))
+
+        def unit_named(name):
+            return units_by_lower_name.get(str(name).lower())
+
+        for start in range(0, len(specs), batch_size):
+            batch = specs[start:start + batch_size]
+            changed_ids |= _import_batch(batch, lookups, ingredients, units, unit_named, result, batch_size)
+
+        if changed_ids:
+            recount_all()
+            CatalogVersion.bump()
+    if changed_ids:
+        notify_drinks_changed(changed_ids)
+        catalog_changed.send(sender=Drink)
+    result.seconds = time.perf_counter() - started
+    return result
+
+
+def _import_batch(specs, lookups, ingredients, units, unit_named, result, batch_size):
+    slugs = [normalize_safe_name(spec['name']) for spec in specs]
+    existing = Drink.objects.in_bulk(slugs, field_name='safe_name')
+    stored = _stored_relations([drink.pk for drink in existing.values()])
+    now = timezone.now()
+    created, updated, rewritten = [], [], []
+    for spec, slug in zip(specs, slugs):
+        drink = existing.get(slug)
+        before = None
+        if drink is not None:
+            before = _state(drink, *(stored[key][drink.pk] for key in RELATED + ('lines',)))
+        else:
+            drink = Drink(safe_name=slug)
+        drink.name = spec['name']
+        drink.instructions = spec['instructions']
+        drink.is_shot = spec['is_shot']
+        drink.category = lookups['category'][normalize_safe_name(spec['category'])] if spec['category'] else None
+        drink.glass_type = lookups['glass_type'][normalize_safe_name(spec['glass_type'])] if spec['glass_type'] else None
+        related = {
+            key: list(dict.fromkeys(lookups[key][normalize_safe_name(name)].pk for name in spec[key]))
+            for key in RELATED
+        }
+        lines = []
+        for ingredient, quantity, unit, text in spec['lines']:
+            line = DrinkIngredientsList(
+                ingredient=ingredients[normalize_safe_name(ingredient)], quantity=quantity,
+                unit=units[normalize_safe_name(unit)] if unit else None, quantity_text=text,
+            )
+            line.normalize(unit_named)
+            lines.append(line)
+        if before is not None:
+            if before == _state(drink, *(related[key] for key in RELATED), lines):
+                result.unchanged += 1
+                continue
+            drink.updated = now
+            updated.append(drink)
+        else:
+            created.append(drink)
+        rewritten.append((drink, related, lines))
+
+    if created:
+        Drink.objects.bulk_create(created, batch_size=batch_size)
+        if any(drink.pk is None for drink in created):
+            by_slug = Drink.objects.in_bulk([drink.safe_name for drink in created], field_name='safe_name')
+            for drink in created:
+                drink.pk = by_slug[drink.safe_name].pk
+    if updated:
+        Drink.objects.bulk_update(
+            updated, ['name', 'instructions', 'is_shot', 'category', 'glass_type', 'updated'], batch_size=batch_size)
+        ids = [drink.pk for drink in updated]
+        for model, _ in THROUGH.values():
+            model.objects.filter(drink_id__in=ids).delete()
+        # Skips the per-line delete signals; their work is redone for the
+        # whole import in ``import_rows``.
+        lines_qs = DrinkIngredientsList.objects.filter(drink_id__in=ids)
+        lines_qs._raw_delete(lines_qs.db)
+
+    through_rows = {key: [] for key in RELATED}
+    new_lines = []
+    for drink, related, lines in rewritten:
+        for key in RELATED:
+            model, column = THROUGH[key]
+            through_rows[key] += [model(drink_id=drink.pk, **{column: pk}) for pk in related[key]]
+        for line in lines:
+            line.drink_id = drink.pk
+            new_lines.append(line)
+    for key, objs in through_rows.items():
+        THROUGH[key][0].objects.bulk_create(objs, batch_size=batch_size)
+    DrinkIngredientsList.objects.bulk_create(new_lines, batch_size=batch_size)
+
+    result.created += len(created)
+    result.updated += len(updated)
+    return {drink.pk for drink, _, _ in rewritten}
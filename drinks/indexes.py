@@ -0,0 +1,116 @@
+"""Base class for per-process in-memory indexes over the drinks catalog.
+
+An index is built from the database on first use and checked against
+``CatalogVersion`` before every query. When the version moved it catches up
+incrementally: drinks named in ``drinks_changed`` by this process, drinks
+whose ``updated`` is past the index watermark (writes made by other
+processes) and, when the drink count no longer adds up, drinks that were
+added or deleted without touching ``updated``.
+"""
+import threading
+from datetime import timedelta
+
+from django.dispatch import receiver
+
+from drinks.models import CatalogVersion, Drink
+from drinks.signals import drinks_changed
+
+
+_registry = []
+
+
+class DrinkIndex:
+    """Subclasses implement ``clear()``, ``remove(pk)`` and ``load(ids)``.
+
+    ``load(None)`` loads every drink; ``load(ids)`` loads the given drinks and
+    must return the set of ids it found. Queries should run under ``lock``
+    after calling ``ensure_current()``.
+    """
+
+    # Drinks updated this long before the watermark are reloaded too, to
+    # cover transactions that committed out of timestamp order.
+    OVERLAP = timedelta(minutes=5)
+    # Ids per ``pk__in`` query when loading drinks.
+    BATCH_SIZE = 500
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.version = None
+        self.watermark = None
+        self.drink_ids = set()
+        self._pending = set()
+        _registry.append(self)
+
+    def clear(self):
+        raise NotImplementedError
+
+    def remove(self, pk):
+        raise NotImplementedError
+
+    def load(self, ids=None):
+        raise NotImplementedError
+
+    def reset(self):
+        with self.lock:
+            self.version = None
+
+    def mark_changed(self, drink_ids):
+        with self.lock:
+            self._pending.update(drink_ids)
+
+    def ensure_current(self, version=None):
+        """Catch up with the catalog; ``version`` is ``CatalogVersion.current()``
+        when the caller already has it (e.g. ``CatalogVersion.for_request()``)."""
+        if version is None:
+            version = CatalogVersion.current()
+        if version == self.version:
+            return
+        with self.lock:
+            if version == self.version:
+                return
+            if self.version is None:
+                self._rebuild()
+            else:
+                self._catch_up()
+            self.version = version
+
+    def batches(self, ids):
+        ids = sorted(ids)
+        for start in range(0, len(ids), self.BATCH_SIZE):
+            yield ids[start:start + self.BATCH_SIZE]
+
+    def _rebuild(self):
+        rows = list(Drink.objects.values_list('pk', 'updated'))
+        self._pending.clear()
+        self.clear()
+        self.load(None)
+        self.drink_ids = {pk for pk, _ in rows}
+        self.watermark = max((updated for _, updated in rows), default=None)
+
+    def _catch_up(self):
+        changed, self._pending = self._pending, set()
+        recent = Drink.objects.all()
+        if self.watermark is not None:
+            recent = recent.filter(updated__gte=self.watermark - self.OVERLAP)
+        for pk, updated in recent.values_list('pk', 'updated'):
+            changed.add(pk)
+            if self.watermark is None or updated > self.watermark:
+                self.watermark = updated
+        self._reload(changed)
+        if Drink.objects.count() != len(self.drink_ids):
+            current = set(Drink.objects.values_list('pk', flat=True))
+            self._reload(current ^ self.drink_ids)
+
+    def _reload(self, ids):
+        if not ids:
+            return
+        for pk in ids & self.drink_ids:
+            self.remove(pk)
+        found = self.load(ids)
+        self.drink_ids = (self.drink_ids - ids) | found
+
+
+@receiver(drinks_changed, dispatch_uid='drinks_indexes_pending')
+def queue_changed_drinks(sender, drink_ids, **kwargs):
+    for index in _registry:
+        index.mark_changed(drink_ids)
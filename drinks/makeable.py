@@ -0,0 +1,279 @@
+""""What can I make" queries over per-ingredient drink bitsets.
+
+For every ingredient the index keeps one integer used as a bitset of the
+drinks that need it (bit ``n`` is the drink with primary key ``n``), once
+for recipe lines only and once for recipe lines plus garnishes. Drinks are
+also grouped into bitsets by how many distinct ingredients they need.
+
+Given a bar stock of ``s`` ingredients, a bit-sliced counter adds up the
+stock's ``s`` columns to get, for every drink at once, how many of its
+ingredients are in stock. A drink needing ``n`` ingredients with ``h`` in
+stock is missing ``n - h``. A query therefore costs a few hundred
+whole-bitset operations regardless of how many drinks there are.
+
+With ``DRINKS_SNAPSHOT`` on, ``source()`` answers from the catalog
+snapshot's ingredient, garnish and size postings instead, with bit ``n``
+the drink at position ``n``, so the index is not built in every process.
+"""
+import itertools
+from collections import defaultdict
+
+from drinks.indexes import DrinkIndex
+from drinks.models import Drink, DrinkIngredientsList
+from drinks.snapshot import current_snapshot, snapshot_enabled
+
+
+# Seconds a query waits for the snapshot to catch up with a write before
+# it falls back to the index.
+SNAPSHOT_WAIT = 2
+
+
+def bit_positions(mask):
+    """Yield the positions of the set bits of ``mask``, lowest first."""
+    bits = format(mask, 'b')[::-1]
+    position = bits.find('1')
+    while position != -1:
+        yield position
+        position = bits.find('1', position + 1)
+
+
+def bit_sliced_count(columns):
+    """Add up bitsets into bit planes: bit ``n`` of ``planes[j]`` is bit ``j`` of drink ``n``'s count."""
+    planes = []
+    for column in columns:
+        carry = column
+        for j, plane in enumerate(planes):
+            planes[j] = plane ^ carry
+            carry &= plane
+            if not carry:
+                break
+        if carry:
+            planes.append(carry)
+    return planes
+
+
+def count_equals(planes, value):
+    """Bitset of the drinks whose count in ``planes`` is exactly ``value``."""
+    if value >> len(planes):
+        return 0
+    mask = -1
+    for j, plane in enumerate(planes):
+        mask &= plane if (value >> j) & 1 else ~plane
+    return mask
+
+
+def makeable_buckets(columns, by_size, max_missing):
+    """Bitsets of the drinks missing 0 to ``max_missing`` ingredients, given
+    the ``columns`` of the ingredients in stock and the drinks by ingredient
+    count in ``by_size``."""
+    planes = bit_sliced_count(columns)
+    buckets = [0] * (max_missing + 1)
+    for size, drinks in by_size.items():
+        if not size or not drinks:
+            continue
+        for missing in range(min(max_missing, size) + 1):
+            buckets[missing] |= drinks & count_equals(planes, size - missing)
+    return buckets
+
+
+def containing_buckets(columns, by_size):
+    """Bitsets of the drinks having every one of ``columns`` and 0, 1, ...
+    other ingredients."""
+    mask = -1
+    for column in columns:
+        mask &= column
+    buckets = defaultdict(int)
+    for size, drinks in by_size.items():
+        if size >= len(columns) and drinks & mask:
+            buckets[size - len(columns)] |= drinks & mask
+    return [buckets[extra] for extra in range(max(buckets, default=-1) + 1)]
+
+
+class MakeableIndex(DrinkIndex):
+
+    def clear(self):
+        self.names = {}
+        self.required = {}
+        self.garnish = {}
+        # Keyed by whether garnishes count as ingredients.
+        self.columns = {False: defaultdict(int), True: defaultdict(int)}
+        self.by_size = {False: defaultdict(int), True: defaultdict(int)}
+
+    def ingredients_of(self, pk, with_garnish=False):
+        required = self.required.get(pk, frozenset())
+        if with_garnish:
+            return required | self.garnish.get(pk, frozenset())
+        return required
+
+    def remove(self, pk):
+        bit = 1 << pk
+        for with_garnish in (False, True):
+            columns = self.columns[with_garnish]
+            ingredients = self.ingredients_of(pk, with_garnish)
+            for ingredient_id in ingredients:
+                columns[ingredient_id] &= ~bit
+                if not columns[ingredient_id]:
+                    del columns[ingredient_id]
+            self.by_size[with_garnish][len(ingredients)] &= ~bit
+        self.names.pop(pk, None)
+        self.required.pop(pk, None)
+        self.garnish.pop(pk, None)
+
+    def _add(self, pk, name, required, garnish):
+        self.names[pk] = name
+        self.required[pk] = frozenset(required)
+        self.garnish[pk] = frozenset(garnish)
+        bit = 1 << pk
+        for with_garnish in (False, True):
+            ingredients = self.ingredients_of(pk, with_garnish)
+            for ingredient_id in ingredients:
+                self.columns[with_garnish][ingredient_id] |= bit
+            self.by_size[with_garnish][len(ingredients)] |= bit
+
+    def load(self, ids=None):
+        garnish_through = Drink.garnish.through
+        if ids is None:
+            groups = [(Drink.objects.all(), DrinkIngredientsList.objects.all(), garnish_through.objects.all())]
+        else:
+            groups = [
+                (
+                    Drink.objects.filter(pk__in=batch),
+                    DrinkIngredientsList.objects.filter(drink_id__in=batch),
+                    garnish_through.objects.filter(drink_id__in=batch),
+                )
+                for batch in self.batches(ids)
+            ]
+        found = set()
+        for drinks, lines, garnishes in groups:
+            required, garnish = defaultdict(set), defaultdict(set)
+            for drink_id, ingredient_id in lines.values_list('drink_id', 'ingredient_id'):
+                required[drink_id].add(ingredient_id)
+            for drink_id, ingredient_id in garnishes.values_list('drink_id', 'recipeingredient_id'):
+                garnish[drink_id].add(ingredient_id)
+            for pk, name in drinks.values_list('pk', 'name'):
+                self._add(pk, name, required[pk], garnish[pk])
+                found.add(pk)
+        return found
+
+    def makeable(self, stock, max_missing=0, with_garnish=False):
+        """Drinks missing at most ``max_missing`` ingredients from ``stock``.
+
+        Returns ``[(drink id, number missing)]``, fewest missing first, then
+        by drink name. Drinks without a recipe are never returned.
+        """
+        self.ensure_current()
+        with self.lock:
+            columns = self.columns[with_garnish]
+            return self._ranked(makeable_buckets(
+                [columns[i] for i in set(stock) if i in columns], self.by_size[with_garnish], max_missing))
+
+    def containing(self, ingredients, with_garnish=False):
+        """Drinks that use every one of ``ingredients``.
+
+        Returns ``[(drink id, number of other ingredients)]``, closest to
+        ``ingredients`` first, then by drink name.
+        """
+        self.ensure_current()
+        with self.lock:
+            wanted = set(ingredients)
+            if not wanted:
+                return []
+            columns = self.columns[with_garnish]
+            return self._ranked(containing_buckets([columns.get(i, 0) for i in wanted], self.by_size[with_garnish]))
+
+    def missing(self, pk, stock, with_garnish=False):
+        """Ingredient ids of drink ``pk`` that are not in ``stock``."""
+        with self.lock:
+            return self.ingredients_of(pk, with_garnish) - set(stock)
+
+    def missing_from(self, pks, stock, with_garnish=False):
+        """``missing()`` of each of ``pks``, by drink id."""
+        return {pk: self.missing(pk, stock, with_garnish) for pk in pks}
+
+    def _ranked(self, buckets):
+        ranked = []
+        for count, mask in enumerate(buckets):
+            for pk in sorted(bit_positions(mask), key=self.names.__getitem__):
+                ranked.append((pk, count))
+        return ranked
+
+
+index = MakeableIndex()
+
+# (catalog version, {size facet: {size: bitset}}) of the last snapshot queried.
+_sizes = (None, {})
+
+
+class SnapshotMakeable:
+    """``MakeableIndex``'s queries over the postings of a catalog snapshot.
+
+    Positions are in name order, so ranked drinks need no sort. The columns
+    of the ingredients asked for are built on every query; only the drinks
+    by ingredient count are kept, for the snapshot's catalog version.
+    """
+
+    def __init__(self, snapshot):
+        self.snapshot = snapshot
+
+    def bitset(self, positions):
+        bits = bytearray(len(self.snapshot) // 8 + 1)
+        for position in positions:
+            bits[position >> 3] |= 1 << (position & 7)
+        return int.from_bytes(bits, 'little')
+
+    def column(self, ingredient_id, with_garnish):
+        positions = self.snapshot.postings('ingredient', ingredient_id)
+        if with_garnish:
+            positions = itertools.chain(positions, self.snapshot.postings('garnish', ingredient_id))
+        return self.bitset(positions)
+
+    def by_size(self, with_garnish):
+        global _sizes
+        facet = 'garnished_size' if with_garnish else 'size'
+        version, sizes = _sizes
+        if version != self.snapshot.catalog_version:
+            sizes = {}
+            _sizes = (self.snapshot.catalog_version, sizes)
+        if facet not in sizes:
+            sizes[facet] = {
+                size: self.bitset(self.snapshot.postings(facet, size)) for size in self.snapshot.values(facet)
+            }
+        return sizes[facet]
+
+    def makeable(self, stock, max_missing=0, with_garnish=False):
+        columns = [self.column(i, with_garnish) for i in set(stock)]
+        return self._ranked(makeable_buckets(columns, self.by_size(with_garnish), max_missing))
+
+    def containing(self, ingredients, with_garnish=False):
+        wanted = set(ingredients)
+        if not wanted:
+            return []
+        columns = [self.column(i, with_garnish) for i in wanted]
+        return self._ranked(containing_buckets(columns, self.by_size(with_garnish)))
+
+    def missing_from(self, pks, stock, with_garnish=False):
+        needed = {pk: set() for pk in pks}
+        rows = list(DrinkIngredientsList.objects.filter(drink_id__in=pks).values_list('drink_id', 'ingredient_id'))
+        if with_garnish:
+            rows += Drink.garnish.through.objects.filter(drink_id__in=pks).values_list('drink_id', 'recipeingredient_id')
+        for drink_id, ingredient_id in rows:
+            needed[drink_id].add(ingredient_id)
+        stock = set(stock)
+        return {pk: ingredients - stock for pk, ingredients in needed.items()}
+
+    def _ranked(self, buckets):
+        return [
+            (self.snapshot.pk_at(position), count)
+            for count, mask in enumerate(buckets) for position in bit_positions(mask)
+        ]
+
+
+def source():
+    """What answers the makeable queries: the current snapshot's postings
+    when ``DRINKS_SNAPSHOT`` is on, else (or if it stays behind a write)
+    ``index``."""
+    if snapshot_enabled():
+        snapshot = current_snapshot(wait=SNAPSHOT_WAIT)
+        if snapshot is not None:
+            return SnapshotMakeable(snapshot)
+    return index
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from drinks.importer import BATCH_SIZE, FORMATS, ImportFormatError, format_for, import_rows, read_rows
+
+
+class Command(BaseCommand):
+    help = 'Import drinks from a JSON, NDJSON or CSV file, creating or updating them by name.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='File to import.')
+        parser.add_argument('--format', choices=FORMATS, help='File format (default: from the extension, else json).')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Rows per bulk insert.')
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive integer.')
+        try:
+            with open(options['path'], 'rb') as f:
+                rows = read_rows(f.read(), options['format'] or format_for(options['path']))
+        except OSError as e:
+            raise CommandError(str(e))
+        except ImportFormatError as e:
+            raise CommandError(str(e))
+        report = import_rows(rows, batch_size=options['batch_size']).as_dict()
+        for error in report['errors']:
+            self.stdout.write(self.style.WARNING(f"Row {error['row']} ({error['name']}): {'; '.join(error['errors'])}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['rows']} rows in {report['seconds']:.2f}s ({report['rows_per_second'] or 0:.0f} rows/s): "
+            f"{report['created']} created, {report['updated']} updated, {report['unchanged']} unchanged, "
+            f"{report['failed']} failed."
+        ))
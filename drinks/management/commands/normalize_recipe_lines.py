@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from drinks.recipe_lines import BATCH_SIZE, normalize_lines
+
+
+class Command(BaseCommand):
+    help = 'Parse the quantity text of every recipe line into its stored quantity, unit and measure.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help='Lines loaded and updated per query.')
+
+    def handle(self, *args, **options):
+        updated, unparsed = normalize_lines(batch_size=options['batch_size'])
+        for pk, text in unparsed:
+            self.stdout.write(self.style.WARNING(f'Line {pk}: could not parse {text!r}'))
+        self.stdout.write(self.style.SUCCESS(f'Normalized {updated} recipe lines; {len(unparsed)} could not be parsed.'))
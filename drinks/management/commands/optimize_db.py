@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from drinks.sqlite import enable_incremental_vacuum, maintain
+
+
+class Command(BaseCommand):
+    help = (
+        'Maintain the SQLite database: refresh the query planner statistics, checkpoint the WAL '
+        'and release free pages. Safe to run from cron while the API is serving.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Database alias (default: "default").')
+        parser.add_argument('--analyze', action='store_true', help='Run a full ANALYZE instead of PRAGMA optimize.')
+        parser.add_argument(
+            '--pages', type=int, default=None,
+            help='Release at most this many free pages per run (default: all).',
+        )
+        parser.add_argument(
+            '--enable-incremental-vacuum', action='store_true',
+            help='Switch the database to auto_vacuum=INCREMENTAL first. Rewrites the file with VACUUM, '
+                 'which holds the write lock until it finishes.',
+        )
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if connection.vendor != 'sqlite':
+            raise CommandError(f'Database "{options["database"]}" is not SQLite.')
+        if options['pages'] is not None and options['pages'] < 1:
+            raise CommandError('--pages must be a positive integer.')
+        if options['enable_incremental_vacuum']:
+            enable_incremental_vacuum(connection)
+            self.stdout.write('Switched to auto_vacuum=INCREMENTAL.')
+        report = maintain(connection, analyze=options['analyze'], vacuum_pages=options['pages'])
+        self.stdout.write(f'Statistics: {"ANALYZE" if report["analyzed"] == "full" else "PRAGMA optimize"}')
+        released = max(report['free_before'] - report['free_after'], 0)
+        if report['auto_vacuum'] == 'incremental':
+            self.stdout.write(
+                f'Released {released} of {report["free_before"]} free pages '
+                f'({released * report["page_size"] // 1024} KiB).'
+            )
+        elif report['free_before']:
+            self.stdout.write(self.style.WARNING(
+                f'{report["free_before"]} free pages are kept in the file (auto_vacuum={report["auto_vacuum"]}); '
+                'run with --enable-incremental-vacuum once to release them.'
+            ))
+        if report['checkpoint'][0]:
+            self.stdout.write(self.style.WARNING('The WAL checkpoint was blocked by a reader; it will run next time.'))
+        self.stdout.write(self.style.SUCCESS('Database maintenance done.'))
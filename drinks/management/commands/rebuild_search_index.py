@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from drinks.search import rebuild_index, search_enabled
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index for drinks from the catalog tables.'
+
+    def handle(self, *args, **options):
+        if not search_enabled():
+            raise CommandError('The search index table is missing; run migrate on an SQLite database first.')
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} drinks.'))
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from drinks.counters import recount_all
+
+
+class Command(BaseCommand):
+    help = 'Recompute the usage counts stored on tags, ingredients, garnishes, glass types, units and preparation methods.'
+
+    def handle(self, *args, **options):
+        for counter, rows in recount_all().items():
+            self.stdout.write(f'{counter}: {rows} rows')
+        self.stdout.write(self.style.SUCCESS('Usage counts recomputed.'))
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+from drinks.replicas import refresh, replicas
+
+
+class Command(BaseCommand):
+    help = 'Copy the database onto the read replicas in DRINKS_READ_REPLICAS with the SQLite online backup API.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval', type=float, default=0,
+            help='Keep refreshing every this many seconds (default: refresh once and exit).',
+        )
+
+    def handle(self, *args, **options):
+        if connections[DEFAULT_DB_ALIAS].vendor != 'sqlite':
+            raise CommandError('Read replicas need an SQLite database.')
+        if not replicas():
+            raise CommandError('No read replicas are configured; set DRINKS_READ_REPLICAS.')
+        if options['interval'] < 0:
+            raise CommandError('--interval must not be negative.')
+        while True:
+            started = time.monotonic()
+            for alias, path in replicas().items():
+                try:
+                    elapsed = refresh(path)
+                except Exception as e:
+                    if not options['interval']:
+                        raise CommandError(f'Cannot refresh {alias} ({path}): {e}')
+                    self.stderr.write(f'Cannot refresh {alias} ({path}): {e}')
+                    continue
+                self.stdout.write(f'{alias}: refreshed {path} in {elapsed * 1000:.0f} ms')
+            if not options['interval']:
+                break
+            self.stdout.flush()
+            time.sleep(max(options['interval'] - (time.monotonic() - started), 0))
+        self.stdout.write(self.style.SUCCESS('Replicas refreshed.'))
@@ -0,0 +1,95 @@
+import os
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from drinks.server import GRACEFUL_TIMEOUT, KEEP_ALIVE, THREADS, Server, parse_bind, preload, warm_caches, with_static_files
+
+
+class Command(BaseCommand):
+    help = 'Run the API on gunicorn with pre-forked WSGI (or ASGI) workers, for production.'
+
+    # Checked in handle(), once the server mode has been applied to the settings.
+    requires_system_checks = []
+
+    def add_arguments(self, parser):
+        parser.add_argument('--bind', default='0.0.0.0:8000', help='host:port to listen on (default: 0.0.0.0:8000).')
+        parser.add_argument(
+            '--workers', type=int, default=int(os.environ.get('WEB_CONCURRENCY') or 0) or os.cpu_count() or 1,
+            help='Worker processes (default: $WEB_CONCURRENCY, else the number of CPUs).',
+        )
+        parser.add_argument('--threads', type=int, default=THREADS, help=f'Threads per WSGI worker (default: {THREADS}).')
+        parser.add_argument('--asgi', action='store_true', help='Serve config.asgi with uvicorn workers.')
+        parser.add_argument(
+            '--max-requests', type=int, default=1000,
+            help='Requests a worker serves before it is replaced (0: never).',
+        )
+        parser.add_argument(
+            '--max-requests-jitter', type=int, default=100,
+            help='Up to this many more requests per worker, so workers do not restart together.',
+        )
+        parser.add_argument(
+            '--graceful-timeout', type=int, default=GRACEFUL_TIMEOUT,
+            help=f'Seconds stopping workers get to finish their requests before they are killed (default: {GRACEFUL_TIMEOUT}).',
+        )
+        parser.add_argument(
+            '--keep-alive', type=int, default=KEEP_ALIVE,
+            help=f'Seconds an idle keep-alive connection is kept open (default: {KEEP_ALIVE}).',
+        )
+        parser.add_argument(
+            '--nostatic', action='store_false', dest='use_static_handler',
+            help='Do not serve STATIC_URL (e.g. when a proxy in front serves it).',
+        )
+
+    def handle(self, *args, **options):
+        if options['workers'] < 1 or options['threads'] < 1:
+            raise CommandError('--workers and --threads must be positive integers.')
+        if options['max_requests'] < 0 or options['max_requests_jitter'] < 0:
+            raise CommandError('--max-requests and --max-requests-jitter must not be negative.')
+        try:
+            host, port = parse_bind(options['bind'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        if options['asgi']:
+            try:
+                import uvicorn  # noqa: F401
+            except ImportError:
+                raise CommandError('--asgi needs uvicorn (pip install uvicorn).')
+            # As config.asgi does, before the URL conf is imported.
+            if 'DRINKS_ASYNC_READS' not in os.environ:
+                settings.DRINKS_ASYNC_READS = True
+        self.check()
+
+        started = time.perf_counter()
+        if options['asgi']:
+            from django.core.asgi import get_asgi_application
+            app, warmed = preload(get_asgi_application)
+        else:
+            from django.core.servers.basehttp import get_internal_wsgi_application
+            app, warmed = preload(get_internal_wsgi_application)
+        self.log(f'Preloaded the app in {(time.perf_counter() - started) * 1000:.0f} ms.')
+        if not warmed:
+            self.log(self.style.WARNING('The database is not ready; the caches will be loaded on first use.'))
+        if options['use_static_handler'] and 'django.contrib.staticfiles' in settings.INSTALLED_APPS:
+            app = with_static_files(app, asgi=options['asgi'])
+
+        mode = 'asgi' if options['asgi'] else 'wsgi'
+        self.log(self.style.SUCCESS(f'Serving on http://{options["bind"]}/ ({mode}, {options["workers"]} workers).'))
+        Server(
+            app,
+            f'[{host}]:{port}' if ':' in host else f'{host}:{port}',
+            options['workers'],
+            asgi=options['asgi'],
+            threads=options['threads'],
+            max_requests=options['max_requests'],
+            max_requests_jitter=options['max_requests_jitter'],
+            graceful_timeout=options['graceful_timeout'],
+            keep_alive=options['keep_alive'],
+            warm=warm_caches,
+            log=self.log,
+        ).run()
+
+    def log(self, message):
+        self.stdout.write(message)
+        self.stdout.flush()
@@ -0,0 +1,107 @@
+"""Quantity parsing and display for recipe lines.
+
+A recipe line shows as ``"<ingredient> <measure>"``, where the measure comes
+from the line's ``quantity`` and ``unit`` or, when the quantity is missing,
+from its free-text ``quantity_text`` (``"1 1/2 oz"``, ``"dash"``). These
+helpers run when a line is written, so reads only use the stored
+``DrinkIngredientsList.measure``. They take the unit lookup as a callable,
+so migrations can use them with historical models.
+"""
+import re
+from fractions import Fraction
+
+
+MEASURE_RE = re.compile(r"^(?P<num>\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)\s*(?P<unit>.+)$")
+
+
+def parse_measure(text: str):
+    """Split ``text`` into ``(quantity, unit name)``; quantity is None when
+    it does not start with a number."""
+    if not text:
+        return (None, None)
+    s = text.strip().replace('\u00bd', '1/2')
+    if s.lower() in ('to taste', 'top', 'taste', 'dash', 'dashes', 'pinch'):
+        return (None, s)
+    m = MEASURE_RE.match(s)
+    if not m:
+        return (None, s)
+    num = m.group('num')
+    unit = m.group('unit').strip()
+    try:
+        if ' ' in num:
+            whole, frac = num.split()
+            quantity = int(whole) + float(Fraction(frac))
+        elif '/' in num:
+            quantity = float(Fraction(num))
+        else:
+            quantity = float(num)
+            if quantity.is_integer():
+                quantity = int(quantity)
+    except Exception:
+        return (None, s)
+    return (quantity, unit)
+
+
+def units_by_name(units):
+    """Index ``units`` by lower-cased name, the first of equal names winning."""
+    index = {}
+    for unit in units:
+        index.setdefault(unit.name.lower(), unit)
+    return index
+
+
+def unit_label(unit, quantity) -> str:
+    """``unit``'s name, pluralized unless ``quantity`` is one."""
+    unit_name = (getattr(unit, 'name', None) or '').strip()
+    if not unit_name:
+        return ''
+    try:
+        is_one = float(quantity) == 1
+    except Exception:
+        is_one = False
+    if is_one:
+        return unit_name
+    if getattr(unit, 'plural', None):
+        return unit.plural
+    if unit_name.endswith('ch') or unit_name.endswith('sh') or unit_name.endswith('x') or unit_name.endswith('s'):
+        return unit_name + 'es'
+    if unit_name.endswith('y') and len(unit_name) > 1 and unit_name[-2] not in 'aeiou':
+        return unit_name[:-1] + 'ies'
+    return unit_name + 's'
+
+
+def format_measure(quantity, unit, quantity_text='') -> str:
+    if quantity is None:
+        return (quantity_text or '').strip()
+    try:
+        qty_str = format(float(quantity), 'g')
+    except Exception:
+        qty_str = str(quantity)
+    label = unit_label(unit, quantity)
+    return f"{qty_str} {label}" if label else qty_str
+
+
+def normalize(quantity, unit, quantity_text, unit_named):
+    """Resolve a recipe line's measure.
+
+    Returns ``(quantity, unit, measure, understood)``. A missing quantity and
+    unit are filled from ``quantity_text`` (the unit through ``unit_named``,
+    which maps a name to a unit or None); the quantity is only filled
+    together with a unit, so a line naming an unknown unit is parsed again
+    once that unit exists. ``understood`` is False for text that did not
+    resolve to a quantity and unit.
+    """
+    text = (quantity_text or '').strip()
+    if quantity is not None or not text:
+        return quantity, unit, format_measure(quantity, unit, text), True
+    parsed_qty, parsed_unit = parse_measure(text)
+    resolved = unit
+    if parsed_unit and unit is None:
+        try:
+            resolved = unit_named(parsed_unit)
+        except Exception:
+            resolved = None
+    measure = format_measure(parsed_qty, resolved, text)
+    if parsed_qty is None or resolved is None:
+        return quantity, resolved, measure, False
+    return parsed_qty, resolved, measure, True
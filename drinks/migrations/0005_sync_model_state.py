@@ -0,0 +1,69 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Record model options and the DrinkIngredient -> DrinkIngredientsList
+    rename in the migration state. The table is unchanged, so nothing runs
+    against the database.
+    """
+
+    dependencies = [
+        ('drinks', '0004_alter_category_options_alter_drink_options_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='category',
+            options={'ordering': ['name'], 'verbose_name': 'Category', 'verbose_name_plural': 'Categories'},
+        ),
+        migrations.AlterModelOptions(
+            name='drink',
+            options={'ordering': ['name']},
+        ),
+        migrations.AlterModelOptions(
+            name='glasstype',
+            options={'ordering': ['name']},
+        ),
+        migrations.AlterModelOptions(
+            name='preparationmethod',
+            options={'ordering': ['name']},
+        ),
+        migrations.AlterModelOptions(
+            name='recipeingredient',
+            options={'ordering': ['name']},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['name']},
+        ),
+        migrations.AlterModelOptions(
+            name='unit',
+            options={'ordering': ['name']},
+        ),
+        migrations.SeparateDatabaseAndState(
+            database_operations=[],
+            state_operations=[
+                migrations.CreateModel(
+                    name='DrinkIngredientsList',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('quantity', models.FloatField(blank=True, null=True)),
+                        ('quantity_text', models.CharField(blank=True, default='', max_length=100)),
+                        ('drink', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='recipe_ingredients', to='drinks.drink')),
+                        ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_query_name='drinkingredient', to='drinks.recipeingredient')),
+                        ('unit', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='drinks.unit')),
+                    ],
+                    options={
+                        'verbose_name': 'Recipe ingredient',
+                        'verbose_name_plural': 'Recipe ingredients',
+                        'db_table': 'drinks_drinkingredient',
+                        'ordering': ['id'],
+                    },
+                ),
+                migrations.DeleteModel(
+                    name='DrinkIngredient',
+                ),
+            ],
+        ),
+    ]
@@ -0,0 +1,59 @@
+import re
+
+from django.db import migrations, models
+
+
+NAMED_MODELS = ['category', 'drink', 'glasstype', 'preparationmethod', 'recipeingredient', 'tag', 'unit']
+
+
+def _normalize(name):
+    slug = re.sub(r'[^0-9A-Za-z]+', '_', str(name or '')).strip('_').lower()
+    return slug or None
+
+
+def backfill_safe_names(apps, schema_editor):
+    """Populate safe_name for existing rows.
+
+    Rows whose names already collide keep working: the oldest row owns the
+    plain slug and later ones get ``_<pk>`` appended.
+    """
+    for model_name in NAMED_MODELS:
+        model = apps.get_model('drinks', model_name)
+        taken = set()
+        changed = []
+        for obj in model.objects.order_by('pk').only('pk', 'name'):
+            slug = _normalize(obj.name)
+            if slug and slug in taken:
+                slug = f'{slug}_{obj.pk}'
+            if slug:
+                taken.add(slug)
+            obj.safe_name = slug
+            changed.append(obj)
+        model.objects.bulk_update(changed, ['safe_name'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drinks', '0005_sync_model_state'),
+    ]
+
+    operations = [
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name='safe_name',
+                field=models.CharField(blank=True, editable=False, max_length=200, null=True),
+            )
+            for model_name in NAMED_MODELS
+        ],
+        migrations.RunPython(backfill_safe_names, migrations.RunPython.noop),
+        *[
+            migrations.AlterField(
+                model_name=model_name,
+                name='safe_name',
+                field=models.CharField(blank=True, editable=False, max_length=200, null=True, unique=True),
+            )
+            for model_name in NAMED_MODELS
+        ],
+    ]
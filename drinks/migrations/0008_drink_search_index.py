@@ -0,0 +1,44 @@
+from django.db import migrations
+
+
+CREATE_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS drinks_drinksearch USING fts5(
+    name, instructions, ingredients, garnish, tags,
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+)
+"""
+
+POPULATE_SQL = """
+INSERT INTO drinks_drinksearch (rowid, name, instructions, ingredients, garnish, tags)
+SELECT d.id, d.name, d.instructions,
+    (SELECT group_concat(i.name, ' ') FROM drinks_drinkingredient l JOIN drinks_recipeingredient i ON i.id = l.ingredient_id WHERE l.drink_id = d.id),
+    (SELECT group_concat(i.name, ' ') FROM drinks_drink_garnish g JOIN drinks_recipeingredient i ON i.id = g.recipeingredient_id WHERE g.drink_id = d.id),
+    (SELECT group_concat(t.name, ' ') FROM drinks_drink_tags dt JOIN drinks_tag t ON t.id = dt.tag_id WHERE dt.drink_id = d.id)
+FROM drinks_drink d
+"""
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other databases fall back to icontains search.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute(CREATE_SQL)
+    schema_editor.execute(POPULATE_SQL)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    schema_editor.execute('DROP TABLE IF EXISTS drinks_drinksearch')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drinks', '0007_catalog_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,47 @@
+from django.db import migrations, models
+
+
+def count_usage(apps, schema_editor):
+    from drinks.counters import recount_all
+    recount_all(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drinks', '0008_drink_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='glasstype',
+            name='drink_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='preparationmethod',
+            name='drink_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='drink_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='recipeingredient',
+            name='garnish_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='drink_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='unit',
+            name='drink_count',
+            field=models.PositiveIntegerField(db_index=True, default=0, editable=False),
+        ),
+        migrations.RunPython(count_usage, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations, models
+
+
+def normalize(apps, schema_editor):
+    from drinks.recipe_lines import normalize_lines
+    normalize_lines(apps=apps)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('drinks', '0009_usage_counts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='drinkingredientslist',
+            name='measure',
+            field=models.CharField(blank=True, default='', editable=False, max_length=200),
+        ),
+        migrations.RunPython(normalize, migrations.RunPython.noop),
+    ]
@@ -1,11 +1,82 @@
 from __future__ import annotations
 
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.db.models import F
 from django.db.models.signals import post_migrate
 from django.dispatch import receiver
+from django.utils import timezone
+
+from drinks.measures import normalize as normalize_measure
+
+
+def safe_name_from(text: str) -> str:
+    if text is None:
+        return ''
+    return re.sub(r'[^0-9A-Za-z]+', '_', str(text)).strip('_')
+
+
+def normalize_safe_name(text: str) -> str | None:
+    """Return the value stored in ``safe_name`` for a name or URL segment."""
+    slug = safe_name_from(text).lower()
+    return slug or None
+
+
+class SafeNamedModel(models.Model):
+    """Base for models addressed in URLs by a normalized version of their name.
+
+    ``safe_name`` is kept in sync on save and is unique, so two names that map
+    to the same URL segment are rejected when written instead of shadowing
+    each other when read.
+    """
+    safe_name = models.CharField(max_length=200, unique=True, null=True, blank=True, editable=False)
+
+    # Fields copied into serialized drinks; changing one of them changes
+    # every drink that references the row.
+    display_fields = ('name',)
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_display = instance.display_values()
+        return instance
+
+    def display_values(self):
+        return tuple(self.__dict__.get(f) for f in self.display_fields)
+
+    def display_changed(self) -> bool:
+        return getattr(self, '_loaded_display', None) != self.display_values()
+
+    def clean(self):
+        super().clean()
+        self.safe_name = normalize_safe_name(self.name)
+        self.validate_safe_name()
+
+    def validate_safe_name(self):
+        if not self.safe_name:
+            return
+        clash = type(self)._base_manager.filter(safe_name=self.safe_name).exclude(pk=self.pk).first()
+        if clash is not None:
+            raise ValidationError({
+                'name': f"'{self.name}' conflicts with existing '{clash.name}' (both resolve to '{self.safe_name}').",
+            })
+
+    def save(self, *args, **kwargs):
+        self.safe_name = normalize_safe_name(self.name)
+        self.validate_safe_name()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'name' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'safe_name'}
+        super().save(*args, **kwargs)
 
 
-class Category(models.Model):
+class Category(SafeNamedModel):
     name = models.CharField(max_length=100, unique=True)
 
 
@@ -21,8 +92,10 @@ class Category(models.Model):
         super().save(*args, **kwargs)
 
 
-class GlassType(models.Model):
+class GlassType(SafeNamedModel):
     name = models.CharField(max_length=100, unique=True)
+    # Distinct drinks using the row, kept by ``drinks.counters``.
+    drink_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
 
     def __str__(self) -> str:
         return self.name
@@ -30,9 +103,13 @@ class GlassType(models.Model):
         ordering = ['name']
 
 
-class RecipeIngredient(models.Model):
+class RecipeIngredient(SafeNamedModel):
     name = models.CharField(max_length=200, unique=True)
     details = models.CharField(max_length=200, blank=True, default='')
+    # Distinct drinks using the row in recipe lines and as a garnish, kept
+    # by ``drinks.counters``.
+    drink_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+    garnish_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
 
     def __str__(self) -> str:
         return self.name
@@ -40,8 +117,10 @@ class RecipeIngredient(models.Model):
         ordering = ['name']
 
 
-class Tag(models.Model):
+class Tag(SafeNamedModel):
     name = models.CharField(max_length=100, unique=True)
+    # Distinct drinks using the row, kept by ``drinks.counters``.
+    drink_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
 
     def __str__(self) -> str:
         return self.name
@@ -49,8 +128,10 @@ class Tag(models.Model):
         ordering = ['name']
 
 
-class PreparationMethod(models.Model):
+class PreparationMethod(SafeNamedModel):
     name = models.CharField(max_length=100, unique=True)
+    # Distinct drinks using the row, kept by ``drinks.counters``.
+    drink_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
 
     def __str__(self) -> str:
         return self.name
@@ -58,9 +139,13 @@ class PreparationMethod(models.Model):
         ordering = ['name']
 
 
-class Unit(models.Model):
+class Unit(SafeNamedModel):
     name = models.CharField(max_length=50, unique=True)
     plural = models.CharField(max_length=50, blank=True, default='')
+    # Distinct drinks using the row, kept by ``drinks.counters``.
+    drink_count = models.PositiveIntegerField(default=0, db_index=True, editable=False)
+
+    display_fields = ('name', 'plural')
 
     def __str__(self) -> str:
         return self.name
@@ -79,7 +164,7 @@ class Unit(models.Model):
         return f"{quantity} {plural}"
 
 
-class Drink(models.Model):
+class Drink(SafeNamedModel):
     name = models.CharField(max_length=200)
     image = models.ImageField(upload_to='drinks/', null=True, blank=True)
     instructions = models.TextField(blank=True, default='')
@@ -107,6 +192,8 @@ class DrinkIngredientsList(models.Model):
     quantity = models.FloatField(null=True, blank=True)
     unit = models.ForeignKey(Unit, on_delete=models.SET_NULL, null=True, blank=True)
     quantity_text = models.CharField(max_length=100, blank=True, default='')
+    # Display of the quantity and unit ("2 oz", "dash"), set on save.
+    measure = models.CharField(max_length=200, blank=True, default='', editable=False)
 
     class Meta:
         verbose_name = 'Recipe ingredient'
@@ -117,6 +204,25 @@ class DrinkIngredientsList(models.Model):
     def __str__(self) -> str:
         return f"{self.ingredient} for {self.drink}"
 
+    def normalize(self, unit_named=None) -> bool:
+        """Fill ``quantity``/``unit`` from ``quantity_text`` and set ``measure``.
+
+        Returns False when the text did not resolve to a quantity and unit.
+        """
+        if unit_named is None:
+            unit_named = lambda name: Unit.objects.filter(name__iexact=name).first()
+        unit = self.unit if self.unit_id is not None else None
+        self.quantity, self.unit, self.measure, understood = normalize_measure(
+            self.quantity, unit, self.quantity_text, unit_named)
+        return understood
+
+    def save(self, *args, **kwargs):
+        self.normalize()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = set(update_fields) | {'quantity', 'unit', 'measure'}
+        super().save(*args, **kwargs)
+
 
 class Cocktail(Drink):
     class Meta:
@@ -132,19 +238,82 @@ class GarnishIngredient(RecipeIngredient):
         verbose_name_plural = 'Garnish Ingredients'
 
 
+class CatalogVersion(models.Model):
+    """Single-row counter bumped by every write to the drinks catalog.
+
+    Read endpoints derive their ETag/Last-Modified validators from it, so a
+    conditional GET costs one primary-key lookup.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated = models.DateTimeField(default=timezone.now)
+
+    ROW_ID = 1
+
+    def __str__(self) -> str:
+        return f"v{self.version}"
+
+    @classmethod
+    def current(cls, using=None):
+        """Return ``(version, updated)`` for the catalog (from the ``using`` database)."""
+        row = cls.objects.db_manager(using).filter(pk=cls.ROW_ID).values_list('version', 'updated').first()
+        if row is None:
+            return (0, datetime(1970, 1, 1, tzinfo=dt_timezone.utc))
+        return row
+
+    @classmethod
+    async def acurrent(cls):
+        """``current()`` through the async ORM."""
+        row = await cls.objects.filter(pk=cls.ROW_ID).values_list('version', 'updated').afirst()
+        if row is None:
+            return (0, datetime(1970, 1, 1, tzinfo=dt_timezone.utc))
+        return row
+
+    @classmethod
+    def for_request(cls, request):
+        """``current()``, read at most once per request."""
+        try:
+            return request._catalog_version
+        except AttributeError:
+            request._catalog_version = cls.current()
+            return request._catalog_version
+
+    @classmethod
+    async def afor_request(cls, request):
+        """``for_request()`` for async views."""
+        try:
+            return request._catalog_version
+        except AttributeError:
+            request._catalog_version = await cls.acurrent()
+            return request._catalog_version
+
+    @classmethod
+    def bump(cls):
+        now = timezone.now()
+        if not cls.objects.filter(pk=cls.ROW_ID).update(version=F('version') + 1, updated=now):
+            cls.objects.get_or_create(pk=cls.ROW_ID, defaults={'version': 1, 'updated': now})
+
+
 @receiver(post_migrate)
 def create_default_categories(sender, **kwargs):
     if sender and getattr(sender, 'name', '') != 'drinks':
         return
+    # Use the migration state's model: when migrating to an older target the
+    # live model may have columns that do not exist yet.
+    apps = kwargs.get('apps')
+    model = apps.get_model('drinks', 'Category') if apps is not None else Category
+    has_safe_name = any(f.name == 'safe_name' for f in model._meta.get_fields())
     defaults = ['Cocktails Throughout History', 'Shots', 'My Recipes']
     for name in defaults:
-        existing = Category.objects.filter(name__iexact=name).first()
+        extra = {'safe_name': normalize_safe_name(name)} if has_safe_name else {}
+        existing = model.objects.filter(name__iexact=name).first()
         if existing:
             if existing.name != name:
                 try:
                     existing.name = name
+                    for field, value in extra.items():
+                        setattr(existing, field, value)
                     existing.save()
                 except Exception:
                     pass
         else:
-            Category.objects.create(name=name)
+            model.objects.create(name=name, **extra)
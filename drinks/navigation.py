@@ -0,0 +1,42 @@
+"""Navigation fragments and home payloads built once per site address.
+
+The nav bar, the random-recipe button and the ``/api/`` payload are made of
+absolute URLs and nothing else, so they only differ between the scheme, host
+and script prefix a request came in on. ``fragments`` builds each of them
+once per such address and keeps the results in a bounded LRU, emptied when
+Django's URL resolver is rebuilt (``clear_url_caches()``).
+"""
+from django.urls import get_resolver, get_script_prefix, get_urlconf
+
+from drinks.breadcrumbs import LRU
+
+
+# Fragments kept per process, across all addresses.
+MAX_FRAGMENTS = 256
+
+
+class FragmentCache:
+
+    def __init__(self, max_fragments=MAX_FRAGMENTS):
+        self.fragments = LRU(max_fragments)
+
+    def clear(self):
+        self.fragments.clear()
+
+    def key(self, request, name):
+        return (name, request.scheme, request.get_host(), get_script_prefix())
+
+    def get(self, request, name, build):
+        """Return fragment ``name`` for ``request``, calling ``build(request)`` on a miss."""
+        if request is None:
+            return build(request)
+        state = get_resolver(get_urlconf())
+        key = self.key(request, name)
+        fragment = self.fragments.get(state, key)
+        if fragment is None:
+            fragment = build(request)
+            self.fragments.set(state, key, fragment)
+        return fragment
+
+
+fragments = FragmentCache()
@@ -0,0 +1,93 @@
+"""Keeps the stored recipe-line measures in step with the unit table.
+
+``DrinkIngredientsList.save()`` normalizes a single line; ``normalize_lines``
+does the same for many lines in batches of ``bulk_update`` (for the
+``normalize_recipe_lines`` command, the migration that added ``measure`` and
+rows written with ``bulk_create``). Renaming, re-pluralizing, adding or
+deleting a unit re-normalizes the lines that show it or may now resolve it.
+"""
+from django.apps import apps as global_apps
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from drinks.counters import recount
+from drinks.measures import normalize, units_by_name
+from drinks.models import DrinkIngredientsList, Unit
+
+
+BATCH_SIZE = 500
+
+
+def normalize_lines(lines=None, batch_size=BATCH_SIZE, apps=global_apps):
+    """Normalize ``lines`` (a queryset; all lines if None) and save the changes.
+
+    Returns ``(updated, unparsed)``: the number of rows written and the
+    ``(pk, quantity_text)`` of lines whose text did not resolve to a quantity
+    and unit. ``apps`` may be a migration state.
+    """
+    Line = apps.get_model('drinks', 'DrinkIngredientsList')
+    units = units_by_name(apps.get_model('drinks', 'Unit').objects.order_by('name'))
+    units_by_pk = {unit.pk: unit for unit in units.values()}
+
+    def unit_named(name):
+        return units.get(str(name).lower())
+
+    if lines is None:
+        lines = Line.objects.all()
+    lines = lines.order_by('pk')
+    updated, unparsed, touched_units = 0, [], set()
+    last = None
+    while True:
+        batch = list((lines if last is None else lines.filter(pk__gt=last))[:batch_size])
+        if not batch:
+            break
+        last = batch[-1].pk
+        changed = []
+        for line in batch:
+            before = (line.quantity, line.unit_id, line.measure)
+            unit = units_by_pk.get(line.unit_id) if line.unit_id is not None else None
+            quantity, unit, measure, understood = normalize(line.quantity, unit, line.quantity_text, unit_named)
+            if not understood:
+                unparsed.append((line.pk, line.quantity_text))
+            line.quantity, line.unit, line.measure = quantity, unit, measure
+            if (line.quantity, line.unit_id, line.measure) != before:
+                touched_units.update({before[1], line.unit_id})
+                changed.append(line)
+        if changed:
+            Line.objects.bulk_update(changed, ['quantity', 'unit', 'measure'])
+            updated += len(changed)
+    if touched_units:
+        recount('Unit', 'drink_count', touched_units, apps=apps)
+    return updated, unparsed
+
+
+def unit_lines(*units):
+    """Lines showing one of ``units`` or whose text may name it."""
+    return DrinkIngredientsList.objects.filter(
+        Q(unit__in=units) | (Q(unit__isnull=True, quantity__isnull=True) & ~Q(quantity_text=''))
+    )
+
+
+@receiver(pre_save, sender=Unit, dispatch_uid='drinks_recipe_lines_unit_saving')
+def unit_saving(sender, instance, raw=False, **kwargs):
+    # ``drinks.signals`` resets the loaded display values after saving.
+    instance._measures_stale = not raw and (instance._state.adding or instance.display_changed())
+
+
+@receiver(post_save, sender=Unit, dispatch_uid='drinks_recipe_lines_unit_saved')
+def unit_saved(sender, instance, **kwargs):
+    if instance.__dict__.pop('_measures_stale', False):
+        normalize_lines(unit_lines(instance))
+
+
+@receiver(pre_delete, sender=Unit, dispatch_uid='drinks_recipe_lines_unit_deleting')
+def unit_deleting(sender, instance, **kwargs):
+    instance._measure_line_ids = list(DrinkIngredientsList.objects.filter(unit=instance).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Unit, dispatch_uid='drinks_recipe_lines_unit_deleted')
+def unit_deleted(sender, instance, **kwargs):
+    ids = getattr(instance, '_measure_line_ids', ())
+    if ids:
+        normalize_lines(DrinkIngredientsList.objects.filter(pk__in=ids))
@@ -0,0 +1,192 @@
+"""Read replicas of the SQLite database.
+
+``DRINKS_READ_REPLICAS`` (``alias -> file``, set from the comma-separated
+``DRINKS_READ_REPLICAS`` environment variable) adds one read-only database
+per replica file. ``manage.py refresh_replicas`` copies the primary onto
+them with SQLite's online backup API, once or every ``--interval`` seconds.
+
+``ReadReplicaMiddleware`` picks the database for a request's reads:
+
+- A replica for GET, HEAD and OPTIONS requests outside ``/admin/``.
+- The primary for writes, and for every read a write request makes
+  (validation, lookups, the response).
+- The primary for reads inside a transaction, and for reads made outside a
+  request, such as the writer thread, commands and warm-up.
+- The primary for a client that wrote in the last
+  ``DRINKS_REPLICA_STICKY_SECONDS``, so it reads its own writes before the
+  next refresh. Successful writes set the ``drinks_primary_until`` cookie
+  and the ``X-Drinks-Primary-Until`` header to the end of that window.
+  Clients without cookies send the header back.
+
+``ReadReplicaRouter`` sends only the drinks app's models to the replica.
+Sessions and users always come from the primary.
+"""
+import os
+import random
+import sqlite3
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+STICKY_COOKIE = 'drinks_primary_until'
+STICKY_HEADER = 'X-Drinks-Primary-Until'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+# Alias of the replica this request reads from, None for the primary.
+_read_db = ContextVar('drinks_read_db', default=None)
+
+
+def replicas():
+    return getattr(settings, 'DRINKS_READ_REPLICAS', {})
+
+
+def read_db():
+    """The replica alias this request's reads go to, or None for the primary."""
+    return _read_db.get()
+
+
+def sticky_seconds():
+    return getattr(settings, 'DRINKS_REPLICA_STICKY_SECONDS', 15)
+
+
+def sticky_until(request):
+    """The end of the request's read-your-writes window, as a timestamp (0: none)."""
+    value = request.headers.get(STICKY_HEADER) or request.COOKIES.get(STICKY_COOKIE)
+    try:
+        return float(value or 0)
+    except ValueError:
+        return 0
+
+
+def read_db_for(request):
+    """The replica alias ``request`` reads from, or None for the primary."""
+    if request.method not in SAFE_METHODS or request.path.startswith('/admin/'):
+        return None
+    if sticky_until(request) > time.time():
+        return None
+    available = [alias for alias, path in replicas().items() if os.path.exists(path)]
+    return random.choice(available) if available else None
+
+
+def mark_written(response):
+    until = int(time.time() + sticky_seconds()) + 1
+    response.set_cookie(STICKY_COOKIE, str(until), max_age=sticky_seconds() + 1, httponly=True, samesite='Lax')
+    response[STICKY_HEADER] = str(until)
+
+
+class ReadReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not replicas():
+            return self.get_response(request)
+        alias = read_db_for(request)
+        token = _read_db.set(alias)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_db.reset(token)
+        return self.finish(request, response, alias)
+
+    async def __acall__(self, request):
+        if not replicas():
+            return await self.get_response(request)
+        alias = read_db_for(request)
+        token = _read_db.set(alias)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_db.reset(token)
+        return self.finish(request, response, alias)
+
+    def finish(self, request, response, alias):
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            mark_written(response)
+        if alias is not None and response.streaming:
+            # Streamed bodies (the export) query as they are sent.
+            if response.is_async:
+                response.streaming_content = astreamed(alias, response.streaming_content)
+            else:
+                response.streaming_content = streamed(alias, response.streaming_content)
+        return response
+
+
+def streamed(alias, content):
+    chunks = iter(content)
+    while True:
+        token = _read_db.set(alias)
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        finally:
+            _read_db.reset(token)
+        yield chunk
+
+
+async def astreamed(alias, content):
+    chunks = aiter(content)
+    while True:
+        token = _read_db.set(alias)
+        try:
+            chunk = await anext(chunks)
+        except StopAsyncIteration:
+            return
+        finally:
+            _read_db.reset(token)
+        yield chunk
+
+
+class ReadReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_db.get()
+        if alias is None or model._meta.app_label != 'drinks':
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, **hints):
+        # Replicas get their schema with the data.
+        if db in replicas():
+            return False
+        return None
+
+
+def refresh(path, using=DEFAULT_DB_ALIAS):
+    """Copy the ``using`` database onto the replica file ``path``; returns the seconds taken.
+
+    The copy is one backup step, so readers of the replica see either the
+    old snapshot or the new one.
+    """
+    started = time.perf_counter()
+    connection = connections[using]
+    connection.ensure_connection()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    target = sqlite3.connect(path)
+    try:
+        connection.connection.backup(target)
+    finally:
+        target.close()
+    return time.perf_counter() - started
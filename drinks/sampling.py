@@ -0,0 +1,82 @@
+"""Random drink sampling over cached arrays of eligible drink ids.
+
+For every filter combination asked for, the ids of the matching drinks are
+loaded once into a compact ``array`` and kept until ``CatalogVersion``
+changes. A draw then picks positions in that array, so it costs the same
+whether the catalog holds a hundred drinks or a hundred thousand, and never
+asks SQLite for an OFFSET scan. With ``DRINKS_SNAPSHOT`` on, draws are made
+from the current snapshot's ids instead.
+"""
+import random
+import threading
+from array import array
+from collections import OrderedDict
+
+from django.dispatch import receiver
+
+from drinks.filtering import apply_drink_filters, filter_key
+from drinks.models import CatalogVersion, Drink
+from drinks.signals import drinks_changed
+from drinks.snapshot import current_snapshot
+
+
+# Filter combinations kept per process.
+MAX_POOLS = 256
+
+
+class RandomPools:
+    """Per-process LRU of ``{filter key: array of drink ids}`` for one catalog version."""
+
+    def __init__(self, max_pools=MAX_POOLS):
+        self.max_pools = max_pools
+        self._lock = threading.Lock()
+        self._version = None
+        self._pools = OrderedDict()
+
+    def clear(self):
+        with self._lock:
+            self._version = None
+            self._pools.clear()
+
+    def ids_for(self, filters, queryset=None):
+        # The timestamp tells apart equal version numbers reached again
+        # after a rolled back write.
+        version = CatalogVersion.current()
+        key = filter_key(filters)
+        with self._lock:
+            if version != self._version:
+                self._pools.clear()
+                self._version = version
+            ids = self._pools.get(key)
+            if ids is not None:
+                self._pools.move_to_end(key)
+                return ids
+        if queryset is None:
+            queryset = Drink.objects.all()
+        qs = apply_drink_filters(queryset, filters).order_by('pk')
+        ids = array('q', qs.values_list('pk', flat=True))
+        with self._lock:
+            if self._version == version:
+                self._pools[key] = ids
+                while len(self._pools) > self.max_pools:
+                    self._pools.popitem(last=False)
+        return ids
+
+
+pools = RandomPools()
+
+
+def sample_drink_ids(filters, n=1, seed=None):
+    """Return up to ``n`` distinct drink ids drawn from those matching ``filters``.
+
+    The same ``seed`` gives the same draw until the catalog changes.
+    """
+    snapshot = current_snapshot()
+    ids = snapshot.sample_pool(filters) if snapshot is not None else pools.ids_for(filters)
+    rng = random.Random(seed) if seed is not None else random
+    return [ids[i] for i in rng.sample(range(len(ids)), min(n, len(ids)))]
+
+
+@receiver(drinks_changed, dispatch_uid='drinks_random_pools_invalidate')
+def drop_random_pools(sender, **kwargs):
+    pools.clear()
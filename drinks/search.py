@@ -0,0 +1,161 @@
+"""Full-text search over drinks using an SQLite FTS5 index.
+
+``drinks_drinksearch`` holds one row per drink (``rowid`` is the drink id)
+with its name, instructions, ingredient names, garnish names and tags. Rows
+are rewritten on ``drinks_changed`` and can be rebuilt from scratch with
+``manage.py rebuild_search_index``.
+
+Queries accept bare words (all must match), ``"quoted phrases"`` and
+``prefix*`` terms, and are ranked with BM25 weighted towards the name.
+On databases without FTS5 the same query falls back to ``icontains`` on
+name and instructions.
+"""
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.dispatch import receiver
+
+from drinks.models import Drink, DrinkIngredientsList, RecipeIngredient, Tag
+from drinks.signals import drinks_changed
+
+
+TABLE = 'drinks_drinksearch'
+COLUMNS = ('name', 'instructions', 'ingredients', 'garnish', 'tags')
+# BM25 weight per column, in COLUMNS order.
+WEIGHTS = (10.0, 1.0, 4.0, 2.0, 3.0)
+
+# Highlight markers that cannot occur in catalog text; swapped for <mark>
+# after the text has been HTML-escaped.
+MARK_OPEN, MARK_CLOSE = '\x02', '\x03'
+SNIPPET_TOKENS = 12
+# Drinks re-indexed per statement, well under SQLite's variable limit.
+BATCH_SIZE = 500
+
+_PHRASE_RE = re.compile(r'"([^"]*)"?|(\S+)')
+_WORD_RE = re.compile(r'\w+')
+
+_index_ready = False
+
+
+def search_enabled():
+    """True when the FTS5 table exists on the default database."""
+    global _index_ready
+    if _index_ready:
+        return True
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s", [TABLE])
+        _index_ready = cursor.fetchone() is not None
+    return _index_ready
+
+
+def build_match(query):
+    """Translate a user query into an FTS5 MATCH expression, or None if empty.
+
+    Every term is quoted so FTS5 operators and punctuation in user input are
+    never interpreted; a trailing ``*`` keeps its prefix meaning.
+    """
+    parts = []
+    for phrase, word in _PHRASE_RE.findall(query or ''):
+        text = phrase if phrase else word
+        words = _WORD_RE.findall(text)
+        if not words:
+            continue
+        expr = '"' + ' '.join(words) + '"'
+        if not phrase and word.endswith('*'):
+            expr += '*'
+        parts.append(expr)
+    return ' '.join(parts) or None
+
+
+def _document_sql(where=''):
+    line = DrinkIngredientsList._meta.db_table
+    ingredient = RecipeIngredient._meta.db_table
+    garnish = Drink.garnish.through._meta.db_table
+    tags = Drink.tags.through._meta.db_table
+    tag = Tag._meta.db_table
+    drink = Drink._meta.db_table
+    return f"""
+        INSERT INTO {TABLE} (rowid, {', '.join(COLUMNS)})
+        SELECT d.id, d.name, d.instructions,
+            (SELECT group_concat(i.name, ' ') FROM {line} l JOIN {ingredient} i ON i.id = l.ingredient_id WHERE l.drink_id = d.id),
+            (SELECT group_concat(i.name, ' ') FROM {garnish} g JOIN {ingredient} i ON i.id = g.recipeingredient_id WHERE g.drink_id = d.id),
+            (SELECT group_concat(t.name, ' ') FROM {tags} dt JOIN {tag} t ON t.id = dt.tag_id WHERE dt.drink_id = d.id)
+        FROM {drink} d {where}
+    """
+
+
+def index_drinks(drink_ids):
+    """Rewrite the index rows of ``drink_ids``; deleted drinks just drop out."""
+    ids = sorted(int(pk) for pk in drink_ids)
+    if not ids or not search_enabled():
+        return
+    with connection.cursor() as cursor:
+        for start in range(0, len(ids), BATCH_SIZE):
+            batch = ids[start:start + BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            cursor.execute(f'DELETE FROM {TABLE} WHERE rowid IN ({placeholders})', batch)
+            cursor.execute(_document_sql(f'WHERE d.id IN ({placeholders})'), batch)
+
+
+def rebuild_index():
+    """Re-index every drink. Returns the number of indexed drinks."""
+    if not search_enabled():
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {TABLE}')
+        cursor.execute(_document_sql())
+        cursor.execute(f"INSERT INTO {TABLE} ({TABLE}) VALUES ('optimize')")
+        cursor.execute(f'SELECT count(*) FROM {TABLE}')
+        return cursor.fetchone()[0]
+
+
+def search_drink_ids(query):
+    """Return ids of drinks matching ``query``, best match first."""
+    match = build_match(query)
+    if match is None:
+        return []
+    if not search_enabled():
+        terms = _WORD_RE.findall(query)
+        lookup = Q()
+        for term in terms:
+            lookup &= Q(name__icontains=term) | Q(instructions__icontains=term)
+        return list(Drink.objects.filter(lookup).order_by('name').values_list('pk', flat=True))
+    weights = ', '.join(str(w) for w in WEIGHTS)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH %s ORDER BY bm25({TABLE}, {weights}), rowid',
+            [match],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def _marked_html(text):
+    return html.escape(text or '').replace(MARK_OPEN, '<mark>').replace(MARK_CLOSE, '</mark>')
+
+
+def highlights(drink_ids, query):
+    """Return ``{drink id: {'name': ..., 'snippet': ...}}`` with matches wrapped in ``<mark>``."""
+    match = build_match(query)
+    ids = [int(pk) for pk in drink_ids]
+    if match is None or not ids or not search_enabled():
+        return {}
+    placeholders = ', '.join(['%s'] * len(ids))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT rowid, highlight({TABLE}, 0, %s, %s), snippet({TABLE}, -1, %s, %s, %s, {SNIPPET_TOKENS}) "
+            f"FROM {TABLE} WHERE {TABLE} MATCH %s AND rowid IN ({placeholders})",
+            [MARK_OPEN, MARK_CLOSE, MARK_OPEN, MARK_CLOSE, '…', match, *ids],
+        )
+        return {
+            pk: {'name': _marked_html(name), 'snippet': _marked_html(snippet)}
+            for pk, name, snippet in cursor.fetchall()
+        }
+
+
+@receiver(drinks_changed, dispatch_uid='drinks_search_index')
+def reindex_changed_drinks(sender, drink_ids, **kwargs):
+    index_drinks(drink_ids)
@@ -3,6 +3,8 @@ from rest_framework.reverse import reverse
 from django.urls import reverse as django_reverse
 from urllib.parse import quote as urlquote
 from drinks.models import (
+    normalize_safe_name,
+    safe_name_from,
     Drink,
     RecipeIngredient,
     DrinkIngredientsList,
@@ -13,7 +15,7 @@ from drinks.models import (
     GlassType,
 )
 import re
-from fractions import Fraction
+from django.db.models import Prefetch, aprefetch_related_objects, prefetch_related_objects
 from django.http import Http404
 from rest_framework.renderers import BrowsableAPIRenderer
 
@@ -49,60 +51,73 @@ class RemoveNoneFieldsMixin:
         return filtered
 
 
-def _parse_measure(text: str):
-    if not text:
-        return (None, None)
-    s = text.strip().replace('\u00bd', '1/2')
-    if s.lower() in ('to taste', 'top', 'taste', 'dash', 'dashes', 'pinch'):
-        return (None, s)
-    m = re.match(r"^(?P<num>\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?)\s*(?P<unit>.+)$", s)
-    if not m:
-        return (None, s)
-    num = m.group('num')
-    unit = m.group('unit').strip()
-    try:
-        if ' ' in num:
-            whole, frac = num.split()
-            quantity = int(whole) + float(Fraction(frac))
-        elif '/' in num:
-            quantity = float(Fraction(num))
-        else:
-            quantity = float(num)
-            if quantity.is_integer():
-                quantity = int(quantity)
-    except Exception:
-        return (None, s)
-    return (quantity, unit)
-
-
-def safe_name_from(text: str) -> str:
-    if text is None:
-        return ''
-    return re.sub(r'[^0-9A-Za-z]+', '_', str(text)).strip('_')
-
-
-def get_by_safe_name(model, safe_value):
+def get_by_safe_name(model, safe_value, queryset=None):
     if safe_value is None:
         raise Http404
-    lookup_name = str(safe_value).replace('_', ' ')
-    try:
-        obj = model.objects.filter(name__iexact=lookup_name).first()
-        if obj:
-            return obj
-    except Exception:
-        pass
-    safe_normalized = re.sub(r'[^0-9A-Za-z]+', '_', str(safe_value)).strip('_').lower()
+    slug = normalize_safe_name(safe_value)
+    if not slug:
+        raise Http404
+    if queryset is None:
+        queryset = model.objects.all()
     try:
-        for o in model.objects.all():
-            name_sanitized = re.sub(r'[^0-9A-Za-z]+', '_', str(o.name)).strip('_').lower()
-            if name_sanitized == safe_normalized:
-                return o
-    except Exception:
-        pass
-    raise Http404
+        return queryset.get(safe_name=slug)
+    except (model.DoesNotExist, model.MultipleObjectsReturned):
+        raise Http404
+
+
+class SafeNameValidationMixin:
+    """Reject names whose URL segment already belongs to another object."""
+
+    def validate_name(self, value):
+        slug = normalize_safe_name(value)
+        if slug:
+            model = self.Meta.model
+            clash = model._base_manager.filter(safe_name=slug)
+            if self.instance is not None and getattr(self.instance, 'pk', None) is not None:
+                clash = clash.exclude(pk=self.instance.pk)
+            clash = clash.first()
+            if clash is not None:
+                raise serializers.ValidationError(
+                    f"'{value}' conflicts with existing '{clash.name}' (both resolve to '{slug}')."
+                )
+        return value
+
+
+def drink_prefetches():
+    """Prefetch lookups covering every relation ``DrinkSerializer`` reads."""
+    return [
+        Prefetch('tags', queryset=Tag.objects.all()),
+        Prefetch('preparation_method', queryset=PreparationMethod.objects.all()),
+        Prefetch('garnish', queryset=RecipeIngredient.objects.all()),
+        Prefetch(
+            'recipe_ingredients',
+            queryset=DrinkIngredientsList.objects.select_related('ingredient'),
+        ),
+    ]
+
+
+def with_drink_relations(queryset):
+    """Return ``queryset`` loading a page of drinks in a constant number of queries."""
+    return queryset.select_related('glass_type').prefetch_related(*drink_prefetches())
+
+
+def load_drink_relations(drinks):
+    """Prefetch serializer relations onto already fetched drink instances."""
+    drinks = [d for d in drinks if d is not None]
+    if drinks:
+        prefetch_related_objects(drinks, 'glass_type', *drink_prefetches())
+    return drinks
+
 
+async def aload_drink_relations(drinks):
+    """``load_drink_relations()`` through the async ORM."""
+    drinks = [d for d in drinks if d is not None]
+    if drinks:
+        await aprefetch_related_objects(drinks, 'glass_type', *drink_prefetches())
+    return drinks
 
-class TagSerializer(serializers.ModelSerializer):
+
+class TagSerializer(SafeNameValidationMixin, serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
     class Meta:
         model = Tag
@@ -183,7 +198,7 @@ class EmbeddedPreparationMethodSerializer(serializers.ModelSerializer):
         fields = ['name']
 
 
-class PreparationMethodSerializer(serializers.ModelSerializer):
+class PreparationMethodSerializer(SafeNameValidationMixin, serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
     class Meta:
         model = PreparationMethod
@@ -203,7 +218,7 @@ class PreparationMethodSerializer(serializers.ModelSerializer):
             return f"/api/preparation_methods/{safe}/"
 
 
-class RecipeIngredientSerializer(serializers.ModelSerializer):
+class RecipeIngredientSerializer(SafeNameValidationMixin, serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
 
     class Meta:
@@ -224,7 +239,7 @@ class RecipeIngredientSerializer(serializers.ModelSerializer):
             return f"/api/recipe_ingredients/{safe}/"
 
 
-class GarnishIngredientSerializer(serializers.ModelSerializer):
+class GarnishIngredientSerializer(SafeNameValidationMixin, serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
 
     class Meta:
@@ -246,7 +261,7 @@ class GarnishIngredientSerializer(serializers.ModelSerializer):
             return f"/api/garnish_ingredients/{obj.name.replace(' ', '_')}/"
 
 
-class UnitSerializer(serializers.ModelSerializer):
+class UnitSerializer(SafeNameValidationMixin, serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
     class Meta:
         model = Unit
@@ -266,7 +281,7 @@ class UnitSerializer(serializers.ModelSerializer):
             return f"/api/units/{safe}/"
 
 
-class GlassTypeSerializer(serializers.ModelSerializer):
+class GlassTypeSerializer(SafeNameValidationMixin, serializers.ModelSerializer):
     url = serializers.SerializerMethodField()
     class Meta:
         model = GlassType
@@ -295,63 +310,14 @@ class DrinkIngredientSerializer(serializers.ModelSerializer):
         fields = ['ingredient', 'quantity', 'unit', 'quantity_text']
 
     def to_representation(self, instance):
+        # ``measure`` is resolved when the line is saved (see drinks.measures).
         name = None
         if instance.ingredient:
             try:
                 name = instance.ingredient.name
             except Exception:
                 name = str(instance.ingredient)
-
-        qty = instance.quantity
-        unit_obj = instance.unit
-        qty_text = (instance.quantity_text or '').strip()
-
-        if (qty is None or (unit_obj is None and not qty_text)) and qty_text:
-            parsed_qty, parsed_unit = _parse_measure(qty_text)
-            if parsed_qty is not None:
-                qty = parsed_qty
-            if parsed_unit and not unit_obj:
-                try:
-                    unit_obj = Unit.objects.filter(name__iexact=parsed_unit).first()
-                except Exception:
-                    unit_obj = None
-
-        if qty is not None:
-            try:
-                qty_str = format(float(qty), 'g')
-            except Exception:
-                qty_str = str(qty)
-            unit_name = ''
-            try:
-                if unit_obj and getattr(unit_obj, 'name', None):
-                    unit_name = unit_obj.name.strip()
-            except Exception:
-                unit_name = ''
-
-            if unit_name:
-                plural = getattr(unit_obj, 'plural', None) if unit_obj is not None else None
-                try:
-                    is_one = float(qty) == 1
-                except Exception:
-                    is_one = False
-                if plural and not is_one:
-                    display_unit = plural
-                else:
-                    if not is_one:
-                        if unit_name.endswith('ch') or unit_name.endswith('sh') or unit_name.endswith('x') or unit_name.endswith('s'):
-                            display_unit = unit_name + 'es'
-                        elif unit_name.endswith('y') and len(unit_name) > 1 and unit_name[-2] not in 'aeiou':
-                            display_unit = unit_name[:-1] + 'ies'
-                        else:
-                            display_unit = unit_name + 's'
-                    else:
-                        display_unit = unit_name
-                display = f"{qty_str} {display_unit}"
-            else:
-                display = qty_str
-        else:
-            display = qty_text or ''
-
+        display = instance.measure
         if name and display:
             return f"{name} {display}"
         if name:
@@ -359,7 +325,7 @@ class DrinkIngredientSerializer(serializers.ModelSerializer):
         return display
 
 
-class DrinkSerializer(RemoveNoneFieldsMixin, serializers.ModelSerializer):
+class DrinkSerializer(SafeNameValidationMixin, RemoveNoneFieldsMixin, serializers.ModelSerializer):
     tags = serializers.SerializerMethodField()
     preparation_method = serializers.SerializerMethodField()
     glass_type = serializers.SerializerMethodField()
@@ -399,17 +365,17 @@ class DrinkSerializer(RemoveNoneFieldsMixin, serializers.ModelSerializer):
 
     def get_garnish_ingredients(self, obj):
         try:
-            names = [g.name for g in obj.garnish.all().order_by('name')]
+            names = sorted(g.name for g in obj.garnish.all())
             return names
         except Exception:
             return []
 
 
     def get_tags(self, obj):
-        return [t.name for t in obj.tags.all().order_by('name')]
+        return sorted(t.name for t in obj.tags.all())
 
     def get_preparation_method(self, obj):
-        return [p.name for p in obj.preparation_method.all().order_by('name')]
+        return sorted(p.name for p in obj.preparation_method.all())
 
     def get_glass_type(self, obj):
         try:
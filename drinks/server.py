@@ -0,0 +1,154 @@
+"""Pre-forking HTTP server behind ``manage.py serve``, on gunicorn.
+
+The master loads the application once and warms it: the URL conf,
+the serializers, the search table check and the in-memory indexes and
+unfiltered random pool or, with ``DRINKS_SNAPSHOT``, the catalog snapshot
+they are then read from (written to and mapped from ``DRINKS_CATALOG_FILE``
+when that is set). It then moves everything it allocated out of the garbage
+collector's reach with ``gc.freeze()``, so collections in the workers do not
+touch, and un-share, those pages. gunicorn then runs it with
+``preload_app``: the workers it forks share the loaded app, catch up with
+the catalog in its ``post_fork`` hook and are replaced after
+``max_requests`` (plus a random jitter). WSGI workers are gunicorn's
+threaded ``gthread`` workers, ASGI ones uvicorn's.
+
+gunicorn does not serve static files; ``with_static_files()`` puts
+Django's staticfiles handler in front of the app, as ``runserver`` does,
+for the browsable API's CSS and JavaScript.
+"""
+import gc
+import os
+import time
+
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.urls import reverse
+from gunicorn.app.base import BaseApplication
+from rest_framework.serializers import ModelSerializer
+
+from drinks import indexes, sampling, snapshot
+from drinks.models import CatalogVersion
+from drinks.search import search_enabled
+
+
+# Workers still running this long after SIGTERM are killed.
+GRACEFUL_TIMEOUT = 30
+# Seconds an idle keep-alive connection is kept open.
+KEEP_ALIVE = 5
+# Threads of a WSGI worker, each serving one connection at a time.
+THREADS = 4
+
+
+def parse_bind(bind):
+    """Split ``host:port`` (``[::1]:8000`` for IPv6) into ``(host, port)``."""
+    host, sep, port = bind.rpartition(':')
+    if not sep:
+        host, port = '0.0.0.0', bind
+    host = host.strip('[]') or '0.0.0.0'
+    try:
+        port = int(port)
+    except ValueError:
+        raise ValueError(f'"{bind}" is not a valid host:port.')
+    if not 0 <= port <= 65535:
+        raise ValueError(f'"{bind}" is not a valid host:port.')
+    return host, port
+
+
+def warm_caches():
+    """Bring this process's indexes and random pool, or its snapshot, up to
+    date with the catalog.
+
+    Returns False when the database is not ready (e.g. not migrated yet).
+    """
+    try:
+        if snapshot.snapshot_enabled():
+            # A worker keeps the snapshot it shares with the master (and
+            # the other workers) for as long as the catalog has not moved on.
+            current = snapshot.holder.current
+            if current is None or current.catalog_version != CatalogVersion.current(using=DEFAULT_DB_ALIAS):
+                snapshot.holder.rebuild()
+        else:
+            version = CatalogVersion.current()
+            for index in indexes._registry:
+                index.ensure_current(version)
+            sampling.pools.ids_for({})
+        search_enabled()
+    except DatabaseError:
+        return False
+    finally:
+        connections.close_all()
+    return True
+
+
+def preload(app_loader):
+    """Load the app with ``app_loader`` and warm it; returns ``(app, caches warmed)``."""
+    from drinks import serializers
+
+    app = app_loader()
+    # Imports the URL conf and fills its reverse lookup tables.
+    reverse('api-root')
+    for serializer in vars(serializers).values():
+        if isinstance(serializer, type) and issubclass(serializer, ModelSerializer) and serializer.__module__ == serializers.__name__:
+            serializer().fields
+    warmed = warm_caches()
+    gc.collect()
+    gc.freeze()
+    return app, warmed
+
+
+def with_static_files(app, asgi=False):
+    """``app`` with ``STATIC_URL`` served from the staticfiles finders."""
+    if asgi:
+        from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
+        return ASGIStaticFilesHandler(app)
+    from django.contrib.staticfiles.handlers import StaticFilesHandler
+    return StaticFilesHandler(app)
+
+
+def asgi_worker_class():
+    from uvicorn.workers import UvicornWorker
+
+    class AsgiWorker(UvicornWorker):
+        # Django's ASGI handler does not speak the lifespan protocol.
+        CONFIG_KWARGS = {**UvicornWorker.CONFIG_KWARGS, 'lifespan': 'off'}
+
+    return AsgiWorker
+
+
+class Server(BaseApplication):
+    """gunicorn serving ``app``, already loaded (and warmed) in the master.
+
+    ``warm`` runs in every worker after the fork; its time is logged.
+    """
+
+    def __init__(self, app, bind, workers, asgi=False, threads=THREADS, max_requests=0, max_requests_jitter=0,
+                 graceful_timeout=GRACEFUL_TIMEOUT, keep_alive=KEEP_ALIVE, warm=None, log=print):
+        self.application = app
+        self.warm = warm
+        self.log = log
+        self.options = {
+            'bind': [bind],
+            'workers': workers,
+            'worker_class': asgi_worker_class() if asgi else 'gthread',
+            'threads': threads,
+            'preload_app': True,
+            'max_requests': max_requests,
+            'max_requests_jitter': max_requests_jitter,
+            'graceful_timeout': graceful_timeout,
+            'keepalive': keep_alive,
+            'post_fork': self.post_fork,
+        }
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+
+    def load(self):
+        return self.application
+
+    def post_fork(self, server, worker):
+        if self.warm is None:
+            return
+        started = time.perf_counter()
+        self.warm()
+        self.log(f'Worker {os.getpid()} ready in {(time.perf_counter() - started) * 1000:.1f} ms.')
@@ -0,0 +1,156 @@
+"""Catalog write hooks.
+
+Every write to a drinks model bumps ``CatalogVersion``. Every write that can
+change how a drink is serialized also ends up in ``drinks_changed``, sent
+with the ids of the affected drinks. Writes that do not save the drink
+itself (recipe lines, tag/garnish/preparation changes and renames of lookup
+rows shown inside drinks) also bump ``Drink.updated`` so that it always
+reflects the last change to the drink's representation.
+"""
+from django.db.models import Q
+from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from drinks.models import (
+    CatalogVersion,
+    Category,
+    Cocktail,
+    Drink,
+    DrinkIngredientsList,
+    GarnishIngredient,
+    GlassType,
+    PreparationMethod,
+    RecipeIngredient,
+    Tag,
+    Unit,
+)
+
+
+# Sent with ``drink_ids`` (a set) and ``deleted`` (bool).
+drinks_changed = Signal()
+# Sent after every write that bumps ``CatalogVersion``.
+catalog_changed = Signal()
+
+def notify_drinks_changed(drink_ids, deleted=False):
+    ids = {pk for pk in drink_ids if pk is not None}
+    if ids:
+        drinks_changed.send(sender=Drink, drink_ids=ids, deleted=deleted)
+
+
+def touch_drinks(drink_ids):
+    """Bump ``updated`` on drinks whose related rows changed and notify listeners."""
+    ids = {pk for pk in drink_ids if pk is not None}
+    if not ids:
+        return
+    Drink.objects.filter(pk__in=ids).update(updated=timezone.now())
+    notify_drinks_changed(ids)
+
+
+def dependent_drink_ids(instance, names=None):
+    """Return ids of drinks whose serialized form shows ``instance``."""
+    if isinstance(instance, Tag):
+        lookup = Q(tags=instance)
+    elif isinstance(instance, PreparationMethod):
+        lookup = Q(preparation_method=instance)
+    elif isinstance(instance, GlassType):
+        lookup = Q(glass_type=instance)
+    elif isinstance(instance, RecipeIngredient):
+        lookup = Q(recipe_ingredients__ingredient=instance) | Q(garnish=instance)
+    elif isinstance(instance, Unit):
+        lookup = Q(recipe_ingredients__unit=instance)
+        # Lines without a unit resolve one by name from their quantity text.
+        for name in names or ():
+            if name:
+                lookup |= Q(recipe_ingredients__unit__isnull=True, recipe_ingredients__quantity_text__icontains=name)
+    else:
+        return set()
+    return set(Drink.objects.filter(lookup).values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Drink)
+@receiver(post_save, sender=Cocktail)
+def drink_saved(sender, instance, **kwargs):
+    notify_drinks_changed({instance.pk})
+
+
+@receiver(post_delete, sender=Drink)
+@receiver(post_delete, sender=Cocktail)
+def drink_deleted(sender, instance, **kwargs):
+    notify_drinks_changed({instance.pk}, deleted=True)
+
+
+@receiver(post_save, sender=DrinkIngredientsList)
+@receiver(post_delete, sender=DrinkIngredientsList)
+def recipe_line_changed(sender, instance, **kwargs):
+    touch_drinks({instance.drink_id})
+
+
+def drink_relation_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if action == 'pre_clear':
+        if reverse:
+            instance._cleared_drink_ids = dependent_drink_ids(instance)
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        touch_drinks({instance.pk})
+    elif action == 'post_clear':
+        touch_drinks(getattr(instance, '_cleared_drink_ids', ()))
+    else:
+        touch_drinks(pk_set or ())
+
+
+for _through in (Drink.tags.through, Drink.preparation_method.through, Drink.garnish.through):
+    m2m_changed.connect(drink_relation_changed, sender=_through, dispatch_uid=f'drinks_m2m_{_through.__name__}')
+
+LOOKUP_MODELS = (Tag, PreparationMethod, GlassType, RecipeIngredient, GarnishIngredient, Unit)
+
+
+def lookup_saved(sender, instance, created, **kwargs):
+    if not instance.display_changed():
+        return
+    names = ()
+    if isinstance(instance, Unit):
+        previous = getattr(instance, '_loaded_display', None) or (None,)
+        names = {instance.name, previous[0]}
+    elif created:
+        instance._loaded_display = instance.display_values()
+        return
+    instance._loaded_display = instance.display_values()
+    touch_drinks(dependent_drink_ids(instance, names))
+
+
+def lookup_deleting(sender, instance, **kwargs):
+    names = {instance.name} if isinstance(instance, Unit) else ()
+    instance._dependent_drink_ids = dependent_drink_ids(instance, names)
+
+
+def lookup_deleted(sender, instance, **kwargs):
+    touch_drinks(getattr(instance, '_dependent_drink_ids', ()))
+
+
+for _model in LOOKUP_MODELS:
+    post_save.connect(lookup_saved, sender=_model, dispatch_uid=f'drinks_saved_{_model.__name__}')
+    pre_delete.connect(lookup_deleting, sender=_model, dispatch_uid=f'drinks_deleting_{_model.__name__}')
+    post_delete.connect(lookup_deleted, sender=_model, dispatch_uid=f'drinks_deleted_{_model.__name__}')
+
+
+CATALOG_MODELS = (
+    Category, GlassType, RecipeIngredient, GarnishIngredient, Tag, PreparationMethod, Unit,
+    Drink, Cocktail, DrinkIngredientsList,
+)
+
+
+def bump_catalog_version(sender, **kwargs):
+    if kwargs.get('action', 'post_').startswith('post_'):
+        CatalogVersion.bump()
+        catalog_changed.send(sender=sender)
+
+
+for _model in CATALOG_MODELS:
+    post_save.connect(bump_catalog_version, sender=_model, dispatch_uid=f'drinks_version_saved_{_model.__name__}')
+    post_delete.connect(bump_catalog_version, sender=_model, dispatch_uid=f'drinks_version_deleted_{_model.__name__}')
+
+for _through in (Drink.tags.through, Drink.preparation_method.through, Drink.garnish.through):
+    m2m_changed.connect(bump_catalog_version, sender=_through, dispatch_uid=f'drinks_version_m2m_{_through.__name__}')
@@ -0,0 +1,490 @@
+"""Immutable in-memory snapshot of the drinks catalog.
+
+With ``DRINKS_SNAPSHOT`` on, every drink, recipe line and lookup row is
+loaded into the compact, read-only structures below: ``__slots__`` records
+holding tuples of interned strings, already in the order the serializers
+emit them. ``drinks.snapshot_views`` answers the JSON reads of the cocktail,
+category and facet endpoints from the current snapshot without touching the
+ORM beyond the ``CatalogVersion`` check every read makes anyway.
+
+With ``DRINKS_CATALOG_FILE`` set as well, the snapshot is written to that
+file in the binary format of ``drinks.catalog_file`` and every process maps
+the file read-only instead of keeping its own copy.
+
+Snapshots are double-buffered. Writes do not change the current one: after
+their transaction commits, a background thread loads a new snapshot and
+swaps it in with a single assignment, so a request sees either the old or
+the new one, never a mix. Until then, and whenever ``CatalogVersion`` shows
+a write another process made, requests are answered by the ORM views and a
+rebuild is scheduled.
+"""
+import logging
+import os
+import sys
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.dispatch import receiver
+
+from drinks.filtering import ID_FACETS
+from drinks.models import (
+    CatalogVersion,
+    Category,
+    Drink,
+    DrinkIngredientsList,
+    GlassType,
+    PreparationMethod,
+    RecipeIngredient,
+    Tag,
+    Unit,
+    normalize_safe_name,
+    safe_name_from,
+)
+from drinks.signals import catalog_changed
+
+
+logger = logging.getLogger(__name__)
+
+# Loads retried when a write commits while the snapshot is being read.
+MAX_ATTEMPTS = 3
+# Seconds the background thread waits before retrying a rebuild that
+# failed, doubled on every further failure up to the maximum.
+RETRY_DELAY = 1
+MAX_RETRY_DELAY = 60
+
+# SQLite's LIKE (``iexact``, ``icontains``) folds ASCII letters only.
+ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+# Lookup tables of a snapshot.
+TABLES = ('categories', 'tags', 'methods', 'glass_types', 'units', 'ingredients')
+# Facets drinks are indexed by: the ``parse_drink_filters`` ones, keyed by
+# primary key like these, ``is_shot``, keyed by True and False, and the
+# number of distinct ingredients of the recipe without and with the
+# garnishes, which ``drinks.makeable`` ranks by.
+FACETS = (
+    'ingredient', 'tag', 'preparation', 'glass', 'garnish', 'unit', 'category', 'is_shot', 'size', 'garnished_size',
+)
+assert set(ID_FACETS) <= set(FACETS)
+
+
+def snapshot_enabled():
+    return getattr(settings, 'DRINKS_SNAPSHOT', False)
+
+
+def catalog_file():
+    path = getattr(settings, 'DRINKS_CATALOG_FILE', None)
+    return str(path) if path else None
+
+
+def ascii_lower(text):
+    return text.translate(ASCII_LOWER)
+
+
+def _intern(text):
+    return sys.intern(text) if text else text
+
+
+class LookupRecord:
+    """A tag, category, ingredient, preparation method, unit or glass type."""
+
+    __slots__ = ('pk', 'name', 'safe_name', 'slug', 'plural', 'drink_count', 'garnish_count')
+
+    def __init__(self, pk, name, safe_name, slug, plural='', drink_count=0, garnish_count=0):
+        self.pk = pk
+        self.name = name
+        self.safe_name = safe_name
+        # URL segment of the detail page.
+        self.slug = slug
+        self.plural = plural
+        self.drink_count = drink_count
+        self.garnish_count = garnish_count
+
+
+class LookupTable:
+    """Rows of one lookup model in name order, by primary key and by safe name."""
+
+    __slots__ = ('rows', 'by_pk', 'by_safe_name')
+
+    def __init__(self, rows):
+        self.rows = tuple(sorted(rows, key=lambda row: (row.name, row.pk)))
+        self.by_pk = {row.pk: row for row in self.rows}
+        self.by_safe_name = {row.safe_name: row for row in self.rows if row.safe_name}
+
+    def get(self, value):
+        """The row addressed by ``value`` the way the viewsets look it up."""
+        if str(value).isdigit():
+            return self.by_pk.get(int(value))
+        return self.named(value)
+
+    def named(self, value):
+        return self.by_safe_name.get(normalize_safe_name(value))
+
+
+class DrinkRecord:
+    """One drink's serialized fields, ready to emit."""
+
+    __slots__ = (
+        'pk', 'position', 'name', 'safe_name', 'slug', 'updated', 'image', 'tags', 'methods', 'glass',
+        'lines', 'garnish', 'instructions', 'ingredient_names',
+    )
+
+
+class Records:
+    """The drinks at ``positions`` of ``snapshot``, read as they are indexed
+    (e.g. one page of them)."""
+
+    __slots__ = ('snapshot', 'positions')
+
+    def __init__(self, snapshot, positions):
+        self.snapshot = snapshot
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.snapshot.record(position) for position in self.positions[index]]
+        return self.snapshot.record(self.positions[index])
+
+    def __iter__(self):
+        return map(self.snapshot.record, self.positions)
+
+
+class BaseSnapshot:
+    """The queries of a snapshot, over the positions of its drinks in name order.
+
+    Subclasses hold ``version``, ``updated`` and the lookup tables of
+    ``TABLES``, and implement ``len()``, ``record(position)``,
+    ``pk_at(position)``, ``name_at(position)``, ``position_of(pk)``,
+    ``position_named(safe_name)``, ``pks()`` (every primary key, ascending),
+    ``values(facet)`` (the values drinks have for a facet, ascending) and
+    ``postings(facet, value)`` (the positions of the drinks with a facet
+    value, ascending).
+    """
+
+    __slots__ = ()
+
+    @property
+    def catalog_version(self):
+        return (self.version, self.updated)
+
+    @property
+    def drinks(self):
+        return Records(self, range(len(self)))
+
+    def drink(self, pk):
+        position = self.position_of(pk)
+        return None if position is None else self.record(position)
+
+    def drink_named(self, value):
+        """The drink ``value`` addresses, as ``safe_name`` lookups find it."""
+        position = self.position_named(normalize_safe_name(value))
+        return None if position is None else self.record(position)
+
+    def drinks_with(self, facet, value):
+        """Drinks having the facet value, in name order."""
+        return Records(self, self.postings(facet, value))
+
+    def drinks_with_any(self, facet, values):
+        return Records(self, sorted(self._any(facet, values)))
+
+    def _any(self, facet, values):
+        positions = set()
+        for value in values:
+            positions.update(self.postings(facet, value))
+        return positions
+
+    def select(self, filters):
+        """Drinks matching parsed ``filters``, in the list endpoint's order."""
+        matched = None
+
+        def narrow(positions):
+            nonlocal matched
+            matched = set(positions) if matched is None else matched.intersection(positions)
+
+        for facet in ID_FACETS:
+            ids = filters.get(facet)
+            if ids and filters.get(f'{facet}_mode') == 'all':
+                for pk in ids:
+                    narrow(self.postings(facet, pk))
+            elif ids:
+                narrow(self._any(facet, ids))
+        if filters.get('category'):
+            name = ascii_lower(filters['category'])
+            narrow(self._any('category', [c.pk for c in self.categories.rows if ascii_lower(c.name) == name]))
+        if 'is_shot' in filters:
+            narrow(self.postings('is_shot', filters['is_shot']))
+        excluded = set()
+        for facet in ID_FACETS:
+            if filters.get(f'exclude_{facet}'):
+                excluded |= self._any(facet, filters[f'exclude_{facet}'])
+        if matched is None and not excluded:
+            return self.drinks
+        if matched is None:
+            matched = set(range(len(self)))
+        return Records(self, sorted(matched - excluded))
+
+    def sample_pool(self, filters):
+        """Primary keys of the drinks matching ``filters``, in ascending order,
+        as ``drinks.sampling`` draws from them."""
+        if not filters:
+            return self.pks()
+        return sorted(map(self.pk_at, self.select(filters).positions))
+
+
+class Snapshot(BaseSnapshot):
+    """Everything the read endpoints serve, as of ``(version, updated)``."""
+
+    __slots__ = (
+        'version', 'updated', 'records', 'by_pk', 'by_safe_name', 'sorted_pks', 'index',
+        'categories', 'tags', 'methods', 'glass_types', 'units', 'ingredients',
+    )
+
+    def __len__(self):
+        return len(self.records)
+
+    def record(self, position):
+        return self.records[position]
+
+    def pk_at(self, position):
+        return self.records[position].pk
+
+    def name_at(self, position):
+        return self.records[position].name
+
+    def position_of(self, pk):
+        return self.by_pk.get(pk)
+
+    def position_named(self, safe_name):
+        return self.by_safe_name.get(safe_name)
+
+    def pks(self):
+        return self.sorted_pks
+
+    def values(self, facet):
+        return sorted(value for name, value in self.index if name == facet)
+
+    def postings(self, facet, value):
+        return self.index.get((facet, value), ())
+
+
+def load_snapshot():
+    """Read the catalog into a new ``Snapshot``.
+
+    The version is read before and after the rows; when a write committed in
+    between, the load is retried. The last attempt is stamped with the
+    earlier version, so requests see it as stale and another one is made.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        version = CatalogVersion.current()
+        try:
+            snapshot = _load(version)
+        except KeyError:
+            # A row referenced a lookup created after its table was read.
+            if attempt == MAX_ATTEMPTS:
+                raise
+            continue
+        if attempt == MAX_ATTEMPTS or CatalogVersion.current() == version:
+            return snapshot
+
+
+def _load(version):
+    snapshot = Snapshot()
+    snapshot.version, snapshot.updated = version
+
+    def table(model, plural=None, counts=False):
+        fields = ['pk', 'name', 'safe_name']
+        if plural:
+            fields.append(plural)
+        if counts:
+            fields += ['drink_count', 'garnish_count']
+        rows = []
+        for pk, name, safe_name, *extra in model.objects.values_list(*fields):
+            plural_name = _intern(extra.pop(0)) if plural else ''
+            rows.append(LookupRecord(pk, _intern(name), safe_name, _intern(safe_name_from(name)), plural_name, *extra))
+        return LookupTable(rows)
+
+    snapshot.categories = table(Category)
+    snapshot.tags = table(Tag)
+    snapshot.methods = table(PreparationMethod)
+    snapshot.glass_types = table(GlassType)
+    snapshot.units = table(Unit, plural='plural')
+    ingredients = snapshot.ingredients = table(RecipeIngredient, counts=True)
+
+    def related(model, field):
+        out = {}
+        for drink_id, value in model.objects.values_list('drink_id', field):
+            out.setdefault(drink_id, []).append(value)
+        return out
+
+    tag_ids = related(Drink.tags.through, 'tag_id')
+    method_ids = related(Drink.preparation_method.through, 'preparationmethod_id')
+    garnish_ids = related(Drink.garnish.through, 'recipeingredient_id')
+    lines = {}
+    for drink_id, ingredient_id, unit_id, measure in DrinkIngredientsList.objects.order_by('id').values_list(
+        'drink_id', 'ingredient_id', 'unit_id', 'measure',
+    ):
+        lines.setdefault(drink_id, []).append((ingredient_id, unit_id, measure))
+
+    storage = Drink._meta.get_field('image').storage
+    rows = Drink.objects.order_by('name', 'pk').values_list(
+        'pk', 'name', 'safe_name', 'updated', 'image', 'instructions', 'category_id', 'glass_type_id', 'is_shot',
+    )
+    records, index = [], {}
+    for position, (pk, name, safe_name, updated, image, instructions, category_id, glass_id, is_shot) in enumerate(rows):
+        record = DrinkRecord()
+        record.pk, record.position, record.updated = pk, position, updated
+        record.name, record.safe_name = name, safe_name
+        record.slug = safe_name_from(name)
+        record.image = storage.url(image) if image else None
+        record.instructions = instructions
+
+        glass = snapshot.glass_types.by_pk.get(glass_id)
+        record.glass = glass.name if glass is not None else None
+        record.tags = tuple(sorted(snapshot.tags.by_pk[i].name for i in tag_ids.get(pk, ())))
+        record.methods = tuple(sorted(snapshot.methods.by_pk[i].name for i in method_ids.get(pk, ())))
+        garnish = [ingredients.by_pk[i].name for i in garnish_ids.get(pk, ())]
+        record.garnish = tuple(sorted(garnish))
+
+        # ``DrinkIngredientSerializer``: "<ingredient> <measure>".
+        recipe, names = [], set(garnish)
+        for ingredient_id, unit_id, measure in lines.get(pk, ()):
+            ingredient = ingredients.by_pk[ingredient_id].name
+            names.add(ingredient)
+            if ingredient and measure:
+                recipe.append(_intern(f'{ingredient} {measure}'))
+            else:
+                recipe.append(ingredient or _intern(measure))
+        record.lines = tuple(recipe)
+        record.ingredient_names = tuple(sorted(names))
+        records.append(record)
+
+        keys = {('is_shot', is_shot)}
+        if category_id is not None:
+            keys.add(('category', category_id))
+        if glass is not None:
+            keys.add(('glass', glass_id))
+        keys.update(('tag', i) for i in tag_ids.get(pk, ()))
+        keys.update(('preparation', i) for i in method_ids.get(pk, ()))
+        keys.update(('garnish', i) for i in garnish_ids.get(pk, ()))
+        for ingredient_id, unit_id, measure in lines.get(pk, ()):
+            keys.add(('ingredient', ingredient_id))
+            if unit_id is not None:
+                keys.add(('unit', unit_id))
+        required = {ingredient_id for ingredient_id, _, _ in lines.get(pk, ())}
+        keys.add(('size', len(required)))
+        keys.add(('garnished_size', len(required.union(garnish_ids.get(pk, ())))))
+        for key in keys:
+            index.setdefault(key, []).append(position)
+
+    snapshot.records = tuple(records)
+    snapshot.by_pk = {r.pk: r.position for r in records}
+    snapshot.by_safe_name = {r.safe_name: r.position for r in records if r.safe_name}
+    snapshot.sorted_pks = tuple(sorted(snapshot.by_pk))
+    snapshot.index = {key: tuple(positions) for key, positions in index.items()}
+    return snapshot
+
+
+class SnapshotHolder:
+    """The current snapshot of this process and the thread that replaces it."""
+
+    def __init__(self):
+        self.current = None
+        self.pid = None
+        self.thread = None
+        self.lock = threading.Lock()
+        self.wanted = threading.Event()
+        self.idle = threading.Event()
+        self.idle.set()
+
+    def get(self, version):
+        """The current snapshot if it is of catalog ``version``; otherwise
+        schedules a rebuild and returns None."""
+        snapshot = self.current
+        if snapshot is not None and snapshot.catalog_version == version:
+            return snapshot
+        path = catalog_file()
+        if path is not None:
+            # Another process may have written the file for it already.
+            from drinks.catalog_file import open_catalog
+            snapshot = open_catalog(path, version, snapshot)
+            if snapshot is not None:
+                self.current = snapshot
+                return snapshot
+        self.refresh()
+        return None
+
+    def rebuild(self):
+        """Load a new snapshot in the calling thread and swap it in."""
+        path = catalog_file()
+        if path is None:
+            snapshot = load_snapshot()
+        else:
+            from drinks.catalog_file import update_catalog
+            snapshot = update_catalog(path)
+        self.current = snapshot
+        return snapshot
+
+    def refresh(self):
+        """Have the background thread rebuild the snapshot."""
+        with self.lock:
+            # Threads do not survive a fork: start one in every worker.
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.wanted = threading.Event()
+                self.thread = threading.Thread(target=self.run, name='drinks-snapshot', daemon=True)
+                self.thread.start()
+            self.idle.clear()
+            self.wanted.set()
+
+    def wait(self, timeout=None):
+        """Block until no rebuild is pending; returns False on timeout."""
+        return self.idle.wait(timeout)
+
+    def run(self):
+        delay = 0
+        while True:
+            self.wanted.wait()
+            if delay:
+                # Every stale read asks again; do not reload in a loop.
+                time.sleep(delay)
+            # Writes committed from here on schedule another rebuild.
+            self.wanted.clear()
+            try:
+                self.rebuild()
+                delay = 0
+            except Exception:
+                # Keep the previous snapshot; requests it is stale for are
+                # answered by the ORM views.
+                delay = min(max(delay * 2, RETRY_DELAY), MAX_RETRY_DELAY)
+                logger.exception('Rebuilding the catalog snapshot failed; retrying in %s s.', delay)
+            finally:
+                connections.close_all()
+            with self.lock:
+                if not self.wanted.is_set():
+                    self.idle.set()
+
+
+holder = SnapshotHolder()
+
+
+def current_snapshot(wait=None):
+    """This process's snapshot if ``DRINKS_SNAPSHOT`` is on and it is of the
+    primary's catalog version (it is loaded from the primary); otherwise None,
+    and a rebuild is scheduled. ``wait`` seconds are given to that rebuild.
+    """
+    if not snapshot_enabled():
+        return None
+    snapshot = holder.get(CatalogVersion.current(using=DEFAULT_DB_ALIAS))
+    if snapshot is None and wait and holder.wait(wait):
+        snapshot = holder.get(CatalogVersion.current(using=DEFAULT_DB_ALIAS))
+    return snapshot
+
+
+@receiver(catalog_changed, dispatch_uid='drinks_snapshot_rebuild')
+def rebuild_snapshot(sender, **kwargs):
+    if snapshot_enabled():
+        transaction.on_commit(holder.refresh)
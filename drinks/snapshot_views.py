@@ -0,0 +1,301 @@
+"""Read path for the drinks endpoints served from ``drinks.snapshot``.
+
+With ``DRINKS_SNAPSHOT`` on, the JSON GETs of the cocktail list, detail and
+random endpoints, of the category list and of every facet's list and detail
+page are answered from the current catalog snapshot rather than by the
+DRF viewsets. The handlers build the same dicts as the serializers, in the
+same key order, and encode them with ``DrinkJSONRenderer``, so the bytes,
+status and headers sent are the same as the ORM path's.
+
+What the snapshot cannot answer (the browsable API, format overrides,
+``?q=``, ``?cursor=``, ``?search=`` and ``?ordering=`` on the lists, HTTP
+authentication, writes, error responses, and any read made while the
+snapshot is behind ``CatalogVersion``) is handed to the sync viewset
+unchanged, as in ``drinks.async_views``.
+"""
+import functools
+import random
+from urllib.parse import quote as urlquote
+
+from django.core.paginator import InvalidPage
+from django.db import DEFAULT_DB_ALIAS
+from django.urls import URLPattern, reverse as django_reverse
+
+from drinks.fast_reads import Fallback, check_not_modified, finish, negotiate, render
+from drinks.filtering import parse_drink_filters
+from drinks.models import CatalogVersion
+from drinks.replicas import read_db
+from drinks.snapshot import ascii_lower, holder
+from drinks.views import AdminAwarePagination, DrinkViewSet, NotModified, make_etag
+
+
+# Query parameters of the lookup lists' filter backends.
+LIST_PARAMS = frozenset({'search', 'ordering'})
+# ``CategoryViewSet.get_queryset()`` puts these first, in this order.
+PREFERRED_CATEGORIES = ('cocktails throughout history', 'shots', 'my recipes')
+
+
+def check_catalog(request, snapshot):
+    check_not_modified(request, (make_etag(request, f'catalog:{snapshot.version}'), snapshot.updated))
+
+
+def paginate(request, rows):
+    """The requested page of ``rows`` as ``AdminAwarePagination`` would cut it."""
+    pagination = AdminAwarePagination()
+    paginator = pagination.django_paginator_class(rows, pagination.get_page_size(request))
+    number = request.query_params.get(pagination.page_query_param) or 1
+    if number in pagination.last_page_strings:
+        number = paginator.num_pages
+    try:
+        page = paginator.page(number)
+    except InvalidPage:
+        raise Fallback
+    return page.object_list
+
+
+class Links:
+    """Absolute URLs of detail pages, built the way the serializers build them."""
+
+    def __init__(self, request):
+        self.request = request
+        self.templates = {}
+
+    def detail(self, route, slug):
+        try:
+            head, tail = self.templates[route]
+        except KeyError:
+            # Segments are [0-9A-Za-z_], which ``reverse()`` leaves as they are.
+            marker = 'snapshot0segment'
+            head, _, tail = django_reverse(route, args=[marker]).rpartition(marker)
+            self.templates[route] = head, tail
+        return self.request.build_absolute_uri(head + slug + tail)
+
+    def drink(self, record):
+        """``DrinkSerializer`` output for ``record``, without the None fields."""
+        data = {'name': record.name, 'url': self.detail('cocktail-detail', record.slug)}
+        if record.image is not None:
+            data['image_url'] = self.request.build_absolute_uri(record.image)
+        data['tags'] = record.tags
+        data['preparation_method'] = record.methods
+        if record.glass is not None:
+            data['glass_type'] = record.glass
+        data['recipe_ingredients'] = record.lines
+        data['garnish_ingredients'] = record.garnish
+        data['instructions'] = record.instructions
+        data['ingredient_names'] = record.ingredient_names
+        return data
+
+
+def drink_page(request, records):
+    links = Links(request)
+    return {'results': [links.drink(record) for record in paginate(request, records)]}
+
+
+def parse_filters(request):
+    try:
+        return parse_drink_filters(request.query_params)
+    except ValueError:
+        raise Fallback
+
+
+# Cocktails.
+
+def cocktail_list(request, snapshot):
+    check_catalog(request, snapshot)
+    return drink_page(request, snapshot.select(parse_filters(request)))
+
+
+def cocktail_detail(request, snapshot, name=None):
+    if not name or str(name).isdigit():
+        raise Fallback
+    record = snapshot.drink_named(name)
+    if record is None:
+        raise Fallback
+    check_not_modified(request, (make_etag(request, f'drink:{record.pk}:{record.updated.isoformat()}'), record.updated))
+    return Links(request).drink(record)
+
+
+def cocktail_random(request, snapshot):
+    if 'seed' in request.query_params:
+        check_catalog(request, snapshot)
+    drink_filters = parse_filters(request)
+    n = request.query_params.get('n')
+    if n is not None:
+        try:
+            n = int(n)
+        except (TypeError, ValueError):
+            raise Fallback
+        if not 1 <= n <= DrinkViewSet.MAX_RANDOM_DRAWS:
+            raise Fallback
+    # The draw of ``drinks.sampling.sample_drink_ids()``.
+    ids = snapshot.sample_pool(drink_filters)
+    seed = request.query_params.get('seed')
+    rng = random.Random(seed) if seed is not None else random
+    records = [snapshot.drink(ids[i]) for i in rng.sample(range(len(ids)), min(n or 1, len(ids)))]
+    if not records:
+        raise Fallback
+    links = Links(request)
+    if n is None:
+        return links.drink(records[0])
+    return {'results': [links.drink(record) for record in records]}
+
+
+# Facet detail pages: the drinks with one tag, ingredient, glass type, ...
+
+def facet_detail(table, facet, kwarg='pk'):
+    def detail(request, snapshot, **kwargs):
+        if kwargs.get(kwarg) is None:
+            raise Fallback
+        check_catalog(request, snapshot)
+        row = getattr(snapshot, table).get(kwargs[kwarg])
+        if row is None:
+            raise Fallback
+        return drink_page(request, snapshot.drinks_with(facet, row.pk))
+    return detail
+
+
+def category_detail(request, snapshot, name=None):
+    if name is None:
+        raise Fallback
+    check_catalog(request, snapshot)
+    # ``CategoryViewSet`` looks digits up by safe name too.
+    category = snapshot.categories.named(name)
+    if category is None:
+        raise Fallback
+    kind = category.name.strip().lower()
+    if kind == 'cocktails throughout history':
+        records = snapshot.drinks_with_any('category', [
+            c.pk for c in snapshot.categories.rows if ascii_lower(c.name) == 'cocktails throughout history'
+        ])
+    elif kind == 'shots':
+        records = snapshot.drinks_with('is_shot', True)
+    else:
+        return drink_page(request, snapshot.drinks_with('category', category.pk))
+    search = request.query_params.get('search')
+    if search:
+        # ``name__icontains`` is SQLite's LIKE.
+        search = ascii_lower(search)
+        records = [r for r in records if search in ascii_lower(r.name)]
+    return drink_page(request, records)
+
+
+# Lists of lookup rows.
+
+def lookup_list(table, route, rows=None, fields=('name',)):
+    def listing(request, snapshot):
+        if not LIST_PARAMS.isdisjoint(request.query_params):
+            raise Fallback
+        check_catalog(request, snapshot)
+        links = Links(request)
+        selected = getattr(snapshot, table).rows
+        if rows is not None:
+            selected = [row for row in selected if rows(row)]
+        results = []
+        for row in paginate(request, selected):
+            data = {field: getattr(row, field) for field in fields}
+            data['url'] = links.detail(route, row.slug)
+            results.append(data)
+        return {'results': results}
+    return listing
+
+
+def category_list(request, snapshot):
+    if not LIST_PARAMS.isdisjoint(request.query_params):
+        raise Fallback
+    check_catalog(request, snapshot)
+
+    def rank(row):
+        name = ascii_lower(row.name)
+        preferred = PREFERRED_CATEGORIES.index(name) if name in PREFERRED_CATEGORIES else 100
+        return (preferred, row.name, row.pk)
+
+    base = request.build_absolute_uri(django_reverse('category-list'))
+    results = []
+    for row in paginate(request, sorted(snapshot.categories.rows, key=rank)):
+        # ``CategorySerializer``.
+        name = row.name.strip()
+        if name and name.lower() == 'cocktails throughout history':
+            name = 'Cocktails Throughout History'
+        results.append({'name': name, 'url': f'{base}?name={urlquote(row.name)}'})
+    return {'results': results}
+
+
+# URL name -> handler.
+HANDLERS = {
+    'cocktail-list': cocktail_list,
+    'cocktail-detail': cocktail_detail,
+    'cocktail-random': cocktail_random,
+    'category-list': category_list,
+    'category-detail': category_detail,
+    'tag-list': lookup_list('tags', 'tag-detail'),
+    'tag-detail': facet_detail('tags', 'tag'),
+    'recipe_ingredient-list': lookup_list(
+        'ingredients', 'recipe_ingredient-detail', rows=lambda row: row.drink_count > 0,
+    ),
+    'recipe_ingredient-detail': facet_detail('ingredients', 'ingredient', kwarg='name'),
+    'garnish_ingredient-list': lookup_list(
+        'ingredients', 'garnish_ingredient-detail', rows=lambda row: row.garnish_count > 0,
+    ),
+    'garnish_ingredient-detail': facet_detail('ingredients', 'garnish', kwarg='name'),
+    'preparationmethod-list': lookup_list('methods', 'preparationmethod-detail'),
+    'preparationmethod-detail': facet_detail('methods', 'preparation'),
+    'unit-list': lookup_list('units', 'unit-detail', fields=('name', 'plural')),
+    'unit-detail': facet_detail('units', 'unit'),
+    'glasstype-list': lookup_list('glass_types', 'glasstype-detail'),
+    'glasstype-detail': facet_detail('glass_types', 'glass'),
+}
+
+
+def catalog_version(request):
+    """``CatalogVersion`` as of the primary, which snapshots are loaded from.
+
+    A replica behind the primary would make every snapshot look stale. When
+    the request reads from the primary anyway, the version is cached on it,
+    so a fallback does not read it again.
+    """
+    if read_db() is None:
+        return CatalogVersion.for_request(request)
+    return CatalogVersion.current(using=DEFAULT_DB_ALIAS)
+
+
+def respond(request, handler, view, kwargs):
+    request = negotiate(request, view, kwargs)
+    snapshot = holder.get(catalog_version(request._request))
+    if snapshot is None:
+        raise Fallback
+    # Every DRF view authenticates, which reads the session.
+    try:
+        request.user
+    except Exception:
+        raise Fallback
+    try:
+        response = render(request, handler(request, snapshot, **kwargs))
+    except NotModified as exc:
+        response = exc.response
+    return finish(request, view, response)
+
+
+def snapshot_read_view(view, handler):
+    """View answering what ``handler`` can from the snapshot and passing the rest to ``view``."""
+
+    @functools.wraps(view)
+    def read_view(request, *args, **kwargs):
+        try:
+            return respond(request, handler, view, kwargs)
+        except Fallback:
+            return view(request, *args, **kwargs)
+
+    return read_view
+
+
+def snapshot_reads(patterns):
+    """``patterns`` (e.g. ``router.urls``) with the snapshot handlers wired in."""
+    wired = []
+    for pattern in patterns:
+        handler = HANDLERS.get(getattr(pattern, 'name', None))
+        if isinstance(pattern, URLPattern) and handler is not None:
+            pattern = URLPattern(
+                pattern.pattern, snapshot_read_view(pattern.callback, handler), pattern.default_args, pattern.name,
+            )
+        wired.append(pattern)
+    return wired
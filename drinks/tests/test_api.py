@@ -55,3 +55,16 @@ class APITests(APITestCase):
         response = self.client.get(reverse('recipe_ingredient-list'))
         self.assertEqual(response.status_code, 200)
         self.assertContains(response, self.ingredient.name)
+
+    def test_detail_lookup_by_safe_name(self):
+        drink = Drink.objects.create(name="Hanky-Panky", instructions="Stir.")
+        response = self.client.get(reverse('cocktail-detail', args=['hanky_panky']))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], drink.name)
+        response = self.client.get(reverse('cocktail-detail', args=['Hanky_Panky_Punch']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_colliding_name_rejected_by_api(self):
+        response = self.client.post(reverse('tag-list'), {'name': 'summer!'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('name', response.data)
@@ -0,0 +1,125 @@
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.test import override_settings
+from django.urls import include, path
+from rest_framework.test import APITestCase
+
+from drinks import urls as drinks_urls
+from drinks.async_views import async_reads
+from drinks.facets import index as facet_index
+from drinks.models import (
+    Category, Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag, Unit,
+)
+from drinks.views import DrinkViewSet, TagViewSet
+
+
+# The router endpoints as config.asgi serves them.
+urlpatterns = [path('api/', include(async_reads(drinks_urls.router.urls)))]
+
+HEADERS = ('Content-Type', 'Vary', 'Allow', 'ETag', 'Last-Modified')
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncReadTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        facet_index.reset()
+        self.sour = Tag.objects.create(name='Sour')
+        self.gin = RecipeIngredient.objects.create(name='Gin')
+        self.lemon = RecipeIngredient.objects.create(name='Lemon Twist')
+        self.oz = Unit.objects.create(name='oz')
+        self.coupe = GlassType.objects.create(name='Coupe')
+        self.shake = PreparationMethod.objects.create(name='Shaken')
+        self.tiki = Category.objects.create(name='Tiki')
+        for i in range(7):
+            drink = Drink.objects.create(
+                name=f'Drink {i}', instructions='Shake.', glass_type=self.coupe if i % 3 else None,
+                category=self.tiki if i % 2 else None, is_shot=i == 4,
+            )
+            DrinkIngredientsList.objects.create(drink=drink, ingredient=self.gin, quantity_text='2 oz')
+            if i % 2:
+                drink.tags.add(self.sour)
+                drink.garnish.add(self.lemon)
+                drink.preparation_method.add(self.shake)
+
+    def sync_get(self, url, accept='application/json', **headers):
+        with override_settings(ROOT_URLCONF='config.urls'):
+            return self.client.get(url, headers={'Accept': accept, **headers})
+
+    def async_get(self, url, accept='application/json', **headers):
+        return async_to_sync(self.async_client.get)(url, headers={'Accept': accept, **headers})
+
+    def assert_same(self, url, accept='application/json', **headers):
+        cache.clear()
+        expected = self.sync_get(url, accept, **headers)
+        cache.clear()
+        response = self.async_get(url, accept, **headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        for header in HEADERS:
+            self.assertEqual(response.get(header), expected.get(header), header)
+        # A warm fragment cache gives the same bytes.
+        self.assertEqual(self.async_get(url, accept, **headers).content, expected.content)
+        return response
+
+    def test_json_reads_match_the_sync_views(self):
+        urls = [
+            '/api/All_Cocktails/',
+            '/api/All_Cocktails/?page=last',
+            f'/api/All_Cocktails/?tag={self.sour.pk}',
+            f'/api/All_Cocktails/?exclude_tag={self.sour.pk}&is_shot=false',
+            '/api/All_Cocktails/?format=json',
+            '/api/All_Cocktails/Drink_3/',
+            '/api/All_Cocktails/random/?seed=7',
+            '/api/All_Cocktails/random/?seed=7&n=3',
+            '/api/tags/Sour/',
+            f'/api/tags/{self.sour.pk}/',
+            '/api/recipe_ingredients/Gin/',
+            '/api/garnish_ingredients/Lemon_Twist/',
+            '/api/categories/Tiki/',
+            '/api/categories/Shots/',
+            '/api/categories/Shots/?search=4',
+            '/api/preparation_methods/Shaken/',
+            '/api/units/oz/',
+            '/api/glass_types/Coupe/',
+        ]
+        for url in urls:
+            with self.subTest(url):
+                response = self.assert_same(url)
+                self.assertEqual(response.status_code, 200)
+
+    def test_json_reads_skip_the_viewsets(self):
+        sync = mock.patch.object(DrinkViewSet, 'list', side_effect=AssertionError('sync list'))
+        with sync, mock.patch.object(TagViewSet, 'retrieve', side_effect=AssertionError('sync retrieve')):
+            self.assertEqual(self.async_get('/api/All_Cocktails/').status_code, 200)
+            self.assertEqual(self.async_get('/api/tags/Sour/').status_code, 200)
+
+    def test_not_modified(self):
+        for url in ('/api/All_Cocktails/', '/api/All_Cocktails/Drink_1/', '/api/tags/Sour/'):
+            with self.subTest(url):
+                etag = self.sync_get(url)['ETag']
+                response = self.assert_same(url, **{'If-None-Match': etag})
+                self.assertEqual(response.status_code, 304)
+
+    def test_everything_else_falls_back(self):
+        urls = [
+            ('/api/All_Cocktails/', 'text/html'),
+            ('/api/All_Cocktails/?q=Drink', 'application/json'),
+            ('/api/All_Cocktails/?cursor=', 'application/json'),
+            ('/api/All_Cocktails/?tag=x', 'application/json'),
+            ('/api/All_Cocktails/?page=9', 'application/json'),
+            ('/api/All_Cocktails/Nope/', 'application/json'),
+            ('/api/All_Cocktails/random/?tag=999', 'application/json'),
+            ('/api/All_Cocktails/random/?n=0', 'application/json'),
+            ('/api/tags/Nope/', 'application/json'),
+            ('/api/tags/', 'application/json'),
+        ]
+        for url, accept in urls:
+            with self.subTest(url=url, accept=accept):
+                response = self.async_get(url, accept)
+                self.assertEqual(response.status_code, self.sync_get(url, accept).status_code)
+        response = async_to_sync(self.async_client.post)('/api/All_Cocktails/', {})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Drink.objects.filter(name='').exists())
@@ -0,0 +1,207 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import Resolver404, clear_url_caches, get_resolver
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from drinks.breadcrumbs import trails, views
+from drinks.models import (
+    CatalogVersion, Category, Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag, Unit,
+)
+from drinks.views import CustomBrowsableAPIRenderer
+
+
+HOME_LINK = '<span style="color:#c00;">Home</span>'
+CATEGORIES_LINK = '<span style="color:#777;">Categories</span>'
+
+CRUMBS = {
+    '/api/': [('Home', '/api/')],
+    '/api/about/': [(HOME_LINK, '/api/'), ('About', '/api/about/')],
+    '/api/contact/': [('Home', '/api/'), ('Contact', '/api/contact/')],
+    '/api/All_Cocktails/': [('Home', '/api/'), ('All Cocktails', '/api/All_Cocktails/')],
+    '/api/All_Cocktails/Ward_Eight/': [
+        (HOME_LINK, '/api/'),
+        (CATEGORIES_LINK, '/api/categories/'),
+        ('Classic', '/api/categories/Classic/'),
+        ('Ward Eight', '/api/All_Cocktails/Ward_Eight/'),
+    ],
+    '/api/All_Cocktails/ward_eight/': [
+        (HOME_LINK, '/api/'),
+        (CATEGORIES_LINK, '/api/categories/'),
+        ('Classic', '/api/categories/Classic/'),
+        ('Ward Eight', '/api/All_Cocktails/ward_eight/'),
+    ],
+    '/api/All_Cocktails/Mai_Tai/': [
+        (HOME_LINK, '/api/'),
+        (CATEGORIES_LINK, '/api/categories/'),
+        ('Tiki & Tropical', '/api/categories/Tiki_Tropical/'),
+        ('Mai Tai', '/api/All_Cocktails/Mai_Tai/'),
+    ],
+    '/api/All_Cocktails/B_52/': [
+        (HOME_LINK, '/api/'),
+        (CATEGORIES_LINK, '/api/categories/'),
+        ('B-52', '/api/All_Cocktails/B_52/'),
+    ],
+    '/api/All_Cocktails/Orphan/': [
+        (HOME_LINK, '/api/'),
+        (CATEGORIES_LINK, '/api/categories/'),
+        ('Orphan', '/api/All_Cocktails/Orphan/'),
+    ],
+    '/api/All_Cocktails/Shot_Cat/': [
+        (HOME_LINK, '/api/'),
+        (CATEGORIES_LINK, '/api/categories/'),
+        ('Shots', '/api/categories/Shots/'),
+        ('Shot Cat', '/api/All_Cocktails/Shot_Cat/'),
+    ],
+    '/api/All_Cocktails/1/': [(HOME_LINK, '/api/'), ('All Cocktails', '/api/All_Cocktails/1/')],
+    '/api/All_Cocktails/Missing/': [
+        (HOME_LINK, '/api/'),
+        (CATEGORIES_LINK, '/api/categories/'),
+        ('Missing', '/api/All_Cocktails/Missing/'),
+    ],
+    '/api/All_Cocktails/random/?seed=1': [
+        (HOME_LINK, '/api/'),
+        (CATEGORIES_LINK, '/api/categories/'),
+        ('random', '/api/All_Cocktails/random/'),
+    ],
+    '/api/All_Cocktails/makeable/?have=1': [
+        (HOME_LINK, '/api/'),
+        (CATEGORIES_LINK, '/api/categories/'),
+        ('makeable', '/api/All_Cocktails/makeable/'),
+    ],
+    '/api/recipe_ingredients/': [(HOME_LINK, '/api/'), ('Recipe Ingredients', '/api/recipe_ingredients/')],
+    '/api/recipe_ingredients/Gin/': [
+        (HOME_LINK, '/api/'),
+        ('Recipe Ingredients', '/api/recipe_ingredients/'),
+        ('Gin', '/api/recipe_ingredients/Gin/'),
+    ],
+    '/api/recipe_ingredients/Missing/': [
+        (HOME_LINK, '/api/'),
+        ('Recipe Ingredients', '/api/recipe_ingredients/'),
+        ('Missing', '/api/recipe_ingredients/Missing/'),
+    ],
+    '/api/garnish_ingredients/': [(HOME_LINK, '/api/'), ('Garnish ingredients', '/api/garnish_ingredients/')],
+    '/api/garnish_ingredients/Lemon_Twist/': [
+        (HOME_LINK, '/api/'),
+        ('Garnish ingredients', '/api/garnish_ingredients/'),
+        ('Lemon Twist', '/api/garnish_ingredients/Lemon_Twist/'),
+    ],
+    '/api/tags/': [(HOME_LINK, '/api/'), ('Tags', '/api/tags/')],
+    '/api/tags/Sour/': [
+        (HOME_LINK, '/api/'),
+        ('Tags', '/api/tags/'),
+        ('Sour', '/api/tags/Sour/'),
+    ],
+    '/api/tags/sour/': [
+        (HOME_LINK, '/api/'),
+        ('Tags', '/api/tags/'),
+        ('Sour', '/api/tags/sour/'),
+    ],
+    '/api/categories/': [(HOME_LINK, '/api/'), ('Categories', '/api/categories/')],
+    '/api/categories/Classic/': [(HOME_LINK, '/api/'), ('Classic', '/api/categories/Classic/')],
+    '/api/categories/Tiki_Tropical/': [(HOME_LINK, '/api/'), ('Tiki & Tropical', '/api/categories/Tiki_Tropical/')],
+    '/api/categories/Shots/': [(HOME_LINK, '/api/'), ('Shots', '/api/categories/Shots/')],
+    '/api/categories/Cocktails_Throughout_History/': [(HOME_LINK, '/api/'), ('Cocktails Throughout History', '/api/categories/Cocktails_Throughout_History/')],
+    '/api/categories/My_Recipes/': [(HOME_LINK, '/api/'), ('My Recipes', '/api/categories/My_Recipes/')],
+    '/api/preparation_methods/': [(HOME_LINK, '/api/'), ('Preparation Methods', '/api/preparation_methods/')],
+    '/api/preparation_methods/Shaken/': [
+        (HOME_LINK, '/api/'),
+        ('Preparation Methods', '/api/preparation_methods/'),
+        ('Shaken', '/api/preparation_methods/Shaken/'),
+    ],
+    '/api/units/': [(HOME_LINK, '/api/'), ('Units', '/api/units/')],
+    '/api/units/oz/': [
+        (HOME_LINK, '/api/'),
+        ('Units', '/api/units/'),
+        ('oz', '/api/units/oz/'),
+    ],
+    '/api/glass_types/': [(HOME_LINK, '/api/'), ('Glass Types', '/api/glass_types/')],
+    '/api/glass_types/Coupe/': [
+        (HOME_LINK, '/api/'),
+        ('Glass Types', '/api/glass_types/'),
+        ('Coupe', '/api/glass_types/Coupe/'),
+    ],
+    '/api/garnish_ingredients/Gin/': [
+        (HOME_LINK, '/api/'),
+        ('Garnish ingredients', '/api/garnish_ingredients/'),
+        ('Gin', '/api/garnish_ingredients/Gin/'),
+    ],
+    '/api/categories/?name=Foo': [(HOME_LINK, '/api/'), ('Foo', '/api/categories/')],
+    '/api/tags/Sour/?search=zzz': [
+        (HOME_LINK, '/api/'),
+        ('Tags', '/api/tags/'),
+        ('Sour', '/api/tags/Sour/'),
+    ],
+    '/api/categories/Classic/?search=zzz': [(HOME_LINK, '/api/'), (CATEGORIES_LINK, '/api/categories/Classic/')],
+}
+
+
+class BreadcrumbTests(APITestCase):
+    def setUp(self):
+        trails.clear()
+        classic = Category.objects.create(name='Classic')
+        tiki = Category.objects.create(name='Tiki & Tropical')
+        shots = Category.objects.get(name='Shots')
+        coupe = GlassType.objects.create(name='Coupe')
+        sour = Tag.objects.create(name='Sour')
+        PreparationMethod.objects.create(name='Shaken')
+        oz = Unit.objects.create(name='oz')
+        gin = RecipeIngredient.objects.create(name='Gin')
+        twist = RecipeIngredient.objects.create(name='Lemon Twist')
+        self.drink = Drink.objects.create(name='Ward Eight', category=classic, glass_type=coupe)
+        self.drink.tags.add(sour)
+        self.drink.garnish.add(twist)
+        DrinkIngredientsList.objects.create(drink=self.drink, ingredient=gin, quantity=2, unit=oz)
+        Drink.objects.create(name='Mai Tai', category=tiki)
+        Drink.objects.create(name='B-52', is_shot=True)
+        Drink.objects.create(name='Orphan')
+        Drink.objects.create(name='Shot Cat', category=shots, is_shot=True)
+
+    def page_crumbs(self, url):
+        response = self.client.get(url, HTTP_ACCEPT='text/html')
+        return [(str(label), path) for label, path in response.context['breadcrumblist']]
+
+    def trail(self, path):
+        request = Request(APIRequestFactory().get(path))
+        CatalogVersion.for_request(request)
+        return request, CustomBrowsableAPIRenderer().get_breadcrumbs(request)
+
+    def test_crumbs_for_every_route(self):
+        for url, expected in CRUMBS.items():
+            with self.subTest(url=url):
+                self.assertEqual(self.page_crumbs(url), expected)
+                # Served from the cache the second time.
+                self.assertEqual(self.page_crumbs(url), expected)
+
+    def test_warm_trail_costs_no_queries(self):
+        for path in ('/api/All_Cocktails/Ward_Eight/', '/api/tags/Sour/', '/api/categories/Shots/', '/api/about/'):
+            with self.subTest(path=path):
+                _, cold = self.trail(path)
+                request = Request(APIRequestFactory().get(path))
+                CatalogVersion.for_request(request)
+                with CaptureQueriesContext(connection) as ctx:
+                    warm = CustomBrowsableAPIRenderer().get_breadcrumbs(request)
+                self.assertEqual(warm, cold)
+                self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_writes_refresh_trails(self):
+        path = '/api/All_Cocktails/Ward_Eight/'
+        self.assertEqual(self.trail(path)[1][2], ('Classic', '/api/categories/Classic/'))
+        category = self.drink.category
+        category.name = 'Classics'
+        category.save()
+        self.assertEqual(self.trail(path)[1][2], ('Classics', '/api/categories/Classics/'))
+        # A write from another process only shows up as a new catalog version.
+        Category.objects.filter(pk=category.pk).update(name='Old School', safe_name='old_school')
+        CatalogVersion.bump()
+        self.assertEqual(self.trail(path)[1][2], ('Old School', '/api/categories/Old_School/'))
+
+    def test_url_resolution_follows_resolver_reloads(self):
+        match = views.resolve('/api/tags/Sour/')
+        self.assertEqual(match[2], {'pk': 'Sour'})
+        self.assertIsNotNone(views.paths.get(get_resolver(), '/api/tags/Sour/'))
+        clear_url_caches()
+        self.assertIsNone(views.paths.get(get_resolver(), '/api/tags/Sour/'))
+        self.assertEqual(views.resolve('/api/tags/Sour/'), match)
+        with self.assertRaises(Resolver404):
+            views.resolve('/nowhere/')
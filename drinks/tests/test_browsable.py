@@ -0,0 +1,119 @@
+import re
+from pathlib import Path
+
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from drinks.browsable import postprocess
+from drinks.facets import index as facet_index
+from drinks.models import (
+    Category, Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag, Unit,
+)
+
+
+GOLDEN = Path(__file__).parent / 'golden'
+
+# Golden pages and the URLs they were captured from. ``<name>.raw.html`` is
+# the page as DRF renders it and ``<name>.html`` the same page after the
+# post-processing, both for the catalog built by ``build_catalog``.
+PAGES = {
+    'drink_list': '/api/All_Cocktails/',
+    'drink_detail': '/api/All_Cocktails/The_Last_Word/',
+    'drink_cursor': '/api/All_Cocktails/?cursor=',
+    'category_list': '/api/categories/',
+    'makeable': '/api/All_Cocktails/makeable/?have=1,2',
+    'empty_list': '/api/All_Cocktails/?q=nothingmatches',
+    'home': '/api/',
+}
+
+
+def build_catalog():
+    classic = Category.objects.create(name='Classic')
+    Category.objects.create(name='Tiki & Tropical')
+    coupe = GlassType.objects.create(name='Coupe')
+    rocks = GlassType.objects.create(name='Rocks')
+    sour = Tag.objects.create(name='Sour')
+    bitter = Tag.objects.create(name="Bitter's & Bold")
+    shaken = PreparationMethod.objects.create(name='Shaken')
+    stirred = PreparationMethod.objects.create(name='Stirred')
+    oz = Unit.objects.create(name='oz')
+    dash = Unit.objects.create(name='dash', plural='dashes')
+    gin, rye, lemon, chartreuse, peychaud, orange = (
+        RecipeIngredient.objects.create(name=name)
+        for name in ('Gin', 'Rye Whiskey', 'Lemon', 'Green Chartreuse', "Peychaud's Bitters", 'Orange [twist]')
+    )
+    recipes = [
+        ('Ward Eight', classic, rocks, [sour], [shaken], [orange],
+         'Shake with ice - strain.\n\nGarnish ,with  orange !', [(rye, 2, oz, ''), (lemon, None, None, '3/4 oz')]),
+        ('The Last Word', classic, coupe, [sour, bitter], [shaken], [],
+         'Shake "hard" — then strain.Serve at http://testserver/api/All_Cocktails/Gimlet/ .',
+         [(gin, 0.75, oz, ''), (chartreuse, 0.75, oz, '')]),
+        ('Sazerac', None, rocks, [bitter], [stirred], [lemon],
+         'Rinse the glass.\r\n\r\nStir ; strain – twist.', [(rye, 2, oz, ''), (peychaud, 3, dash, '')]),
+        ('Café Brûlot', None, None, [], [], [], '', []),
+        ('Gin Rickey', classic, None, [sour], [], [lemon, orange], 'Build (over ice)- top.', [(gin, 2, oz, '')]),
+    ]
+    for name, category, glass, tags, methods, garnish, instructions, lines in recipes:
+        drink = Drink.objects.create(name=name, category=category, glass_type=glass, instructions=instructions)
+        drink.tags.set(tags)
+        drink.preparation_method.set(methods)
+        drink.garnish.set(garnish)
+        for ingredient, quantity, unit, text in lines:
+            DrinkIngredientsList.objects.create(
+                drink=drink, ingredient=ingredient, quantity=quantity, unit=unit, quantity_text=text,
+            )
+
+
+def normalize(text):
+    """Blank out the per-request tokens and headers of a rendered page."""
+    text = re.sub(r'(csrfmiddlewaretoken" value=")[^"]+', r'\1CSRF', text)
+    text = re.sub(r'("csrfToken": ")[^"]+', r'\1CSRF', text)
+    text = re.sub(r'(<b>ETag:</b> <span class="lit">)[^<]+', r'\1ETAG', text)
+    return re.sub(r'(<b>Last-Modified:</b> <span class="lit">)[^<]+', r'\1DATE', text)
+
+
+def golden(name, raw=False):
+    return (GOLDEN / f'{name}{".raw" if raw else ""}.html').read_text(encoding='utf-8')
+
+
+class PostprocessGoldenTests(APITestCase):
+    def test_golden_pages_are_byte_identical(self):
+        for name in PAGES:
+            with self.subTest(page=name):
+                self.assertEqual(postprocess(golden(name, raw=True)), golden(name))
+
+    def test_formats_json_inside_pre_and_textarea_only(self):
+        page = (
+            '<p>\n    &quot;tags&quot;: [\n        &quot;Sour&quot;\n    ]</p>'
+            '<textarea>{\n    &quot;tags&quot;: [\n        &quot;Sour&quot;\n    ]\n}</textarea>'
+        )
+        self.assertEqual(postprocess(page), (
+            '<p>\n    &quot;tags&quot;: [\n        &quot;Sour&quot;\n    ]</p>'
+            '<textarea>{\n<span style="display:inline-block; margin-left:23ch; text-indent:-23ch;">'
+            '    &quot;tags&quot;: ["Sour"]</span>\n}</textarea>'
+        ))
+
+    def test_instruction_urls_are_still_linked(self):
+        page = (
+            '<pre class="prettyprint">&quot;instructions&quot;: &quot;See  \\&quot;'
+            'http://testserver/api/All_Cocktails/Gimlet/&quot;</pre>'
+        )
+        self.assertEqual(postprocess(page), (
+            '<pre class="prettyprint">&quot;instructions&quot;: &quot;See \\&quot;'
+            '<a href="http://testserver/api/All_Cocktails/Gimlet/" rel="nofollow">'
+            'http://testserver/api/All_Cocktails/Gimlet/</a>&quot;</pre>'
+        ))
+
+
+class BrowsableRendererTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        facet_index.reset()
+        build_catalog()
+
+    def test_rendered_pages_match_golden(self):
+        for name in ('drink_list', 'drink_detail', 'drink_cursor', 'category_list', 'empty_list'):
+            with self.subTest(page=name):
+                response = self.client.get(PAGES[name], HTTP_ACCEPT='text/html')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(normalize(response.content.decode()), golden(name))
@@ -0,0 +1,83 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from drinks.models import CatalogVersion, Category, Drink, Tag
+
+
+class ConditionalGetTests(APITestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Tiki')
+        self.tag = Tag.objects.create(name='Rum')
+        self.drink = Drink.objects.create(name='Mai Tai', category=self.category)
+        self.other = Drink.objects.create(name='Zombie', category=self.category)
+
+    def get(self, url, **headers):
+        return self.client.get(url, HTTP_ACCEPT='application/json', **headers)
+
+    def assert_not_modified_without_work(self, url):
+        first = self.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertTrue(first['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', first)
+        with CaptureQueriesContext(connection) as ctx:
+            second = self.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b'')
+        self.assertEqual(second['ETag'], first['ETag'])
+        # Only the validator lookup runs.
+        self.assertEqual(len(ctx.captured_queries), 1)
+        return first
+
+    def test_list_not_modified(self):
+        self.assert_not_modified_without_work('/api/All_Cocktails/')
+
+    def test_category_detail_not_modified(self):
+        self.assert_not_modified_without_work('/api/categories/Tiki/')
+
+    def test_lookup_list_not_modified(self):
+        self.assert_not_modified_without_work('/api/tags/')
+
+    def test_drink_detail_not_modified(self):
+        self.assert_not_modified_without_work('/api/All_Cocktails/Mai_Tai/')
+
+    def test_if_modified_since(self):
+        first = self.get('/api/All_Cocktails/')
+        response = self.get('/api/All_Cocktails/', HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_write_changes_validators(self):
+        first = self.get('/api/All_Cocktails/')
+        self.drink.tags.add(self.tag)
+        response = self.get('/api/All_Cocktails/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+
+    def test_every_model_write_bumps_catalog_version(self):
+        before = CatalogVersion.current()[0]
+        self.category.name = 'Tropical'
+        self.category.save()
+        self.assertGreater(CatalogVersion.current()[0], before)
+
+    def test_drink_detail_uses_per_drink_validator(self):
+        first = self.get('/api/All_Cocktails/Mai_Tai/')
+        self.other.instructions = 'Blend.'
+        self.other.save()
+        self.assertEqual(self.get('/api/All_Cocktails/Mai_Tai/', HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        self.drink.tags.add(self.tag)
+        response = self.get('/api/All_Cocktails/Mai_Tai/', HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['tags'], ['Rum'])
+
+    def test_representations_have_distinct_etags(self):
+        as_json = self.get('/api/All_Cocktails/')
+        as_html = self.client.get('/api/All_Cocktails/', HTTP_ACCEPT='text/html')
+        self.assertTrue(as_html['ETag'].startswith('W/'))
+        self.assertNotEqual(as_json['ETag'], as_html['ETag'].lstrip('W/'))
+        page = self.get('/api/All_Cocktails/?search=mai')
+        self.assertNotEqual(as_json['ETag'], page['ETag'])
+
+    def test_random_is_never_validated(self):
+        response = self.get('/api/All_Cocktails/random/')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
@@ -0,0 +1,97 @@
+from io import StringIO
+
+from django.core.management import call_command
+from rest_framework.test import APITestCase
+
+from drinks.models import Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag, Unit
+
+
+class CounterTests(APITestCase):
+    def setUp(self):
+        self.gin = RecipeIngredient.objects.create(name='Gin')
+        self.lime = RecipeIngredient.objects.create(name='Lime')
+        self.ounce = Unit.objects.create(name='oz')
+        self.coupe = GlassType.objects.create(name='Coupe')
+        self.rocks = GlassType.objects.create(name='Rocks')
+        self.classic = Tag.objects.create(name='Classic')
+        self.shaken = PreparationMethod.objects.create(name='Shaken')
+
+    def counts(self):
+        for obj in (self.gin, self.lime, self.ounce, self.coupe, self.rocks, self.classic, self.shaken):
+            obj.refresh_from_db()
+        return {
+            'gin': self.gin.drink_count, 'lime': self.lime.drink_count, 'lime_garnish': self.lime.garnish_count,
+            'oz': self.ounce.drink_count, 'coupe': self.coupe.drink_count, 'rocks': self.rocks.drink_count,
+            'classic': self.classic.drink_count, 'shaken': self.shaken.drink_count,
+        }
+
+    def assertCounts(self, **expected):
+        counts = self.counts()
+        self.assertEqual({k: counts[k] for k in expected}, expected)
+
+    def test_recipe_lines_count_drinks_once(self):
+        gimlet = Drink.objects.create(name='Gimlet', glass_type=self.coupe)
+        line = DrinkIngredientsList.objects.create(drink=gimlet, ingredient=self.gin, unit=self.ounce)
+        DrinkIngredientsList.objects.create(drink=gimlet, ingredient=self.gin, unit=self.ounce)
+        self.assertCounts(gin=1, oz=1, coupe=1, lime=0)
+        line.ingredient = self.lime
+        line.unit = None
+        line.save()
+        self.assertCounts(gin=1, lime=1, oz=1)
+        line.delete()
+        self.assertCounts(gin=1, lime=0, oz=1)
+
+    def test_glass_change_and_drink_delete(self):
+        gimlet = Drink.objects.create(name='Gimlet', glass_type=self.coupe)
+        DrinkIngredientsList.objects.create(drink=gimlet, ingredient=self.gin, unit=self.ounce)
+        gimlet.tags.add(self.classic)
+        gimlet.garnish.add(self.lime)
+        gimlet.glass_type = self.rocks
+        gimlet.save()
+        self.assertCounts(coupe=0, rocks=1, classic=1, lime_garnish=1)
+        gimlet.delete()
+        self.assertCounts(gin=0, oz=0, rocks=0, classic=0, lime_garnish=0)
+
+    def test_m2m_forward_and_reverse(self):
+        gimlet = Drink.objects.create(name='Gimlet')
+        daiquiri = Drink.objects.create(name='Daiquiri')
+        gimlet.tags.add(self.classic)
+        gimlet.preparation_method.add(self.shaken)
+        self.classic.drink_set.add(daiquiri)
+        self.assertCounts(classic=2, shaken=1)
+        gimlet.tags.remove(self.classic)
+        self.assertCounts(classic=1)
+        daiquiri.preparation_method.add(self.shaken)
+        self.shaken.drink_set.clear()
+        self.assertCounts(shaken=0)
+        daiquiri.garnish.add(self.lime)
+        daiquiri.garnish.clear()
+        daiquiri.tags.clear()
+        self.assertCounts(classic=0, lime_garnish=0)
+
+    def test_recount_command_repairs_counts(self):
+        gimlet = Drink.objects.create(name='Gimlet', glass_type=self.coupe)
+        gimlet.tags.add(self.classic)
+        Tag.objects.update(drink_count=7)
+        GlassType.objects.update(drink_count=0)
+        out = StringIO()
+        call_command('recount', stdout=out)
+        self.assertIn('Tag.drink_count', out.getvalue())
+        self.assertCounts(classic=1, coupe=1, rocks=0)
+
+
+class CounterListTests(APITestCase):
+    def names(self, url):
+        return [row['name'] for row in self.client.get(url, HTTP_ACCEPT='application/json').json()['results']]
+
+    def test_lists_filter_in_use_and_sort_by_popularity(self):
+        gin, lime, _ = (RecipeIngredient.objects.create(name=n) for n in ('Gin', 'Lime', 'Orgeat'))
+        for name in ('Gimlet', 'Martini'):
+            drink = Drink.objects.create(name=name)
+            DrinkIngredientsList.objects.create(drink=drink, ingredient=gin)
+        drink.garnish.add(lime)
+        DrinkIngredientsList.objects.create(drink=drink, ingredient=lime)
+        self.assertEqual(self.names('/api/recipe_ingredients/'), ['Gin', 'Lime'])
+        self.assertEqual(self.names('/api/recipe_ingredients/?ordering=-drink_count'), ['Gin', 'Lime'])
+        self.assertEqual(self.names('/api/recipe_ingredients/?ordering=drink_count'), ['Lime', 'Gin'])
+        self.assertEqual(self.names('/api/garnish_ingredients/'), ['Lime'])
@@ -0,0 +1,80 @@
+import csv
+import io
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from drinks import export
+from drinks.models import Drink, DrinkIngredientsList, RecipeIngredient, Tag
+
+
+class ExportTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.sour = Tag.objects.create(name='Sour')
+        self.gin = RecipeIngredient.objects.create(name='Gin')
+        for i in range(7):
+            drink = Drink.objects.create(name=f'Drink {i}', instructions='Shake, "hard"\nStrain.')
+            DrinkIngredientsList.objects.create(drink=drink, ingredient=self.gin, quantity_text='2 oz')
+            if i % 2:
+                drink.tags.add(self.sour)
+
+    def fetch(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return b''.join(response.streaming_content).decode(), response
+
+    def listed(self, params=''):
+        return self.client.get(f'/api/All_Cocktails/?page_size=1000{params}', HTTP_ACCEPT='application/json').json()['results']
+
+    def test_ndjson_matches_the_list(self):
+        body, response = self.fetch('/api/All_Cocktails/export.ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([json.loads(line) for line in body.splitlines()], self.listed())
+
+    def test_csv_flattens_lists(self):
+        body, response = self.fetch('/api/All_Cocktails/export.csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(io.StringIO(body)))
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(rows[1]['tags'], 'Sour')
+        self.assertEqual(rows[1]['recipe_ingredients'], 'Gin 2')
+        self.assertEqual(rows[1]['instructions'], 'Shake, "hard"\nStrain.')
+
+    def test_list_filters_apply(self):
+        for params in (f'tag={self.sour.pk}', f'exclude_tag={self.sour.pk}', 'q=Drink 3'):
+            with self.subTest(params):
+                body, _ = self.fetch(f'/api/All_Cocktails/export.ndjson?{params}')
+                names = [json.loads(line)['name'] for line in body.splitlines()]
+                self.assertEqual(names, [d['name'] for d in self.listed(f'&{params}')])
+        response = self.client.get('/api/All_Cocktails/export.csv?tag=x')
+        self.assertEqual(response.status_code, 400)
+
+    def count_queries(self, url):
+        self.fetch(url)  # Brings the facet index up to date.
+        cache.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            body, _ = self.fetch(url)
+        self.assertEqual(len(body.splitlines()), Drink.objects.count())
+        sql = [q['sql'] for q in ctx.captured_queries]
+        self.assertFalse([q for q in sql if 'COUNT(' in q or 'OFFSET' in q])
+        return len(sql)
+
+    @mock.patch.object(export, 'CHUNK_SIZE', 3)
+    def test_queries_grow_with_chunks_not_drinks(self):
+        # Per chunk: tags + preparation methods + garnish + recipe lines, and
+        # the drinks themselves unless they come from one streamed query.
+        for url, per_chunk in (('/api/All_Cocktails/export.ndjson', 4), ('/api/All_Cocktails/export.ndjson?is_shot=false', 5)):
+            with self.subTest(url):
+                three_chunks = self.count_queries(url)
+                Drink.objects.create(name='Drink 7')
+                Drink.objects.create(name='Drink 8')
+                self.assertEqual(self.count_queries(url), three_chunks)
+                Drink.objects.create(name='Drink 9')
+                self.assertEqual(self.count_queries(url), three_chunks + per_chunk)
+                Drink.objects.filter(name__in=['Drink 7', 'Drink 8', 'Drink 9']).delete()
@@ -0,0 +1,104 @@
+import random
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import QueryDict
+from rest_framework.test import APITestCase
+
+from drinks import facets
+from drinks.facets import index
+from drinks.filtering import apply_drink_filters, parse_drink_filters
+from drinks.models import (
+    Category, Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag
+)
+
+
+class FacetIndexDifferentialTests(APITestCase):
+    """The facet index must select exactly what the ORM filters select."""
+
+    def setUp(self):
+        cache.clear()
+        index.reset()
+        rng = random.Random(11)
+        self.rng = rng
+        self.tags = [Tag.objects.create(name=f'Tag {i}') for i in range(5)]
+        self.ingredients = [RecipeIngredient.objects.create(name=f'Ingredient {i}') for i in range(6)]
+        self.preps = [PreparationMethod.objects.create(name=f'Prep {i}') for i in range(3)]
+        self.glasses = [GlassType.objects.create(name=f'Glass {i}') for i in range(3)]
+        self.categories = [Category.objects.create(name=f'Cat {i}') for i in range(2)]
+        for i in range(60):
+            drink = Drink.objects.create(
+                name=f'Drink {rng.randint(0, 10 ** 6):07} {i}',
+                glass_type=rng.choice(self.glasses + [None]),
+                category=rng.choice(self.categories + [None]),
+                is_shot=rng.random() < 0.3,
+            )
+            drink.tags.set(rng.sample(self.tags, rng.randint(0, 3)))
+            drink.preparation_method.set(rng.sample(self.preps, rng.randint(0, 2)))
+            for ingredient in rng.sample(self.ingredients, rng.randint(0, 4)):
+                DrinkIngredientsList.objects.create(drink=drink, ingredient=ingredient)
+
+    def random_query(self):
+        rng = self.rng
+        params = QueryDict(mutable=True)
+        pools = {
+            'tag': self.tags, 'ingredient': self.ingredients,
+            'preparation': self.preps, 'glass': self.glasses,
+        }
+        for facet in rng.sample(list(pools), rng.randint(1, 3)):
+            chosen = rng.sample(pools[facet], rng.randint(1, 2))
+            params[facet] = ','.join(str(o.pk) for o in chosen)
+            if rng.random() < 0.4:
+                params[f'{facet}_mode'] = 'all'
+            if rng.random() < 0.3:
+                params[f'exclude_{facet}'] = str(rng.choice(pools[facet]).pk)
+        if rng.random() < 0.3:
+            params['category'] = rng.choice(self.categories).name.upper()
+        if rng.random() < 0.3:
+            params['is_shot'] = rng.choice(['true', 'false'])
+        return params
+
+    def orm_ids(self, filters):
+        qs = apply_drink_filters(Drink.objects.order_by('name'), filters)
+        return list(qs.values_list('pk', flat=True))
+
+    def test_random_queries_match_orm(self):
+        for _ in range(150):
+            params = self.random_query()
+            filters = parse_drink_filters(params)
+            self.assertEqual(list(index.select(filters)), self.orm_ids(filters), params.urlencode())
+
+    def test_slices_match_orm_on_both_ordering_paths(self):
+        filters = {'is_shot': False}
+        expected = self.orm_ids(filters)
+        for limit in (facets.SORT_LIMIT, 0):
+            with mock.patch.object(facets, 'SORT_LIMIT', limit):
+                result = index.select(filters)
+                self.assertEqual(len(result), len(expected))
+                self.assertEqual(result[5:15], expected[5:15])
+                self.assertEqual(result[-1], expected[-1])
+                self.assertEqual(result[len(expected):], [])
+
+    def test_follows_writes(self):
+        tag = self.tags[0]
+        filters = {'tag': [tag.pk]}
+        self.assertEqual(list(index.select(filters)), self.orm_ids(filters))
+        drink = Drink.objects.exclude(tags=tag).first()
+        drink.tags.add(tag)
+        Drink.objects.filter(tags=tag).exclude(pk=drink.pk).first().delete()
+        renamed = Drink.objects.filter(tags=tag).last()
+        renamed.name = 'AAA first'
+        renamed.save()
+        self.assertEqual(list(index.select(filters)), self.orm_ids(filters))
+
+    def test_endpoint_matches_orm(self):
+        for _ in range(20):
+            params = self.random_query()
+            response = self.client.get(f'/api/All_Cocktails/?{params.urlencode()}', HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 200)
+            expected = list(Drink.objects.filter(pk__in=self.orm_ids(parse_drink_filters(params))).order_by('name').values_list('name', flat=True))
+            self.assertEqual([d['name'] for d in response.json()['results']], expected, params.urlencode())
+
+    def test_invalid_mode(self):
+        response = self.client.get('/api/All_Cocktails/?tag=1&tag_mode=some', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,101 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from drinks.fragments import DrinkJSONRenderer, EncodedFragments, encode_fragment
+from drinks.models import Drink, DrinkIngredientsList, GlassType, RecipeIngredient, Tag, Unit
+
+
+class FragmentRendererTests(APITestCase):
+    drinks = [
+        {'name': 'Sidecar', 'tags': ['Sour', 'Brandy'], 'instructions': 'Shake   strain.'},
+        {'name': 'Café', 'tags': [], 'recipe_ingredients': ['Cognac 2 ozs']},
+    ]
+
+    def assert_matches_plain_render(self, media_type, context=None):
+        indent = DrinkJSONRenderer().get_indent(media_type, context or {})
+        fragments = EncodedFragments([encode_fragment(d, indent) for d in self.drinks], indent=indent)
+        spliced = DrinkJSONRenderer().render({'results': fragments}, media_type, context)
+        plain = JSONRenderer().render({'results': self.drinks}, media_type, context)
+        self.assertEqual(spliced, plain)
+
+    def test_compact_output_is_byte_identical(self):
+        self.assert_matches_plain_render('application/json')
+
+    def test_indented_output_is_byte_identical(self):
+        self.assert_matches_plain_render('application/json; indent=2')
+        self.assert_matches_plain_render('text/html', {'indent': 4})
+
+    def test_empty_page(self):
+        fragments = EncodedFragments([], indent=4)
+        self.assertEqual(
+            DrinkJSONRenderer().render({'results': fragments}, 'text/html', {'indent': 4}),
+            JSONRenderer().render({'results': []}, 'text/html', {'indent': 4}),
+        )
+
+
+class FragmentCacheTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.tag = Tag.objects.create(name='Sour')
+        self.glass = GlassType.objects.create(name='Coupe')
+        self.gin = RecipeIngredient.objects.create(name='Gin')
+        self.drink = Drink.objects.create(name='Gimlet', glass_type=self.glass)
+        self.drink.tags.add(self.tag)
+        DrinkIngredientsList.objects.create(drink=self.drink, ingredient=self.gin, quantity_text='2 oz')
+
+    def get_list(self):
+        response = self.client.get('/api/All_Cocktails/', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def test_warm_page_skips_serialization_queries(self):
+        cold = self.get_list()
+        with CaptureQueriesContext(connection) as ctx:
+            warm = self.get_list()
+        self.assertEqual(cold, warm)
+        # catalog version + count + page only
+        self.assertEqual(len(ctx.captured_queries), 3)
+
+    def test_html_and_json_variants_are_cached_separately(self):
+        self.drink.instructions = 'Shake.\n\nStrain.'
+        self.drink.save()
+        self.assertEqual(self.get_list()[0]['instructions'], 'Shake.\n\nStrain.')
+        response = self.client.get('/api/All_Cocktails/', HTTP_ACCEPT='text/html')
+        self.assertContains(response, 'Shake. Strain.')
+        self.assertEqual(self.get_list()[0]['instructions'], 'Shake.\n\nStrain.')
+
+    def test_drink_and_relation_writes_invalidate(self):
+        self.get_list()
+        self.drink.tags.add(Tag.objects.create(name='Classic'))
+        self.assertEqual(self.get_list()[0]['tags'], ['Classic', 'Sour'])
+        self.tag.drink_set.clear()
+        self.assertEqual(self.get_list()[0]['tags'], ['Classic'])
+        DrinkIngredientsList.objects.create(drink=self.drink, ingredient=RecipeIngredient.objects.create(name='Lime'))
+        self.assertIn('Lime', self.get_list()[0]['ingredient_names'])
+        self.drink.name = 'Gin Gimlet'
+        self.drink.save()
+        self.assertEqual(self.get_list()[0]['name'], 'Gin Gimlet')
+
+    def test_lookup_renames_invalidate_dependent_drinks(self):
+        self.get_list()
+        self.glass.name = 'Nick & Nora'
+        self.glass.save()
+        self.gin.name = 'Old Tom Gin'
+        self.gin.save()
+        drink = self.get_list()[0]
+        self.assertEqual(drink['glass_type'], 'Nick & Nora')
+        self.assertEqual(drink['recipe_ingredients'], ['Old Tom Gin 2'])
+        Unit.objects.create(name='oz')
+        self.assertEqual(self.get_list()[0]['recipe_ingredients'], ['Old Tom Gin 2 ozs'])
+        self.tag.delete()
+        self.assertEqual(self.get_list()[0]['tags'], [])
+
+    def test_stale_entry_from_another_process_is_ignored(self):
+        self.get_list()
+        # A write seen only by another process leaves our cache entry in place
+        # but bumps Drink.updated, which is part of the entry.
+        Drink.objects.filter(pk=self.drink.pk).update(name='Renamed elsewhere', updated=self.drink.updated.replace(year=2100))
+        self.assertEqual(self.get_list()[0]['name'], 'Renamed elsewhere')
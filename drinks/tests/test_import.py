@@ -0,0 +1,147 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from drinks.importer import import_rows
+from drinks.models import Drink, DrinkIngredientsList, RecipeIngredient, Tag, Unit
+
+
+def recipe(name, **extra):
+    row = {
+        'name': name,
+        'category': 'Classics',
+        'glass_type': 'Coupe',
+        'tags': ['Sour'],
+        'preparation_method': ['Shaken'],
+        'garnish_ingredients': ['Lime wheel'],
+        'instructions': 'Shake and strain.',
+        'recipe_ingredients': [{'ingredient': 'Gin', 'quantity': 2, 'unit': 'oz'}, 'Lime juice: 3/4 oz'],
+    }
+    row.update(extra)
+    return row
+
+
+class ImportViewTests(APITestCase):
+    url = '/api/admin/import/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = get_user_model().objects.create_user('admin', password='pw', is_staff=True)
+        self.client.force_login(self.admin)
+
+    def upload(self, content, filename='drinks.json', **data):
+        return self.client.post(self.url, {'file': SimpleUploadedFile(filename, content.encode()), **data})
+
+    def drink(self, name):
+        return self.client.get(f'/api/All_Cocktails/{name}/', HTTP_ACCEPT='application/json').json()
+
+    def test_requires_an_admin(self):
+        self.client.logout()
+        self.assertEqual(self.upload('[]').status_code, 403)
+
+    def test_json_import_and_idempotent_rerun(self):
+        content = json.dumps([recipe('Gimlet'), recipe('Gin Sour', tags=['Sour', 'Classic'])])
+        report = self.upload(content).json()
+        self.assertEqual((report['created'], report['updated'], report['unchanged'], report['failed']), (2, 0, 0, 0))
+        self.assertIn('rows_per_second', report)
+        self.assertEqual(self.drink('Gimlet'), {
+            'name': 'Gimlet', 'url': 'http://testserver/api/All_Cocktails/Gimlet/', 'tags': ['Sour'],
+            'preparation_method': ['Shaken'], 'glass_type': 'Coupe', 'recipe_ingredients': ['Gin 2 ozs', 'Lime juice 0.75 ozs'],
+            'garnish_ingredients': ['Lime wheel'], 'instructions': 'Shake and strain.',
+            'ingredient_names': ['Gin', 'Lime juice', 'Lime wheel'],
+        })
+        report = self.upload(content).json()
+        self.assertEqual((report['created'], report['updated'], report['unchanged']), (0, 0, 2))
+        self.assertEqual(Tag.objects.get(name='Sour').drink_count, 2)
+        self.assertEqual(Unit.objects.get(name='oz').drink_count, 2)
+
+    def test_rerun_updates_changed_rows(self):
+        self.upload(json.dumps([recipe('Gimlet')]))
+        self.drink('Gimlet')
+        report = self.upload(json.dumps([recipe('gimlet', tags=[], recipe_ingredients=['Gin: 2 oz'])])).json()
+        self.assertEqual((report['created'], report['updated']), (0, 1))
+        drink = self.drink('Gimlet')
+        self.assertEqual((drink['name'], drink['tags'], drink['recipe_ingredients']), ('gimlet', [], ['Gin 2 ozs']))
+        self.assertEqual(DrinkIngredientsList.objects.count(), 1)
+        self.assertEqual(RecipeIngredient.objects.get(name='Lime juice').drink_count, 0)
+
+    def test_csv_import(self):
+        content = (
+            'name,category,tags,garnish_ingredients,recipe_ingredients,is_shot\n'
+            'B-52,Shots,Layered; Coffee,,Kahlua: 1/2 oz; Baileys: 1/2 oz,true\n'
+        )
+        report = self.upload(content, filename='drinks.csv').json()
+        self.assertEqual(report['created'], 1)
+        drink = Drink.objects.get(name='B-52')
+        self.assertTrue(drink.is_shot)
+        self.assertEqual(drink.category.name, 'Shots')
+        self.assertEqual(sorted(drink.tags.values_list('name', flat=True)), ['Coffee', 'Layered'])
+        self.assertEqual(self.drink('B_52')['recipe_ingredients'], ['Kahlua 0.5 ozs', 'Baileys 0.5 ozs'])
+
+    def test_reports_row_errors_and_imports_the_rest(self):
+        rows = [recipe('Gimlet'), {'name': ''}, recipe('Bad', is_shot='maybe'), recipe('GIMLET'),
+                recipe('Odd', recipe_ingredients=[{'ingredient': 'Gin', 'quantity': 'lots'}])]
+        report = self.upload('\n'.join(json.dumps(r) for r in rows), filename='drinks.ndjson').json()
+        self.assertEqual(report['created'], 1)
+        self.assertEqual(report['errors'], [
+            {'row': 2, 'name': '', 'errors': ['name: required']},
+            {'row': 3, 'name': 'Bad', 'errors': ['is_shot: expected true or false']},
+            {'row': 4, 'name': 'GIMLET', 'errors': ['name: duplicates row 1']},
+            {'row': 5, 'name': 'Odd', 'errors': ["recipe_ingredients[1]: invalid quantity 'lots'"]},
+        ])
+
+    def test_unreadable_uploads(self):
+        self.assertEqual(self.client.post(self.url, {}).status_code, 400)
+        self.assertEqual(self.upload('{"name": ').status_code, 400)
+        self.assertEqual(self.upload('[]', batch_size='0').status_code, 400)
+
+
+class ImportPipelineTests(APITestCase):
+    def import_queries(self, count):
+        # New lookup rows every time, so each run creates some of every model.
+        rows = [
+            recipe(f'Drink {count} {i}', category=f'Category {count}', glass_type=f'Glass {count}',
+                   tags=[f'Tag {count} {i}'], preparation_method=[f'Method {count}'], garnish_ingredients=[],
+                   recipe_ingredients=[{'ingredient': f'Ingredient {count} {i}', 'quantity': 1, 'unit': f'Unit {count}'}])
+            for i in range(count)
+        ]
+        with CaptureQueriesContext(connection) as ctx:
+            report = import_rows(rows, batch_size=1000).as_dict()
+        self.assertEqual(report['created'], count)
+        return len(ctx.captured_queries)
+
+    def test_queries_do_not_grow_with_rows(self):
+        self.assertEqual(self.import_queries(50), self.import_queries(5))
+
+    def test_units_named_in_text_are_created_and_applied_to_stored_lines(self):
+        import_rows([recipe('Gimlet', recipe_ingredients=[])])
+        gin = RecipeIngredient.objects.create(name='Gin')
+        DrinkIngredientsList.objects.create(drink=Drink.objects.get(), ingredient=gin, quantity_text='2 cl')
+        self.assertIsNone(DrinkIngredientsList.objects.get().unit)
+        import_rows([recipe('Gin Sour', recipe_ingredients=['Gin: 5 cl'])])
+        self.assertEqual(sorted(DrinkIngredientsList.objects.values_list('measure', flat=True)), ['2 cls', '5 cls'])
+        self.assertEqual(Unit.objects.get(name='cl').drink_count, 2)
+
+    def test_command(self):
+        path = self.tmp_file(json.dumps([recipe('Gimlet'), {'name': ''}]))
+        out = StringIO()
+        call_command('import_drinks', path, stdout=out)
+        self.assertIn("Row 2 (): name: required", out.getvalue())
+        self.assertIn('1 created, 0 updated, 0 unchanged, 1 failed', out.getvalue())
+        self.assertTrue(Drink.objects.filter(name='Gimlet').exists())
+
+    def tmp_file(self, content):
+        fd, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            f.write(content)
+        self.addCleanup(os.remove, path)
+        return path
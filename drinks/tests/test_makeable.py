@@ -0,0 +1,121 @@
+import random
+
+from rest_framework.test import APITestCase
+
+from drinks.makeable import bit_positions, bit_sliced_count, count_equals, index
+from drinks.models import CatalogVersion, Drink, DrinkIngredientsList, RecipeIngredient
+
+
+class BitsetTests(APITestCase):
+    def test_bit_sliced_count_matches_popcount(self):
+        rng = random.Random(7)
+        columns = [rng.getrandbits(200) for _ in range(13)]
+        planes = bit_sliced_count(columns)
+        for value in range(15):
+            expected = {n for n in range(200) if sum((c >> n) & 1 for c in columns) == value}
+            self.assertEqual(set(bit_positions(count_equals(planes, value) & ((1 << 200) - 1))), expected)
+
+    def test_bit_positions(self):
+        self.assertEqual(list(bit_positions(0)), [])
+        self.assertEqual(list(bit_positions(0b100101)), [0, 2, 5])
+
+
+class MakeableTests(APITestCase):
+    def setUp(self):
+        index.reset()
+        self.gin, self.lime, self.sugar, self.mint, self.rum = (
+            RecipeIngredient.objects.create(name=n) for n in ('Gin', 'Lime', 'Sugar', 'Mint', 'Rum')
+        )
+        self.gimlet = self.drink('Gimlet', self.gin, self.lime)
+        self.daiquiri = self.drink('Daiquiri', self.rum, self.lime, self.sugar)
+        self.mojito = self.drink('Mojito', self.rum, self.lime, self.sugar, self.mint)
+        self.mojito.garnish.add(self.mint)
+        self.daiquiri.garnish.add(self.mint)
+        Drink.objects.create(name='Water')
+
+    def drink(self, name, *ingredients):
+        drink = Drink.objects.create(name=name)
+        for ingredient in ingredients:
+            DrinkIngredientsList.objects.create(drink=drink, ingredient=ingredient)
+        return drink
+
+    def names(self, ranked):
+        by_pk = Drink.objects.in_bulk([pk for pk, _ in ranked])
+        return [by_pk[pk].name for pk, _ in ranked]
+
+    def get(self, query):
+        response = self.client.get(f'/api/All_Cocktails/makeable/{query}', HTTP_ACCEPT='application/json')
+        return response
+
+    def test_exact_and_missing(self):
+        stock = {self.rum.pk, self.lime.pk, self.sugar.pk}
+        self.assertEqual(self.names(index.makeable(stock)), ['Daiquiri'])
+        ranked = index.makeable(stock, max_missing=1)
+        self.assertEqual(self.names(ranked), ['Daiquiri', 'Gimlet', 'Mojito'])
+        self.assertEqual([missing for _, missing in ranked], [0, 1, 1])
+        self.assertEqual(index.missing(self.gimlet.pk, stock), {self.gin.pk})
+
+    def test_garnish_counts_when_asked(self):
+        stock = {self.rum.pk, self.lime.pk, self.sugar.pk}
+        self.assertEqual(self.names(index.makeable(stock, with_garnish=True)), [])
+        self.assertEqual(self.names(index.makeable(stock | {self.mint.pk}, with_garnish=True)), ['Daiquiri', 'Mojito'])
+
+    def test_containing(self):
+        self.assertEqual(self.names(index.containing({self.rum.pk, self.sugar.pk})), ['Daiquiri', 'Mojito'])
+        self.assertEqual(self.names(index.containing({self.mint.pk}, with_garnish=True)), ['Daiquiri', 'Mojito'])
+
+    def test_follows_recipe_changes(self):
+        stock = {self.gin.pk, self.lime.pk}
+        self.assertEqual(self.names(index.makeable(stock)), ['Gimlet'])
+        DrinkIngredientsList.objects.create(drink=self.gimlet, ingredient=self.sugar)
+        self.assertEqual(self.names(index.makeable(stock)), [])
+        tom_collins = self.drink('Tom Collins', self.gin)
+        self.assertEqual(self.names(index.makeable(stock)), ['Tom Collins'])
+        tom_collins.delete()
+        self.assertEqual(self.names(index.makeable(stock)), [])
+
+    def test_catches_up_with_writes_from_other_processes(self):
+        stock = {self.gin.pk, self.lime.pk}
+        self.assertEqual(self.names(index.makeable(stock)), ['Gimlet'])
+        # Writes that bypass this process's signals, as another worker's would.
+        DrinkIngredientsList.objects.filter(drink=self.daiquiri, ingredient=self.rum).update(ingredient=self.gin)
+        DrinkIngredientsList.objects.filter(drink=self.daiquiri, ingredient=self.sugar).delete()
+        Drink.objects.filter(pk=self.daiquiri.pk).update(updated=self.daiquiri.updated.replace(year=2100))
+        DrinkIngredientsList.objects.filter(drink=self.gimlet)._raw_delete(Drink.objects.db)
+        Drink.objects.filter(pk=self.gimlet.pk)._raw_delete(Drink.objects.db)
+        CatalogVersion.bump()
+        self.assertEqual(self.names(index.makeable(stock)), ['Daiquiri'])
+
+    def test_matches_brute_force(self):
+        rng = random.Random(3)
+        extras = [RecipeIngredient.objects.create(name=f'Extra {i}') for i in range(8)]
+        pool = [self.gin, self.lime, self.sugar, self.mint, self.rum] + extras
+        for i in range(40):
+            self.drink(f'Random {i:02}', *rng.sample(pool, rng.randint(1, 5)))
+        recipes = {}
+        for drink_id, ingredient_id in DrinkIngredientsList.objects.values_list('drink_id', 'ingredient_id'):
+            recipes.setdefault(drink_id, set()).add(ingredient_id)
+        for _ in range(20):
+            stock = {i.pk for i in rng.sample(pool, rng.randint(0, 8))}
+            k = rng.randint(0, 3)
+            expected = sorted(
+                (len(r - stock), Drink.objects.get(pk=pk).name, pk)
+                for pk, r in recipes.items() if len(r - stock) <= k
+            )
+            self.assertEqual(index.makeable(stock, max_missing=k), [(pk, missing) for missing, _, pk in expected])
+
+    def test_endpoint(self):
+        response = self.get(f'?have={self.rum.pk},{self.lime.pk}&have={self.sugar.pk}&missing=1')
+        self.assertEqual(response.status_code, 200)
+        results = response.json()['results']
+        self.assertEqual([d['name'] for d in results], ['Daiquiri', 'Gimlet', 'Mojito'])
+        self.assertEqual(results[0]['missing_ingredients'], [])
+        self.assertEqual(results[1]['missing_ingredients'], ['Gin'])
+        self.assertEqual(results[1]['recipe_ingredients'], ['Gin', 'Lime'])
+        contains = self.get(f'?have={self.mint.pk}&mode=contains').json()['results']
+        self.assertEqual([d['name'] for d in contains], ['Mojito'])
+        self.assertEqual(contains[0]['missing_ingredients'], ['Lime', 'Rum', 'Sugar'])
+
+    def test_endpoint_rejects_bad_parameters(self):
+        for query in ('?have=gin', '?missing=9', '?missing=x', '?mode=any', '?garnish=maybe'):
+            self.assertEqual(self.get(query).status_code, 400, query)
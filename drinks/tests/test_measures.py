@@ -0,0 +1,83 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from drinks.measures import format_measure, parse_measure
+from drinks.models import Drink, DrinkIngredientsList, RecipeIngredient, Unit
+from drinks.serializers import DrinkIngredientSerializer
+
+
+class ParseMeasureTests(TestCase):
+    def test_quantities(self):
+        self.assertEqual(parse_measure('2 oz'), (2, 'oz'))
+        self.assertEqual(parse_measure('1 1/2 oz'), (1.5, 'oz'))
+        self.assertEqual(parse_measure('½ barspoon'), (0.5, 'barspoon'))
+        self.assertEqual(parse_measure('dash'), (None, 'dash'))
+        self.assertEqual(parse_measure(''), (None, None))
+
+    def test_plurals(self):
+        self.assertEqual(format_measure(2, Unit(name='dash')), '2 dashes')
+        self.assertEqual(format_measure(2, Unit(name='berry')), '2 berries')
+        self.assertEqual(format_measure(1.0, Unit(name='oz', plural='ounces')), '1 oz')
+        self.assertEqual(format_measure(0.5, Unit(name='oz', plural='ounces')), '0.5 ounces')
+        self.assertEqual(format_measure(None, None, ' to taste '), 'to taste')
+
+
+class RecipeLineMeasureTests(TestCase):
+    def setUp(self):
+        self.oz = Unit.objects.create(name='oz')
+        self.gin = RecipeIngredient.objects.create(name='Gin')
+        self.drink = Drink.objects.create(name='Gimlet')
+
+    def line(self, **kwargs):
+        return DrinkIngredientsList.objects.create(drink=self.drink, ingredient=self.gin, **kwargs)
+
+    def measure(self, line):
+        line.refresh_from_db()
+        return line.measure
+
+    def test_text_is_parsed_on_save(self):
+        line = self.line(quantity_text='1 1/2 OZ')
+        line.refresh_from_db()
+        self.assertEqual((line.quantity, line.unit, line.measure), (1.5, self.oz, '1.5 ozs'))
+        explicit = self.line(quantity=1, unit=self.oz, quantity_text='3 dashes')
+        self.assertEqual(self.measure(explicit), '1 oz')
+
+    def test_unknown_unit_resolves_once_created(self):
+        line = self.line(quantity_text='2 sprigs')
+        line.refresh_from_db()
+        self.assertEqual((line.quantity, line.unit, line.measure), (None, None, '2'))
+        sprig = Unit.objects.create(name='Sprigs', plural='sprigs')
+        line.refresh_from_db()
+        self.assertEqual((line.quantity, line.unit, line.measure), (2, sprig, '2 sprigs'))
+
+    def test_unit_changes_update_lines(self):
+        line = self.line(quantity_text='2 oz')
+        self.oz.plural = 'ounces'
+        self.oz.save()
+        self.assertEqual(self.measure(line), '2 ounces')
+        self.oz.delete()
+        self.assertEqual(self.measure(line), '2')
+
+    def test_serializer_reads_stored_columns(self):
+        line = DrinkIngredientsList.objects.select_related('ingredient').get(pk=self.line(quantity_text='2 oz').pk)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(DrinkIngredientSerializer().to_representation(line), 'Gin 2 ozs')
+        self.assertEqual(len(ctx.captured_queries), 0)
+
+    def test_command_backfills_bulk_rows_and_reports_unparsed(self):
+        DrinkIngredientsList.objects.bulk_create([
+            DrinkIngredientsList(drink=self.drink, ingredient=self.gin, quantity_text=text)
+            for text in ('2 oz', 'a splash', '')
+        ])
+        out = StringIO()
+        call_command('normalize_recipe_lines', batch_size=2, stdout=out)
+        self.assertIn("could not parse 'a splash'", out.getvalue())
+        self.assertIn('Normalized 2 recipe lines; 1 could not be parsed.', out.getvalue())
+        self.assertEqual(
+            list(DrinkIngredientsList.objects.values_list('measure', flat=True)), ['2 ozs', 'a splash', ''])
+        self.oz.refresh_from_db()
+        self.assertEqual(self.oz.drink_count, 1)
@@ -1,3 +1,4 @@
+from django.core.exceptions import ValidationError
 from django.test import TestCase
 from drinks.models import (
     Category, GlassType, RecipeIngredient, Tag, PreparationMethod, Unit, Drink, DrinkIngredientsList
@@ -52,3 +53,17 @@ class ModelTests(TestCase):
         self.assertTrue(Category.objects.filter(name="Cocktails Throughout History").exists())
         self.assertTrue(Category.objects.filter(name="Shots").exists())
         self.assertTrue(Category.objects.filter(name="My Recipes").exists())
+
+    def test_safe_name_kept_in_sync(self):
+        drink = Drink.objects.create(name="Brandy Crusta (1862)")
+        self.assertEqual(drink.safe_name, "brandy_crusta_1862")
+        drink.name = "Café Brûlot"
+        drink.save(update_fields=["name"])
+        drink.refresh_from_db()
+        self.assertEqual(drink.safe_name, "caf_br_lot")
+
+    def test_safe_name_collision_rejected_on_write(self):
+        Tag.objects.create(name="Low-ABV")
+        with self.assertRaises(ValidationError):
+            Tag.objects.create(name="Low ABV")
+        self.assertEqual(Tag.objects.filter(safe_name="low_abv").count(), 1)
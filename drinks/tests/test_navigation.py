@@ -0,0 +1,61 @@
+from unittest import mock
+
+from django.urls import clear_url_caches
+from rest_framework.test import APITestCase
+
+from drinks import views
+from drinks.navigation import FragmentCache, fragments
+
+
+class NavigationFragmentTests(APITestCase):
+    def setUp(self):
+        fragments.clear()
+
+    def get(self, url, host='testserver', secure=False, accept='text/html'):
+        response = self.client.get(url, HTTP_ACCEPT=accept, HTTP_HOST=host, secure=secure)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_nav_is_built_once_per_address(self):
+        with mock.patch.object(views, 'build_nav_html', wraps=views.build_nav_html) as build:
+            self.get('/api/')
+            self.get('/api/about/')
+            self.get('/api/tags/')
+            self.assertEqual(build.call_count, 1)
+            self.get('/api/', host='example.com')
+            self.get('/api/', secure=True)
+            self.assertEqual(build.call_count, 3)
+
+    def test_fragments_use_the_request_address(self):
+        page = self.get('/api/about/', host='example.com', secure=True).content.decode()
+        self.assertIn('href="https://example.com/api/about/"', page)
+        self.assertNotIn('http://testserver/', page)
+        page = self.get('/api/about/').content.decode()
+        self.assertIn('href="http://testserver/api/about/"', page)
+        self.assertNotIn('example.com', page)
+
+    def test_home_payloads_are_built_once(self):
+        with mock.patch.object(views.HomeView, 'build_payloads', autospec=True,
+                               side_effect=views.HomeView.build_payloads) as build:
+            data = self.get('/api/', accept='application/json').json()
+            page = self.get('/api/').content.decode()
+            self.assertEqual(self.get('/api/', accept='application/json').json(), data)
+            self.assertEqual(build.call_count, 1)
+        self.assertEqual(data['endpoints']['Cocktails'], 'http://testserver/api/All_Cocktails/')
+        self.assertNotIn('&quot;Cocktails&quot;', page)
+        self.assertIn('http://testserver/api/glass_types/', page)
+
+    def test_url_conf_reload_drops_fragments(self):
+        with mock.patch.object(views, 'build_nav_html', wraps=views.build_nav_html) as build:
+            self.get('/api/about/')
+            clear_url_caches()
+            self.get('/api/about/')
+            self.assertEqual(build.call_count, 2)
+
+    def test_cache_is_bounded(self):
+        cache = FragmentCache(max_fragments=2)
+        request = mock.Mock(scheme='http')
+        for host in ('a', 'b', 'c'):
+            request.get_host.return_value = host
+            cache.get(request, 'nav', lambda r: r.get_host())
+        self.assertEqual(len(cache.fragments._items), 2)
@@ -0,0 +1,85 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from drinks.facets import index as facet_index
+from drinks.models import Category, Drink, Tag
+from drinks.views import AdminAwarePagination
+
+
+@mock.patch.object(AdminAwarePagination, 'page_size', 4)
+class CursorPaginationTests(APITestCase):
+    def setUp(self):
+        cache.clear()
+        facet_index.reset()
+        self.tag = Tag.objects.create(name='Sour')
+        for i in range(11):
+            drink = Drink.objects.create(name=f'Sour {i:02}' if i % 2 else f'Fizz {i:02}')
+            if i % 3:
+                drink.tags.add(self.tag)
+
+    def get(self, url):
+        response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200, url)
+        return response.json()
+
+    def walk(self, url):
+        pages = []
+        data = self.get(url)
+        while True:
+            pages.append([d['name'] for d in data['results']])
+            if not data['next']:
+                break
+            data = self.get(data['next'])
+        backwards = []
+        while data['previous']:
+            data = self.get(data['previous'])
+            backwards.insert(0, [d['name'] for d in data['results']])
+        self.assertEqual(backwards, pages[:-1])
+        return pages
+
+    def test_walks_list_in_name_order(self):
+        expected = list(Drink.objects.order_by('name', 'pk').values_list('name', flat=True))
+        pages = self.walk('/api/All_Cocktails/?cursor=')
+        self.assertEqual([len(p) for p in pages], [4, 4, 3])
+        self.assertEqual(sum(pages, []), expected)
+
+    def test_walks_facet_index_results(self):
+        expected = list(Drink.objects.filter(tags=self.tag).order_by('name').values_list('name', flat=True))
+        pages = self.walk(f'/api/All_Cocktails/?tag={self.tag.pk}&cursor=')
+        self.assertEqual(sum(pages, []), expected)
+        self.assertEqual(sum(self.walk('/api/tags/Sour/?cursor='), []), expected)
+
+    def test_search_results_use_offset_cursors(self):
+        pages = self.walk('/api/All_Cocktails/?q=fizz&cursor=')
+        self.assertEqual(sorted(sum(pages, [])), [f'Fizz {i:02}' for i in range(0, 11, 2)])
+
+    def test_deep_pages_cost_the_same_and_skip_count(self):
+        first = self.get('/api/All_Cocktails/?cursor=')
+        deep = self.get(self.get(first['next'])['next'])
+        counts = []
+        for url in ('/api/All_Cocktails/?cursor=', deep['previous']):
+            cache.clear()
+            with CaptureQueriesContext(connection) as ctx:
+                self.get(url)
+            self.assertFalse([q for q in ctx.captured_queries if 'COUNT(' in q['sql'].upper()])
+            counts.append(len(ctx.captured_queries))
+        self.assertEqual(counts[0], counts[1])
+
+    def test_page_numbers_still_work(self):
+        data = self.get('/api/All_Cocktails/?page=2')
+        self.assertEqual(list(data), ['results'])
+        self.assertEqual(len(data['results']), 4)
+
+    def test_custom_ordered_lists_ignore_cursor(self):
+        Category.objects.create(name='Classics')
+        data = self.get('/api/categories/?cursor=')
+        self.assertEqual(list(data), ['results'])
+
+    def test_invalid_cursor(self):
+        for token in ('nope', 'eyJ4IjoxfQ', 'eyJvIjotMX0'):
+            response = self.client.get(f'/api/All_Cocktails/?cursor={token}', HTTP_ACCEPT='application/json')
+            self.assertEqual(response.status_code, 404, token)
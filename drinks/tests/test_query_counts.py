@@ -0,0 +1,179 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.http import Http404
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from drinks.breadcrumbs import trails as breadcrumb_trails
+from drinks.identity import lookup as lookup_object
+from drinks.models import (
+    Category, Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag, Unit
+)
+
+
+class CatalogMixin:
+
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(name='Classic')
+        self.glass = GlassType.objects.create(name='Coupe')
+        self.tag = Tag.objects.create(name='Sour')
+        self.prep = PreparationMethod.objects.create(name='Shaken')
+        self.oz = Unit.objects.create(name='oz')
+        self.gin = RecipeIngredient.objects.create(name='Gin')
+        self.lemon = RecipeIngredient.objects.create(name='Lemon')
+
+    def add_drinks(self, count):
+        start = Drink.objects.count()
+        for i in range(start, start + count):
+            drink = Drink.objects.create(name=f'Sour {i}', category=self.category, glass_type=self.glass)
+            drink.tags.add(self.tag)
+            drink.preparation_method.add(self.prep)
+            drink.garnish.add(self.lemon)
+            DrinkIngredientsList.objects.create(drink=drink, ingredient=self.gin, quantity_text='2 oz')
+            DrinkIngredientsList.objects.create(drink=drink, ingredient=self.lemon, quantity=1, unit=self.oz)
+
+
+class DrinkListQueryCountTests(CatalogMixin, APITestCase):
+    """Every endpoint listing drinks must load a page in a constant number of queries."""
+
+    # catalog version + count + page + tags + preparation methods + garnish
+    # + recipe lines
+    LIST_QUERIES = 7
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response
+
+    def assert_constant(self, url, expected):
+        self.add_drinks(2)
+        small, _ = self.count_queries(url)
+        self.add_drinks(20)
+        large, response = self.count_queries(url)
+        self.assertEqual(small, expected)
+        self.assertEqual(large, expected)
+        self.assertEqual(len(response.json()['results']), 22)
+
+    def test_cocktail_list(self):
+        self.assert_constant('/api/All_Cocktails/', self.LIST_QUERIES)
+
+    def test_cocktail_detail(self):
+        self.add_drinks(1)
+        # validators + object lookup + tags + preparation methods + garnish
+        # + recipe lines
+        queries, response = self.count_queries('/api/All_Cocktails/Sour_0/')
+        self.assertEqual(queries, 6)
+        self.assertEqual(response.json()['recipe_ingredients'], ['Gin 2 ozs', 'Lemon 1 oz'])
+
+    def test_tag_detail(self):
+        self.assert_constant('/api/tags/Sour/', self.LIST_QUERIES + 1)
+
+    def test_category_detail(self):
+        self.assert_constant('/api/categories/Classic/', self.LIST_QUERIES + 1)
+
+    def test_glass_type_detail(self):
+        self.assert_constant('/api/glass_types/Coupe/', self.LIST_QUERIES + 1)
+
+    def test_unit_detail(self):
+        self.assert_constant('/api/units/oz/', self.LIST_QUERIES + 1)
+
+    def test_preparation_method_detail(self):
+        self.assert_constant('/api/preparation_methods/Shaken/', self.LIST_QUERIES + 1)
+
+    def test_recipe_ingredient_detail(self):
+        self.assert_constant('/api/recipe_ingredients/Gin/', self.LIST_QUERIES + 1)
+
+    def test_garnish_ingredient_detail(self):
+        self.assert_constant('/api/garnish_ingredients/Lemon/', self.LIST_QUERIES + 1)
+
+    def test_serialized_relations_are_sorted(self):
+        drink = Drink.objects.create(name='Mixed')
+        drink.tags.add(Tag.objects.create(name='Zesty'), Tag.objects.create(name='Bitter'))
+        drink.garnish.add(self.lemon, RecipeIngredient.objects.create(name='Cherry'))
+        data = self.client.get('/api/All_Cocktails/Mixed/', HTTP_ACCEPT='application/json').json()
+        self.assertEqual(data['tags'], ['Bitter', 'Zesty'])
+        self.assertEqual(data['garnish_ingredients'], ['Cherry', 'Lemon'])
+
+
+class BrowsableDetailQueryCountTests(CatalogMixin, APITestCase):
+    """A browsable detail page titles itself, describes itself and walks its
+    breadcrumbs without looking its object up again."""
+
+    DETAIL_ROUTES = {
+        '/api/All_Cocktails/Sour_0/': 'drinks_drink',
+        '/api/tags/Sour/': 'drinks_tag',
+        '/api/categories/Classic/': 'drinks_category',
+        '/api/glass_types/Coupe/': 'drinks_glasstype',
+        '/api/units/oz/': 'drinks_unit',
+        '/api/preparation_methods/Shaken/': 'drinks_preparationmethod',
+        '/api/recipe_ingredients/Gin/': 'drinks_recipeingredient',
+        '/api/garnish_ingredients/Lemon/': 'drinks_recipeingredient',
+    }
+
+    def setUp(self):
+        super().setUp()
+        self.add_drinks(3)
+
+    def capture(self, url, accept):
+        cache.clear()
+        breadcrumb_trails.clear()
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, HTTP_ACCEPT=accept)
+        self.assertEqual(response.status_code, 200)
+        return [q['sql'] for q in ctx.captured_queries]
+
+    def test_object_is_looked_up_once(self):
+        for url, table in self.DETAIL_ROUTES.items():
+            with self.subTest(url=url):
+                queries = self.capture(url, 'text/html')
+                lookups = [sql for sql in queries if f'FROM "{table}"' in sql and '"safe_name" =' in sql]
+                self.assertEqual(len(lookups), 1, lookups)
+
+    def test_html_page_costs_no_more_than_json(self):
+        for url in self.DETAIL_ROUTES:
+            with self.subTest(url=url):
+                html = self.capture(url, 'text/html')
+                # JSON cocktail details validate on the drink row instead of
+                # the catalog version; list routes check the version for both.
+                self.assertEqual(len(html), len(self.capture(url, 'application/json')))
+
+    def test_unknown_name_is_looked_up_once(self):
+        for url, table in (('/api/All_Cocktails/No_Such_Drink/', 'drinks_drink'), ('/api/tags/No_Such_Tag/', 'drinks_tag')):
+            with self.subTest(url=url):
+                breadcrumb_trails.clear()
+                with CaptureQueriesContext(connection) as ctx:
+                    response = self.client.get(url, HTTP_ACCEPT='text/html')
+                self.assertEqual(response.status_code, 404)
+                lookups = [q['sql'] for q in ctx.captured_queries if f'FROM "{table}"' in q['sql']]
+                self.assertEqual(len(lookups), 1, lookups)
+
+
+class IdentityMapTests(APITestCase):
+    def setUp(self):
+        self.tag = Tag.objects.create(name='Sour')
+        self.request = APIRequestFactory().get('/')
+
+    def test_same_object_for_every_spelling(self):
+        with self.assertNumQueries(1):
+            first = lookup_object(self.request, Tag, 'Sour')
+            self.assertIs(lookup_object(self.request, Tag, 'sour'), first)
+        self.assertEqual(first, self.tag)
+
+    def test_misses_are_remembered(self):
+        with self.assertNumQueries(1):
+            for _ in range(2):
+                with self.assertRaises(Http404):
+                    lookup_object(self.request, Tag, 'Bitter')
+
+    def test_querysets_are_kept_apart(self):
+        with self.assertNumQueries(2):
+            lookup_object(self.request, Tag, 'Sour')
+            with self.assertRaises(Http404):
+                lookup_object(self.request, Tag, 'Sour', queryset=Tag.objects.filter(drink__isnull=False))
+
+    def test_each_request_starts_empty(self):
+        lookup_object(self.request, Tag, 'Sour')
+        with self.assertNumQueries(1):
+            lookup_object(APIRequestFactory().get('/'), Tag, 'Sour')
@@ -0,0 +1,72 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from drinks.models import Category, Drink, Tag
+from drinks.sampling import pools
+
+
+class RandomDrinkTests(APITestCase):
+    def setUp(self):
+        pools.clear()
+        self.tiki = Category.objects.create(name='Tiki')
+        self.sour = Tag.objects.create(name='Sour')
+        for i in range(6):
+            drink = Drink.objects.create(name=f'Tiki {i}', category=self.tiki)
+            if i % 2:
+                drink.tags.add(self.sour)
+        Drink.objects.create(name='Kamikaze', is_shot=True)
+
+    def get(self, query=''):
+        return self.client.get(f'/api/All_Cocktails/random/{query}', HTTP_ACCEPT='application/json')
+
+    def draw_names(self, query):
+        response = self.get(query)
+        self.assertEqual(response.status_code, 200)
+        return [d['name'] for d in response.json()['results']]
+
+    def test_single_draw_keeps_object_shape(self):
+        data = self.get().json()
+        self.assertIn('name', data)
+        self.assertNotIn('results', data)
+
+    def test_filters_match_list(self):
+        self.assertEqual(self.get('?is_shot=true').json()['name'], 'Kamikaze')
+        names = self.draw_names(f'?n=50&category=tiki&tag={self.sour.pk}')
+        self.assertEqual(sorted(names), ['Tiki 1', 'Tiki 3', 'Tiki 5'])
+
+    def test_batch_draw_is_without_replacement(self):
+        names = self.draw_names('?n=5')
+        self.assertEqual(len(names), 5)
+        self.assertEqual(len(set(names)), 5)
+
+    def test_seed_is_reproducible(self):
+        first = self.draw_names('?n=3&seed=2024-06-01')
+        self.assertEqual(self.draw_names('?n=3&seed=2024-06-01'), first)
+        self.assertEqual(self.get('?seed=day').json(), self.get('?seed=day').json())
+
+    def test_new_drinks_join_the_pool(self):
+        self.assertEqual(self.get('?is_shot=1').json()['name'], 'Kamikaze')
+        Drink.objects.filter(is_shot=True).delete()
+        self.assertEqual(self.get('?is_shot=1').status_code, 404)
+        Drink.objects.create(name='B-52', is_shot=True)
+        self.assertEqual(self.get('?is_shot=1').json()['name'], 'B-52')
+
+    def test_bad_parameters(self):
+        self.assertEqual(self.get('?n=0').status_code, 400)
+        self.assertEqual(self.get('?n=many').status_code, 400)
+        self.assertEqual(self.get('?n=51').status_code, 400)
+        self.assertEqual(self.get('?tag=sour').status_code, 400)
+        self.assertEqual(self.get('?category=nope').status_code, 404)
+
+    def test_query_count_does_not_grow_with_catalog(self):
+        def count():
+            self.get()
+            with CaptureQueriesContext(connection) as ctx:
+                self.assertEqual(self.get().status_code, 200)
+            return len(ctx.captured_queries)
+
+        small = count()
+        Drink.objects.bulk_create(Drink(name=f'Bulk {i}', safe_name=f'bulk_{i}') for i in range(200))
+        pools.clear()
+        self.assertEqual(count(), small)
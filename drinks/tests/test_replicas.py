@@ -0,0 +1,145 @@
+import os
+import sqlite3
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+
+from drinks import replicas
+from drinks.models import Category, Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag, Unit
+from drinks.replicas import STICKY_COOKIE, STICKY_HEADER, ReadReplicaRouter
+from drinks.urls import router
+
+
+class ReplicaRoutingTests(TransactionTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.replica = os.path.join(tmp.name, 'replica.sqlite3')
+        open(self.replica, 'w').close()
+        settings = override_settings(DRINKS_READ_REPLICAS={'replica0': self.replica})
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        # Record where each read of a drinks model would go, and run it on
+        # the test database.
+        self.reads = []
+        self.route = route = ReadReplicaRouter.db_for_read
+
+        def db_for_read(router, model, **hints):
+            alias = route(router, model, **hints)
+            if model._meta.app_label == 'drinks':
+                self.reads.append(alias or 'default')
+            return None
+
+        patcher = mock.patch.object(ReadReplicaRouter, 'db_for_read', db_for_read)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        category = Category.objects.create(name='Routing Category')
+        glass = GlassType.objects.create(name='Routing Glass')
+        drink = Drink.objects.create(name='Routing Drink', category=category, glass_type=glass, instructions='Stir.')
+        ingredient = RecipeIngredient.objects.create(name='Routing Ingredient')
+        DrinkIngredientsList.objects.create(drink=drink, ingredient=ingredient)
+        drink.garnish.add(RecipeIngredient.objects.create(name='Routing Garnish'))
+        Tag.objects.create(name='Routing Tag')
+        PreparationMethod.objects.create(name='Routing Method')
+        Unit.objects.create(name='Routing Unit')
+
+    def routed(self, method, url, **extra):
+        self.reads.clear()
+        response = getattr(self.client, method)(url, **extra)
+        if response.streaming:
+            b''.join(response.streaming_content)
+        self.assertLess(response.status_code, 500, f'{method.upper()} {url}')
+        return response, set(self.reads)
+
+    def detail_url(self, basename, viewset):
+        obj = viewset.queryset.filter(name__startswith='Routing').first()
+        value = obj.pk if viewset.lookup_field == 'pk' else obj.name
+        return reverse(f'{basename}-detail', args=[value])
+
+    def test_read_actions_read_from_the_replica(self):
+        for prefix, viewset, basename in router.registry:
+            urls = [reverse(f'{basename}-list'), self.detail_url(basename, viewset)]
+            for extra in viewset.get_extra_actions():
+                if 'get' in extra.mapping and not extra.detail:
+                    urls.append(reverse(f'{basename}-{extra.url_name}'))
+            for url in urls:
+                for method in ('get', 'head'):
+                    with self.subTest(method=method, url=url):
+                        response, reads = self.routed(method, url, HTTP_ACCEPT='application/json, */*;q=0.1')
+                        self.assertEqual(reads, {'replica0'})
+            with self.subTest(method='options', url=urls[0]):
+                response, reads = self.routed('options', urls[0])
+                self.assertNotIn('default', reads)
+
+    def test_write_actions_read_from_the_primary(self):
+        for prefix, viewset, basename in router.registry:
+            name = viewset.__name__
+            requests = [
+                ('post', reverse(f'{basename}-list'), {'name': f'Routing {name} New'}),
+                ('put', self.detail_url(basename, viewset), {'name': f'Routing {name} Put'}),
+            ]
+            for method, url, data in requests:
+                with self.subTest(method=method, url=url):
+                    response, reads = self.routed(method, url, data=data, content_type='application/json')
+                    self.assertNotIn('replica0', reads)
+            for method, data in (('patch', {'name': f'Routing {name} Patched'}), ('delete', None)):
+                url = self.detail_url(basename, viewset)
+                with self.subTest(method=method, url=url):
+                    response, reads = self.routed(
+                        method, url, data=data, content_type='application/json', HTTP_ACCEPT='application/json',
+                    )
+                    self.assertIn(response.status_code, (200, 204))
+                    self.assertEqual(reads, {'default'})
+
+    def test_writes_make_the_client_read_its_writes(self):
+        response = self.client.post(reverse('tag-list'), {'name': 'Sticky'}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        until = float(response[STICKY_HEADER])
+        self.assertGreater(until, time.time())
+        self.assertEqual(response.cookies[STICKY_COOKIE].value, response[STICKY_HEADER])
+        url = reverse('tag-list')
+        self.assertEqual(self.routed('get', url)[1], {'default'})
+
+        self.client.cookies.clear()
+        self.assertEqual(self.routed('get', url)[1], {'replica0'})
+        self.assertEqual(self.routed('get', url, HTTP_X_DRINKS_PRIMARY_UNTIL=str(until))[1], {'default'})
+        self.assertEqual(self.routed('get', url, HTTP_X_DRINKS_PRIMARY_UNTIL=str(time.time() - 1))[1], {'replica0'})
+
+        response = self.client.post(reverse('tag-list'), {'name': 'Sticky'}, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(STICKY_HEADER, response)
+
+    def test_reads_outside_a_replica_request_use_the_primary(self):
+        route = ReadReplicaRouter()
+        self.assertIsNone(self.route(route, Drink))
+        token = replicas._read_db.set('replica0')
+        try:
+            self.assertEqual(self.route(route, Drink), 'replica0')
+            self.assertIsNone(self.route(route, User))
+            with transaction.atomic():
+                self.assertIsNone(self.route(route, Drink))
+        finally:
+            replicas._read_db.reset(token)
+        self.assertEqual(route.db_for_write(Drink), 'default')
+        self.assertIs(route.allow_migrate('replica0', 'drinks'), False)
+
+    def test_missing_replica_falls_back_to_the_primary(self):
+        os.remove(self.replica)
+        self.assertEqual(self.routed('get', reverse('tag-list'))[1], {'default'})
+
+    def test_refresh_replicas(self):
+        out = StringIO()
+        call_command('refresh_replicas', stdout=out)
+        self.assertIn('replica0: refreshed', out.getvalue())
+        with sqlite3.connect(self.replica) as copy:
+            names = {row[0] for row in copy.execute('SELECT name FROM drinks_drink')}
+        self.assertEqual(names, {'Routing Drink'})
@@ -0,0 +1,84 @@
+from urllib.parse import quote
+
+from django.core.management import call_command
+from django.db import connection
+from rest_framework.test import APITestCase
+
+from drinks.models import Category, Drink, DrinkIngredientsList, RecipeIngredient, Tag
+from drinks.search import TABLE, build_match
+
+
+class BuildMatchTests(APITestCase):
+    def test_terms_are_quoted(self):
+        self.assertEqual(build_match('gin OR lime'), '"gin" "OR" "lime"')
+        self.assertEqual(build_match('old-fashioned'), '"old fashioned"')
+
+    def test_prefix_and_phrase(self):
+        self.assertEqual(build_match('marg*'), '"marg"*')
+        self.assertEqual(build_match('"egg white" rum'), '"egg white" "rum"')
+
+    def test_empty(self):
+        self.assertIsNone(build_match('  *** "" '))
+
+
+class DrinkSearchTests(APITestCase):
+    def setUp(self):
+        self.tiki = Category.objects.create(name='Tiki')
+        self.rum = RecipeIngredient.objects.create(name='Rum')
+        self.mint = RecipeIngredient.objects.create(name='Mint')
+        self.mojito = Drink.objects.create(name='Mojito', instructions='Muddle mint, add rum and soda.')
+        DrinkIngredientsList.objects.create(drink=self.mojito, ingredient=self.rum)
+        self.mojito.garnish.add(self.mint)
+        self.daiquiri = Drink.objects.create(name='Daiquiri', instructions='Shake with lime.', category=self.tiki)
+        DrinkIngredientsList.objects.create(drink=self.daiquiri, ingredient=self.rum)
+        self.rum_punch = Drink.objects.create(name='Rum Punch', instructions='Stir.', category=self.tiki)
+
+    def search(self, url, q):
+        sep = '&' if '?' in url else '?'
+        response = self.client.get(f'{url}{sep}q={quote(q)}', HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 200)
+        return response.json()['results']
+
+    def names(self, q, url='/api/All_Cocktails/'):
+        return [d['name'] for d in self.search(url, q)]
+
+    def test_ranks_name_matches_first(self):
+        names = self.names('rum')
+        self.assertEqual(names[0], 'Rum Punch')
+        self.assertEqual(sorted(names[1:]), ['Daiquiri', 'Mojito'])
+
+    def test_prefix_phrase_and_fields(self):
+        self.assertEqual(self.names('daiq*'), ['Daiquiri'])
+        self.assertEqual(self.names('"add rum"'), ['Mojito'])
+        self.assertEqual(self.names('"rum add"'), [])
+        self.assertEqual(self.names('mint'), ['Mojito'])
+
+    def test_highlights_are_escaped(self):
+        self.mojito.instructions = 'Muddle <mint> gently.'
+        self.mojito.save()
+        drink = self.search('/api/All_Cocktails/', 'mojito')[0]
+        self.assertEqual(drink['highlight']['name'], '<mark>Mojito</mark>')
+        drink = self.search('/api/All_Cocktails/', 'gent*')[0]
+        self.assertEqual(drink['highlight']['snippet'], 'Muddle &lt;mint&gt; <mark>gently</mark>.')
+
+    def test_combines_with_filters_and_category(self):
+        self.assertEqual(self.names('rum', '/api/All_Cocktails/?category=tiki'), ['Rum Punch', 'Daiquiri'])
+        self.assertEqual(self.names('mint', '/api/recipe_ingredients/Rum/'), ['Mojito'])
+        self.assertEqual(self.names('rum', '/api/categories/Tiki/'), ['Rum Punch', 'Daiquiri'])
+
+    def test_index_follows_writes(self):
+        Tag.objects.create(name='Refreshing')
+        self.daiquiri.tags.add(Tag.objects.get(name='Refreshing'))
+        self.assertEqual(self.names('refreshing'), ['Daiquiri'])
+        self.rum.name = 'Aged Rum'
+        self.rum.save()
+        self.assertEqual(sorted(self.names('aged')), ['Daiquiri', 'Mojito'])
+        self.daiquiri.delete()
+        self.assertEqual(self.names('refreshing'), [])
+
+    def test_rebuild_command(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {TABLE}')
+        self.assertEqual(self.names('rum'), [])
+        call_command('rebuild_search_index', stdout=open('/dev/null', 'w'))
+        self.assertEqual(len(self.names('rum')), 3)
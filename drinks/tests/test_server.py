@@ -0,0 +1,165 @@
+import http.client
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from io import BytesIO
+from wsgiref.util import setup_testing_defaults
+
+from unittest import mock
+
+from django.conf import settings
+from django.core.servers.basehttp import get_internal_wsgi_application
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from drinks.models import CatalogVersion, Tag
+from drinks.server import Server, parse_bind, warm_caches, with_static_files
+from drinks.snapshot import holder
+
+
+# A gunicorn ``Server`` around a test app: ``/slow`` takes a minute, every
+# other path answers with the worker's pid.
+SERVE = '''
+import os, sys, time
+import django
+django.setup()
+from drinks.server import Server
+
+def app(environ, start_response):
+    if environ['PATH_INFO'] == '/slow':
+        time.sleep(60)
+    body = str(os.getpid()).encode()
+    start_response('200 OK', [('Content-Type', 'text/plain'), ('Content-Length', str(len(body)))])
+    return [body]
+
+Server(app, sys.argv[1], 1, max_requests=int(sys.argv[2]), graceful_timeout=2, keep_alive=1).run()
+'''
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+class ServerTests(SimpleTestCase):
+    def test_parse_bind(self):
+        self.assertEqual(parse_bind('127.0.0.1:8000'), ('127.0.0.1', 8000))
+        self.assertEqual(parse_bind('[::1]:8001'), ('::1', 8001))
+        self.assertEqual(parse_bind('9000'), ('0.0.0.0', 9000))
+        for bind in ('localhost:http', 'localhost:70000'):
+            with self.subTest(bind), self.assertRaises(ValueError):
+                parse_bind(bind)
+
+    def test_config(self):
+        server = Server(object(), '127.0.0.1:0', 3, max_requests=100, max_requests_jitter=10, graceful_timeout=7)
+        cfg = server.cfg
+        self.assertEqual((cfg.workers, cfg.max_requests, cfg.max_requests_jitter), (3, 100, 10))
+        self.assertEqual((cfg.graceful_timeout, cfg.keepalive), (7, 5))
+        self.assertTrue(cfg.preload_app)
+        self.assertEqual(cfg.worker_class_str, 'gthread')
+
+    def test_static_files(self):
+        app = with_static_files(get_internal_wsgi_application())
+        for path, expected in ((f'{settings.STATIC_URL}rest_framework/css/bootstrap.min.css', '200'),
+                               (f'{settings.STATIC_URL}nope.css', '404')):
+            with self.subTest(path):
+                environ = {'PATH_INFO': path, 'wsgi.input': BytesIO()}
+                setup_testing_defaults(environ)
+                statuses = []
+                body = app(environ, lambda status, headers: statuses.append(status))
+                b''.join(body)
+                body.close()
+                self.assertEqual(statuses[0].split()[0], expected)
+
+
+@override_settings(DRINKS_SNAPSHOT=True)
+class WarmCachesTests(TransactionTestCase):
+    def setUp(self):
+        holder.wait(10)
+        self.addCleanup(setattr, holder, 'current', None)
+        self.enterContext(mock.patch.object(holder, 'refresh'))
+        with self.settings(DRINKS_SNAPSHOT=False):
+            Tag.objects.create(name='Sour')
+
+    def test_workers_keep_the_preloaded_snapshot(self):
+        # The master's warm-up, then a worker's after the fork.
+        self.assertTrue(warm_caches())
+        preloaded = holder.current
+        # Only the catalog version is read.
+        with self.assertNumQueries(1):
+            self.assertTrue(warm_caches())
+        self.assertIs(holder.current, preloaded)
+
+        CatalogVersion.bump()
+        self.assertTrue(warm_caches())
+        self.assertIsNot(holder.current, preloaded)
+        self.assertEqual(holder.current.catalog_version, CatalogVersion.current())
+
+
+class ServerProcessTests(SimpleTestCase):
+    def start(self, max_requests=0):
+        port = free_port()
+        process = subprocess.Popen(
+            [sys.executable, '-c', SERVE, f'127.0.0.1:{port}', str(max_requests)],
+            cwd=settings.BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+            env={**os.environ, 'DJANGO_SETTINGS_MODULE': 'config.settings'},
+        )
+        self.addCleanup(process.stderr.close)
+        self.addCleanup(lambda: process.poll() is None and process.kill())
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            try:
+                socket.create_connection(('127.0.0.1', port), timeout=1).close()
+                return process, port
+            except OSError:
+                time.sleep(0.1)
+        self.fail('server did not start')
+
+    def get(self, port, path='/'):
+        return urllib.request.urlopen(f'http://127.0.0.1:{port}{path}', timeout=10).read()
+
+    def test_stuck_workers_are_killed_after_the_graceful_timeout(self):
+        process, port = self.start()
+        slow = socket.create_connection(('127.0.0.1', port))
+        self.addCleanup(slow.close)
+        slow.sendall(b'GET /slow HTTP/1.1\r\nHost: x\r\n\r\n')
+        time.sleep(0.5)
+        started = time.monotonic()
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=15)
+        self.assertLess(time.monotonic() - started, 10)
+
+    def test_idle_keep_alive_connections_close_quietly(self):
+        process, port = self.start()
+        conn = http.client.HTTPConnection('127.0.0.1', port, timeout=10)
+        conn.request('GET', '/')
+        response = conn.getresponse()
+        response.read()
+        self.assertEqual(response.status, 200)
+        # Closed by the server once idle for the keep-alive timeout.
+        self.assertEqual(conn.sock.recv(1), b'')
+        conn.close()
+        process.terminate()
+        _, stderr = process.communicate(timeout=15)
+        self.assertNotIn(b'Traceback', stderr)
+
+    def test_workers_are_replaced_after_max_requests(self):
+        process, port = self.start(max_requests=2)
+        first, second = self.get(port), self.get(port)
+        self.assertEqual(first, second)
+        # A request racing the old worker's exit may still reach it or have
+        # its connection reset; the replacement answers the next ones.
+        third, deadline = second, time.monotonic() + 10
+        while third == second and time.monotonic() < deadline:
+            time.sleep(0.2)
+            try:
+                third = self.get(port)
+            except OSError:
+                pass
+        self.assertNotEqual(third, second)
+        process.terminate()
+        process.wait(timeout=15)
@@ -0,0 +1,330 @@
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.cache import cache
+from django.http import QueryDict
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import include, path
+from rest_framework.test import APIClient
+
+from drinks import facets, makeable, urls as drinks_urls
+from drinks.catalog_file import MappedSnapshot, read_header, update_catalog
+from drinks.facets import index as facet_index
+from drinks.filtering import parse_drink_filters
+from drinks.models import (
+    CatalogVersion, Category, Drink, DrinkIngredientsList, GlassType, PreparationMethod, RecipeIngredient, Tag, Unit,
+)
+from drinks.replicas import read_db
+from drinks.snapshot import RETRY_DELAY, SnapshotHolder, holder
+from drinks.snapshot_views import snapshot_reads
+from drinks.views import CategoryViewSet, DrinkViewSet, TagViewSet
+
+
+# The router endpoints as DRINKS_SNAPSHOT serves them.
+urlpatterns = [path('api/', include(snapshot_reads(drinks_urls.router.urls)))]
+
+HEADERS = ('Content-Type', 'Vary', 'Allow', 'ETag', 'Last-Modified')
+
+
+@override_settings(ROOT_URLCONF=__name__, DRINKS_SNAPSHOT=True)
+class SnapshotReadTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        facet_index.reset()
+        makeable.index.reset()
+        # Rebuilds run in the background must be done before the tables are
+        # written: the test database takes table locks.
+        holder.wait(10)
+        self.addCleanup(setattr, holder, 'current', None)
+        self.addCleanup(holder.wait, 10)
+        self.client = APIClient()
+        with self.settings(DRINKS_SNAPSHOT=False):
+            self.create_catalog()
+        holder.rebuild()
+
+    def create_catalog(self):
+        self.sour = Tag.objects.create(name='Sour')
+        self.classic = Tag.objects.create(name='Classic')
+        self.gin = RecipeIngredient.objects.create(name='Gin')
+        self.sirop = RecipeIngredient.objects.create(name='Sirop d’Érable')
+        self.lemon = RecipeIngredient.objects.create(name='Lemon Twist')
+        self.oz = Unit.objects.create(name='oz', plural='oz')
+        self.dash = Unit.objects.create(name='dash')
+        self.coupe = GlassType.objects.create(name='Coupe')
+        self.shake = PreparationMethod.objects.create(name='Shaken')
+        self.stir = PreparationMethod.objects.create(name='Stirred')
+        self.tiki = Category.objects.create(name='Tiki')
+        history = Category.objects.get(name__iexact='Cocktails Throughout History')
+        for i in range(12):
+            drink = Drink.objects.create(
+                name=f'Drink {i}' if i % 5 else f'Élan {i}', instructions='Shake\nhard.',
+                glass_type=self.coupe if i % 3 else None, category=(self.tiki, history, None)[i % 3],
+                is_shot=i % 4 == 0, image=f'drinks/drink {i}.jpg' if i % 2 else None,
+            )
+            DrinkIngredientsList.objects.create(drink=drink, ingredient=self.gin, quantity_text='2 oz')
+            DrinkIngredientsList.objects.create(drink=drink, ingredient=self.sirop, quantity_text='' if i % 2 else '1 dash')
+            if i % 2:
+                drink.tags.add(self.sour)
+                drink.garnish.add(self.lemon)
+                drink.preparation_method.add(self.shake, self.stir)
+            if i % 3 == 0:
+                drink.tags.add(self.classic)
+
+    def orm_get(self, url, **headers):
+        with override_settings(ROOT_URLCONF='config.urls'):
+            return self.client.get(url, headers={'Accept': 'application/json', **headers})
+
+    def snapshot_get(self, url, **headers):
+        return self.client.get(url, headers={'Accept': 'application/json', **headers})
+
+    def assert_same(self, url, **headers):
+        cache.clear()
+        expected = self.orm_get(url, **headers)
+        response = self.snapshot_get(url, **headers)
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(response.content, expected.content)
+        for header in HEADERS:
+            self.assertEqual(response.get(header), expected.get(header), header)
+        return response
+
+    def test_json_reads_match_the_orm_path(self):
+        urls = [
+            '/api/All_Cocktails/',
+            '/api/All_Cocktails/?page=2',
+            '/api/All_Cocktails/?page=last',
+            f'/api/All_Cocktails/?tag={self.sour.pk},{self.classic.pk}',
+            f'/api/All_Cocktails/?tag={self.sour.pk},{self.classic.pk}&tag_mode=all',
+            f'/api/All_Cocktails/?ingredient={self.gin.pk}&exclude_tag={self.sour.pk}&is_shot=false',
+            f'/api/All_Cocktails/?glass={self.coupe.pk}&preparation={self.stir.pk}',
+            f'/api/All_Cocktails/?exclude_glass={self.coupe.pk}',
+            '/api/All_Cocktails/?category=TIKI',
+            '/api/All_Cocktails/Drink_3/',
+            '/api/All_Cocktails/lan_10/',
+            '/api/All_Cocktails/random/?seed=7',
+            '/api/All_Cocktails/random/?seed=7&n=5',
+            f'/api/All_Cocktails/random/?seed=day&n=3&tag={self.sour.pk}',
+            '/api/categories/',
+            '/api/categories/Tiki/',
+            '/api/categories/cocktails_throughout_history/',
+            '/api/categories/Cocktails_Throughout_History/?search=DRINK',
+            '/api/categories/Shots/',
+            '/api/categories/Shots/?search=lan',
+            '/api/tags/',
+            '/api/tags/Sour/',
+            f'/api/tags/{self.classic.pk}/',
+            '/api/recipe_ingredients/',
+            '/api/recipe_ingredients/Gin/',
+            f'/api/recipe_ingredients/{self.sirop.pk}/',
+            '/api/garnish_ingredients/',
+            '/api/garnish_ingredients/Lemon_Twist/',
+            '/api/preparation_methods/',
+            '/api/preparation_methods/Shaken/',
+            '/api/units/',
+            '/api/units/oz/',
+            '/api/glass_types/',
+            '/api/glass_types/Coupe/',
+        ]
+        with mock.patch.object(DrinkViewSet.pagination_class, 'page_size', 5):
+            for url in urls:
+                with self.subTest(url):
+                    response = self.assert_same(url)
+                    self.assertEqual(response.status_code, 200)
+
+    def test_json_reads_skip_the_viewsets(self):
+        patches = [
+            mock.patch.object(DrinkViewSet, 'list', side_effect=AssertionError('sync list')),
+            mock.patch.object(TagViewSet, 'retrieve', side_effect=AssertionError('sync retrieve')),
+            mock.patch.object(CategoryViewSet, 'list', side_effect=AssertionError('sync list')),
+        ]
+        for patcher in patches:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Only the catalog version is read.
+        with self.assertNumQueries(1):
+            self.assertEqual(self.snapshot_get('/api/All_Cocktails/').status_code, 200)
+        self.assertEqual(self.snapshot_get('/api/tags/Sour/').status_code, 200)
+        self.assertEqual(self.snapshot_get('/api/categories/').status_code, 200)
+
+    def test_not_modified(self):
+        for url in ('/api/All_Cocktails/', '/api/All_Cocktails/Drink_1/', '/api/tags/Sour/'):
+            with self.subTest(url):
+                etag = self.orm_get(url)['ETag']
+                response = self.assert_same(url, **{'If-None-Match': etag})
+                self.assertEqual(response.status_code, 304)
+
+    def test_everything_else_falls_back(self):
+        urls = [
+            ('/api/All_Cocktails/', 'text/html'),
+            ('/api/All_Cocktails/?format=json', 'application/json'),
+            ('/api/All_Cocktails/?q=Drink', 'application/json'),
+            ('/api/All_Cocktails/?cursor=', 'application/json'),
+            ('/api/All_Cocktails/?tag=x', 'application/json'),
+            ('/api/All_Cocktails/?page=9', 'application/json'),
+            ('/api/All_Cocktails/Nope/', 'application/json'),
+            ('/api/All_Cocktails/random/?tag=999', 'application/json'),
+            ('/api/All_Cocktails/random/?n=0', 'application/json'),
+            ('/api/tags/Nope/', 'application/json'),
+            ('/api/tags/?search=So', 'application/json'),
+            ('/api/categories/?ordering=-name', 'application/json'),
+        ]
+        for url, accept in urls:
+            with self.subTest(url=url, accept=accept):
+                cache.clear()
+                response = self.snapshot_get(url, Accept=accept)
+                expected = self.orm_get(url, Accept=accept)
+                self.assertEqual(response.status_code, expected.status_code)
+                if accept == 'application/json':
+                    self.assertEqual(response.content, expected.content)
+
+    def test_facets_and_makeable_are_read_off_the_snapshot(self):
+        self.assertEqual(self.orm_get(f'/api/All_Cocktails/?tag={self.sour.pk}').status_code, 200)
+        self.assertEqual(self.orm_get(f'/api/All_Cocktails/makeable/?have={self.gin.pk}').status_code, 200)
+        # Neither index was built in this process.
+        self.assertIsNone(facet_index.version)
+        self.assertIsNone(makeable.index.version)
+
+        queries = [
+            f'tag={self.sour.pk},{self.classic.pk}',
+            f'tag={self.sour.pk},{self.classic.pk}&tag_mode=all',
+            f'ingredient={self.gin.pk}&exclude_tag={self.sour.pk}&is_shot=false',
+            f'exclude_glass={self.coupe.pk}',
+            'category=TIKI',
+        ]
+        for query in queries:
+            with self.subTest(query):
+                drink_filters = parse_drink_filters(QueryDict(query))
+                result = facets.select(drink_filters)
+                self.assertIsInstance(result, facets.SnapshotResult)
+                expected = facet_index.select(drink_filters)
+                self.assertEqual(list(result), list(expected))
+                self.assertEqual(result[1:3], expected[1:3])
+                keys = expected.keyset_page()
+                self.assertEqual(result.keyset_page(), keys)
+                for key in keys:
+                    self.assertEqual(result.keyset_page(after=key, limit=2), expected.keyset_page(after=key, limit=2))
+                    self.assertEqual(result.keyset_page(before=key, limit=2), expected.keyset_page(before=key, limit=2))
+
+        queries = makeable.source()
+        self.assertIsInstance(queries, makeable.SnapshotMakeable)
+        for stock in ({self.gin.pk}, {self.gin.pk, self.sirop.pk}, {self.sirop.pk, self.lemon.pk}):
+            for with_garnish in (False, True):
+                with self.subTest(stock=stock, with_garnish=with_garnish):
+                    ranked = queries.makeable(stock, max_missing=2, with_garnish=with_garnish)
+                    self.assertEqual(ranked, makeable.index.makeable(stock, max_missing=2, with_garnish=with_garnish))
+                    self.assertEqual(
+                        queries.containing(stock, with_garnish=with_garnish),
+                        makeable.index.containing(stock, with_garnish=with_garnish),
+                    )
+                    pks = [pk for pk, _ in ranked]
+                    self.assertEqual(
+                        queries.missing_from(pks, stock, with_garnish=with_garnish),
+                        makeable.index.missing_from(pks, stock, with_garnish=with_garnish),
+                    )
+
+    def test_lagging_replicas_do_not_make_the_snapshot_stale(self):
+        replica = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'replica.sqlite3'
+        replica.touch()
+        self.enterContext(override_settings(DRINKS_READ_REPLICAS={'replica0': str(replica)}))
+        # A write committed on the primary, which the snapshot was loaded
+        # from after it, has not reached the replica yet.
+        with mock.patch.object(holder, 'refresh'):
+            Tag.objects.create(name='Tall')
+        holder.rebuild()
+        current = CatalogVersion.current
+        lagging = (holder.current.version - 1, holder.current.updated)
+
+        def version_on(using=None):
+            return lagging if using is None and read_db() is not None else current(using)
+
+        self.enterContext(mock.patch.object(CatalogVersion, 'current', side_effect=version_on))
+        self.enterContext(mock.patch.object(TagViewSet, 'retrieve', side_effect=AssertionError('sync retrieve')))
+        refresh = self.enterContext(mock.patch.object(holder, 'refresh'))
+        for _ in range(3):
+            self.assertEqual(self.snapshot_get('/api/tags/Tall/').status_code, 200)
+        refresh.assert_not_called()
+
+    def test_writes_swap_in_a_new_snapshot(self):
+        before = holder.current
+        with mock.patch.object(holder, 'refresh') as refresh:
+            response = self.client.patch(
+                '/api/All_Cocktails/Drink_1/', {'instructions': 'Stir.'}, format='json', HTTP_ACCEPT='application/json',
+            )
+            self.assertEqual(response.status_code, 200)
+            Drink.objects.get(name='Drink 2').tags.add(Tag.objects.create(name='Tall'))
+            self.assertTrue(refresh.called)
+            # Until the new snapshot is in, reads are answered by the ORM views.
+            self.assertNotEqual(before.catalog_version, CatalogVersion.current())
+            self.assert_same('/api/All_Cocktails/Drink_1/')
+            tall = Tag.objects.get(name='Tall')
+            response = self.assert_same(f'/api/All_Cocktails/?tag={tall.pk}')
+            self.assertEqual([drink['name'] for drink in response.json()['results']], ['Drink 2'])
+            # ... filtering with the ORM rather than an index of this process.
+            self.assertIsNone(facet_index.version)
+
+        holder.refresh()
+        self.assertTrue(holder.wait(10))
+        self.assertIsNot(holder.current, before)
+        self.assertEqual(holder.current.catalog_version, CatalogVersion.current())
+        self.assertEqual(holder.current.drink_named('Drink_1').instructions, 'Stir.')
+        self.assertEqual(before.drink_named('Drink_1').instructions, 'Shake\nhard.')
+        self.assert_same('/api/All_Cocktails/')
+        self.assert_same('/api/All_Cocktails/Drink_1/')
+        self.assert_same('/api/tags/Tall/')
+
+
+class CatalogFileReadTests(SnapshotReadTests):
+    """The same reads, from the catalog file mapped by every process."""
+
+    def setUp(self):
+        # Rebuilds scheduled before this test would write the file too.
+        holder.wait(10)
+        self.path = Path(self.enterContext(tempfile.TemporaryDirectory())) / 'catalog.bin'
+        self.enterContext(override_settings(DRINKS_CATALOG_FILE=self.path))
+        super().setUp()
+
+    def test_snapshot_is_mapped(self):
+        self.assertIsInstance(holder.current, MappedSnapshot)
+        self.assertEqual(holder.current.generation, 1)
+        self.assertEqual(read_header(self.path).version, CatalogVersion.current()[0])
+
+    def test_processes_pick_up_new_generations(self):
+        before = holder.current
+        with mock.patch.object(holder, 'refresh') as refresh:
+            Drink.objects.filter(name='Drink 1').update(instructions='Stir.')
+            CatalogVersion.bump()
+            version = CatalogVersion.current()
+            # Not written yet: answered by the ORM views.
+            self.assertIsNone(holder.get(version))
+            self.assertEqual(refresh.call_count, 1)
+
+            # Another process writes the next generation ...
+            self.assertEqual(update_catalog(str(self.path)).generation, 2)
+            # ... which this one maps on its next read.
+            snapshot = holder.get(version)
+            self.assertEqual(refresh.call_count, 1)
+        self.assertEqual(snapshot.generation, 2)
+        self.assertIs(holder.current, snapshot)
+        self.assertEqual(snapshot.drink_named('Drink_1').instructions, 'Stir.')
+        # The replaced file stays mapped for the requests still reading it.
+        self.assertEqual(before.drink_named('Drink_1').instructions, 'Shake\nhard.')
+        # Up to date: mapped as it is.
+        self.assertEqual(update_catalog(str(self.path)).generation, 2)
+        self.assert_same('/api/All_Cocktails/Drink_1/')
+
+
+class SnapshotHolderTests(SimpleTestCase):
+    def test_failed_rebuilds_are_logged_and_retried_with_backoff(self):
+        snapshots = SnapshotHolder()
+        rebuild = self.enterContext(mock.patch.object(
+            snapshots, 'rebuild', side_effect=[ValueError('locked'), ValueError('locked'), None, None]))
+        sleep = self.enterContext(mock.patch('drinks.snapshot.time.sleep'))
+        with self.assertLogs('drinks.snapshot', 'ERROR') as logs:
+            for _ in range(4):
+                snapshots.refresh()
+                self.assertTrue(snapshots.wait(10))
+        self.assertEqual(rebuild.call_count, 4)
+        self.assertEqual(len(logs.records), 2)
+        self.assertIn('ValueError: locked', logs.output[0])
+        # Delays before the second and the third attempt; none after a success.
+        self.assertEqual(sleep.call_args_list, [mock.call(RETRY_DELAY), mock.call(2 * RETRY_DELAY)])
@@ -0,0 +1,64 @@
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from drinks.sqlite import enable_incremental_vacuum, maintain, pragma
+
+
+class SQLiteTuningTests(TestCase):
+    def file_connection(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': os.path.join(tmp.name, 'tuned.sqlite3')}, alias='tuned')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_new_connections_are_tuned(self):
+        wrapper = self.file_connection()
+        with wrapper.cursor() as cursor:
+            self.assertEqual(pragma(cursor, 'journal_mode'), 'wal')
+            self.assertEqual(pragma(cursor, 'synchronous'), 1)
+            self.assertEqual(pragma(cursor, 'busy_timeout'), 5000)
+            self.assertEqual(pragma(cursor, 'temp_store'), 2)
+            self.assertEqual(pragma(cursor, 'cache_size'), -20000)
+
+    @override_settings(DRINKS_SQLITE_PRAGMAS={'cache_size': -1000, 'busy_timeout': 250})
+    def test_pragmas_setting(self):
+        wrapper = self.file_connection()
+        with wrapper.cursor() as cursor:
+            self.assertEqual(pragma(cursor, 'cache_size'), -1000)
+            self.assertEqual(pragma(cursor, 'busy_timeout'), 250)
+            self.assertEqual(pragma(cursor, 'journal_mode'), 'delete')
+
+    def test_pragma_rejects_injection(self):
+        with connection.cursor() as cursor:
+            for name, value in (('cache_size; DROP TABLE drinks_drink', None), ('cache_size', '1; VACUUM')):
+                with self.subTest(name=name, value=value), self.assertRaises(ValueError):
+                    pragma(cursor, name, value)
+
+    def test_maintain_releases_free_pages(self):
+        wrapper = self.file_connection()
+        enable_incremental_vacuum(wrapper)
+        with wrapper.cursor() as cursor:
+            cursor.execute('CREATE TABLE scratch (body TEXT)')
+            for _ in range(200):
+                cursor.execute("INSERT INTO scratch VALUES (printf('%.2000c', 'x'))")
+            cursor.execute('DROP TABLE scratch')
+        report = maintain(wrapper, analyze=True)
+        self.assertEqual(report['auto_vacuum'], 'incremental')
+        self.assertGreater(report['free_before'], 50)
+        self.assertEqual(report['free_after'], 0)
+        self.assertEqual(report['checkpoint'][0], 0)
+
+
+class OptimizeDbCommandTests(TransactionTestCase):
+    def test_optimize_db(self):
+        out = StringIO()
+        call_command('optimize_db', '--analyze', stdout=out)
+        self.assertIn('Statistics: ANALYZE', out.getvalue())
+        self.assertIn('Database maintenance done.', out.getvalue())
@@ -0,0 +1,98 @@
+import os
+import tempfile
+import threading
+from unittest import mock
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from drinks import writer as writer_module
+from drinks.models import Drink, Tag
+from drinks.writer import WriteQueue, run_write
+
+
+@override_settings(DRINKS_WRITE_QUEUE=True)
+class WriteQueueTests(TransactionTestCase):
+    def test_viewset_writes_run_on_the_writer_thread(self):
+        drink = Drink.objects.create(name='Hanky Panky', instructions='Stir.')
+        threads = []
+        original = Tag.save
+
+        def save(tag, *args, **kwargs):
+            threads.append(threading.current_thread().name)
+            return original(tag, *args, **kwargs)
+
+        client = APIClient()
+        with mock.patch.object(Tag, 'save', save):
+            response = client.post(reverse('tag-list'), {'name': 'Stirred'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(threads, ['drinks-writer'])
+        response = client.patch(reverse('cocktail-detail', args=['hanky_panky']), {'instructions': 'Stir well.'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        drink.refresh_from_db()
+        self.assertEqual(drink.instructions, 'Stir well.')
+        response = client.delete(reverse('cocktail-detail', args=['hanky_panky']), HTTP_ACCEPT='application/json')
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(Drink.objects.exists())
+
+    def test_queued_writes_are_committed_together(self):
+        queue = WriteQueue(batch=10)
+        started, release = threading.Event(), threading.Event()
+        blocks = []
+
+        def first():
+            started.set()
+            release.wait(5)
+
+        def create(name):
+            blocks.append(id(connection.atomic_blocks[0]))
+            return Tag.objects.create(name=name).pk
+
+        def fail(name):
+            Tag.objects.create(name=name)
+            raise ValueError(name)
+
+        futures = [queue.submit(first)]
+        started.wait(5)
+        futures += [queue.submit(create, 'Sour'), queue.submit(fail, 'Broken'), queue.submit(create, 'Fizz')]
+        release.set()
+        self.assertIsNotNone(futures[1].result(5))
+        with self.assertRaisesMessage(ValueError, 'Broken'):
+            futures[2].result(5)
+        self.assertIsNotNone(futures[3].result(5))
+        self.assertEqual(len(set(blocks)), 1)
+        self.assertEqual(sorted(Tag.objects.values_list('name', flat=True)), ['Fizz', 'Sour'])
+
+    def test_a_failing_batch_fails_its_writes_and_the_writer_carries_on(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with override_settings(DRINKS_WRITE_LOCK_FILE=os.path.join(tmp, 'missing', 'write-lock')):
+                queue = WriteQueue()
+                future = queue.submit(lambda: Tag.objects.create(name='Sour'))
+            with self.assertRaises(FileNotFoundError):
+                future.result(5)
+            queue.write_lock.path = os.path.join(tmp, 'write-lock')
+            self.assertEqual(queue.submit(lambda: Tag.objects.create(name='Fizz').name).result(5), 'Fizz')
+            self.assertTrue(queue.thread.is_alive())
+        self.assertEqual(list(Tag.objects.values_list('name', flat=True)), ['Fizz'])
+
+    def test_a_dead_writer_is_restarted(self):
+        queue = WriteQueue()
+        queue.start()
+        dead = threading.Thread(target=lambda: None)
+        dead.start()
+        dead.join()
+        queue.thread = dead
+        self.assertEqual(queue.submit(lambda: Tag.objects.create(name='Sour').name).result(5), 'Sour')
+        self.assertIsNot(queue.thread, dead)
+
+    def test_writes_inside_a_transaction_run_inline(self):
+        with mock.patch.object(writer_module.writer, 'submit') as submit:
+            with transaction.atomic():
+                run_write(lambda: Tag.objects.create(name='Inline'))
+            self.assertFalse(submit.called)
+            with override_settings(DRINKS_WRITE_QUEUE=False):
+                run_write(lambda: Tag.objects.create(name='Off'))
+            self.assertFalse(submit.called)
+        self.assertEqual(Tag.objects.count(), 2)
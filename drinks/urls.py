@@ -1,4 +1,5 @@
 
+from django.conf import settings
 from rest_framework.routers import DefaultRouter
 from django.urls import path, include, re_path
 from .views import (
@@ -16,6 +17,8 @@ from .views import (
     GalleryView,
     ContactView,
 )
+from .async_views import async_reads
+from .snapshot_views import snapshot_reads
 from django.views.generic import TemplateView
 from django.shortcuts import redirect
 
@@ -29,6 +32,12 @@ router.register(r'preparation_methods', PreparationMethodViewSet, basename='prep
 router.register(r'units', UnitViewSet, basename='unit')
 router.register(r'glass_types', GlassTypeViewSet, basename='glasstype')
 
+router_urls = router.urls
+if settings.DRINKS_SNAPSHOT:
+    router_urls = snapshot_reads(router_urls)
+elif settings.DRINKS_ASYNC_READS:
+    router_urls = async_reads(router_urls)
+
 urlpatterns = [
 
     path('api/', include([
@@ -36,7 +45,7 @@ urlpatterns = [
         path('about/', AboutView.as_view(), name='api-about'),
         path('contact/', ContactView.as_view(), name='api-contact'),
         path('admin/import/', ReimportView.as_view(), name='api-admin-import'),
-        path('', include(router.urls)),
+        path('', include(router_urls)),
     ])),
 
 
@@ -6,16 +6,30 @@ from rest_framework.permissions import IsAdminUser
 from rest_framework.parsers import MultiPartParser, FormParser
 from rest_framework.renderers import BrowsableAPIRenderer, JSONRenderer
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.exceptions import NotFound
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 from rest_framework.response import Response as DRFResponse
 
 from django.shortcuts import get_object_or_404
 from django.utils.safestring import mark_safe
 from django.http import Http404
-from django.urls import resolve, get_script_prefix
-from django.db.models import Count, Case, When, Value, IntegerField
+from django.urls import get_script_prefix
+from django.db.models import Case, When, Value, IntegerField, Q, QuerySet
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 
 from rest_framework.reverse import reverse
-from drinks.models import Drink, RecipeIngredient, Tag, Category, PreparationMethod, Unit, GlassType
+from drinks.models import (
+    CatalogVersion,
+    Drink,
+    RecipeIngredient,
+    Tag,
+    Category,
+    PreparationMethod,
+    Unit,
+    GlassType,
+    normalize_safe_name,
+)
 from .serializers import (
     DrinkSerializer,
     RecipeIngredientSerializer,
@@ -26,21 +40,289 @@ from .serializers import (
     GlassTypeSerializer,
     GarnishIngredientSerializer,
     safe_name_from as _safe_name_from,
-    get_by_safe_name as _get_by_safe_name,
+    load_drink_relations,
+)
+from .breadcrumbs import trails as breadcrumb_trails, views as breadcrumb_views
+from .browsable import postprocess
+from .identity import lookup as lookup_object
+from .navigation import fragments as nav_fragments
+from .fragments import DrinkJSONRenderer, drink_fragments
+from .export import (
+    CSVRenderer, NDJSONRenderer, export_response, facet_chunks as export_facet_chunks,
+    id_chunks as export_id_chunks, queryset_chunks as export_queryset_chunks,
+)
+from .filtering import apply_drink_filters, parse_bool, parse_drink_filters, parse_id_list
+from .facets import select as select_facets
+from .importer import (
+    BATCH_SIZE as IMPORT_BATCH_SIZE, ImportFormatError, format_for as import_format_for, import_rows,
+    read_rows as read_import_rows,
 )
+from .makeable import source as makeable_source
+from .sampling import sample_drink_ids
+from .search import highlights as search_highlights, search_drink_ids
+from .writer import run_write
 
 from urllib.parse import urlparse
 import re
-import random
 import html
 import json
+import hashlib
+import base64
 
 
 class AdminAwarePagination(PageNumberPagination):
+    """Page-number pagination that returns only ``{'results': ...}``.
+
+    Sending ``?cursor=`` (empty for the first page) switches a request to
+    keyset pagination on ``(name, id)`` instead: no COUNT or OFFSET, so deep
+    pages cost the same as the first, and the response carries opaque
+    ``next``/``previous`` links. Sequences ranked by something other than
+    name (search, makeable) get cursors holding an offset.
+    """
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = False
+        if self.cursor_query_param not in request.query_params or not self.supports_cursor(queryset):
+            return super().paginate_queryset(queryset, request, view)
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+        self.keyset = True
+        self.request = request
+        cursor = self.decode_cursor(request)
+        if hasattr(queryset, 'keyset_page') or isinstance(queryset, QuerySet):
+            return self.paginate_keyset(queryset, cursor, page_size)
+        return self.paginate_offset(queryset, cursor, page_size)
+
+    def supports_cursor(self, queryset):
+        if not isinstance(queryset, QuerySet):
+            return True
+        ordering = list(queryset.query.order_by) or list(queryset.model._meta.ordering)
+        return ordering[:1] == ['name']
+
+    def paginate_keyset(self, queryset, cursor, page_size):
+        after, before = cursor.get('a'), cursor.get('b')
+        if isinstance(queryset, QuerySet):
+            if before is not None:
+                qs = queryset.order_by('-name', '-pk').filter(
+                    Q(name__lt=before[0]) | Q(name=before[0], pk__lt=before[1])
+                )
+            else:
+                qs = queryset.order_by('name', 'pk')
+                if after is not None:
+                    qs = qs.filter(Q(name__gt=after[0]) | Q(name=after[0], pk__gt=after[1]))
+            rows = list(qs[:page_size + 1])
+            has_more = len(rows) > page_size
+            rows = rows[:page_size]
+            if before is not None:
+                rows.reverse()
+            keys = [(row.name, row.pk) for row in rows]
+        else:
+            keys = queryset.keyset_page(after=after, before=before, limit=page_size + 1)
+            has_more = len(keys) > page_size
+            keys = keys[1:] if before is not None and has_more else keys[:page_size]
+            rows = [pk for _, pk in keys]
+        self.next_cursor = self.previous_cursor = None
+        if keys:
+            if has_more or before is not None:
+                self.next_cursor = {'a': list(keys[-1])}
+            if (has_more and before is not None) or after is not None:
+                self.previous_cursor = {'b': list(keys[0])}
+        return rows
+
+    def paginate_offset(self, sequence, cursor, page_size):
+        offset = cursor.get('o', 0)
+        rows = list(sequence[offset:offset + page_size + 1])
+        self.next_cursor = {'o': offset + page_size} if len(rows) > page_size else None
+        self.previous_cursor = {'o': max(0, offset - page_size)} if offset else None
+        return rows[:page_size]
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return {}
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+            for key, value in cursor.items():
+                if key == 'o':
+                    valid = isinstance(value, int) and value >= 0
+                else:
+                    valid = key in ('a', 'b') and isinstance(value[0], str) and isinstance(value[1], int)
+                if not valid or len(cursor) != 1:
+                    raise ValueError
+            return cursor
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def cursor_link(self, cursor):
+        if cursor is None:
+            return None
+        token = base64.urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode()).decode().rstrip('=')
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, token)
+
     def get_paginated_response(self, data):
+        if getattr(self, 'keyset', False):
+            return DRFResponse({
+                'next': self.cursor_link(self.next_cursor),
+                'previous': self.cursor_link(self.previous_cursor),
+                'results': data,
+            })
         return DRFResponse({'results': data})
 
 
+def make_etag(request, state):
+    """ETag of the representation ``request`` negotiated for catalog ``state``."""
+    renderer = getattr(request, 'accepted_renderer', None)
+    parts = [state, request.get_full_path(), request.get_host(), request.scheme, getattr(request, 'accepted_media_type', '')]
+    html_page = isinstance(renderer, BrowsableAPIRenderer)
+    if html_page:
+        # Browsable pages embed the user and a CSRF token.
+        parts += [str(getattr(request.user, 'pk', '') or ''), request.COOKIES.get('csrftoken', '')]
+    digest = hashlib.sha1('|'.join(parts).encode()).hexdigest()
+    # The masked CSRF token differs on every HTML render, so those
+    # representations are only semantically equivalent.
+    return f'W/"{digest}"' if html_page else f'"{digest}"'
+
+
+class NotModified(Exception):
+    def __init__(self, response):
+        super().__init__()
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """ETag / Last-Modified validators for every GET on a catalog viewset.
+
+    Validators come from ``CatalogVersion`` (or ``Drink.updated`` for JSON
+    cocktail details), so a matching If-None-Match / If-Modified-Since is
+    answered with 304 before the queryset, serializer or renderer run.
+    """
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self._validators = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        validators = self.get_validators(request)
+        if validators is None:
+            return
+        self._validators = validators
+        etag, last_modified = validators
+        response = get_conditional_response(request, etag=etag, last_modified=int(last_modified.timestamp()))
+        if response is not None:
+            raise NotModified(response)
+
+    def get_validators(self, request):
+        """Return ``(etag, last_modified)`` for the current GET, or None."""
+        version, last_modified = CatalogVersion.for_request(request)
+        return self._make_etag(request, f'catalog:{version}'), last_modified
+
+    def _make_etag(self, request, state):
+        return make_etag(request, state)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validators = getattr(self, '_validators', None)
+        if validators and response.status_code in (200, 304):
+            etag, last_modified = validators
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(last_modified.timestamp())
+        return response
+
+
+class WriteQueueMixin:
+    """Sends the writes of create, update and destroy through ``drinks.writer``."""
+
+    def perform_create(self, serializer):
+        run_write(super().perform_create, serializer)
+
+    def perform_update(self, serializer):
+        run_write(super().perform_update, serializer)
+
+    def perform_destroy(self, instance):
+        run_write(super().perform_destroy, instance)
+
+
+class DrinkListingMixin:
+    """Read pipeline shared by every endpoint that returns a page of drinks.
+
+    Drinks already in the fragment cache are emitted as pre-encoded JSON; the
+    rest are loaded with ``Prefetch`` objects so the number of queries does
+    not depend on the page size. ``?q=`` narrows the page to full-text
+    matches, best first, each with a highlighted ``highlight`` entry.
+
+    Facet detail pages get their drinks from a ``drinks_for(request, obj)``
+    static method, which ``drinks.async_views`` calls too.
+    """
+
+    def drink_results(self, request, drinks, context):
+        def serialize(missing):
+            load_drink_relations(missing)
+            return DrinkSerializer(missing, many=True, context=context).data
+
+        return drink_fragments(drinks, request, serialize)
+
+    def list_drinks(self, request, drinks_qs, context=None):
+        if context is None:
+            context = {"request": request, "suppress_category": True}
+        drinks_qs = drinks_qs.select_related('glass_type')
+        query = (request.query_params.get('q') or '').strip()
+        if query:
+            return self.search_drinks(request, drinks_qs, query, context)
+        page = self.paginate_queryset(drinks_qs)
+        drinks = page if page is not None else list(drinks_qs)
+        results = self.drink_results(request, drinks, context)
+        if page is not None:
+            return self.get_paginated_response(results)
+        return Response({'results': results})
+
+    def search_drinks(self, request, drinks_qs, query, context):
+        allowed = set(drinks_qs.values_list('pk', flat=True))
+        ids = [pk for pk in search_drink_ids(query) if pk in allowed]
+
+        def annotate(drinks):
+            marks = search_highlights([d.pk for d in drinks], query)
+            return {d.pk: {'highlight': marks.get(d.pk)} for d in drinks}
+
+        return self.list_drink_ids(request, ids, context, annotate)
+
+    def list_drink_ids(self, request, ids, context, annotate=None):
+        """Respond with the drinks in ``ids``, a sequence already in list order.
+
+        Only the requested page of ``ids`` is loaded. ``annotate`` receives the
+        page's drinks and returns extra keys to add to each, by drink id.
+        """
+        page = self.paginate_queryset(ids)
+        ids = page if page is not None else list(ids)
+        by_pk = Drink.objects.select_related('glass_type').in_bulk(ids)
+        drinks = [by_pk[pk] for pk in ids if pk in by_pk]
+        if annotate is None:
+            results = self.drink_results(request, drinks, context)
+        else:
+            results = self.annotated_results(request, drinks, context, annotate(drinks))
+        if page is not None:
+            return self.get_paginated_response(results)
+        return Response({'results': results})
+
+    def annotated_results(self, request, drinks, context, extra):
+        """Serialized ``drinks`` with the per-drink keys in ``extra[pk]`` added."""
+        fragments = self.drink_results(request, drinks, context)
+        results = []
+        for drink, fragment in zip(drinks, fragments):
+            item = json.loads(fragment)
+            item.update(extra.get(drink.pk) or {})
+            results.append(item)
+        return results
+
+
 class PrettyNameMixin:
 
     pagination_class = AdminAwarePagination
@@ -53,22 +335,23 @@ class PrettyNameMixin:
 
             if action == 'retrieve' or pk:
                 if pk and not str(pk).isdigit():
-                    lookup_name = str(pk).replace('_', ' ')
                     serializer = getattr(self, 'serializer_class', None)
                     try:
                         if serializer and hasattr(serializer, 'Meta') and hasattr(serializer.Meta, 'model'):
-                            model = serializer.Meta.model
-                            obj = model.objects.filter(name__iexact=lookup_name).first()
-                            if obj:
-                                return getattr(obj, 'name', str(obj))
+                            obj = lookup_object(
+                                getattr(self, 'request', None), serializer.Meta.model, pk,
+                                queryset=self.get_name_lookup_queryset(),
+                            )
+                            return getattr(obj, 'name', str(obj))
+                    except Exception:
+                        pass
+                else:
+                    # A name the plain lookup missed is not in any narrower queryset.
+                    try:
+                        obj = self.get_object()
+                        return getattr(obj, 'name', str(obj))
                     except Exception:
                         pass
-
-                try:
-                    obj = self.get_object()
-                    return getattr(obj, 'name', str(obj))
-                except Exception:
-                    pass
         except Exception:
             pass
 
@@ -86,6 +369,20 @@ class PrettyNameMixin:
 
         return super().get_view_name()
 
+    def get_name_lookup_queryset(self):
+        """Queryset the page title looks its object up in (None: the model's manager)."""
+        return None
+
+    def get_object(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        value = self.kwargs.get(lookup_url_kwarg)
+        if value is None or str(value).isdigit():
+            return super().get_object()
+        queryset = self.filter_queryset(self.get_queryset())
+        obj = lookup_object(self.request, queryset.model, value, queryset=queryset)
+        self.check_object_permissions(self.request, obj)
+        return obj
+
 
 class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
 
@@ -98,8 +395,11 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
 
     def get_description(self, view, nodes=None):
         description = super().get_description(view, nodes)
+        injection = nav_fragments.get(getattr(view, 'request', None), 'random_button', self.build_random_button)
+        return mark_safe(injection + description) if description else mark_safe(injection)
 
-
+    def build_random_button(self, request):
+        """Styles and script adding the Random Recipe button (uncached)."""
         try:
             drinks_path = reverse('cocktail-list')
             random_url = f"{drinks_path.rstrip('/')}/random/"
@@ -145,9 +445,44 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
             }})();
         </script>
         '''
-        return mark_safe(injection + description) if description else mark_safe(injection)
+        return injection
 
     def get_breadcrumbs(self, request):
+        return breadcrumb_trails.get(request, self.build_breadcrumbs)
+
+    def build_breadcrumbs(self, request):
+        """Work out the crumb trail for ``request`` (uncached)."""
+        names = {}
+        drinks = {}
+
+        def view_name(u):
+            # Name of the view at ``u`` as its own page would title it.
+            if u not in names:
+                view, args, kwargs = breadcrumb_views.resolve(u)
+                cls = getattr(view, 'cls', None)
+                if cls is None:
+                    names[u] = None
+                else:
+                    inst = cls(**getattr(view, 'initkwargs', {}))
+                    inst.request = request
+                    inst.args = args
+                    inst.kwargs = kwargs
+                    names[u] = inst.get_view_name()
+            return names[u]
+
+        def drink_named(seg):
+            if seg not in drinks:
+                try:
+                    drinks[seg] = (lookup_object(request, Drink, seg, queryset=drink_detail_queryset()), None)
+                except Exception as exc:
+                    drinks[seg] = (None, exc)
+            obj, exc = drinks[seg]
+            if exc is not None:
+                raise exc
+            return obj
+
+        def path_of(route, *args):
+            return urlparse(reverse(route, args=args or None, request=request)).path
 
         crumbs = []
         try:
@@ -158,25 +493,12 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
 
             def recurse(u, out, seen):
                 try:
-                    view, args, kwargs = resolve(u)
+                    view, args, kwargs = breadcrumb_views.resolve(u)
                 except Exception:
                     return
-                cls = getattr(view, 'cls', None)
-                initkwargs = getattr(view, 'initkwargs', {})
-                if cls is not None:
+                if getattr(view, 'cls', None) is not None:
                     if not seen or seen[-1] != view:
-                        inst = cls(**initkwargs)
-                        try:
-                            inst.request = request
-                        except Exception:
-                            pass
-                        try:
-                            inst.args = args
-                            inst.kwargs = kwargs
-                        except Exception:
-                            pass
-                        name = inst.get_view_name()
-                        out.insert(0, (name, u))
+                        out.insert(0, (view_name(u), u))
                         seen.append(view)
 
                 if u == '':
@@ -191,38 +513,22 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
             return super().get_breadcrumbs(request)
 
         try:
-            api_root_full = reverse('api-root', request=request)
-            api_root_path = urlparse(api_root_full).path
+            api_root_path = path_of('api-root')
             if not crumbs or (len(crumbs) and crumbs[0][1] != api_root_path):
-                view, args, kwargs = resolve(api_root_path)
-                cls = getattr(view, 'cls', None)
-                initkwargs = getattr(view, 'initkwargs', {})
-                if cls is not None:
-                    inst = cls(**initkwargs)
-                    try:
-                        inst.request = request
-                    except Exception:
-                        pass
-                    try:
-                        inst.args = args
-                        inst.kwargs = kwargs
-                    except Exception:
-                        pass
-                    name = inst.get_view_name()
+                name = view_name(api_root_path)
+                if name is not None:
                     crumbs.insert(0, (name, api_root_path))
         except Exception:
             pass
 
         try:
             try:
-                cocktail_full = reverse('cocktail-list', request=request)
-                cocktail_path = urlparse(cocktail_full).path
+                cocktail_path = path_of('cocktail-list')
             except Exception:
                 cocktail_path = '/api/All_Cocktails/'
             if request.path.rstrip('/') == cocktail_path.rstrip('/'):
                 try:
-                    api_root_full = reverse('api-root', request=request)
-                    api_root_path = urlparse(api_root_full).path
+                    api_root_path = path_of('api-root')
                 except Exception:
                     api_root_path = '/api/'
                 return [('Home', api_root_path), ('All Cocktails', cocktail_path)]
@@ -244,25 +550,11 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
             for seg, route_name in resources.items():
                 if f'/{seg}/' in path:
                     try:
-                        list_full = reverse(route_name, request=request)
-                        list_path = urlparse(list_full).path
+                        list_path = path_of(route_name)
                         present = any(c[1] == list_path for c in crumbs)
                         if not present:
-                            view, args, kwargs = resolve(list_path)
-                            cls = getattr(view, 'cls', None)
-                            initkwargs = getattr(view, 'initkwargs', {})
-                            if cls is not None:
-                                inst = cls(**initkwargs)
-                                try:
-                                    inst.request = request
-                                except Exception:
-                                    pass
-                                try:
-                                    inst.args = args
-                                    inst.kwargs = kwargs
-                                except Exception:
-                                    pass
-                                name = inst.get_view_name()
+                            name = view_name(list_path)
+                            if name is not None:
                                 insert_at = 1 if crumbs else 0
                                 crumbs.insert(insert_at, (name, list_path))
                     except Exception:
@@ -278,11 +570,10 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
                 seg = request.path.rstrip('/').split('/')[-1]
                 if seg and not seg.isdigit():
                     try:
-                        drink = _get_by_safe_name(Drink, seg)
+                        drink = drink_named(seg)
                         cat = getattr(drink, 'category', None)
                         try:
-                            categories_full = reverse('category-list', request=request)
-                            categories_path = urlparse(categories_full).path
+                            categories_path = path_of('category-list')
                         except Exception:
                             categories_path = None
 
@@ -290,21 +581,8 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
                             present = any(c[1] == categories_path for c in crumbs)
                             if not present:
                                 try:
-                                    view, args, kwargs = resolve(categories_path)
-                                    cls = getattr(view, 'cls', None)
-                                    initkwargs = getattr(view, 'initkwargs', {})
-                                    if cls is not None:
-                                        inst = cls(**initkwargs)
-                                        try:
-                                            inst.request = request
-                                        except Exception:
-                                            pass
-                                        try:
-                                            inst.args = args
-                                            inst.kwargs = kwargs
-                                        except Exception:
-                                            pass
-                                        name = inst.get_view_name()
+                                    name = view_name(categories_path)
+                                    if name is not None:
                                         insert_at = 1 if crumbs else 0
                                         crumbs.insert(insert_at, (name, categories_path))
                                 except Exception:
@@ -313,8 +591,7 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
                         if cat:
                                     try:
                                         public = _safe_name_from(cat.name)
-                                        cat_path = reverse('category-detail', args=[public], request=request)
-                                        cat_path = urlparse(cat_path).path
+                                        cat_path = path_of('category-detail', public)
                                         if not any(c[1] == cat_path for c in crumbs):
                                             idx = next((i for i, c in enumerate(crumbs) if c[1] == categories_path), None)
                                             insert_at = (idx + 1) if idx is not None else (1 if crumbs else 0)
@@ -324,8 +601,7 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
                     except Exception:
                             try:
                                 public = _safe_name_from(cat.name)
-                                cat_path = reverse('category-detail', args=[public], request=request)
-                                cat_path = urlparse(cat_path).path
+                                cat_path = path_of('category-detail', public)
                                 if not any(c[1] == cat_path for c in crumbs):
                                     idx = next((i for i, c in enumerate(crumbs) if c[1] == categories_path), None)
                                     insert_at = (idx + 1) if idx is not None else (1 if crumbs else 0)
@@ -334,21 +610,8 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
                                 pass
                     if not present:
                         try:
-                            view, args, kwargs = resolve(categories_path)
-                            cls = getattr(view, 'cls', None)
-                            initkwargs = getattr(view, 'initkwargs', {})
-                            if cls is not None:
-                                inst = cls(**initkwargs)
-                                try:
-                                    inst.request = request
-                                except Exception:
-                                    pass
-                                try:
-                                    inst.args = args
-                                    inst.kwargs = kwargs
-                                except Exception:
-                                    pass
-                                name = inst.get_view_name()
+                            name = view_name(categories_path)
+                            if name is not None:
                                 insert_at = 1 if crumbs else 0
                                 crumbs.insert(insert_at, (name, categories_path))
                         except Exception:
@@ -386,7 +649,7 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
                             seg = last_url.rstrip('/').split('/')[-1]
                             if seg and not seg.isdigit():
                                 try:
-                                    obj = _get_by_safe_name(Drink, seg)
+                                    obj = drink_named(seg)
                                     cleaned[-1] = (getattr(obj, 'name', seg), last_url)
                                 except Exception:
                                     pass
@@ -401,112 +664,47 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
 
                 if is_drink_detail:
                     try:
-                        obj = _get_by_safe_name(Drink, seg)
+                        obj = drink_named(seg)
                         cat = getattr(obj, 'category', None)
                     except Exception:
                         obj = None
                         cat = None
 
                     parts = []
-                    try:
-                        api_root_full = reverse('api-root', request=request)
-                        api_root_path = urlparse(api_root_full).path
-                        view, args, kwargs = resolve(api_root_path)
-                        cls = getattr(view, 'cls', None)
-                        initkwargs = getattr(view, 'initkwargs', {})
-                        if cls is not None:
-                            inst = cls(**initkwargs)
-                            try:
-                                inst.request = request
-                            except Exception:
-                                pass
-                            parts.append(str(inst.get_view_name()))
-                    except Exception:
-                        pass
-
-                    try:
-                        categories_full = reverse('category-list', request=request)
-                        categories_path = urlparse(categories_full).path
-                        view, args, kwargs = resolve(categories_path)
-                        cls = getattr(view, 'cls', None)
-                        initkwargs = getattr(view, 'initkwargs', {})
-                        if cls is not None:
-                            inst = cls(**initkwargs)
-                            try:
-                                inst.request = request
-                            except Exception:
-                                pass
-                            parts.append(str(inst.get_view_name()))
-                    except Exception:
-                        pass
-
+                    for route in ('api-root', 'category-list'):
                         try:
-                            if cat:
-                                public = _safe_name_from(cat.name)
-                                parts.append(str(getattr(cat, 'name', public)))
-                            else:
-                                if obj and getattr(obj, 'is_shot', False):
-                                    parts.append('Shots')
+                            name = view_name(path_of(route))
+                            if name is not None:
+                                parts.append(str(name))
                         except Exception:
                             pass
 
                     if obj:
                         parts.append(str(getattr(obj, 'name', seg)))
 
-                    import re as _re
-                    def _strip_tags(s):
-                        return _re.sub(r'<[^>]+>', '', s)
-
-                    clean_parts = [_strip_tags(str(p)).strip() for p in parts if p]
+                    clean_parts = [re.sub(r'<[^>]+>', '', str(p)).strip() for p in parts if p]
                     if clean_parts:
                         crumbs_out = []
                         try:
-                            api_root_full = reverse('api-root', request=request)
-                            api_root_path = urlparse(api_root_full).path
-                            view, args, kwargs = resolve(api_root_path)
-                            cls = getattr(view, 'cls', None)
-                            initkwargs = getattr(view, 'initkwargs', {})
-                            if cls is not None:
-                                inst = cls(**initkwargs)
-                                try:
-                                    inst.request = request
-                                except Exception:
-                                    pass
-                                try:
-                                    inst.args = args
-                                    inst.kwargs = kwargs
-                                except Exception:
-                                    pass
-                                crumbs_out.append((inst.get_view_name(), api_root_path))
+                            api_root_path = path_of('api-root')
+                            name = view_name(api_root_path)
+                            if name is not None:
+                                crumbs_out.append((name, api_root_path))
                         except Exception:
                             pass
 
                         try:
-                            categories_full = reverse('category-list', request=request)
-                            categories_path = urlparse(categories_full).path
-                            view, args, kwargs = resolve(categories_path)
-                            cls = getattr(view, 'cls', None)
-                            initkwargs = getattr(view, 'initkwargs', {})
-                            if cls is not None:
-                                inst = cls(**initkwargs)
-                                try:
-                                    inst.request = request
-                                except Exception:
-                                    pass
-                                try:
-                                    inst.args = args
-                                    inst.kwargs = kwargs
-                                except Exception:
-                                    pass
-                                crumbs_out.append((inst.get_view_name(), categories_path))
+                            categories_path = path_of('category-list')
+                            name = view_name(categories_path)
+                            if name is not None:
+                                crumbs_out.append((name, categories_path))
                         except Exception:
                             pass
 
                         try:
                             if cat:
                                 public = _safe_name_from(cat.name)
-                                cat_path = reverse('category-detail', args=[public], request=request)
-                                cat_path = urlparse(cat_path).path
+                                cat_path = path_of('category-detail', public)
                                 crumbs_out.append((str(getattr(cat, 'name', public)), cat_path))
                         except Exception:
                             pass
@@ -529,192 +727,34 @@ class CustomBrowsableAPIRenderer(BrowsableAPIRenderer):
         result = super().render(data, accepted_media_type, renderer_context)
         try:
             text = result.decode('utf-8') if isinstance(result, (bytes, bytearray)) else str(result)
-            import re
-
-            try:
-                text = re.sub(r'(<div[^>]*class=["\'][^"\']*(?:request|response)-info[^"\']*["\'][\s\S]*?<pre[^>]*class=["\'])(prettyprint)(["\'][^>]*>)', r"\1\2 nocode\3", text, flags=re.IGNORECASE)
-            except Exception:
-                pass
-            try:
-                pre_url_re = re.compile(r'(&quot;)(?P<url>https?://[^&<\s]*/api/(?:drinks|Cocktails|All_Cocktails)/[A-Za-z0-9_\-]+/?)(?P<end>&quot;)', re.IGNORECASE)
-                def _wrap_pre_url(m):
-                    quote, url, end = m.group(1), m.group('url'), m.group('end')
-                    return f'{quote}<a href="{url}" rel="nofollow">{url}</a>{end}'
-                text = pre_url_re.sub(_wrap_pre_url, text)
-            except Exception:
-                pass
-            try:
-                import html, json
-
-                def _apply_custom_formatting(src_text, key_name, fmt_type='flat_value_aligned'):
-
-
-                    q_pat = r'(?:&quot;|\")'
-
-
-                    prefix_pat = r'(?P<prefix>(?:^|\n)\s*|\s+)'
-
-                    if 'array' in fmt_type:
-
-                        pattern = re.compile(prefix_pat + r'(' + q_pat + re.escape(key_name) + q_pat + r'\s*:\s*\[)(?P<inside>.*?)(\])', re.S)
-                    else:
-
-                        pattern = re.compile(prefix_pat + r'(' + q_pat + re.escape(key_name) + q_pat + r'\s*:\s*)(?P<value>' + q_pat + r'(?:[^"\\]|\\.)*?' + q_pat + r')', re.S)
-
-                    def _repl(m):
-                        prefix_full = m.group('prefix') or ''
-                        if '\n' in prefix_full:
-                            newline_part = '\n'
-                            indent_spaces = prefix_full.replace('\n', '')
-                        else:
-                            newline_part = ''
-                            indent_spaces = prefix_full
-                        base_indent_len = len(indent_spaces)
-
-                        if 'array' in fmt_type:
-                            inside = m.group('inside')
-                            full_start = m.group(2)
-                            full_end = m.group(4)
-
-
-                            inside_unescaped = html.unescape(inside)
-                            items = re.findall(r'(?:(?:\")|\"|\')(.*?)(?:(?:\")|\"|\')', inside_unescaped, re.S)
-                            if not items:
-                                raw = re.sub(r'\s+', ' ', inside_unescaped).strip()
-                                if not raw: return m.group(0)
-                                parts = [p.strip().strip('"\'') for p in raw.split(',') if p.strip()]
-                                items = parts
-
-                            cleaned = []
-                            for it in items:
-                                try:
-                                    decoded = bytes(it, 'utf-8').decode('unicode_escape')
-                                except Exception:
-                                    decoded = it
-                                decoded = decoded.replace('\n', ' ').replace('\r', ' ').strip()
-                                cleaned.append(decoded)
-
-                            if 'stack' in fmt_type:
-
-
-                                header_text_last_line = full_start.split('\n')[-1]
-                                header_visual_offset = base_indent_len + len(html.unescape(header_text_last_line))
-                                line_prefix = ' ' * header_visual_offset
-
-
-                                joined = (',\n' + line_prefix).join(json.dumps(s, ensure_ascii=False) for s in cleaned)
-
-
-                                total_indent = 0
-                                text_indent = 0
-                                content_line = full_start + joined + full_end
-                                span_inner_text = indent_spaces + content_line
-                            else:
-
-                                joined = ', '.join(json.dumps(s, ensure_ascii=False) for s in cleaned)
-                                content_line = full_start + joined + full_end
-
-
-                                header_text = full_start
-                                header_visual_len = base_indent_len + len(header_text.split('\n')[-1])
-
-                                total_indent = header_visual_len
-                                text_indent = -total_indent
-                                span_inner_text = indent_spaces + content_line
-                        else:
-
-                            key_part = m.group(2)
-                            val_part = m.group(3)
-                            content_line = key_part + val_part
-
-                            if fmt_type == 'block_key_aligned':
-
-                                total_indent = base_indent_len
-                                text_indent = -total_indent
-                                span_inner_text = indent_spaces + content_line
-                            else:
-
-                                header_visual_len = base_indent_len + len(key_part.split('\n')[-1])
-                                if key_name == 'instructions':
-
-                                    content_line = f'{full_start}<span class="instr-wrap">"{inside}"</span>{full_end}'
-                                    total_indent = 0
-                                    text_indent = 0
-                                    span_inner_text = indent_spaces + content_line
-                                else:
-                                    total_indent = header_visual_len
-                                    text_indent = -total_indent
-                                    span_inner_text = indent_spaces + content_line
-                        return f'{newline_part}<span style="display:inline-block; margin-left:{total_indent}ch; text-indent:{text_indent}ch;">{span_inner_text}</span>'
-
-                    return pattern.sub(_repl, src_text)
-
-
-                fields_to_format = [
-                    ('tags', 'array_flat'),
-                    ('preparation_method', 'array_flat'),
-                    ('garnish_ingredients', 'array_flat'),
-                    ('recipe_ingredients', 'array_stack'),
-                    ('instructions', 'flat_value_aligned'),
-                ]
-
-                for key, ftype in fields_to_format:
-                    text = _apply_custom_formatting(text, key, ftype)
-            except Exception:
-                pass
-
-            try:
-                text = re.sub(r'\{\s*(?:&quot;|")results(?:&quot;|")\s*:\s*(?P<inner>\[.*?\]|\{.*?\})\s*\}', lambda m: m.group('inner'), text, flags=re.S)
-            except Exception:
-                pass
-            try:
-                pre_pattern = re.compile(r'(<pre[^>]*class=["\"][^"\']*prettyprint[^"\']*["\"][^>]*>)(?P<content>.*?)(</pre>)', re.S | re.I)
-                def _align_closing_bracket(m):
-                    open_tag = m.group(1)
-                    content = m.group('content')
-                    close_tag = m.group(3)
-
-                    content = re.sub(r"\n[ \t]+(?=\])", "\n", content)
-
-
-                    content = re.sub(r'(\r?\n)\s*\r?\n', r'\1', content)
-                    return open_tag + content + close_tag
-                text = pre_pattern.sub(_align_closing_bracket, text)
-            except Exception:
-                pass
-            try:
-                def _sanitize_instructions(m):
-                    prefix = m.group(1)
-                    content = m.group('inside')
-
-                    sanitized = content.replace('\\n', ' ').replace('\n', ' ')
-
-                    sanitized = re.sub(r'([.!?)])\s*[—–-]\s*', r'\1 ', sanitized)
-                    sanitized = re.sub(r'\s+', ' ', sanitized).strip()
-                    sanitized = re.sub(r',(?=\S)', ', ', sanitized)
-                    sanitized = re.sub(r'\s+(?=[\.,;:\?!])', '', sanitized)
-                    sanitized = sanitized.replace('"', '\\"')
-                    return f"{prefix}{sanitized}{m.group(3)}"
-
-                instr_pattern_html = re.compile(r'((?:&quot;|")instructions(?:&quot;|")\s*:\s*&quot;)(?P<inside>.*?)(\&quot;)', re.S)
-                text = instr_pattern_html.sub(lambda m: _sanitize_instructions(m), text)
-
-                instr_pattern = re.compile(r'((?:"|\')instructions(?:"|\')\s*:\s*")(?P<inside>.*?)(")', re.S)
-            except Exception:
-                instr_pattern = None
-
-            try:
-                if instr_pattern:
-                    text = instr_pattern.sub(lambda m: _sanitize_instructions(m), text)
-            except Exception:
-                pass
-
-            return text.encode('utf-8')
+            return postprocess(text).encode('utf-8')
         except Exception:
             return result
 class HomeView(APIView):
     renderer_classes = (CustomBrowsableAPIRenderer, JSONRenderer)
     def get(self, request, format=None):
+        payload, display_payload = nav_fragments.get(request, 'home', self.build_payloads)
+
+        is_html = False
+        try:
+            renderer = getattr(request, 'accepted_renderer', None)
+            if renderer and getattr(renderer, 'format', None) in ('html', 'api'):
+                is_html = True
+        except Exception:
+            is_html = False
+
+        accept = request.META.get('HTTP_ACCEPT', '') if request is not None else ''
+        fmt = request.query_params.get('format') if request is not None else None
+        if (accept and 'text/html' in accept) or (fmt and fmt in ('html', 'api')):
+            is_html = True
+
+
+        if is_html:
+            payload = display_payload
+        return Response({**payload, 'endpoints': dict(payload['endpoints'])})
+
+    def build_payloads(self, request):
+        """Build the JSON and the browsable payloads for ``request`` (uncached)."""
         req = request
 
 
@@ -781,60 +821,42 @@ class HomeView(APIView):
             'endpoints': endpoints,
         }
 
-        is_html = False
-        try:
-            renderer = getattr(request, 'accepted_renderer', None)
-            if renderer and getattr(renderer, 'format', None) in ('html', 'api'):
-                is_html = True
-        except Exception:
-            is_html = False
-
-        accept = request.META.get('HTTP_ACCEPT', '') if request is not None else ''
-        fmt = request.query_params.get('format') if request is not None else None
-        if (accept and 'text/html' in accept) or (fmt and fmt in ('html', 'api')):
-            is_html = True
-
+        display_payload = {
+            'title': payload['title'],
+            'description': payload['description'],
+        }
+        all_eps = dict(payload.get('endpoints', {}))
+        preferred_order = [
+            'categories',
+            'tags',
+            'preparation_methods',
+            'glass_types',
+            'recipe_ingredients',
+            'garnish_ingredients',
+            'units',
+        ]
+        endpoints_display = {}
+        for key in preferred_order:
+            if key in all_eps:
+                endpoints_display[key] = all_eps.pop(key)
 
-        if is_html:
+        for k, v in payload.get('endpoints', {}).items():
+            if k == 'Cocktails':
+                continue
+            if k not in endpoints_display:
+                endpoints_display[k] = v
 
-            display_payload = {
-                'title': payload['title'],
-                'description': payload['description'],
-            }
-            all_eps = dict(payload.get('endpoints', {}))
-            preferred_order = [
-                'categories',
-                'tags',
-                'preparation_methods',
-                'glass_types',
-                'recipe_ingredients',
-                'garnish_ingredients',
-                'units',
-            ]
-            endpoints_display = {}
-            for key in preferred_order:
-                if key in all_eps:
-                    endpoints_display[key] = all_eps.pop(key)
-
-            for k, v in payload.get('endpoints', {}).items():
-                if k == 'Cocktails':
-                    continue
-                if k not in endpoints_display:
-                    endpoints_display[k] = v
-
-            display_payload['endpoints'] = endpoints_display
-            return Response(display_payload)
-
-        return Response(payload)
+        display_payload['endpoints'] = endpoints_display
+        return payload, display_payload
 
     def get_view_name(self):
         try:
             req = getattr(self, 'request', None)
             if req is not None:
                 try:
-                    api_root_full = reverse('api-root', request=req)
-                    from urllib.parse import urlparse
-                    api_root_path = urlparse(api_root_full).path
+                    api_root_path = nav_fragments.get(
+                        req, 'api_root_path', lambda r: urlparse(reverse('api-root', request=r)).path,
+                    )
                 except Exception:
                     api_root_path = None
 
@@ -849,11 +871,11 @@ class HomeView(APIView):
     def get_view_description(self, *args, **kwargs):
         req = kwargs.get('request') or getattr(self, 'request', None)
         if req is not None and getattr(req, 'accepted_renderer', None) is not None and req.accepted_renderer.format in ('html', 'api'):
-            nav = build_nav_html(req)
+            nav = nav_html(req)
             header = f'<div style="margin-top:8px;margin-bottom:10px;"><h2>{"Cocktail Recipes API"}</h2><p>{"Welcome to Cocktail Recipes API"}</p></div>'
             return mark_safe(nav + header)
         if req:
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
         return super().get_view_description(*args, **kwargs)
 
 
@@ -865,11 +887,17 @@ class AboutView(APIView):
     def get_view_description(self, *args, **kwargs):
         req = kwargs.get('request') or getattr(self, 'request', None)
         if req:
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
         return super().get_view_description(*args, **kwargs)
 
 
+def nav_html(request):
+    """The navigation bar for ``request``, built once per site address."""
+    return nav_fragments.get(request, 'nav', build_nav_html)
+
+
 def build_nav_html(request):
+    """Build the navigation bar for ``request`` (uncached)."""
     req = request
     try:
         home = reverse('api-root', request=req)
@@ -927,25 +955,146 @@ def build_nav_html(request):
     return nav
 
 
-class DrinkViewSet(PrettyNameMixin, viewsets.ModelViewSet):
+def drink_detail_queryset():
+    """Queryset every lookup of a single drink by name goes through, so the
+    detail view, its page title and its breadcrumbs share one object."""
+    return Drink.objects.select_related('glass_type', 'category')
+
+
+class DrinkViewSet(ConditionalGetMixin, WriteQueueMixin, DrinkListingMixin, PrettyNameMixin, viewsets.ModelViewSet):
     queryset = Drink.objects.all().order_by('name')
     serializer_class = DrinkSerializer
-    renderer_classes = (CustomBrowsableAPIRenderer, JSONRenderer)
+    renderer_classes = (CustomBrowsableAPIRenderer, DrinkJSONRenderer)
     lookup_field = 'name'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name', 'instructions']
     ordering_fields = ['name', 'created']
 
+    def get_name_lookup_queryset(self):
+        return drink_detail_queryset()
+
+    def get_validators(self, request):
+        if self.action == 'random':
+            # Only a seeded draw is repeatable.
+            if 'seed' not in request.query_params:
+                return None
+            return super().get_validators(request)
+        name = self.kwargs.get('name')
+        if self.action != 'retrieve' or not name or str(name).isdigit():
+            return super().get_validators(request)
+        if isinstance(getattr(request, 'accepted_renderer', None), BrowsableAPIRenderer):
+            # The HTML page also shows the category and navigation.
+            return super().get_validators(request)
+        row = Drink.objects.filter(safe_name=normalize_safe_name(name)).values_list('pk', 'updated').first()
+        if row is None:
+            return None
+        pk, updated = row
+        return self._make_etag(request, f'drink:{pk}:{updated.isoformat()}'), updated
+
+    # Largest batch ``random?n=`` will draw.
+    MAX_RANDOM_DRAWS = 50
+
     @action(detail=False, methods=['get'], name='Random Recipe', url_path='random')
     def random(self, request):
-        """Return a random cocktail."""
-        count = self.get_queryset().count()
-        if count == 0:
+        """Return a random cocktail, or ``n`` distinct ones with ``?n=``.
+
+        Accepts the same filters as the list, and ``seed`` for a reproducible
+        draw (e.g. ``?seed=2024-06-01`` for a drink of the day).
+        """
+        try:
+            drink_filters = parse_drink_filters(request.query_params)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        n = request.query_params.get('n')
+        if n is not None:
+            try:
+                n = int(n)
+            except (TypeError, ValueError):
+                n = 0
+            if not 1 <= n <= self.MAX_RANDOM_DRAWS:
+                return Response(
+                    {'detail': f"'n' must be an integer between 1 and {self.MAX_RANDOM_DRAWS}."},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+        ids = sample_drink_ids(drink_filters, n or 1, seed=request.query_params.get('seed'))
+        if not ids:
             return Response({'detail': 'No cocktails found'}, status=status.HTTP_404_NOT_FOUND)
-        random_index = random.randint(0, count - 1)
-        obj = self.get_queryset()[random_index]
-        serializer = self.get_serializer(obj)
-        return Response(serializer.data)
+        by_pk = Drink.objects.select_related('glass_type').in_bulk(ids)
+        drinks = [by_pk[pk] for pk in ids if pk in by_pk]
+        if not drinks:
+            return Response({'detail': 'No cocktails found'}, status=status.HTTP_404_NOT_FOUND)
+        if n is None:
+            load_drink_relations(drinks)
+            return Response(self.get_serializer(drinks[0]).data)
+        return Response({'results': self.drink_results(request, drinks, self.get_serializer_context())})
+
+    # Largest ``missing=`` accepted by the makeable endpoint.
+    MAX_MISSING = 5
+
+    @action(detail=False, methods=['get'], name='What Can I Make', url_path='makeable')
+    def makeable(self, request):
+        """Cocktails you can make from the ingredient ids in ``have``.
+
+        ``missing=<k>`` also returns drinks lacking up to k ingredients, fewest
+        missing first; ``garnish=true`` counts garnishes as ingredients; and
+        ``mode=contains`` instead returns drinks that use every ingredient in
+        ``have``. Each result lists its ``missing_ingredients``.
+        """
+        params = request.query_params
+        try:
+            stock = set(parse_id_list(params, 'have'))
+            with_garnish = parse_bool(params, 'garnish', default=False)
+            try:
+                max_missing = int(params.get('missing', 0))
+            except (TypeError, ValueError):
+                max_missing = -1
+            if not 0 <= max_missing <= self.MAX_MISSING:
+                raise ValueError(f"'missing' must be an integer between 0 and {self.MAX_MISSING}.")
+            mode = params.get('mode', 'makeable')
+            if mode not in ('makeable', 'contains'):
+                raise ValueError("'mode' must be 'makeable' or 'contains'.")
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        source = makeable_source()
+        if mode == 'contains':
+            ranked = source.containing(stock, with_garnish=with_garnish)
+        else:
+            ranked = source.makeable(stock, max_missing=max_missing, with_garnish=with_garnish)
+
+        def annotate(drinks):
+            missing = source.missing_from([d.pk for d in drinks], stock, with_garnish=with_garnish)
+            names = dict(RecipeIngredient.objects.filter(
+                pk__in={i for ids in missing.values() for i in ids}
+            ).values_list('pk', 'name'))
+            return {
+                pk: {'missing_ingredients': sorted(names[i] for i in ids if i in names)}
+                for pk, ids in missing.items()
+            }
+
+        ids = [pk for pk, _ in ranked]
+        return self.list_drink_ids(request, ids, self.get_serializer_context(), annotate)
+
+    @action(detail=False, methods=['get'], name='Export', url_path='export',
+            renderer_classes=[NDJSONRenderer, CSVRenderer])
+    def export(self, request, *args, **kwargs):
+        """Stream every cocktail as NDJSON (``export.ndjson``, one drink per line)
+        or CSV (``export.csv``), taking the same filters as the list.
+        """
+        try:
+            drink_filters = parse_drink_filters(request.query_params)
+        except ValueError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        query = (request.query_params.get('q') or '').strip()
+        selected = select_facets(drink_filters) if drink_filters and not query else None
+        if query:
+            allowed = set(apply_drink_filters(self.get_queryset(), drink_filters).values_list('pk', flat=True))
+            chunks = export_id_chunks([pk for pk in search_drink_ids(query) if pk in allowed])
+        elif selected is not None:
+            chunks = export_facet_chunks(selected)
+        else:
+            chunks = export_queryset_chunks(apply_drink_filters(self.get_queryset(), drink_filters))
+        context = self.get_serializer_context()
+        return export_response(chunks, lambda drinks: self.drink_results(request, drinks, context), request.accepted_renderer)
 
     def get_view_name(self):
         action_name = getattr(self, 'action', None)
@@ -968,19 +1117,16 @@ class DrinkViewSet(PrettyNameMixin, viewsets.ModelViewSet):
             if action_name == 'retrieve' or pk:
                 if pk and not str(pk).isdigit():
                     try:
-                        lookup_name = str(pk).replace('_', ' ')
-                        obj = Drink.objects.filter(name__iexact=lookup_name).first()
-                        if not obj:
-                            obj = _get_by_safe_name(Drink, pk)
-                        if obj:
-                            return getattr(obj, 'name', str(obj))
+                        obj = lookup_object(self.request, Drink, pk, queryset=drink_detail_queryset())
+                        return getattr(obj, 'name', str(obj))
+                    except Exception:
+                        pass
+                else:
+                    try:
+                        obj = self.get_object()
+                        return getattr(obj, 'name', str(obj))
                     except Exception:
                         pass
-                try:
-                    obj = self.get_object()
-                    return getattr(obj, 'name', str(obj))
-                except Exception:
-                    pass
         except Exception:
             pass
 
@@ -994,7 +1140,7 @@ class DrinkViewSet(PrettyNameMixin, viewsets.ModelViewSet):
     def get_view_description(self, *args, **kwargs):
         req = kwargs.get('request') or getattr(self, 'request', None)
         if req is not None and getattr(req, 'accepted_renderer', None) is not None and req.accepted_renderer.format in ('html', 'api'):
-            nav = build_nav_html(req)
+            nav = nav_html(req)
 
 
             styles = '''
@@ -1020,10 +1166,10 @@ class DrinkViewSet(PrettyNameMixin, viewsets.ModelViewSet):
                     obj = None
                     if lookup and not str(lookup).isdigit():
                         try:
-                            obj = _get_by_safe_name(Drink, lookup)
+                            obj = lookup_object(req, Drink, lookup, queryset=drink_detail_queryset())
                         except Exception:
                             obj = None
-                    if obj is None:
+                    else:
                         try:
                             obj = self.get_object()
                         except Exception:
@@ -1046,67 +1192,27 @@ class DrinkViewSet(PrettyNameMixin, viewsets.ModelViewSet):
                 return mark_safe(nav)
             return mark_safe(nav)
         if req:
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
 
     def list(self, request, *args, **kwargs):
         """
-        Extend list to support filtering by ingredient, tag, preparation, and shot flag via
-        query params: `ingredient=<id>`, `tag=<id>`, `preparation=<id>`, and `is_shot=true|false`.
+        Extend list to support filtering by ingredient, tag, preparation, glass and shot flag via
+        query params: `ingredient=<id>`, `tag=<id>`, `preparation=<id>`, `glass=<id>` and `is_shot=true|false`.
+        Id filters take comma separated lists matching any id, or all of them with e.g. `tag_mode=all`,
+        and `exclude_tag=<id>` etc. drop drinks with any of the ids. Filtered lists are answered from
+        the in-memory facet index (or the catalog snapshot's postings).
         """
-        qs = self.get_queryset()
-        def _parse_multi(key):
-            vals = request.query_params.getlist(key)
-            out = []
-            for v in vals:
-                if not v:
-                    continue
-                for part in v.split(','):
-                    part = part.strip()
-                    if not part:
-                        continue
-                    try:
-                        ival = int(part)
-                    except Exception:
-                        raise ValueError(f"Invalid integer value for '{key}': {part}")
-                    out.append(ival)
-            return out
-
         try:
-            ingredient_ids = _parse_multi('ingredient')
-            tag_ids = _parse_multi('tag')
-            prep_ids = _parse_multi('preparation')
+            drink_filters = parse_drink_filters(request.query_params)
         except ValueError as e:
             return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
-
-        if ingredient_ids:
-            qs = qs.filter(recipe_ingredients__ingredient__id__in=ingredient_ids).distinct()
-        if tag_ids:
-            qs = qs.filter(tags__id__in=tag_ids).distinct()
-
-        category_name = request.query_params.get('category')
-        if category_name:
-            qs = qs.filter(category__name__iexact=category_name)
-        if prep_ids:
-            qs = qs.filter(preparation_method__id__in=prep_ids).distinct()
-
-        is_shot_param = request.query_params.get('is_shot')
-        if is_shot_param is not None:
-            val = (is_shot_param or '').strip().lower()
-            truthy = {'1', 'true', 't', 'yes', 'y'}
-            falsey = {'0', 'false', 'f', 'no', 'n'}
-            if val in truthy:
-                qs = qs.filter(is_shot=True)
-            elif val in falsey:
-                qs = qs.filter(is_shot=False)
-            else:
-                return Response({'detail': "Invalid boolean for 'is_shot'. Use true/false or 1/0."}, status=status.HTTP_400_BAD_REQUEST)
-
-        page = self.paginate_queryset(qs)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(qs, many=True)
-        return Response({'results': serializer.data})
+        context = self.get_serializer_context()
+        if drink_filters and not request.query_params.get('q'):
+            selected = select_facets(drink_filters)
+            if selected is not None:
+                return self.list_drink_ids(request, selected, context)
+        qs = apply_drink_filters(self.get_queryset(), drink_filters)
+        return self.list_drinks(request, qs, context=context)
 
     def retrieve(self, request, pk=None, *args, **kwargs):
         name = kwargs.get('name') or pk
@@ -1115,35 +1221,39 @@ class DrinkViewSet(PrettyNameMixin, viewsets.ModelViewSet):
         if str(name).isdigit():
             obj = get_object_or_404(Drink, pk=name)
         else:
-            obj = _get_by_safe_name(Drink, name)
+            obj = lookup_object(request, Drink, name, queryset=drink_detail_queryset())
+        load_drink_relations([obj])
         serializer = self.get_serializer(obj, context={"request": request})
         return Response(serializer.data)
 
 
-class RecipeIngredientViewSet(PrettyNameMixin, viewsets.ModelViewSet):
-    queryset = RecipeIngredient.objects.filter(drinkingredient__isnull=False).order_by('name').distinct()
+class RecipeIngredientViewSet(ConditionalGetMixin, WriteQueueMixin, DrinkListingMixin, PrettyNameMixin, viewsets.ModelViewSet):
+    queryset = RecipeIngredient.objects.filter(drink_count__gt=0).order_by('name')
     serializer_class = RecipeIngredientSerializer
     lookup_field = 'name'
-    renderer_classes = (CustomBrowsableAPIRenderer, JSONRenderer)
+    renderer_classes = (CustomBrowsableAPIRenderer, DrinkJSONRenderer)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
-    ordering_fields = ['name']
+    ordering_fields = ['name', 'drink_count']
 
     def get_view_name(self):
         if getattr(self, 'action', None) == 'list' or not getattr(self, 'kwargs', {}).get('name'):
             return 'Recipe Ingredients'
         try:
-            obj = self.get_object()
+            name = self.kwargs['name']
+            # A name the filtered queryset misses still titles the page.
+            obj = self.get_object() if str(name).isdigit() else lookup_object(self.request, RecipeIngredient, name)
             return getattr(obj, 'name', str(obj))
         except Exception:
             return super().get_view_name()
 
     def list(self, request, *args, **kwargs):
-        page = self.paginate_queryset(self.get_queryset())
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True, context={"request": request})
             return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(self.get_queryset(), many=True, context={"request": request})
+        serializer = self.get_serializer(queryset, many=True, context={"request": request})
         return Response({'results': serializer.data})
 
     def retrieve(self, request, pk=None, *args, **kwargs):
@@ -1153,41 +1263,42 @@ class RecipeIngredientViewSet(PrettyNameMixin, viewsets.ModelViewSet):
         if str(name).isdigit():
             ingredient = get_object_or_404(RecipeIngredient, pk=name)
         else:
-            ingredient = _get_by_safe_name(RecipeIngredient, name)
-        drinks_qs = Drink.objects.filter(recipe_ingredients__ingredient=ingredient).order_by('name').distinct()
-        page = self.paginate_queryset(drinks_qs)
-        if page is not None:
-            drinks_ser = DrinkSerializer(page, many=True, context={"request": request, "suppress_category": True})
-            return self.get_paginated_response(drinks_ser.data)
-        drinks_ser = DrinkSerializer(drinks_qs, many=True, context={"request": request, "suppress_category": True})
-        return Response({'results': drinks_ser.data})
+            ingredient = lookup_object(request, RecipeIngredient, name)
+        return self.list_drinks(request, self.drinks_for(request, ingredient))
 
+    @staticmethod
+    def drinks_for(request, ingredient):
+        return Drink.objects.filter(recipe_ingredients__ingredient=ingredient).order_by('name').distinct()
 
-class GarnishIngredientViewSet(PrettyNameMixin, viewsets.ModelViewSet):
-    queryset = RecipeIngredient.objects.filter(garnish_for__isnull=False).order_by('name').distinct()
+
+class GarnishIngredientViewSet(ConditionalGetMixin, WriteQueueMixin, DrinkListingMixin, PrettyNameMixin, viewsets.ModelViewSet):
+    queryset = RecipeIngredient.objects.filter(garnish_count__gt=0).order_by('name')
 
     serializer_class = GarnishIngredientSerializer
     lookup_field = 'name'
-    renderer_classes = (CustomBrowsableAPIRenderer, JSONRenderer)
+    renderer_classes = (CustomBrowsableAPIRenderer, DrinkJSONRenderer)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
-    ordering_fields = ['name']
+    ordering_fields = ['name', 'garnish_count']
 
     def get_view_name(self):
         if getattr(self, 'action', None) == 'list' or not getattr(self, 'kwargs', {}).get('name'):
             return 'Garnish ingredients'
         try:
-            obj = self.get_object()
+            name = self.kwargs['name']
+            # A name the filtered queryset misses still titles the page.
+            obj = self.get_object() if str(name).isdigit() else lookup_object(self.request, RecipeIngredient, name)
             return getattr(obj, 'name', str(obj))
         except Exception:
             return super().get_view_name()
 
     def list(self, request, *args, **kwargs):
-        page = self.paginate_queryset(self.get_queryset())
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = self.get_serializer(page, many=True, context={"request": request})
             return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(self.get_queryset(), many=True, context={"request": request})
+        serializer = self.get_serializer(queryset, many=True, context={"request": request})
         return Response({'results': serializer.data})
 
     def retrieve(self, request, pk=None, *args, **kwargs):
@@ -1197,30 +1308,28 @@ class GarnishIngredientViewSet(PrettyNameMixin, viewsets.ModelViewSet):
         if str(name).isdigit():
             ingredient = get_object_or_404(RecipeIngredient, pk=name)
         else:
-            ingredient = _get_by_safe_name(RecipeIngredient, name)
-        drinks_qs = Drink.objects.filter(garnish=ingredient).order_by('name').distinct()
-        page = self.paginate_queryset(drinks_qs)
-        if page is not None:
-            drinks_ser = DrinkSerializer(page, many=True, context={"request": request, "suppress_category": True})
-            return self.get_paginated_response(drinks_ser.data)
-        drinks_ser = DrinkSerializer(drinks_qs, many=True, context={"request": request, "suppress_category": True})
-        return Response({'results': drinks_ser.data})
+            ingredient = lookup_object(request, RecipeIngredient, name)
+        return self.list_drinks(request, self.drinks_for(request, ingredient))
 
+    @staticmethod
+    def drinks_for(request, ingredient):
+        return Drink.objects.filter(garnish=ingredient).order_by('name').distinct()
 
-class TagViewSet(PrettyNameMixin, viewsets.ModelViewSet):
 
-    queryset = Tag.objects.all().annotate(drink_count=Count('drink', distinct=True)).order_by('name')
+class TagViewSet(ConditionalGetMixin, WriteQueueMixin, DrinkListingMixin, PrettyNameMixin, viewsets.ModelViewSet):
+
+    queryset = Tag.objects.all().order_by('name')
     serializer_class = TagSerializer
-    renderer_classes = (CustomBrowsableAPIRenderer, JSONRenderer)
+    renderer_classes = (CustomBrowsableAPIRenderer, DrinkJSONRenderer)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
-    ordering_fields = ['name']
+    ordering_fields = ['name', 'drink_count']
     def get_view_description(self, *args, **kwargs):
         req = kwargs.get('request') or getattr(self, 'request', None)
         if req is not None and getattr(req, 'accepted_renderer', None) is not None and req.accepted_renderer.format == 'html':
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
         if req:
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
 
     def retrieve(self, request, pk=None, *args, **kwargs):
         if pk is None:
@@ -1228,24 +1337,22 @@ class TagViewSet(PrettyNameMixin, viewsets.ModelViewSet):
         if str(pk).isdigit():
             tag = get_object_or_404(Tag, pk=pk)
         else:
-            tag = _get_by_safe_name(Tag, pk)
-        drinks_qs = Drink.objects.filter(tags=tag).order_by('name').distinct()
-        page = self.paginate_queryset(drinks_qs)
-        if page is not None:
-            drinks_ser = DrinkSerializer(page, many=True, context={"request": request, "suppress_category": True})
-            return self.get_paginated_response(drinks_ser.data)
-        drinks_ser = DrinkSerializer(drinks_qs, many=True, context={"request": request, "suppress_category": True})
-        return Response({'results': drinks_ser.data})
+            tag = lookup_object(request, Tag, pk)
+        return self.list_drinks(request, self.drinks_for(request, tag))
+
+    @staticmethod
+    def drinks_for(request, tag):
+        return Drink.objects.filter(tags=tag).order_by('name').distinct()
 
 
-class CategoryViewSet(PrettyNameMixin, viewsets.ModelViewSet):
+class CategoryViewSet(ConditionalGetMixin, WriteQueueMixin, DrinkListingMixin, PrettyNameMixin, viewsets.ModelViewSet):
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = 'name'
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
     ordering_fields = ['name']
-    renderer_classes = (CustomBrowsableAPIRenderer, JSONRenderer)
+    renderer_classes = (CustomBrowsableAPIRenderer, DrinkJSONRenderer)
 
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
@@ -1280,6 +1387,8 @@ class CategoryViewSet(PrettyNameMixin, viewsets.ModelViewSet):
                         return 'Shots'
                     if norm in ('my recipes', 'my_recipes'):
                         return 'My Recipes'
+                    if not str(name).isdigit() and not self.request.query_params.get('search'):
+                        return lookup_object(self.request, Category, name).name
                 obj = self.get_object()
                 return obj.name
         except Exception:
@@ -1307,24 +1416,11 @@ class CategoryViewSet(PrettyNameMixin, viewsets.ModelViewSet):
         name = kwargs.get('name') or slug
         if name is None:
             raise Http404
-        category = None
-        try:
-            try:
-                category = Category.objects.filter(name__iexact=str(name).replace('_', ' ')).first()
-            except Exception:
-                category = None
-        except Exception:
-            category = None
-
-        if not category:
-            try:
-                category = _get_by_safe_name(Category, name)
-            except Exception:
-                category = None
-
-        if not category:
-            raise Http404
+        category = lookup_object(request, Category, name)
+        return self.list_drinks(request, self.drinks_for(request, category))
 
+    @staticmethod
+    def drinks_for(request, category):
         if getattr(category, 'name', '').strip().lower() == 'cocktails throughout history':
             drinks = Drink.objects.filter(category__name__iexact='Cocktails Throughout History').order_by('name').distinct()
             if request.query_params.get('search'):
@@ -1335,17 +1431,12 @@ class CategoryViewSet(PrettyNameMixin, viewsets.ModelViewSet):
                 drinks = drinks.filter(name__icontains=request.query_params.get('search'))
         else:
             drinks = Drink.objects.filter(category=category).order_by('name')
+        return drinks
 
-        page = self.paginate_queryset(drinks)
-        if page is not None:
-            serializer = DrinkSerializer(page, many=True, context={"request": request, "suppress_category": True})
-            return self.get_paginated_response(serializer.data)
-        serializer = DrinkSerializer(drinks, many=True, context={"request": request, "suppress_category": True})
-        return Response({'results': serializer.data})
     def get_view_description(self, *args, **kwargs):
         req = kwargs.get('request') or getattr(self, 'request', None)
         if req is not None and getattr(req, 'accepted_renderer', None) is not None and getattr(req.accepted_renderer, 'format', None) == 'html':
-            nav = build_nav_html(req)
+            nav = nav_html(req)
             if not req.query_params.get('name'):
                 try:
                     categories = list(self.get_queryset())
@@ -1373,11 +1464,8 @@ class CategoryViewSet(PrettyNameMixin, viewsets.ModelViewSet):
                         if req and '/categories/' in getattr(req, 'path', '') and req.path.rstrip('/').count('/') >= 3:
                             seg = req.path.rstrip('/').split('/')[-1]
                             try:
-                                cat = Category.objects.filter(name__iexact=str(seg).replace('_', ' ')).first()
-                                if not cat:
-                                    cat = _get_by_safe_name(Category, seg)
-                                if cat:
-                                    header_title = cat.name
+                                cat = lookup_object(req, Category, seg)
+                                header_title = cat.name
                             except Exception:
                                 pass
                     except Exception:
@@ -1390,19 +1478,19 @@ class CategoryViewSet(PrettyNameMixin, viewsets.ModelViewSet):
             return mark_safe(nav)
 
         if req:
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
 
         return super().get_view_description(*args, **kwargs)
 
 
-class PreparationMethodViewSet(PrettyNameMixin, viewsets.ModelViewSet):
+class PreparationMethodViewSet(ConditionalGetMixin, WriteQueueMixin, DrinkListingMixin, PrettyNameMixin, viewsets.ModelViewSet):
     queryset = PreparationMethod.objects.all().order_by('name')
     serializer_class = PreparationMethodSerializer
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
-    ordering_fields = ['name']
+    ordering_fields = ['name', 'drink_count']
     pagination_class = AdminAwarePagination
-    renderer_classes = (CustomBrowsableAPIRenderer, JSONRenderer)
+    renderer_classes = (CustomBrowsableAPIRenderer, DrinkJSONRenderer)
 
     def get_view_name(self):
         """Delegate to PrettyNameMixin so browsable UI shows the method name on detail pages."""
@@ -1413,9 +1501,9 @@ class PreparationMethodViewSet(PrettyNameMixin, viewsets.ModelViewSet):
     def get_view_description(self, *args, **kwargs):
         req = kwargs.get('request') or getattr(self, 'request', None)
         if req is not None and getattr(req, 'accepted_renderer', None) is not None and req.accepted_renderer.format == 'html':
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
         if req:
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
         return super().get_view_description(*args, **kwargs)
 
     def retrieve(self, request, pk=None, *args, **kwargs):
@@ -1424,30 +1512,28 @@ class PreparationMethodViewSet(PrettyNameMixin, viewsets.ModelViewSet):
         if str(pk).isdigit():
             prep = get_object_or_404(PreparationMethod, pk=pk)
         else:
-            prep = _get_by_safe_name(PreparationMethod, pk)
-        drinks_qs = Drink.objects.filter(preparation_method=prep).order_by('name').distinct()
-        page = self.paginate_queryset(drinks_qs)
-        if page is not None:
-            drinks_ser = DrinkSerializer(page, many=True, context={"request": request, "suppress_category": True})
-            return self.get_paginated_response(drinks_ser.data)
-        drinks_ser = DrinkSerializer(drinks_qs, many=True, context={"request": request, "suppress_category": True})
-        return Response({'results': drinks_ser.data})
+            prep = lookup_object(request, PreparationMethod, pk)
+        return self.list_drinks(request, self.drinks_for(request, prep))
+
+    @staticmethod
+    def drinks_for(request, prep):
+        return Drink.objects.filter(preparation_method=prep).order_by('name').distinct()
 
 
-class UnitViewSet(PrettyNameMixin, viewsets.ModelViewSet):
+class UnitViewSet(ConditionalGetMixin, WriteQueueMixin, DrinkListingMixin, PrettyNameMixin, viewsets.ModelViewSet):
     queryset = Unit.objects.all().order_by('name')
     serializer_class = UnitSerializer
-    renderer_classes = (CustomBrowsableAPIRenderer, JSONRenderer)
+    renderer_classes = (CustomBrowsableAPIRenderer, DrinkJSONRenderer)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
-    ordering_fields = ['name']
+    ordering_fields = ['name', 'drink_count']
 
     def get_view_description(self, *args, **kwargs):
         req = kwargs.get('request') or getattr(self, 'request', None)
         if req is not None and getattr(req, 'accepted_renderer', None) is not None and req.accepted_renderer.format == 'html':
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
         if req:
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
         return super().get_view_description(*args, **kwargs)
 
     def get_view_name(self):
@@ -1462,30 +1548,28 @@ class UnitViewSet(PrettyNameMixin, viewsets.ModelViewSet):
         if str(pk).isdigit():
             unit = get_object_or_404(Unit, pk=pk)
         else:
-            unit = _get_by_safe_name(Unit, pk)
-        drinks_qs = Drink.objects.filter(recipe_ingredients__unit=unit).order_by('name').distinct()
-        page = self.paginate_queryset(drinks_qs)
-        if page is not None:
-            drinks_ser = DrinkSerializer(page, many=True, context={"request": request, "suppress_category": True})
-            return self.get_paginated_response(drinks_ser.data)
-        drinks_ser = DrinkSerializer(drinks_qs, many=True, context={"request": request, "suppress_category": True})
-        return Response({'results': drinks_ser.data})
+            unit = lookup_object(request, Unit, pk)
+        return self.list_drinks(request, self.drinks_for(request, unit))
+
+    @staticmethod
+    def drinks_for(request, unit):
+        return Drink.objects.filter(recipe_ingredients__unit=unit).order_by('name').distinct()
 
 
-class GlassTypeViewSet(PrettyNameMixin, viewsets.ModelViewSet):
+class GlassTypeViewSet(ConditionalGetMixin, WriteQueueMixin, DrinkListingMixin, PrettyNameMixin, viewsets.ModelViewSet):
     queryset = GlassType.objects.all().order_by('name')
     serializer_class = GlassTypeSerializer
-    renderer_classes = (CustomBrowsableAPIRenderer, JSONRenderer)
+    renderer_classes = (CustomBrowsableAPIRenderer, DrinkJSONRenderer)
     filter_backends = [filters.SearchFilter, filters.OrderingFilter]
     search_fields = ['name']
-    ordering_fields = ['name']
+    ordering_fields = ['name', 'drink_count']
 
     def get_view_description(self, *args, **kwargs):
         req = kwargs.get('request') or getattr(self, 'request', None)
         if req is not None and getattr(req, 'accepted_renderer', None) is not None and req.accepted_renderer.format == 'html':
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
         if req:
-            return mark_safe(build_nav_html(req))
+            return mark_safe(nav_html(req))
         return super().get_view_description(*args, **kwargs)
     def retrieve(self, request, pk=None, *args, **kwargs):
         if pk is None:
@@ -1493,14 +1577,12 @@ class GlassTypeViewSet(PrettyNameMixin, viewsets.ModelViewSet):
         if str(pk).isdigit():
             glass = get_object_or_404(GlassType, pk=pk)
         else:
-            glass = _get_by_safe_name(GlassType, pk)
-        drinks_qs = Drink.objects.filter(glass_type=glass).order_by('name').distinct()
-        page = self.paginate_queryset(drinks_qs)
-        if page is not None:
-            drinks_ser = DrinkSerializer(page, many=True, context={"request": request, "suppress_category": True})
-            return self.get_paginated_response(drinks_ser.data)
-        drinks_ser = DrinkSerializer(drinks_qs, many=True, context={"request": request, "suppress_category": True})
-        return Response({'results': drinks_ser.data})
+            glass = lookup_object(request, GlassType, pk)
+        return self.list_drinks(request, self.drinks_for(request, glass))
+
+    @staticmethod
+    def drinks_for(request, glass):
+        return Drink.objects.filter(glass_type=glass).order_by('name').distinct()
 
 
 class ReimportView(APIView):
@@ -1508,7 +1590,27 @@ class ReimportView(APIView):
     parser_classes = [MultiPartParser, FormParser]
 
     def post(self, request, format=None):
-        return Response({'detail': 'Import endpoints have been removed from this installation.'}, status=status.HTTP_404_NOT_FOUND)
+        """Import the drinks in the uploaded ``file`` (JSON, NDJSON or CSV).
+
+        The format comes from the file extension or ``file_format``, and
+        ``batch_size`` sets the rows per bulk insert. The response reports
+        created, updated and unchanged drinks, per-row errors and throughput.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'detail': "Upload the drinks as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            batch_size = int(request.data.get('batch_size') or IMPORT_BATCH_SIZE)
+            if batch_size < 1:
+                raise ValueError
+        except (TypeError, ValueError):
+            return Response({'detail': "'batch_size' must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows = read_import_rows(upload.read(), request.data.get('file_format') or import_format_for(upload.name))
+        except ImportFormatError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        # The import commits in batches of its own, so it is not grouped.
+        return Response(run_write(import_rows, rows, batch_size, group=False).as_dict())
 
     def retrieve(self, request, pk=None, *args, **kwargs):
         raise Http404
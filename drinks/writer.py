@@ -0,0 +1,169 @@
+"""Single-writer queue for the authoring endpoints.
+
+SQLite takes one write lock for the whole file. When ``DRINKS_WRITE_QUEUE``
+is on, the mutating viewset actions do not write from their request thread.
+They hand the write (``perform_create``/``perform_update``/
+``perform_destroy``) to one writer thread per process, then wait for its
+result. Validation and the response are still done in the request thread.
+
+The writer takes the writes queued so far, up to ``DRINKS_WRITE_BATCH``,
+and commits the small ones together in one transaction. Each write runs in
+its own savepoint, so one that fails is rolled back alone and its error is
+raised in its request. Writes that manage their own transactions, such as
+the bulk import, are run one at a time. Around every batch the writer holds
+an exclusive ``flock`` on ``DRINKS_WRITE_LOCK_FILE`` (next to the database
+by default), so the workers of ``manage.py serve`` take turns instead of
+waiting on SQLite's busy timeout.
+
+Writes made inside a transaction (e.g. in a test case) or while the queue
+is off run in the calling thread as before.
+"""
+import os
+import queue
+import threading
+from concurrent.futures import Future
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+try:
+    import fcntl
+except ImportError:  # Windows: the writer thread still serializes each process.
+    fcntl = None
+
+
+BATCH = 32
+
+
+def queue_enabled():
+    return getattr(settings, 'DRINKS_WRITE_QUEUE', False)
+
+
+def lock_path():
+    path = getattr(settings, 'DRINKS_WRITE_LOCK_FILE', None)
+    if path:
+        return str(path)
+    connection = connections[DEFAULT_DB_ALIAS]
+    if connection.vendor != 'sqlite' or connection.is_in_memory_db():
+        return None
+    return f'{connection.settings_dict["NAME"]}.write-lock'
+
+
+class WriteLock:
+    """Exclusive ``flock`` on a file shared by every process writing the database."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+
+    def __enter__(self):
+        if self.path and fcntl is not None:
+            if self.file is None:
+                self.file = open(self.path, 'a+b')
+            fcntl.flock(self.file, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.file is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+
+
+class WriteQueue:
+    def __init__(self, batch=None):
+        self.batch = batch
+        self.pid = None
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def start(self):
+        # After a fork only the forking thread survives: start a writer (and
+        # open the lock file) again in every process, and a new one should
+        # the writer ever have died.
+        with self.lock:
+            if self.pid != os.getpid():
+                self.pid = os.getpid()
+                self.jobs = queue.SimpleQueue()
+                self.write_lock = WriteLock(lock_path())
+                self.thread = None
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.run, name='drinks-writer', daemon=True)
+                self.thread.start()
+
+    def submit(self, func, *args, group=True):
+        """Queue ``func(*args)`` for the writer thread; returns a ``Future``.
+
+        ``group=False`` runs it outside any batch, for writes that commit
+        on their own.
+        """
+        self.start()
+        future = Future()
+        self.jobs.put((func, args, group, future))
+        return future
+
+    def run(self):
+        while True:
+            batch = [self.jobs.get()]
+            limit = self.batch or getattr(settings, 'DRINKS_WRITE_BATCH', BATCH)
+            while len(batch) < limit:
+                try:
+                    batch.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+            try:
+                connections[DEFAULT_DB_ALIAS].close_if_unusable_or_obsolete()
+                with self.write_lock:
+                    self.commit([job for job in batch if job[2]])
+                    for job in batch:
+                        if not job[2]:
+                            self.run_alone(job)
+            except Exception as e:
+                # E.g. the lock file or the database could not be opened:
+                # fail the writes still waiting and carry on with the next.
+                for func, args, group, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def commit(self, jobs):
+        """Run ``jobs`` in one transaction, each in a savepoint of its own."""
+        if not jobs:
+            return
+        outcomes = []
+        try:
+            with transaction.atomic():
+                for func, args, group, future in jobs:
+                    try:
+                        with transaction.atomic():
+                            outcomes.append((future, func(*args), None))
+                    except Exception as e:
+                        outcomes.append((future, None, e))
+        except Exception as e:
+            # The commit itself failed: none of the writes were made.
+            for func, args, group, future in jobs:
+                future.set_exception(e)
+            return
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def run_alone(self, job):
+        func, args, group, future = job
+        try:
+            future.set_result(func(*args))
+        except Exception as e:
+            future.set_exception(e)
+
+
+writer = WriteQueue()
+
+
+def run_write(func, *args, group=True):
+    """Run the write ``func(*args)`` through the writer thread when the queue is on."""
+    if (
+        not queue_enabled()
+        or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        or threading.current_thread() is writer.thread
+    ):
+        return func(*args)
+    return writer.submit(func, *args, group=group).result()